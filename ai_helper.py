@@ -1,45 +1,37 @@
 import streamlit as st
-import google.generativeai as genai
+import hashlib
 import json
+import os
+import sqlite3
+import threading
+import time
 
-def parse_transaction_with_ai(user_input, categories):
-    """
-    Mengirim input pengguna ke Gemini untuk diproses dan mengembalikan JSON terstruktur.
-    """
-    
-    # 1. Konfigurasi model AI dengan API key dari st.secrets
-    try:
-        genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
-        model = genai.GenerativeModel('models/gemini-flash-latest') # Menggunakan model dari hasil tes
-    except Exception as e:
-        st.error(f"Error konfigurasi Gemini: {e}")
-        st.error("Pastikan Anda sudah mengatur GEMINI_API_KEY di file .streamlit/secrets.toml")
-        return None
+import ai_resilience
+import local_parser
+import metrics
 
-    # 2. Membuat prompt yang sangat spesifik
-    # Ini adalah bagian terpenting (Prompt Engineering)
-    
-    # Mengubah list kategori menjadi string yang mudah dibaca AI
-    category_list_string = ", ".join(categories)
+MODEL_NAME = 'models/gemini-flash-latest' # Menggunakan model dari hasil tes
 
-    prompt = f"""
-    Anda adalah asisten keuangan pribadi yang cerdas. 
-    Tugas Anda adalah mengekstrak informasi transaksi dari teks bahasa Indonesia 
+# --- Prompt ---
+# Template dibuat sekali; hanya teks pengguna dan daftar kategori yang diisi setiap panggilan.
+PROMPT_TEMPLATE = """
+    Anda adalah asisten keuangan pribadi yang cerdas.
+    Tugas Anda adalah mengekstrak informasi transaksi dari teks bahasa Indonesia
     dan mengembalikannya dalam format JSON yang ketat.
-    
+
     Teks dari pengguna: "{user_input}"
 
     Anda HARUS mengikuti aturan ini:
-    1.  'type' harus 'Pemasukan' atau 'Pengeluaran'. Tentukan dari konteks. 
+    1.  'type' harus 'Pemasukan' atau 'Pengeluaran'. Tentukan dari konteks.
         (Contoh: "dapat gaji" -> Pemasukan, "beli kopi" -> Pengeluaran).
-    2.  'amount' harus berupa angka (integer) saja, tanpa "Rp", "rb", atau "k". 
+    2.  'amount' harus berupa angka (integer) saja, tanpa "Rp", "rb", atau "k".
         (Contoh: "50rb" -> 50000, "1.5 juta" -> 1500000).
     3.  'description' adalah deskripsi singkat dari teks asli.
     4.  'category' HARUS dipilih dari daftar berikut: {category_list_string}.
-    5.  Jika kategori tidak ada di daftar, pilih kategori yang paling mirip. 
+    5.  Jika kategori tidak ada di daftar, pilih kategori yang paling mirip.
         Contoh: "makan siang" harus masuk ke "Makanan". "ongkos ojol" ke "Transportasi".
     6.  Jika tidak ada kategori yang cocok sama sekali, gunakan "Lain-lain (Pengeluaran)".
-    
+
     Format output HARUS berupa JSON saja, tanpa teks tambahan:
     {{
       "type": "...",
@@ -49,22 +41,411 @@ def parse_transaction_with_ai(user_input, categories):
     }}
     """
 
-    # 3. Panggil API
+# Versi banyak baris: semua baris dikirim dalam satu panggilan, hasilnya array JSON
+BATCH_PROMPT_TEMPLATE = """
+    Anda adalah asisten keuangan pribadi yang cerdas.
+    Tugas Anda adalah mengekstrak informasi transaksi dari BEBERAPA teks bahasa Indonesia
+    dan mengembalikannya dalam format JSON yang ketat.
+
+    Daftar teks dari pengguna (satu transaksi per nomor):
+{numbered_inputs}
+
+    Anda HARUS mengikuti aturan ini untuk SETIAP teks:
+    1.  'type' harus 'Pemasukan' atau 'Pengeluaran'. Tentukan dari konteks.
+    2.  'amount' harus berupa angka (integer) saja, tanpa "Rp", "rb", atau "k".
+        (Contoh: "50rb" -> 50000, "1.5 juta" -> 1500000).
+    3.  'description' adalah deskripsi singkat dari teks asli.
+    4.  'category' HARUS dipilih dari daftar berikut: {category_list_string}.
+    5.  Jika tidak ada kategori yang cocok sama sekali, gunakan "Lain-lain (Pengeluaran)".
+    6.  'index' adalah nomor teks yang diproses.
+
+    Format output HARUS berupa array JSON saja (satu objek per teks, urut sesuai nomor),
+    tanpa teks tambahan:
+    [
+      {{"index": 1, "type": "...", "amount": ..., "description": "...", "category": "..."}}
+    ]
+    """
+
+
+# --- Model (dibuat sekali per proses) ---
+
+class AIConfigError(RuntimeError):
+    """Model AI tidak bisa dikonfigurasi (misal GEMINI_API_KEY belum diatur)."""
+
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Mengembalikan model Gemini yang sudah dikonfigurasi.
+    genai.configure dan GenerativeModel hanya dijalankan sekali per proses, lalu dipakai ulang.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    # Diimpor di sini (bukan di atas modul) karena import-nya berat
+                    import google.generativeai as genai
+                    genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+                    _model = genai.GenerativeModel(MODEL_NAME)
+                except Exception as e:
+                    raise AIConfigError(e) from e
+    return _model
+
+def set_model(model):
+    """
+    Mengganti model yang dipakai (misal LocalStubModel untuk pengujian offline).
+    Mengembalikan model sebelumnya.
+    """
+    global _model
+    with _model_lock:
+        old_model = _model
+        _model = model
+    return old_model
+
+
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class LocalStubModel:
+    """
+    Model lokal pengganti Gemini, untuk pengujian/benchmark tanpa jaringan.
+    responder(prompt) mengembalikan dict (akan di-JSON-kan) atau string mentah.
+
+    errors (opsional) adalah list berisi exception atau None per panggilan,
+    untuk mensimulasikan gangguan (misal [TimeoutError(), None] = gagal sekali lalu berhasil).
+    """
+
+    def __init__(self, responder, latency=0.0, errors=None):
+        self.responder = responder
+        self.latency = latency
+        self.errors = list(errors or [])
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+            error = self.errors.pop(0) if self.errors else None
+        if self.latency:
+            time.sleep(self.latency)
+        if error is not None:
+            raise error
+        result = self.responder(prompt)
+        return StubResponse(result if isinstance(result, str) else json.dumps(result))
+
+
+# --- Cache Hasil Parsing (persisten) ---
+
+PARSE_CACHE_PATH = os.environ.get("EFTARI_AI_CACHE_PATH", "ai_parse_cache.db")
+PARSE_CACHE_MAX_ENTRIES = int(os.environ.get("EFTARI_AI_CACHE_MAX_ENTRIES", 5000))
+
+
+def normalize_input(user_input):
+    """Menyamakan input yang hampir identik ('Kopi  20rb ' == 'kopi 20rb')."""
+    return " ".join(user_input.lower().split())
+
+def categories_hash(categories):
+    """Hash daftar kategori; hasil cache tidak berlaku jika daftar kategori berubah."""
+    joined = "\n".join(sorted(categories))
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()
+
+
+class ParseCache:
+    """
+    Cache persisten (SQLite) untuk hasil parsing AI.
+    Kunci: input yang dinormalisasi + hash daftar kategori.
+    Dibatasi max_entries; entri yang paling lama tidak dipakai dibuang dulu (LRU).
+    """
+
+    def __init__(self, path=PARSE_CACHE_PATH, max_entries=PARSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_parse_cache ("
+                " input_key TEXT NOT NULL,"
+                " categories_key TEXT NOT NULL,"
+                " result TEXT NOT NULL,"
+                " last_used REAL NOT NULL,"
+                " PRIMARY KEY (input_key, categories_key))"
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ai_parse_cache_last_used ON ai_parse_cache (last_used)"
+            )
+
+    def get(self, user_input, categories):
+        key = (normalize_input(user_input), categories_hash(categories))
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                "SELECT result FROM ai_parse_cache WHERE input_key = ? AND categories_key = ?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute(
+                "UPDATE ai_parse_cache SET last_used = ? WHERE input_key = ? AND categories_key = ?",
+                (time.time(),) + key,
+            )
+        return json.loads(row[0])
+
+    def put(self, user_input, categories, result):
+        key = (normalize_input(user_input), categories_hash(categories))
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ai_parse_cache (input_key, categories_key, result, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                key + (json.dumps(result), time.time()),
+            )
+            # Buang entri LRU jika melebihi batas
+            self.conn.execute(
+                "DELETE FROM ai_parse_cache WHERE rowid IN ("
+                " SELECT rowid FROM ai_parse_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM ai_parse_cache")
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM ai_parse_cache").fetchone()[0]
+        return {'entries': size, 'hits': self.hits, 'misses': self.misses}
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+def get_parse_cache():
+    """Cache parsing dibuat sekali per proses (dipakai bersama semua sesi)."""
+    global _parse_cache
+    if _parse_cache is None:
+        with _parse_cache_lock:
+            if _parse_cache is None:
+                _parse_cache = ParseCache()
+    return _parse_cache
+
+def set_parse_cache(cache):
+    """Mengganti cache parsing (misal ParseCache(':memory:') untuk pengujian)."""
+    global _parse_cache
+    _parse_cache = cache
+
+
+def generate(prompt):
+    """
+    Satu panggilan model melalui ResilientCaller bersama (timeout, retry, batas konkurensi,
+    circuit breaker). Mengembalikan teks respons.
+    """
+    model = get_model()
+    response = ai_resilience.get_caller().call(model.generate_content, prompt)
+    metrics.record_ai_usage(getattr(response, 'usage_metadata', None))
+    return response.text
+
+
+def _clean_model_output(text):
+    # Menghapus "```json" dan "```" yang mungkin ditambahkan oleh model
+    return text.strip().replace("```json", "").replace("```", "").strip()
+
+
+def validate_parsed_transaction(result, budget_categories, income_categories):
+    """
+    Normalisasi dan validasi satu hasil parsing terhadap daftar kategori.
+    Kategori yang tidak dikenal diganti ke 'Lain-Lain (Pengeluaran)' / 'Lain-Lain (Pemasukan)'.
+    Mengembalikan (hasil, list peringatan), atau (None, [pesan]) jika hasilnya tidak bisa dipakai.
+    """
+    try:
+        result = dict(result)
+        result['category'] = str(result['category']).strip().title()
+        result['type'] = str(result['type']).strip().title()
+        result['amount'] = float(result['amount'])
+        result['description'] = str(result.get('description', '')).strip()
+    except (KeyError, TypeError, ValueError) as e:
+        return None, [f"Hasil tidak lengkap: {e}"]
+
+    if result['type'] not in ('Pemasukan', 'Pengeluaran'):
+        return None, [f"Tipe '{result['type']}' tidak dikenal"]
+    if result['amount'] <= 0:
+        return None, ["Jumlah harus lebih dari nol"]
+
+    warnings = []
+    if result['type'] == 'Pengeluaran' and result['category'] not in budget_categories:
+        warnings.append(f"AI memilih kategori '{result['category']}' yang tidak ada di daftar anggaran Anda. Menggantinya ke 'Lain-Lain (Pengeluaran)'.")
+        result['category'] = 'Lain-Lain (Pengeluaran)'
+    elif result['type'] == 'Pemasukan' and result['category'] not in income_categories:
+        warnings.append(f"AI memilih kategori '{result['category']}' yang tidak ada di daftar pemasukan. Menggantinya ke 'Lain-Lain (Pemasukan)'.")
+        result['category'] = 'Lain-Lain (Pemasukan)'
+    return result, warnings
+
+
+def _parse_with_ai(user_input, categories):
+    """
+    Inti parsing dengan AI tanpa pemanggilan Streamlit (aman dipakai dari thread).
+    Melempar exception jika gagal.
+    """
+    cache = get_parse_cache()
+    cached_result = cache.get(user_input, categories)
+    if cached_result is not None:
+        return cached_result
+
+    # Membuat prompt yang sangat spesifik
+    # Mengubah list kategori menjadi string yang mudah dibaca AI
+    category_list_string = ", ".join(categories)
+    prompt = PROMPT_TEMPLATE.format(user_input=user_input, category_list_string=category_list_string)
+
+    # Panggil API, bersihkan, lalu ubah string JSON menjadi dictionary Python
+    response_text = generate(prompt)
+    try:
+        parsed_json = json.loads(_clean_model_output(response_text))
+    except json.JSONDecodeError:
+        print("AI response (invalid):", response_text) # Untuk debug di terminal
+        raise
+    cache.put(user_input, categories, parsed_json)
+    return parsed_json
+
+
+def parse_transaction_with_ai(user_input, categories):
+    """
+    Mengirim input pengguna ke Gemini untuk diproses dan mengembalikan JSON terstruktur.
+    Input yang pernah diproses (dengan daftar kategori yang sama) diambil dari cache tanpa memanggil API.
+    Jika AI lambat/gagal, pesan ditampilkan dan None dikembalikan agar pengguna bisa input manual.
+    """
     try:
-        response = model.generate_content(prompt)
-        
-        # 4. Bersihkan dan parse output
-        # Menghapus "```json" dan "```" yang mungkin ditambahkan oleh model
-        cleaned_response = response.text.strip().replace("```json", "").replace("```", "").strip()
-        
-        # Ubah string JSON menjadi dictionary Python
-        parsed_json = json.loads(cleaned_response)
-        return parsed_json
-    
+        return _parse_with_ai(user_input, categories)
+    except ai_resilience.CircuitOpenError as e:
+        st.warning(str(e))
+        return None
+    except ai_resilience.AIBusyError:
+        st.warning("Terlalu banyak permintaan AI bersamaan. Coba lagi sebentar atau gunakan Input Manual.")
+        return None
+    except TimeoutError:
+        st.error("AI terlalu lama merespons. Coba lagi atau gunakan Input Manual.")
+        return None
+    except ai_resilience.transient_errors() as e:
+        st.error(f"Layanan AI sedang tidak tersedia ({e}). Coba lagi atau gunakan Input Manual.")
+        return None
     except json.JSONDecodeError:
         st.error("Error: AI mengembalikan format yang tidak valid.")
-        print("AI response (invalid):", response.text) # Untuk debug di terminal
+        return None
+    except AIConfigError as e:
+        st.error(f"Error konfigurasi Gemini: {e}")
+        st.error("Pastikan Anda sudah mengatur GEMINI_API_KEY di file .streamlit/secrets.toml")
         return None
     except Exception as e:
         st.error(f"Error saat memanggil AI: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def parse_transaction(user_input, budget_categories, income_categories):
+    """
+    Jalur utama parsing input cepat: parser lokal berbasis aturan dulu,
+    AI hanya dipanggil jika confidence hasil lokal di bawah local_parser.CONFIDENCE_THRESHOLD.
+    Mengembalikan (hasil, sumber) dengan sumber 'lokal' atau 'ai'.
+    """
+    local_result, confidence = local_parser.parse_transaction_locally(
+        user_input, budget_categories, income_categories
+    )
+    if local_result is not None and confidence >= local_parser.CONFIDENCE_THRESHOLD:
+        return local_result, 'lokal'
+    return parse_transaction_with_ai(user_input, budget_categories + income_categories), 'ai'
+
+
+def _parse_batch_with_ai(lines, categories):
+    """
+    Satu panggilan model untuk banyak baris. Mengembalikan dict {posisi: hasil mentah}
+    untuk item yang bisa dipetakan kembali ke barisnya; sisanya tidak ada di dict.
+    """
+    numbered_inputs = "\n".join(f'    {number}. "{line}"' for number, line in enumerate(lines, start=1))
+    prompt = BATCH_PROMPT_TEMPLATE.format(numbered_inputs=numbered_inputs,
+                                          category_list_string=", ".join(categories))
+    parsed = json.loads(_clean_model_output(generate(prompt)))
+    if not isinstance(parsed, list):
+        raise ValueError("AI tidak mengembalikan array JSON")
+
+    results = {}
+    for position, item in enumerate(parsed):
+        if not isinstance(item, dict):
+            continue
+        # Pakai 'index' dari model jika ada, jika tidak pakai urutan array
+        try:
+            index = int(item.get('index', position + 1)) - 1
+        except (TypeError, ValueError):
+            index = position
+        if 0 <= index < len(lines) and index not in results:
+            results[index] = {key: value for key, value in item.items() if key != 'index'}
+    return results
+
+
+def parse_transactions_batch(lines, budget_categories, income_categories):
+    """
+    Mem-parsing banyak baris sekaligus.
+    1. Setiap baris dicoba dengan parser lokal, lalu cache AI.
+    2. Sisanya dikirim ke model dalam SATU panggilan (array JSON).
+    3. Item yang gagal divalidasi dicoba ulang satu per satu (parse_transaction_with_ai).
+    Mengembalikan list dict per baris: {'input', 'result', 'source', 'warnings'};
+    'result' bernilai None jika baris tetap gagal diproses.
+    """
+    all_categories = budget_categories + income_categories
+    cache = get_parse_cache()
+    items = [{'input': line, 'result': None, 'source': None, 'warnings': []} for line in lines]
+
+    pending = []
+    for index, item in enumerate(items):
+        local_result, confidence = local_parser.parse_transaction_locally(
+            item['input'], budget_categories, income_categories
+        )
+        if local_result is not None and confidence >= local_parser.CONFIDENCE_THRESHOLD:
+            item['result'], item['source'] = local_result, 'lokal'
+            continue
+        cached_result = cache.get(item['input'], all_categories)
+        if cached_result is not None:
+            item['result'], item['source'] = cached_result, 'ai'
+            continue
+        pending.append(index)
+
+    batch_results = {}
+    if pending:
+        try:
+            batch_results = _parse_batch_with_ai([items[index]['input'] for index in pending], all_categories)
+        except ai_resilience.CircuitOpenError:
+            # Upstream bermasalah: jangan retry per item, arahkan ke input manual
+            pending = []
+        except Exception as e:
+            # Gagal total: semua item di-retry satu per satu di bawah
+            print(f"Batch AI gagal, retry per item: {e}")
+
+    for position, index in enumerate(pending):
+        item = items[index]
+        raw_result = batch_results.get(position)
+        if raw_result is not None:
+            validated, _ = validate_parsed_transaction(raw_result, budget_categories, income_categories)
+            if validated is not None:
+                cache.put(item['input'], all_categories, raw_result)
+                item['result'], item['source'] = raw_result, 'ai'
+                continue
+        # Retry individual untuk item yang hilang/tidak valid di hasil batch
+        item['result'], item['source'] = parse_transaction_with_ai(item['input'], all_categories), 'ai'
+
+    for item in items:
+        if item['result'] is None:
+            item['warnings'] = ["Tidak dapat diproses."]
+            continue
+        item['result'], item['warnings'] = validate_parsed_transaction(
+            item['result'], budget_categories, income_categories
+        )
+    return items
+
+
+# Latensi dan token AI per panggilan (lihat metrics.py); generate = satu panggilan model
+metrics.instrument_module(globals(), ['generate', 'parse_transaction_with_ai', 'parse_transaction',
+                                      'parse_transactions_batch'])
@@ -0,0 +1,201 @@
+"""
+Pemanggilan model AI yang tahan gangguan:
+- batas waktu (timeout) per panggilan,
+- retry dengan exponential backoff untuk error sementara,
+- batas jumlah panggilan bersamaan untuk seluruh proses (dipakai bersama semua sesi Streamlit),
+- circuit breaker: jika upstream terus gagal, panggilan langsung ditolak sementara
+  agar pengguna diarahkan ke input manual tanpa menunggu.
+"""
+import concurrent.futures
+import os
+import random
+import threading
+import time
+
+# Error yang layak di-retry (gangguan sementara, bukan kesalahan input/konfigurasi)
+BASE_TRANSIENT_ERRORS = (TimeoutError, ConnectionError, concurrent.futures.TimeoutError)
+_transient_errors = None
+
+def transient_errors():
+    """
+    Tuple error sementara, termasuk error google.api_core.
+    Diimpor saat pertama kali dibutuhkan agar startup aplikasi tidak ikut memuat library Google.
+    """
+    global _transient_errors
+    if _transient_errors is None:
+        try:
+            from google.api_core import exceptions as google_exceptions
+            _transient_errors = BASE_TRANSIENT_ERRORS + (
+                google_exceptions.ServiceUnavailable,
+                google_exceptions.ResourceExhausted,
+                google_exceptions.DeadlineExceeded,
+                google_exceptions.InternalServerError,
+                google_exceptions.TooManyRequests,
+            )
+        except ImportError:
+            _transient_errors = BASE_TRANSIENT_ERRORS
+    return _transient_errors
+
+AI_TIMEOUT_SECONDS = float(os.environ.get("EFTARI_AI_TIMEOUT", 15))
+AI_MAX_RETRIES = int(os.environ.get("EFTARI_AI_MAX_RETRIES", 2))
+AI_MAX_CONCURRENCY = int(os.environ.get("EFTARI_AI_MAX_CONCURRENCY", 4))
+AI_BACKOFF_BASE_SECONDS = 0.5
+AI_BREAKER_FAILURE_THRESHOLD = 5
+AI_BREAKER_RESET_SECONDS = 30.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Circuit breaker sedang terbuka: upstream dianggap bermasalah, panggilan tidak dikirim."""
+
+
+class AIBusyError(TimeoutError):
+    """Semua slot panggilan AI proses ini terpakai (batas lokal, bukan gangguan upstream)."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana (closed -> open -> half-open).
+    Setelah failure_threshold kegagalan berturut-turut, breaker terbuka selama reset_seconds.
+    Setelah itu satu panggilan percobaan diizinkan; jika berhasil breaker kembali tertutup.
+    """
+
+    def __init__(self, failure_threshold=AI_BREAKER_FAILURE_THRESHOLD,
+                 reset_seconds=AI_BREAKER_RESET_SECONDS, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    @property
+    def state(self):
+        with self.lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_seconds:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self.lock:
+            state = self._state()
+            if state == 'open' or (state == 'half-open' and self.trial_in_progress):
+                raise CircuitOpenError("Layanan AI sedang bermasalah. Silakan gunakan Input Manual.")
+            if state == 'half-open':
+                self.trial_in_progress = True
+
+    def cancel_trial(self):
+        """Panggilan percobaan batal dikirim (bukan gagal), izinkan percobaan berikutnya."""
+        with self.lock:
+            self.trial_in_progress = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_progress = False
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+class ResilientCaller:
+    """
+    Menjalankan fungsi (misal model.generate_content) di thread pool bersama
+    dengan timeout, retry + backoff, batas konkurensi, dan circuit breaker.
+    """
+
+    def __init__(self, max_concurrency=AI_MAX_CONCURRENCY, timeout=AI_TIMEOUT_SECONDS,
+                 max_retries=AI_MAX_RETRIES, backoff_base=AI_BACKOFF_BASE_SECONDS,
+                 breaker=None, sleep=time.sleep):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        # Slot dilepas saat panggilan benar-benar selesai (bukan saat timeout),
+        # jadi panggilan yang "menggantung" tetap dihitung terhadap kuota.
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrency * 2, thread_name_prefix="ai-call"
+        )
+
+    def submit(self, fn, *args, **kwargs):
+        """Menjadwalkan satu percobaan; mengembalikan Future."""
+        if not self.slots.acquire(timeout=self.timeout):
+            raise AIBusyError("Antrian AI penuh, coba lagi sebentar.")
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.slots.release()
+
+        try:
+            return self.executor.submit(run)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Panggilan sinkron dengan semua perlindungan. Jika semua percobaan gagal, error terakhir dari
+        upstream dilempar apa adanya (jenis dan pesannya tetap). Antrian lokal yang penuh
+        (AIBusyError) tidak dihitung sebagai kegagalan upstream oleh circuit breaker.
+        """
+        attempt = 0
+        last_error = None
+        while True:
+            self.breaker.before_call()
+            try:
+                future = self.submit(fn, *args, **kwargs)
+            except AIBusyError:
+                self.breaker.cancel_trial()
+                if last_error is not None:
+                    # Slot masih dipegang percobaan sebelumnya yang menggantung: laporkan error upstream-nya
+                    raise last_error
+                raise
+            try:
+                result = future.result(timeout=self.timeout)
+            except transient_errors() as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                last_error = e
+                # Exponential backoff dengan jitter: 0.5s, 1s, 2s, ...
+                self.sleep(self.backoff_base * (2 ** attempt) * (0.5 + random.random() / 2))
+                attempt += 1
+                continue
+            except Exception:
+                # Error non-sementara (misal API key salah) tidak di-retry
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            return result
+
+
+_caller = None
+_caller_lock = threading.Lock()
+
+def get_caller():
+    """ResilientCaller bersama untuk seluruh proses (semua sesi Streamlit)."""
+    global _caller
+    if _caller is None:
+        with _caller_lock:
+            if _caller is None:
+                _caller = ResilientCaller()
+    return _caller
+
+def set_caller(caller):
+    """Mengganti ResilientCaller (misal dengan timeout kecil untuk pengujian)."""
+    global _caller
+    _caller = caller
@@ -0,0 +1,245 @@
+"""
+Snapshot analitik lokal: transaksi satu pengguna disalin ke file Parquet per bulan,
+lalu dikueri di dalam proses dengan DuckDB (tanpa bolak-balik ke backend utama).
+
+Sinkronisasi bersifat inkremental. Watermark setiap bulan adalah hash rollup bulanannya beserta
+revisinya (storage/rollups.py), yang dijaga backend di setiap penulisan transaksi. Hanya bulan yang
+watermark-nya berubah, atau yang ditandai kotor oleh penulisan dari proses ini, yang dibaca ulang.
+Bulan-bulan lama yang tidak berubah tidak pernah dibaca lagi.
+Data lama tanpa rollup baru ikut masuk setelah `python rebuild_rollups.py` dijalankan.
+
+Isi direktori snapshot:
+    <YYYY-MM>.parquet   transaksi satu bulan (skema export.export_schema())
+    manifest.json       {'months': {'YYYY-MM': {'signature': watermark bulan, 'rows': n}},
+                         'synced_at': epoch}
+"""
+import calendar
+import json
+import os
+import threading
+import time
+
+from dashboard import summary_hash
+
+# duckdb dan pyarrow diimpor di dalam fungsi agar impor modul ini tetap ringan
+
+MANIFEST_NAME = "manifest.json"
+WEEKDAY_NAMES = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+DEFAULT_PERCENTILES = (0.5, 0.75, 0.9, 0.99)
+DEFAULT_TOP_DESCRIPTIONS = 10
+
+
+def month_signature(rollup):
+    """
+    Watermark satu bulan: hash isi rollup plus revisinya. Revisi naik pada setiap penulisan
+    transaksi bulan itu, jadi perubahan yang tidak mengubah total (deskripsi, tanggal di bulan
+    yang sama) dari proses mana pun tetap terdeteksi; hash isi menangkap rollup yang dihitung ulang.
+    """
+    return f"{summary_hash(rollup)}:{rollup.get('revision', 0)}"
+
+
+def _month_range(year_month):
+    year, month = int(year_month[:4]), int(year_month[5:7])
+    last_day = calendar.monthrange(year, month)[1]
+    return f"{year_month}-01", f"{year_month}-{last_day:02d}"
+
+
+def _sql_string(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+class AnalyticsSnapshot:
+    """Snapshot Parquet milik satu pengguna beserta koneksi DuckDB untuk mengkuerinya."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.RLock()
+        self.manifest = self._load_manifest()
+        self._conn = None
+        self._view_ready = False
+
+    @property
+    def synced_at(self):
+        """Waktu sinkronisasi terakhir (epoch detik), atau None jika belum pernah."""
+        return self.manifest.get('synced_at')
+
+    @property
+    def months(self):
+        """Bulan-bulan yang punya transaksi di snapshot, terurut."""
+        return sorted(year_month for year_month, entry in self.manifest['months'].items() if entry['rows'])
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _load_manifest(self):
+        try:
+            with open(self._path(MANIFEST_NAME), encoding='utf-8') as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return {'months': {}, 'synced_at': None}
+        manifest.setdefault('months', {})
+        manifest.setdefault('synced_at', None)
+        return manifest
+
+    def _save_manifest(self):
+        temp_path = self._path(MANIFEST_NAME + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as manifest_file:
+            json.dump(self.manifest, manifest_file, ensure_ascii=False)
+        os.replace(temp_path, self._path(MANIFEST_NAME))
+
+    def _write_month(self, year_month, transactions):
+        """Menimpa file Parquet satu bulan (ditulis ke file sementara lalu diganti secara atomik)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        from export import PARQUET_COMPRESSION, chunk_to_batch, export_schema
+
+        path = self._path(f"{year_month}.parquet")
+        if not transactions:
+            # Bulan yang semua transaksinya dihapus: rollup-nya tetap ada (bernilai nol), filenya tidak
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        table = pa.Table.from_batches([chunk_to_batch(transactions)], schema=export_schema())
+        pq.write_table(table, path + ".tmp", compression=PARQUET_COMPRESSION)
+        os.replace(path + ".tmp", path)
+
+    def sync(self, backend, user_id, dirty_months=()):
+        """
+        Menyamakan snapshot dengan backend. Satu kali baca semua rollup, lalu hanya bulan
+        yang berubah (atau ada di dirty_months) yang transaksinya dibaca ulang.
+        Mengembalikan list bulan yang diperbarui atau dihapus.
+        """
+        rollups = backend.get_all_rollups(user_id)
+        signatures = {year_month: month_signature(rollup) for year_month, rollup in rollups.items()}
+        with self.lock:
+            known = self.manifest['months']
+            changed = sorted(
+                year_month for year_month, signature in signatures.items()
+                if known.get(year_month, {}).get('signature') != signature or year_month in dirty_months
+            )
+            removed = sorted(set(known) - set(signatures))
+            if changed or removed:
+                os.makedirs(self.directory, exist_ok=True)
+            for year_month in changed:
+                start_date, end_date = _month_range(year_month)
+                transactions = backend.get_transactions_between(user_id, start_date, end_date)
+                self._write_month(year_month, transactions)
+                known[year_month] = {'signature': signatures[year_month], 'rows': len(transactions)}
+            for year_month in removed:
+                self._write_month(year_month, [])
+                del known[year_month]
+            self.manifest['synced_at'] = time.time()
+            if os.path.isdir(self.directory):
+                self._save_manifest()
+            if changed or removed:
+                # Daftar file berubah: view DuckDB dibuat ulang saat kueri berikutnya
+                self._view_ready = False
+            return changed + removed
+
+    def close(self):
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                self._view_ready = False
+
+    # --- Kueri ---
+
+    def _query(self, sql, params=(), date_from=None, date_to=None, expense_only=True):
+        """
+        Menjalankan kueri atas view 'transactions' (semua file Parquet snapshot).
+        `{where}` di dalam sql diganti filter tanggal/tipe. Mengembalikan DataFrame,
+        atau None jika snapshot masih kosong.
+        """
+        import duckdb
+
+        conditions, where_params = [], []
+        if expense_only:
+            conditions.append("type = 'Pengeluaran'")
+        if date_from:
+            conditions.append("date >= CAST(? AS DATE)")
+            where_params.append(str(date_from))
+        if date_to:
+            conditions.append("date <= CAST(? AS DATE)")
+            where_params.append(str(date_to))
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+        with self.lock:
+            if not self.months:
+                return None
+            if self._conn is None:
+                self._conn = duckdb.connect()
+            if not self._view_ready:
+                pattern = os.path.join(self.directory, "*.parquet")
+                self._conn.execute(
+                    f"CREATE OR REPLACE VIEW transactions AS SELECT * FROM read_parquet({_sql_string(pattern)})"
+                )
+                self._view_ready = True
+            return self._conn.execute(sql.format(where=where), [*where_params, *params]).df()
+
+    def category_totals(self, date_from=None, date_to=None):
+        """Total dan jumlah transaksi per (tipe, kategori), terbesar dulu."""
+        import pandas as pd
+
+        df = self._query(
+            "SELECT type, category, SUM(amount) AS total, COUNT(*) AS count "
+            "FROM transactions {where} GROUP BY type, category ORDER BY total DESC, category",
+            date_from=date_from, date_to=date_to, expense_only=False
+        )
+        return pd.DataFrame(columns=['type', 'category', 'total', 'count']) if df is None else df
+
+    def top_descriptions(self, limit=DEFAULT_TOP_DESCRIPTIONS, date_from=None, date_to=None):
+        """Deskripsi pengeluaran dengan total terbesar (deskripsi dinormalisasi huruf kecil)."""
+        import pandas as pd
+
+        df = self._query(
+            "SELECT lower(trim(description)) AS description, SUM(amount) AS total, COUNT(*) AS count "
+            "FROM transactions {where} GROUP BY 1 ORDER BY total DESC, description LIMIT ?",
+            params=(int(limit),), date_from=date_from, date_to=date_to
+        )
+        return pd.DataFrame(columns=['description', 'total', 'count']) if df is None else df
+
+    def daily_category_spend(self, date_from=None, date_to=None):
+        """Pengeluaran per (tanggal, kategori); hari tanpa pengeluaran tidak ada barisnya."""
+        import pandas as pd
+
+        df = self._query(
+            "SELECT date, category, SUM(amount) AS total FROM transactions {where} GROUP BY 1, 2 ORDER BY 1, 2",
+            date_from=date_from, date_to=date_to
+        )
+        return pd.DataFrame(columns=['date', 'category', 'total']) if df is None else df
+
+    def spend_by_weekday(self, date_from=None, date_to=None):
+        """Pengeluaran per hari dalam minggu (Senin..Minggu); hari tanpa transaksi bernilai nol."""
+        import pandas as pd
+
+        df = self._query(
+            "SELECT isodow(date) AS weekday, SUM(amount) AS total, COUNT(*) AS count, AVG(amount) AS average "
+            "FROM transactions {where} GROUP BY 1",
+            date_from=date_from, date_to=date_to
+        )
+        by_day = pd.DataFrame({'weekday': range(1, 8)})
+        if df is not None:
+            by_day = by_day.merge(df, on='weekday', how='left')
+        by_day = by_day.reindex(columns=['weekday', 'total', 'count', 'average']).fillna(0)
+        by_day['count'] = by_day['count'].astype('int64')
+        by_day['weekday'] = [WEEKDAY_NAMES[day - 1] for day in by_day['weekday']]
+        return by_day
+
+    def amount_percentiles(self, percentiles=DEFAULT_PERCENTILES, date_from=None, date_to=None):
+        """
+        Persentil jumlah pengeluaran per kategori, plus baris 'Semua' untuk seluruh kategori.
+        Kolom: category, count, lalu p50/p75/... sesuai percentiles.
+        """
+        import pandas as pd
+
+        columns = [f"p{round(p * 100):g}" for p in percentiles]
+        selects = ", ".join(f"quantile_cont(amount, {float(p)}) AS {name}" for p, name in zip(percentiles, columns))
+        df = self._query(
+            f"SELECT COALESCE(category, 'Semua') AS category, COUNT(*) AS count, {selects} "
+            "FROM transactions {where} GROUP BY GROUPING SETS ((category), ()) "
+            "ORDER BY GROUPING(category) DESC, count DESC, category",
+            date_from=date_from, date_to=date_to
+        )
+        return pd.DataFrame(columns=['category', 'count', *columns]) if df is None else df
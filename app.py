@@ -1,8 +1,14 @@
 import streamlit as st
+import metrics
 import database as db  # Fungsi database kita (yang sekarang sudah pakai Firebase)
+import user_session
+import dashboard
+import forecast
 import datetime
-import pandas as pd
-import plotly.express as px  # Library untuk grafik interaktif
+# pandas dan plotly diimpor di dalam fungsi dashboard yang membutuhkannya (import-nya berat),
+# jadi halaman tanpa data/grafik tidak ikut menanggung waktu muatnya.
+
+LIVE_CHECK_SECONDS = 2 # Interval pengecekan versi view realtime (bukan interval kueri)
 
 # --- Konfigurasi Halaman ---
 st.set_page_config(
@@ -10,10 +16,14 @@ st.set_page_config(
     page_icon="💰",
     layout="wide"
 )
+metrics.begin_page("Dasbor") # Render halaman diukur sampai metrics.end_page() di akhir file
 
 # --- Inisialisasi Database ---
 # BARIS "db.create_tables()" SUDAH DIHAPUS DARI SINI.
-# Database Firebase akan otomatis diinisialisasi saat 'database.py' diimpor.
+# Backend penyimpanan (Firestore atau SQLite lokal) otomatis diinisialisasi saat 'database.py' diimpor.
+
+# Semua data yang ditampilkan hanya milik pengguna sesi ini
+user_id = user_session.current_user_id()
 
 # --- Judul ---
 st.title("💰 Dasbor Keuangan e-Ftari")
@@ -31,22 +41,36 @@ current_month_str = selected_month.strftime('%Y-%m')
 st.header(f"Gambaran Keuangan Bulan: {current_month_str}")
 
 # --- Ambil Data dari Database ---
-# Fungsi-fungsi ini namanya tetap sama, tapi sekarang mengambil data dari Firebase
-transactions_data = db.get_transactions_for_month(current_month_str)
-budgets_data = db.get_all_budgets()
+# Ringkasan bulan dihitung di sisi backend (SUM/GROUP BY), jadi yang diunduh hanya
+# total per tipe dan per kategori, bukan seluruh transaksi bulan itu.
+summary = dashboard.summary_from_month_summary(db.get_month_summary(user_id, current_month_str))
+# Anggaran yang berlaku di bulan yang dipilih (bukan anggaran hari ini)
+budgets_data = db.get_budgets_for_month(user_id, current_month_str)
+
+total_pemasukan = summary['income']
+total_pengeluaran = summary['expense']
+
+# --- Pembaruan Realtime ---
+# Jika backend mendukung aliran perubahan, ringkasan di atas dibaca dari view realtime yang
+# diperbarui oleh backend (lihat live_views.py). Fragment ini hanya membandingkan versi view
+# setiap beberapa detik (tanpa kueri) dan memicu rerun halaman saat ada perubahan.
+if db.get_live_views() is not None:
+    @st.fragment(run_every=LIVE_CHECK_SECONDS)
+    def watch_month_changes():
+        version = db.get_live_version(user_id, current_month_str)
+        seen = st.session_state.get("live_view_version")
+        st.session_state.live_view_version = (current_month_str, version)
+        if seen is not None and seen[0] == current_month_str and seen[1] != version:
+            st.rerun()
+
+    watch_month_changes()
 
 # Jika tidak ada data, tampilkan pesan
-if not transactions_data:
+if not total_pemasukan and not total_pengeluaran:
     st.info(f"Belum ada data transaksi untuk bulan {current_month_str}.")
     # Kita tidak 'stop' di sini agar anggaran tetap bisa ditampilkan
 else:
-    # --- Proses Data dengan Pandas ---
-    df_transactions = pd.DataFrame(transactions_data)
-    df_transactions['amount'] = pd.to_numeric(df_transactions['amount'])
-
     # --- 1. Ringkasan Metrik (Pemasukan, Pengeluaran, Sisa) ---
-    total_pemasukan = df_transactions[df_transactions['type'] == 'Pemasukan']['amount'].sum()
-    total_pengeluaran = df_transactions[df_transactions['type'] == 'Pengeluaran']['amount'].sum()
     sisa_netto = total_pemasukan - total_pengeluaran
 
     col1, col2, col3 = st.columns(3)
@@ -59,22 +83,34 @@ else:
     # --- 3. Grafik Pie Chart Pengeluaran ---
     st.header("Pengeluaran Berdasarkan Kategori")
     
-    df_pengeluaran_chart = df_transactions[df_transactions['type'] == 'Pengeluaran']
-    
-    if total_pengeluaran > 0 and not df_pengeluaran_chart.empty:
-        # Hitung total pengeluaran per kategori untuk pie chart
-        spending_by_category_chart = df_pengeluaran_chart.groupby('category')['amount'].sum().reset_index()
-
-        fig = px.pie(
-            spending_by_category_chart,
-            values='amount',
-            names='category',
-            title='Proporsi Pengeluaran per Kategori'
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    if total_pengeluaran > 0 and summary['expense_by_category']:
+        # Figure di-cache berdasarkan hash isi ringkasan: bulan yang tidak berubah tidak dibangun ulang
+        st.plotly_chart(dashboard.expense_pie_figure(summary), use_container_width=True)
     else:
         st.info("Belum ada data pengeluaran untuk digambarkan di grafik.")
 
+    # --- Pengeluaran Terbesar Bulan Ini (dari snapshot analitik lokal) ---
+    # Snapshot (DuckDB + pyarrow, plus sinkronisasinya) hanya dibuka jika diminta,
+    # agar render dasbor tidak menanggung import dan sinkronisasi itu
+    if total_pengeluaran > 0 and st.toggle("Tampilkan pengeluaran terbesar per deskripsi", key="show_top_descriptions"):
+        snapshot = db.get_analytics_snapshot(user_id)
+        month_start, month_end = db.month_date_range(current_month_str)
+        st.subheader("Pengeluaran Terbesar per Deskripsi")
+        st.dataframe(
+            snapshot.top_descriptions(5, month_start, month_end),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "description": st.column_config.TextColumn("Deskripsi"),
+                "total": st.column_config.NumberColumn("Total (Rp)", format="localized"),
+                "count": st.column_config.NumberColumn("Jumlah Transaksi"),
+            },
+        )
+        st.caption(
+            f"Dari snapshot analitik, disinkronkan "
+            f"{datetime.datetime.fromtimestamp(snapshot.synced_at):%H:%M:%S}. Selengkapnya di halaman Analitik."
+        )
+
 # --- 2. Status Anggaran vs. Aktual (Selalu tampilkan) ---
 st.markdown("---") # Garis pemisah
 st.header("Status Anggaran vs. Aktual")
@@ -82,34 +118,57 @@ st.header("Status Anggaran vs. Aktual")
 if not budgets_data:
     st.warning("Anda belum mengatur anggaran apapun. Silakan atur di tab 'Manajemen Anggaran'.")
 else:
-    df_budgets = pd.DataFrame(budgets_data)
-    df_budgets['amount'] = pd.to_numeric(df_budgets['amount'])
-    
-    # Siapkan df pengeluaran jika ada, jika tidak, buat yang kosong
-    if not transactions_data or df_transactions[df_transactions['type'] == 'Pengeluaran'].empty:
-        df_summary = df_budgets
-        df_summary['actual_spending'] = 0.0 # Tidak ada pengeluaran
-    else:
-        df_pengeluaran = df_transactions[df_transactions['type'] == 'Pengeluaran']
-        spending_by_category = df_pengeluaran.groupby('category')['amount'].sum().reset_index()
-        spending_by_category = spending_by_category.rename(columns={'amount': 'actual_spending'})
-        
-        # Gabungkan data anggaran dengan data pengeluaran
-        df_summary = pd.merge(df_budgets, spending_by_category, on='category', how='left')
-        df_summary['actual_spending'] = df_summary['actual_spending'].fillna(0) # Ganti NaN dengan 0
-
-    # Hitung persentase
-    df_summary['percent_spent'] = (df_summary['actual_spending'] / df_summary['amount']) * 100
-    df_summary['progress_percent'] = df_summary['percent_spent'].apply(lambda x: min(x, 100))
-
-    # Tampilkan progress bar untuk setiap kategori
-    for row in df_summary.itertuples():
-        st.write(f"**{row.category}** (Anggaran: Rp {row.amount:,.0f})")
-        st.write(f"Terpakai: Rp {row.actual_spending:,.0f} ({row.percent_spent:.1f}%)")
-        
-        if row.percent_spent > 100:
-            st.progress(100, text="Overbudget!")
-            st.error(f"Overbudget sebesar Rp {row.actual_spending - row.amount:,.0f}!")
-        else:
-            st.progress(int(row.progress_percent))
-        st.write("") # Kasih jarak
+    # Satu tabel untuk semua kategori (bukan progress bar per kategori)
+    df_status = dashboard.budget_status_frame(summary, budgets_data)
+    st.dataframe(
+        df_status,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "category": st.column_config.TextColumn("Kategori"),
+            "budget": st.column_config.NumberColumn("Anggaran (Rp)", format="localized"),
+            "actual_spending": st.column_config.NumberColumn("Terpakai (Rp)", format="localized"),
+            "percent_spent": st.column_config.NumberColumn("Terpakai (%)", format="%.1f%%"),
+            "progress": st.column_config.ProgressColumn("Progres", min_value=0, max_value=100, format="%.0f%%"),
+            "over_budget": st.column_config.NumberColumn("Overbudget (Rp)", format="localized"),
+        },
+    )
+
+    over_budget_count = int((df_status['over_budget'] > 0).sum())
+    if over_budget_count:
+        st.error(f"{over_budget_count} kategori overbudget, total kelebihan Rp {df_status['over_budget'].sum():,.0f}!")
+
+    # --- Proyeksi Akhir Bulan (bulan berjalan/mendatang) ---
+    # Dari laju pengeluaran harian per kategori (lihat forecast.py), agar overbudget terlihat
+    # sebelum terjadi, bukan sesudahnya
+    df_forecast, forecast_day = db.get_budget_forecast(user_id, current_month_str)
+    if forecast_day < forecast.days_in_month(current_month_str):
+        st.subheader("Proyeksi Akhir Bulan")
+        overrun_warning = forecast.describe_projected_overruns(df_forecast)
+        if overrun_warning:
+            st.warning(overrun_warning)
+        st.dataframe(
+            df_forecast.drop(columns=['daily_rate', 'projected_overrun']),
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "category": st.column_config.TextColumn("Kategori"),
+                "budget": st.column_config.NumberColumn("Anggaran (Rp)", format="localized"),
+                "spent": st.column_config.NumberColumn("Terpakai (Rp)", format="localized"),
+                "projected": st.column_config.NumberColumn("Proyeksi (Rp)", format="localized"),
+                "projected_low": st.column_config.NumberColumn("Batas Bawah (Rp)", format="localized"),
+                "projected_high": st.column_config.NumberColumn("Batas Atas (Rp)", format="localized"),
+                "overrun_probability": st.column_config.NumberColumn("Peluang Lewat", format="percent"),
+                "runout_date": st.column_config.DateColumn("Perkiraan Habis", format="YYYY-MM-DD"),
+                "runout_earliest": st.column_config.DateColumn("Habis Tercepat", format="YYYY-MM-DD"),
+                "runout_latest": st.column_config.DateColumn("Habis Terlambat", format="YYYY-MM-DD"),
+                "status": st.column_config.TextColumn("Status"),
+            },
+        )
+        st.caption(
+            f"Hari ke-{forecast_day} dari {forecast.days_in_month(current_month_str)}; interval keyakinan "
+            f"{forecast.DEFAULT_CONFIDENCE:.0%} dari pengeluaran harian {forecast.HISTORY_MONTHS} bulan terakhir "
+            f"dan bulan ini. Tanggal habis kosong = diperkirakan tidak habis bulan ini."
+        )
+
+metrics.end_page()
@@ -0,0 +1,296 @@
+"""
+Impor mutasi rekening (CSV atau OFX) secara massal.
+
+Alurnya berupa pipeline generator, jadi file besar tidak pernah dimuat utuh ke memori:
+    baca baris (CSV/OFX) -> normalisasi -> buang duplikat -> kelompokkan per chunk -> tulis batch
+
+Pemakaian dari terminal:
+    python bank_import.py mutasi.csv
+    python bank_import.py mutasi.ofx --chunk-size 500
+    python bank_import.py mutasi.csv --user budi@contoh.id
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import io
+import re
+import sys
+
+import database as db
+import storage
+
+DEFAULT_CHUNK_SIZE = 500
+
+DEFAULT_EXPENSE_CATEGORY = "Lain-Lain (Pengeluaran)"
+DEFAULT_INCOME_CATEGORY = "Lain-Lain (Pemasukan)"
+
+# Nama kolom CSV yang dikenali (huruf kecil) untuk setiap field
+CSV_COLUMN_ALIASES = {
+    'date': ('date', 'tanggal', 'tgl', 'transaction date', 'posting date'),
+    'description': ('description', 'deskripsi', 'keterangan', 'uraian', 'memo'),
+    'amount': ('amount', 'jumlah', 'nominal', 'mutasi'),
+    'debit': ('debit', 'keluar', 'db'),
+    'credit': ('credit', 'kredit', 'masuk', 'cr'),
+    'type': ('type', 'tipe', 'jenis'),
+    'category': ('category', 'kategori'),
+}
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%Y/%m/%d')
+
+
+class StatementRowError(ValueError):
+    """Baris mutasi yang tidak bisa dibaca."""
+
+
+# --- Parsing nilai ---
+
+def parse_amount(text):
+    """
+    Mengubah teks nominal menjadi float.
+    Mendukung 'Rp 25.000', '25,000.50', '25.000,50', '-15000', '(15.000)'.
+    """
+    text = str(text).strip()
+    negative = text.startswith('-') or (text.startswith('(') and text.endswith(')'))
+    text = re.sub(r'[^0-9.,]', '', text)
+    if not text:
+        raise StatementRowError("Jumlah kosong")
+
+    if '.' in text and ',' in text:
+        # Pemisah yang muncul terakhir adalah pemisah desimal
+        if text.rfind(',') > text.rfind('.'):
+            text = text.replace('.', '').replace(',', '.')
+        else:
+            text = text.replace(',', '')
+    elif ',' in text:
+        # '25,000' -> ribuan; '25,5' -> desimal
+        head, _, tail = text.rpartition(',')
+        text = text.replace(',', '') if len(tail) == 3 else f"{head.replace(',', '')}.{tail}"
+    elif text.count('.') > 1 or re.fullmatch(r'\d{1,3}\.\d{3}', text):
+        # '1.500.000' atau '25.000' -> pemisah ribuan gaya Indonesia
+        text = text.replace('.', '')
+
+    value = float(text)
+    return -value if negative else value
+
+
+def parse_date(text):
+    """Mengubah teks tanggal (beberapa format umum, termasuk OFX 'YYYYMMDD...') menjadi 'YYYY-MM-DD'."""
+    text = str(text).strip()
+    if re.fullmatch(r'\d{8}.*', text):
+        return f"{text[0:4]}-{text[4:6]}-{text[6:8]}"
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    raise StatementRowError(f"Format tanggal tidak dikenali: '{text}'")
+
+
+# --- Tahap 1: Baca file menjadi baris mentah ---
+
+def _text_stream(source):
+    """Menerima file teks atau file biner (misal dari st.file_uploader)."""
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+
+
+def read_csv_rows(stream):
+    """Generator baris CSV sebagai dict {field: nilai} berdasarkan CSV_COLUMN_ALIASES."""
+    sample = stream.read(4096)
+    stream.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(stream, dialect)
+
+    header = [column.strip().lower() for column in next(reader, [])]
+    column_index = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                column_index[field] = header.index(alias)
+                break
+    if 'date' not in column_index or not ({'amount', 'debit', 'credit'} & set(column_index)):
+        raise StatementRowError("CSV harus punya kolom tanggal dan jumlah (atau debit/kredit).")
+
+    for line in reader:
+        if not any(cell.strip() for cell in line):
+            continue
+        yield {field: line[index] if index < len(line) else '' for field, index in column_index.items()}
+
+
+OFX_TAG_PATTERN = re.compile(r'<(/?)([A-Z0-9.]+)>([^<\r\n]*)')
+
+def read_ofx_rows(stream):
+    """Generator transaksi dari file OFX (format SGML maupun XML), dibaca baris per baris."""
+    current = None
+    for line in stream:
+        for closing, tag, value in OFX_TAG_PATTERN.findall(line):
+            if tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield current
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing:
+                value = value.strip()
+                if tag == 'DTPOSTED':
+                    current['date'] = value
+                elif tag == 'TRNAMT':
+                    current['amount'] = value
+                elif tag in ('NAME', 'MEMO') and value:
+                    # MEMO biasanya lebih lengkap daripada NAME
+                    if tag == 'MEMO' or 'description' not in current:
+                        current['description'] = value
+
+
+def read_rows(source, file_format):
+    """Memilih pembaca sesuai format ('csv' atau 'ofx')."""
+    stream = _text_stream(source)
+    if file_format == 'ofx':
+        return read_ofx_rows(stream)
+    return read_csv_rows(stream)
+
+
+# --- Tahap 2: Normalisasi ---
+
+def normalize_rows(rows, errors):
+    """
+    Generator transaksi yang sudah dinormalisasi dengan aturan yang sama
+    seperti input manual (db.normalize_transaction: .strip().title() untuk tipe/kategori).
+    Baris yang gagal dibaca dicatat di list 'errors' dan dilewati.
+    """
+    for line_number, row in enumerate(rows, start=1):
+        try:
+            if row.get('debit') or row.get('credit'):
+                debit = parse_amount(row['debit']) if row.get('debit') else 0.0
+                credit = parse_amount(row['credit']) if row.get('credit') else 0.0
+                signed_amount = credit - abs(debit)
+            else:
+                signed_amount = parse_amount(row.get('amount', ''))
+
+            trx_type = (row.get('type') or '').strip().title()
+            if trx_type not in ('Pemasukan', 'Pengeluaran'):
+                trx_type = 'Pengeluaran' if signed_amount < 0 else 'Pemasukan'
+
+            category = (row.get('category') or '').strip()
+            if not category:
+                category = DEFAULT_EXPENSE_CATEGORY if trx_type == 'Pengeluaran' else DEFAULT_INCOME_CATEGORY
+
+            amount = abs(signed_amount)
+            if amount <= 0:
+                raise StatementRowError("Jumlah harus lebih dari nol")
+
+            yield db.normalize_transaction(
+                date=parse_date(row.get('date', '')),
+                description=(row.get('description') or '').strip(),
+                amount=amount,
+                type=trx_type,
+                category=category,
+            )
+        except (StatementRowError, ValueError) as e:
+            errors.append((line_number, str(e)))
+
+
+# --- Tahap 3: Buang duplikat ---
+
+def transaction_fingerprint(data):
+    """Hash (tanggal, jumlah, deskripsi) untuk mendeteksi transaksi yang sama."""
+    key = f"{data['date']}|{float(data['amount']):.2f}|{data['description'].strip().lower()}"
+    return hashlib.sha1(key.encode('utf-8')).digest()
+
+
+def dedupe_rows(user_id, rows, stats):
+    """
+    Generator yang membuang transaksi yang sudah ada di database atau muncul dua kali di file.
+    Sidik jari transaksi lama dimuat per bulan saat bulan itu pertama kali muncul,
+    jadi memori sebanding dengan jumlah bulan yang disentuh, bukan seluruh riwayat.
+    """
+    seen = set()
+    loaded_months = set()
+    for data in rows:
+        year_month = data['date'][:7]
+        if year_month not in loaded_months:
+            loaded_months.add(year_month)
+            for existing in db.get_transactions_for_month(user_id, year_month):
+                seen.add(transaction_fingerprint(existing))
+
+        fingerprint = transaction_fingerprint(data)
+        if fingerprint in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(fingerprint)
+        yield data
+
+
+# --- Tahap 4: Tulis per chunk ---
+
+def chunked(rows, size):
+    """Mengelompokkan generator menjadi list berukuran maksimal 'size'."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_statement(user_id, source, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, progress_callback=None):
+    """
+    Mengimpor satu file mutasi ke data milik user_id.
+    source: path, file teks, atau file biner (misal hasil st.file_uploader).
+    progress_callback(stats): dipanggil setelah setiap chunk ditulis.
+    Mengembalikan dict statistik {'imported', 'duplicates', 'errors': [(baris, pesan)]}.
+    """
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8-sig') as f:
+            return import_statement(user_id, f, file_format, chunk_size, progress_callback)
+
+    stats = {'imported': 0, 'duplicates': 0, 'errors': []}
+    rows = read_rows(source, file_format)
+    rows = normalize_rows(rows, stats['errors'])
+    rows = dedupe_rows(user_id, rows, stats)
+
+    for chunk in chunked(rows, chunk_size):
+        db.add_transactions(user_id, chunk)
+        stats['imported'] += len(chunk)
+        if progress_callback:
+            progress_callback(stats)
+    return stats
+
+
+def detect_format(filename):
+    return 'ofx' if filename.lower().endswith(('.ofx', '.qfx')) else 'csv'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Impor mutasi rekening (CSV/OFX) ke e-Ftari.")
+    parser.add_argument("path", help="Path file mutasi (.csv atau .ofx)")
+    parser.add_argument("--format", choices=['csv', 'ofx'], help="Paksa format file (default: dari ekstensi)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--user", default=storage.DEFAULT_USER_ID, help="user_id pemilik transaksi")
+    args = parser.parse_args(argv)
+
+    def report(stats):
+        print(f"\rDiimpor: {stats['imported']:,} | Duplikat: {stats['duplicates']:,} | "
+              f"Gagal: {len(stats['errors']):,}", end='', file=sys.stderr)
+
+    stats = import_statement(args.user, args.path, args.format or detect_format(args.path),
+                             chunk_size=args.chunk_size, progress_callback=report)
+    report(stats)
+    print(file=sys.stderr)
+    for line_number, message in stats['errors'][:20]:
+        print(f"  Baris {line_number}: {message}", file=sys.stderr)
+    # Transaksi mungkin masih di antrean tulis lokal; tunggu tersinkron sebelum proses selesai
+    if not db.flush_pending_writes():
+        print("Sebagian transaksi belum tersinkron; akan dikirim saat aplikasi berjalan lagi.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
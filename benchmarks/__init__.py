@@ -0,0 +1,21 @@
+"""
+Benchmark e-Ftari. Semua benchmark berjalan offline (SQLite lokal + model AI tiruan).
+
+Contoh:
+    python -m benchmarks.bench_parser
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_dashboard
+    python -m benchmarks.bench_multiuser
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_write_queue
+    python -m benchmarks.bench_live_views
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_forecast
+
+Suite dengan baseline JSON dan gerbang regresi (rumah tangga sintetis, lihat synthetic.py):
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json
+"""
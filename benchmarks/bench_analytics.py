@@ -0,0 +1,79 @@
+"""
+Benchmark snapshot analitik (Parquet + DuckDB): sinkronisasi awal, sinkronisasi inkremental,
+dan waktu setiap kueri analitik.
+
+    python -m benchmarks.bench_analytics
+    python -m benchmarks.bench_analytics --rows 1000000
+
+Memakai database SQLite dan direktori snapshot sementara.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import storage
+from benchmarks.bench_export import seed
+
+QUERY_REPEATS = 5
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(rows=1000000):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    os.environ['EFTARI_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['EFTARI_SQLITE_PATH'] = os.path.join(workdir, "bench.db")
+    os.environ['EFTARI_ANALYTICS_DIR'] = os.path.join(workdir, "analytics")
+
+    import database as db
+
+    user_id = storage.DEFAULT_USER_ID
+    seed(db, rows)
+    db.reset_analytics_snapshots()
+
+    results = {'rows': rows}
+    snapshot, results['initial_sync_ms'] = timed(lambda: db.get_analytics_snapshot(user_id))
+    results['months'] = len(snapshot.months)
+
+    # Satu transaksi baru: hanya bulannya yang ditulis ulang
+    db.add_transaction(user_id, "2026-06-15", "transaksi baru", 25000, "Pengeluaran", "Makanan")
+    _, results['incremental_sync_ms'] = timed(lambda: db.get_analytics_snapshot(user_id))
+    # Tanpa perubahan: hanya membaca rollup dan membandingkan hash
+    _, results['noop_sync_ms'] = timed(lambda: snapshot.sync(db.get_backend(), user_id))
+
+    queries = {
+        'category_totals': snapshot.category_totals,
+        'top_descriptions': snapshot.top_descriptions,
+        'spend_by_weekday': snapshot.spend_by_weekday,
+        'amount_percentiles': snapshot.amount_percentiles,
+    }
+    results['queries_ms'] = {}
+    for name, query in queries.items():
+        query()  # pemanasan: koneksi DuckDB dan metadata Parquet
+        results['queries_ms'][name] = statistics.median(timed(query)[1] for _ in range(QUERY_REPEATS))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    results = run(rows=args.rows)
+    print(f"Baris / bulan            : {results['rows']:,} / {results['months']}")
+    print(f"Sinkronisasi awal        : {results['initial_sync_ms']:10.1f} ms")
+    print(f"Sinkronisasi inkremental : {results['incremental_sync_ms']:10.1f} ms (satu bulan berubah)")
+    print(f"Sinkronisasi tanpa ubahan: {results['noop_sync_ms']:10.1f} ms")
+    for name, milliseconds in results['queries_ms'].items():
+        print(f"{name:<25}: {milliseconds:10.1f} ms (median {QUERY_REPEATS}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
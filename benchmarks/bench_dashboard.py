@@ -0,0 +1,87 @@
+"""
+Benchmark perhitungan dasbor: satu groupby (dashboard.summarize_transactions) dibanding
+cara lama (filter per tipe + dua groupby + apply per baris).
+
+    python -m benchmarks.bench_dashboard
+    python -m benchmarks.bench_dashboard --sizes 10000 100000 1000000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+import dashboard
+
+CATEGORIES = ["Makanan", "Transportasi", "Tagihan", "Hiburan", "Kesehatan", "Belanja",
+              "Lain-Lain (Pengeluaran)", "Gaji", "Bonus"]
+BUDGETS = [{'category': category, 'amount': 1_000_000} for category in CATEGORIES[:7]]
+
+
+def synthetic_transactions(rows, seed=42):
+    """DataFrame transaksi acak dengan kolom type/category/amount (tipe kolom sama seperti di aplikasi)."""
+    rng = np.random.default_rng(seed)
+    is_income = rng.random(rows) < 0.1
+    categories = np.where(is_income, rng.choice(CATEGORIES[7:], rows), rng.choice(CATEGORIES[:7], rows))
+    return pd.DataFrame({
+        'type': pd.Categorical(np.where(is_income, 'Pemasukan', 'Pengeluaran')),
+        'category': pd.Categorical(categories),
+        'amount': rng.integers(1, 500, rows).astype('float64') * 1000,
+    })
+
+
+def legacy_dashboard(df_transactions, budgets_data):
+    """Perhitungan dasbor sebelum refactor, untuk pembanding."""
+    total_pemasukan = df_transactions[df_transactions['type'] == 'Pemasukan']['amount'].sum()
+    df_expense = df_transactions[df_transactions['type'] == 'Pengeluaran']
+    total_pengeluaran = df_expense['amount'].sum()
+    chart = df_expense.groupby('category', observed=True)['amount'].sum().reset_index()
+    spending = df_expense.groupby('category', observed=True)['amount'].sum()
+    df_summary = pd.DataFrame(budgets_data)
+    df_summary['actual_spending'] = df_summary['category'].map(spending).fillna(0)
+    df_summary['percent_spent'] = df_summary['actual_spending'] / df_summary['amount'] * 100
+    df_summary['progress_percent'] = df_summary['percent_spent'].apply(lambda x: min(x, 100))
+    return total_pemasukan, total_pengeluaran, chart, df_summary
+
+
+def vectorized_dashboard(df_transactions, budgets_data):
+    summary = dashboard.summarize_transactions(df_transactions)
+    return summary, dashboard.budget_status_frame(summary, budgets_data)
+
+
+def measure(fn, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run(sizes=(10_000, 100_000, 1_000_000), repeat=5):
+    results = []
+    for rows in sizes:
+        df_transactions = synthetic_transactions(rows)
+        results.append({
+            'rows': rows,
+            'legacy_ms': measure(legacy_dashboard, df_transactions, BUDGETS, repeat=repeat),
+            'vectorized_ms': measure(vectorized_dashboard, df_transactions, BUDGETS, repeat=repeat),
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    for result in run(sizes=args.sizes, repeat=args.repeat):
+        print(f"{result['rows']:>9} baris: lama {result['legacy_ms']:8.2f} ms | "
+              f"satu groupby {result['vectorized_ms']:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""
+Benchmark ekspor transaksi: streaming per batch vs. memuat semua transaksi sekaligus.
+
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --rows 1000000
+
+Memakai database SQLite sementara yang diisi transaksi acak. Memori puncak diukur dengan
+tracemalloc (objek Python) dan memory pool Arrow (buffer kolom).
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import storage
+
+CATEGORIES = ["Makanan", "Transportasi", "Tagihan", "Hiburan", "Kesehatan", "Belanja"]
+SEED_CHUNK = 50000
+
+
+def seed(db, rows):
+    rng = random.Random(42)
+    for first in range(0, rows, SEED_CHUNK):
+        db.add_transactions(storage.DEFAULT_USER_ID, [
+            {
+                'date': f"{rng.randint(2020, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                'description': f"transaksi {i}",
+                'amount': rng.randint(1, 500) * 1000,
+                'type': 'Pengeluaran',
+                'category': rng.choice(CATEGORIES),
+            }
+            for i in range(first, min(first + SEED_CHUNK, rows))
+        ])
+
+
+def measure(function):
+    """Menjalankan function() dan mengembalikan (hasil, detik, puncak tracemalloc dalam MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def run(rows=1000000):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    os.environ['EFTARI_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['EFTARI_SQLITE_PATH'] = os.path.join(workdir, "bench.db")
+
+    import pyarrow as pa
+
+    import database as db
+    import export
+
+    seed(db, rows)
+    results = {}
+    for file_format in export.EXPORT_FORMATS:
+        path = os.path.join(workdir, f"transaksi.{file_format}")
+        count, seconds, peak_mb = measure(
+            lambda: export.export_transactions(storage.DEFAULT_USER_ID, path, file_format)
+        )
+        results[file_format] = {
+            'rows': count, 'seconds': seconds, 'peak_mb': peak_mb,
+            'file_mb': os.path.getsize(path) / 2**20,
+        }
+
+    # Pembanding: semua transaksi dimuat ke memori lalu ditulis sekali
+    def materialized():
+        import pyarrow.parquet as pq
+        transactions = db.get_backend().get_all_transactions(storage.DEFAULT_USER_ID)
+        table = pa.Table.from_batches([export.chunk_to_batch(transactions)])
+        pq.write_table(table, os.path.join(workdir, "semua.parquet"), compression=export.PARQUET_COMPRESSION)
+        return table.num_rows
+
+    count, seconds, peak_mb = measure(materialized)
+    results['materialized'] = {'rows': count, 'seconds': seconds, 'peak_mb': peak_mb}
+    results['arrow_pool_max_mb'] = pa.default_memory_pool().max_memory() / 2**20
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args(argv)
+
+    results = run(rows=args.rows)
+    for name in ('parquet', 'csv', 'materialized'):
+        result = results[name]
+        line = (f"{name:<13}: {result['rows']:>9,} baris  {result['seconds']:7.2f} s  "
+                f"puncak Python {result['peak_mb']:8.1f} MB")
+        if 'file_mb' in result:
+            line += f"  file {result['file_mb']:7.1f} MB"
+        print(line)
+    print(f"Puncak memory pool Arrow : {results['arrow_pool_max_mb']:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+"""
+Benchmark proyeksi anggaran (forecast.py) atas riwayat rumah tangga sintetis bertahun-tahun.
+
+    python -m benchmarks.bench_forecast
+    python -m benchmarks.bench_forecast --years 8 --transactions-per-month 300
+
+Dua bagian:
+1. Backtest (tanpa backend): untuk setiap bulan yang punya riwayat cukup, proyeksi dibuat pada
+   hari ke-7, 14, dan 21 dari transaksi sampai hari itu, lalu dibandingkan dengan total akhir
+   bulan: galat proyeksi (MAPE), cakupan interval keyakinan, serta deteksi overbudget (presisi,
+   recall, dan berapa hari sebelum anggaran benar-benar habis peringatan pertama muncul).
+2. Lewat database.py (SQLite lokal): pertama kali (statistik riwayat dihitung dari snapshot analitik),
+   model dingin (baca bulan + statistik riwayat tersimpan, tanpa DuckDB), model hangat dari cache, dan
+   setelah satu penulisan (model diperbarui, bukan dibangun ulang).
+"""
+import argparse
+import datetime
+import os
+import statistics
+import tempfile
+import time
+
+import forecast
+import storage
+from benchmarks import synthetic
+from benchmarks.bench_parser import percentile
+
+AS_OF_DAYS = (7, 14, 21)
+BUDGET_FACTOR = 1.2 # Anggaran backtest = anggaran sintetis x faktor ini (agar overbudget tidak mendominasi)
+FLAGGED = (forecast.STATUS_OVER, forecast.STATUS_PROJECTED_OVER)
+
+
+def backtest(years, transactions_per_month, budget_factor=BUDGET_FACTOR):
+    import pandas as pd
+
+    frame = pd.DataFrame(synthetic.generate_household(transactions_per_month=transactions_per_month, years=years))
+    expenses = frame[frame['type'] == 'Pengeluaran']
+    daily = expenses.groupby(['date', 'category'], as_index=False)['amount'].sum().rename(columns={'amount': 'total'})
+    months = sorted(expenses['date'].str[:7].unique())
+    budgets = [{'category': category, 'amount': amount * budget_factor}
+               for category, amount in synthetic.household_budgets(transactions_per_month).items()]
+
+    records, project_ms = [], []
+    for position in range(forecast.HISTORY_MONTHS, len(months)):
+        year_month = months[position]
+        history_start = months[position - forecast.HISTORY_MONTHS]
+        history = daily[(daily['date'] >= f"{history_start}-01") & (daily['date'] < f"{year_month}-01")]
+        month_rows = expenses[expenses['date'].str[:7] == year_month].to_dict('records')
+        model = forecast.MonthForecast.from_transactions(year_month, month_rows, history, history_start)
+        actual = model.project(budgets).set_index('category')
+        for as_of_day in AS_OF_DAYS:
+            start = time.perf_counter()
+            projection = model.project(budgets, as_of_day)
+            project_ms.append((time.perf_counter() - start) * 1000)
+            for row in projection.itertuples():
+                final = actual.loc[row.category]
+                records.append({
+                    'month': year_month, 'day': as_of_day, 'category': row.category,
+                    'actual': final['spent'], 'projected': row.projected,
+                    'low': row.projected_low, 'high': row.projected_high,
+                    'flagged': row.status in FLAGGED, 'over': final['spent'] > row.budget + 0.005,
+                    'actual_runout': final['runout_date'],
+                })
+    return pd.DataFrame.from_records(records), project_ms, len(months) - forecast.HISTORY_MONTHS
+
+
+def summarize_backtest(results):
+    import pandas as pd
+
+    rows = []
+    for day, group in results.groupby('day'):
+        nonzero = group[group['actual'] > 0]
+        flagged, over = group['flagged'], group['over']
+        # Hari antara peringatan (hari proyeksi) dan tanggal anggaran benar-benar habis
+        caught = group[flagged & over & group['actual_runout'].notna()]
+        lead = [(runout.day - day) for runout in pd.to_datetime(caught['actual_runout'])]
+        rows.append({
+            'day': day,
+            'mape': ((nonzero['projected'] - nonzero['actual']).abs() / nonzero['actual']).mean() * 100,
+            'coverage': ((group['actual'] >= group['low'] - 0.5) & (group['actual'] <= group['high'] + 0.5)).mean() * 100,
+            'precision': (flagged & over).sum() / max(flagged.sum(), 1) * 100,
+            'recall': (flagged & over).sum() / max(over.sum(), 1) * 100,
+            'lead_days': statistics.median(lead) if lead else float('nan'),
+        })
+    return rows
+
+
+def database_timings(years, transactions_per_month, repeat=50):
+    """Model proyeksi lewat database.py: dingin, hangat, dan setelah satu penulisan."""
+    import database as db
+    from storage.sqlite_backend import SQLiteBackend
+
+    user_id = storage.DEFAULT_USER_ID
+    end_month = synthetic.DEFAULT_END_MONTH
+    as_of = datetime.date(int(end_month[:4]), int(end_month[5:7]), 15)
+    with tempfile.TemporaryDirectory() as workdir:
+        db.ANALYTICS_DIR = os.path.join(workdir, "analytics")
+        db.set_backend(SQLiteBackend(os.path.join(workdir, "forecast.db")))
+        count = synthetic.load_household(db, user_id, years=years, transactions_per_month=transactions_per_month)
+
+        start = time.perf_counter()
+        db.get_budget_forecast(user_id, end_month, as_of)
+        first_ms = (time.perf_counter() - start) * 1000 # Termasuk sinkronisasi pertama snapshot analitik
+
+        cold_ms = []
+        for _ in range(repeat // 5 or 1):
+            db.reset_forecasts()
+            db.cache.clear()
+            start = time.perf_counter()
+            db.get_budget_forecast(user_id, end_month, as_of)
+            cold_ms.append((time.perf_counter() - start) * 1000)
+
+        warm_ms = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            db.get_budget_forecast(user_id, end_month, as_of)
+            warm_ms.append((time.perf_counter() - start) * 1000)
+
+        model = db.get_month_forecast(user_id, end_month)
+        write_ms = []
+        for i in range(repeat):
+            db.add_transaction(user_id, f"{end_month}-10", f"kopi {i}", 20000, 'Pengeluaran', 'Makanan')
+            start = time.perf_counter()
+            db.get_budget_forecast(user_id, end_month, as_of)
+            write_ms.append((time.perf_counter() - start) * 1000)
+        incremental = db.get_month_forecast(user_id, end_month) is model
+        db.set_backend(SQLiteBackend(":memory:"))
+    return {'rows': count, 'first_ms': first_ms, 'cold_ms': cold_ms, 'warm_ms': warm_ms,
+            'write_ms': write_ms, 'incremental': incremental}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--transactions-per-month", type=int, default=synthetic.DEFAULT_TRANSACTIONS_PER_MONTH)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    results, project_ms, months = backtest(args.years, args.transactions_per_month)
+    print(f"Backtest: {months} bulan x {len(AS_OF_DAYS)} hari proyeksi, {args.transactions_per_month} transaksi/bulan, "
+          f"interval {forecast.DEFAULT_CONFIDENCE:.0%}")
+    for row in summarize_backtest(results):
+        print(f"  hari ke-{row['day']:<3}: MAPE {row['mape']:5.1f}% | cakupan interval {row['coverage']:5.1f}% | "
+              f"overbudget presisi {row['precision']:5.1f}% recall {row['recall']:5.1f}% | "
+              f"peringatan {row['lead_days']:.0f} hari sebelum habis (median)")
+    print(f"  project() semua kategori: median {statistics.median(project_ms):.2f} ms | "
+          f"p99 {percentile(project_ms, 99):.2f} ms")
+
+    timings = database_timings(args.years, args.transactions_per_month, args.repeat)
+    print(f"database.get_budget_forecast ({timings['rows']:,} transaksi):")
+    print(f"  pertama (termasuk sinkronisasi snapshot analitik): {timings['first_ms']:.1f} ms")
+    for label, key in (("dingin", 'cold_ms'), ("hangat", 'warm_ms'), ("setelah penulisan", 'write_ms')):
+        print(f"  {label:<18}: median {statistics.median(timings[key]):7.2f} ms | p99 {percentile(timings[key], 99):7.2f} ms")
+    print(f"  model diperbarui per transaksi (tidak dibangun ulang): {timings['incremental']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""
+Benchmark halaman Riwayat Transaksi: penyusunan DataFrame dan render satu halaman besar.
+
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --rows 50000
+
+Memakai database SQLite sementara yang diisi transaksi acak.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import storage
+
+PAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         "pages", "3_riwayat_transaksi.py")
+CATEGORIES = ["Makanan", "Transportasi", "Tagihan", "Hiburan", "Kesehatan", "Belanja"]
+
+
+def seed(db, rows):
+    rng = random.Random(42)
+    db.add_transactions(storage.DEFAULT_USER_ID, [
+        {
+            'date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'description': f"transaksi {i}",
+            'amount': rng.randint(1, 500) * 1000,
+            'type': 'Pengeluaran',
+            'category': rng.choice(CATEGORIES),
+        }
+        for i in range(rows)
+    ])
+
+
+def run(rows=50000):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    os.environ['EFTARI_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['EFTARI_SQLITE_PATH'] = os.path.join(workdir, "bench.db")
+
+    import database as db
+    import history_table
+    from streamlit.testing.v1 import AppTest
+
+    seed(db, rows)
+    transactions = db.get_transactions_page(storage.DEFAULT_USER_ID, {}, page_size=rows)['transactions']
+
+    start = time.perf_counter()
+    history_table.build_history_frame(transactions)
+    build_seconds = time.perf_counter() - start
+
+    app = AppTest.from_file(PAGE_PATH, default_timeout=120)
+    app.session_state['history_page_size'] = 50000
+    start = time.perf_counter()
+    app.run()
+    render_seconds = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+
+    return {'rows': len(transactions), 'build_ms': build_seconds * 1000, 'render_ms': render_seconds * 1000}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args(argv)
+
+    result = run(rows=args.rows)
+    print(f"Baris                : {result['rows']}")
+    print(f"Susun DataFrame      : {result['build_ms']:8.1f} ms")
+    print(f"Render halaman       : {result['render_ms']:8.1f} ms (termasuk query halaman)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""
+Benchmark view realtime: baca ringkasan bulan dari view di memori vs. cache + rollup backend,
+dan jeda dari penulisan (oleh proses lain) sampai view ikut berubah.
+
+    python -m benchmarks.bench_live_views
+    python -m benchmarks.bench_live_views --rows 50000 --writes 200
+
+Aliran perubahan memakai SQLite di dalam proses (meniru on_snapshot Firestore). Penulisan "dari
+proses lain" ditiru dengan menulis langsung ke backend, tanpa lewat database.py.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import storage
+from benchmarks.bench_export import seed
+from benchmarks.bench_parser import percentile
+from storage.sqlite_backend import SQLiteBackend
+
+BENCH_MONTH = '2026-03'
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def run(rows=50000, reads=2000, writes=200):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    import database as db
+
+    user_id = storage.DEFAULT_USER_ID
+    backend = SQLiteBackend(os.path.join(workdir, "live.db"))
+    db.set_backend(backend)
+    seed(db, rows)
+
+    def read_summary():
+        return db.get_month_summary(user_id, BENCH_MONTH)
+
+    # 1. Tanpa view: cache dingin (setiap baca ke backend) dan cache hangat
+    db.LIVE_VIEWS_ENABLED = False
+    db.cache.clear()
+    cold_us = timed(lambda: (db.cache.clear(), read_summary()), reads)
+    warm_us = timed(read_summary, reads)
+
+    # 2. Dengan view: langganan pertama memuat bulan itu, sesudahnya baca dari memori
+    db.LIVE_VIEWS_ENABLED = True
+    start = time.perf_counter()
+    read_summary()
+    subscribe_ms = (time.perf_counter() - start) * 1000
+    live_us = timed(read_summary, reads)
+
+    # 3. Penulisan dari luar: berapa lama sampai versi view berubah, dan apakah hasil baca ikut benar
+    view = db.get_live_views().peek(user_id, BENCH_MONTH)
+
+    def write_elsewhere(i):
+        backend.add_transaction(user_id, {
+            'date': f"{BENCH_MONTH}-15", 'description': f"luar {i}", 'amount': 1000,
+            'type': 'Pengeluaran', 'category': 'Makanan',
+        })
+
+    propagation_ms = []
+    before = read_summary()['expense']
+    for i in range(writes):
+        version = view.version
+        start = time.perf_counter()
+        threading.Thread(target=write_elsewhere, args=(i,)).start()
+        while view.version == version:
+            time.sleep(0)
+        propagation_ms.append((time.perf_counter() - start) * 1000)
+    expense_delta = read_summary()['expense'] - before
+
+    db.LIVE_VIEWS_ENABLED = False
+    cached_delta = read_summary()['expense'] - before # Cache lama: perubahan luar belum terlihat (menunggu TTL)
+    db.LIVE_VIEWS_ENABLED = True
+    db.reset_live_views()
+
+    return {
+        'rows': rows,
+        'cold_us': cold_us,
+        'warm_us': warm_us,
+        'subscribe_ms': subscribe_ms,
+        'live_us': live_us,
+        'writes': writes,
+        'propagation_ms': propagation_ms,
+        'live_delta': expense_delta,
+        'cached_delta': cached_delta,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    result = run(rows=args.rows, reads=args.reads, writes=args.writes)
+    print(f"{result['rows']:,} transaksi, ringkasan bulan {BENCH_MONTH}")
+    for label, key in (("Cache dingin", 'cold_us'), ("Cache hangat", 'warm_us'), ("View realtime", 'live_us')):
+        timings = result[key]
+        print(f"{label:<14}: median {statistics.median(timings):9.1f} µs | p99 {percentile(timings, 99):9.1f} µs")
+    print(f"Langganan pertama        : {result['subscribe_ms']:.1f} ms")
+    timings = result['propagation_ms']
+    print(f"Penulisan luar -> view   : median {statistics.median(timings):.2f} ms | "
+          f"p99 {percentile(timings, 99):.2f} ms ({result['writes']} penulisan)")
+    expected = result['writes'] * 1000
+    print(f"Terlihat setelah ditulis : view Rp {result['live_delta']:,.0f} / cache Rp {result['cached_delta']:,.0f} "
+          f"(seharusnya Rp {expected:,.0f})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""
+Benchmark overhead instrumentasi (metrics.py): beban kerja yang sama dijalankan dengan
+EFTARI_METRICS=on dan off, masing-masing di proses baru (fungsi dibungkus saat import).
+
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --rounds 5 --renders 20
+
+Diukur dua hal: satu "render" berisi panggilan database seperti dasbor + riwayat (cache
+dibuang setiap render agar backend ikut terbaca), dan render penuh app.py lewat AppTest.
+Selisih on/off antarproses mudah tertutup derau mesin, jadi overhead juga diperkirakan secara
+deterministik: biaya satu pembungkus (diukur di proses ini) x jumlah panggilan terukur per render.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import metrics
+from benchmarks.bench_startup import REPO_ROOT
+
+WORKLOAD_SNIPPET = """
+import json, time, warnings
+warnings.filterwarnings("ignore")
+import database as db
+import storage
+from benchmarks.bench_export import seed
+
+user_id = storage.DEFAULT_USER_ID
+seed(db, {rows})
+for category in ("Makanan", "Transportasi", "Tagihan"):
+    db.add_budget(user_id, category, 1_000_000, effective_month="2020-01")
+
+def render(month):
+    db.cache.clear()
+    db.get_month_summary(user_id, month)
+    db.get_budgets_for_month(user_id, month)
+    db.get_monthly_trends(user_id, month)
+    db.get_transactions_page(user_id, {{'date_from': month + '-01'}})
+    db.get_over_budget_report(user_id)
+
+months = [f"{{2020 + i % 7}}-{{i % 12 + 1:02d}}" for i in range(84)]
+for month in months:
+    render(month) # Pemanasan: view realtime dan indeks tren sudah dibuat
+
+start = time.perf_counter()
+for _ in range({loops}):
+    for month in months:
+        render(month)
+workload = (time.perf_counter() - start) / ({loops} * len(months))
+import metrics
+data = metrics.snapshot()
+calls = sum(histogram.count for (name, _), histogram in data['histograms'].items()
+            if name in ('eftari_call_duration_seconds', 'eftari_backend_duration_seconds'))
+calls_per_render = calls / (({loops} + 1) * len(months))
+
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("app.py", default_timeout=120).run()
+timings = []
+for _ in range({renders}):
+    start = time.perf_counter()
+    AppTest.from_file("app.py", default_timeout=120).run()
+    timings.append(time.perf_counter() - start)
+print(json.dumps({{'workload': workload, 'render': sorted(timings)[len(timings) // 2],
+                  'calls_per_render': calls_per_render}}))
+"""
+
+
+def _run(enabled, rows, loops, renders, tmp_dir, index):
+    env = dict(os.environ)
+    env.update({
+        "EFTARI_METRICS": "on" if enabled else "off",
+        "EFTARI_STORAGE_BACKEND": "sqlite",
+        "EFTARI_SQLITE_PATH": os.path.join(tmp_dir, f"metrics{index}.db"),
+        "EFTARI_AI_CACHE_PATH": os.path.join(tmp_dir, "ai_cache.db"),
+        "EFTARI_ANALYTICS_DIR": os.path.join(tmp_dir, f"analytics{index}"),
+    })
+    code = WORKLOAD_SNIPPET.format(rows=rows, loops=loops, renders=renders)
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def wrapper_cost_us(iterations=200000):
+    """Biaya tambahan satu panggilan terbungkus metrics.timed dibanding panggilan langsung (µs)."""
+    def noop():
+        return None
+
+    wrapped = metrics.timed("bench.noop", noop)
+    timings = {}
+    for label, function in (('direct', noop), ('wrapped', wrapped)):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        timings[label] = (time.perf_counter() - start) / iterations
+    metrics.reset()
+    return (timings['wrapped'] - timings['direct']) * 1e6
+
+
+def run(rounds=3, rows=20000, loops=5, renders=10):
+    """Bergantian off/on per putaran (agar gangguan mesin terbagi rata), median per mode."""
+    results = {False: [], True: []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index in range(rounds):
+            for enabled in (False, True):
+                results[enabled].append(_run(enabled, rows, loops, renders, tmp_dir, f"{index}{enabled:d}"))
+    summary = {}
+    for key in ('workload', 'render'):
+        off = statistics.median(result[key] for result in results[False])
+        on = statistics.median(result[key] for result in results[True])
+        summary[key] = {'off_ms': off * 1000, 'on_ms': on * 1000, 'overhead_pct': (on - off) / off * 100}
+    calls_per_render = statistics.median(result['calls_per_render'] for result in results[True])
+    cost_us = wrapper_cost_us()
+    summary['estimate'] = {
+        'wrapper_us': cost_us,
+        'calls_per_render': calls_per_render,
+        'overhead_pct': cost_us * calls_per_render / (summary['workload']['off_ms'] * 1000) * 100,
+    }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--loops", type=int, default=5)
+    parser.add_argument("--renders", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    result = run(rounds=args.rounds, rows=args.rows, loops=args.loops, renders=args.renders)
+    for label, key in (("Panggilan database per render", 'workload'), ("Render app.py (AppTest)", 'render')):
+        row = result[key]
+        print(f"{label:<30}: off {row['off_ms']:8.3f} ms | on {row['on_ms']:8.3f} ms | "
+              f"overhead {row['overhead_pct']:+.2f}%")
+    estimate = result['estimate']
+    print(f"Perkiraan deterministik        : {estimate['wrapper_us']:.2f} µs per pembungkus x "
+          f"{estimate['calls_per_render']:.1f} panggilan per render = {estimate['overhead_pct']:.2f}% "
+          f"dari panggilan database per render")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
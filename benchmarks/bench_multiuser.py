@@ -0,0 +1,125 @@
+"""
+Uji beban multi-pengguna: banyak pengguna bersamaan menulis dan membaca data masing-masing.
+
+    python -m benchmarks.bench_multiuser
+    python -m benchmarks.bench_multiuser --users 200 --threads 32 --shards 4 --hot-user-rows 200000
+
+Setiap thread mensimulasikan satu sesi: menyimpan transaksi, membuka riwayat, dasbor, dan tren.
+Seorang pengguna "panas" dengan data besar ikut diisi untuk menunjukkan bahwa latensi pengguna
+lain tidak bergantung pada ukuran data seluruh deployment. Di akhir, isolasi data diperiksa.
+"""
+import argparse
+import concurrent.futures
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_parser import percentile
+
+HOT_USER_ID = "pengguna-panas"
+CATEGORIES = ["Makanan", "Transportasi", "Tagihan", "Hiburan", "Kesehatan", "Belanja"]
+
+
+def random_transactions(rng, count):
+    return [
+        {
+            'date': f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'description': f"transaksi {i}",
+            'amount': rng.randint(1, 500) * 1000,
+            'type': 'Pengeluaran',
+            'category': rng.choice(CATEGORIES),
+        }
+        for i in range(count)
+    ]
+
+
+def user_session(db, user_id, rounds, rows_per_round, seed):
+    """Satu sesi pengguna; mengembalikan list (operasi, detik)."""
+    rng = random.Random(seed)
+    timings = []
+    for _ in range(rounds):
+        for operation, call in (
+            ('tulis', lambda: db.add_transactions(user_id, random_transactions(rng, rows_per_round))),
+            ('riwayat', lambda: db.get_transactions_page(user_id, {}, page_size=50)),
+            ('dasbor', lambda: db.get_month_summary(user_id, f"2026-{rng.randint(1, 12):02d}")),
+            ('tren', lambda: db.get_monthly_trends(user_id, "2026-12", 12)),
+        ):
+            start = time.perf_counter()
+            call()
+            timings.append((operation, time.perf_counter() - start))
+    return timings
+
+
+def run(users=100, threads=16, rounds=5, rows_per_round=20, shards=1, hot_user_rows=100_000):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    os.environ['EFTARI_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['EFTARI_SQLITE_PATH'] = os.path.join(workdir, "bench.db")
+    os.environ['EFTARI_STORAGE_SHARDS'] = str(shards)
+    if shards > 1:
+        # Pengguna panas mendapat shard sendiri
+        os.environ['EFTARI_HOT_USERS'] = f"{HOT_USER_ID}:{shards - 1}"
+
+    import database as db
+
+    if hot_user_rows:
+        db.add_transactions(HOT_USER_ID, random_transactions(random.Random(0), hot_user_rows))
+
+    user_ids = [f"pengguna-{index:04d}" for index in range(users)]
+    timings = []
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(user_session, db, user_id, rounds, rows_per_round, seed)
+            for seed, user_id in enumerate(user_ids)
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            timings += future.result()
+    elapsed = time.perf_counter() - start
+
+    # Isolasi: setiap pengguna hanya melihat transaksinya sendiri
+    expected = rounds * rows_per_round
+    leaked = [user_id for user_id in user_ids if len(db.get_all_transactions(user_id)) != expected]
+
+    by_operation = {}
+    for operation, seconds in timings:
+        by_operation.setdefault(operation, []).append(seconds)
+    return {
+        'users': users,
+        'shards': shards,
+        'operations': len(timings),
+        'ops_per_second': len(timings) / elapsed if elapsed else 0.0,
+        'isolation_errors': leaked,
+        'latency': {
+            operation: {'p50_ms': percentile(values, 50) * 1000, 'p99_ms': percentile(values, 99) * 1000}
+            for operation, values in by_operation.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--rows-per-round", type=int, default=20)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--hot-user-rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    result = run(users=args.users, threads=args.threads, rounds=args.rounds,
+                 rows_per_round=args.rows_per_round, shards=args.shards, hot_user_rows=args.hot_user_rows)
+
+    print(f"Pengguna             : {result['users']} ({result['shards']} shard)")
+    print(f"Operasi              : {result['operations']:,} ({result['ops_per_second']:,.0f} operasi/detik)")
+    for operation, stats in result['latency'].items():
+        print(f"  {operation:<8}: p50 {stats['p50_ms']:8.2f} ms | p99 {stats['p99_ms']:8.2f} ms")
+    if result['isolation_errors']:
+        print(f"GAGAL: data {len(result['isolation_errors'])} pengguna tercampur!")
+        return 1
+    print("Isolasi data         : OK")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+"""
+Benchmark jalur parsing input cepat: parser lokal vs AI (model tiruan dengan latensi buatan).
+
+    python -m benchmarks.bench_parser
+    python -m benchmarks.bench_parser --ai-latency 1.5 --repeat 20
+
+Melaporkan persentase input yang selesai di parser lokal dan latensi p50/p99 tiap jalur.
+"""
+import argparse
+import statistics
+import time
+
+import ai_helper
+import local_parser
+
+BUDGET_CATEGORIES = ["Makanan", "Transportasi", "Tagihan", "Hiburan", "Kesehatan", "Belanja",
+                     "Lain-Lain (Pengeluaran)"]
+INCOME_CATEGORIES = ["Gaji", "Bonus", "Investasi", "Lain-Lain (Pemasukan)"]
+
+# Contoh input yang mewakili pemakaian sehari-hari
+SAMPLE_INPUTS = [
+    "makan siang di warteg 25rb", "kopi 20rb", "ojol ke kantor 15rb", "gaji 5 juta",
+    "bayar listrik 350k", "beli pulsa 50rb", "bensin motor 30rb", "parkir 5rb",
+    "nonton bioskop 60rb", "obat flu 45rb", "belanja bulanan 1.2 juta", "bonus akhir tahun 2jt",
+    "dividen saham 750rb", "sarapan bubur 12rb", "grab pulang 28rb", "Rp 25.000 makan malam",
+    "langganan netflix 54rb", "mie ayam 15rb", "beli 3 buku 150.000", "transfer ke adik 200rb",
+    "thr 3 juta", "jajan cilok 5rb", "tiket kereta 85rb", "bayar kos 1.5 juta",
+    "sumbangan masjid 50rb", "servis laptop 400rb", "sedekah jumat 20rb", "kuota internet 100k",
+    "ganti oli 65rb", "dapat uang dari ortu 500rb",
+]
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def stub_responder(prompt):
+    return {'type': 'Pengeluaran', 'amount': 10000, 'description': 'stub',
+            'category': 'Lain-Lain (Pengeluaran)'}
+
+
+def run(repeat=10, ai_latency=0.2):
+    ai_helper.set_model(ai_helper.LocalStubModel(stub_responder, latency=ai_latency))
+    timings = {'lokal': [], 'ai': []}
+
+    for round_number in range(repeat):
+        # Cache AI dikosongkan tiap putaran agar yang diukur adalah jalur model, bukan cache
+        ai_helper.set_parse_cache(ai_helper.ParseCache(':memory:'))
+        for text in SAMPLE_INPUTS:
+            start = time.perf_counter()
+            _, source = ai_helper.parse_transaction(text, BUDGET_CATEGORIES, INCOME_CATEGORIES)
+            timings[source].append(time.perf_counter() - start)
+
+    total = sum(len(values) for values in timings.values())
+    return {
+        'inputs': total,
+        'local_share': len(timings['lokal']) / total if total else 0.0,
+        'paths': {
+            source: {
+                'count': len(values),
+                'p50_ms': percentile(values, 50) * 1000,
+                'p99_ms': percentile(values, 99) * 1000,
+                'mean_ms': (statistics.fmean(values) * 1000) if values else 0.0,
+            }
+            for source, values in timings.items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--ai-latency", type=float, default=0.2,
+                        help="Latensi buatan model AI tiruan (detik)")
+    parser.add_argument("--threshold", type=float, default=local_parser.CONFIDENCE_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    local_parser.CONFIDENCE_THRESHOLD = args.threshold
+    result = run(repeat=args.repeat, ai_latency=args.ai_latency)
+
+    print(f"Input diproses       : {result['inputs']}")
+    print(f"Selesai di lokal     : {result['local_share']:.0%}")
+    for source, stats in result['paths'].items():
+        print(f"Jalur {source:<5} ({stats['count']:>4}x): p50 {stats['p50_ms']:8.3f} ms | "
+              f"p99 {stats['p99_ms']:8.3f} ms | rata-rata {stats['mean_ms']:8.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
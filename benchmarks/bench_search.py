@@ -0,0 +1,150 @@
+"""
+Benchmark indeks pencarian riwayat (search.py) atas rumah tangga sintetis berukuran besar.
+
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --rows 200000 --unique-ratio 0.5
+
+Indeks dibangun langsung dari generator sintetis (tanpa backend), lalu diukur: kueri kata,
+awalan, salah ketik, beberapa kata, digabung filter tanggal/jumlah/kategori, halaman berikutnya
+(cursor), kueri pertama (peta salah ketik dibangun saat pertama dibutuhkan), penulisan
+inkremental, serta ukuran dan waktu simpan/muat file indeks. Sebagai pembanding, pencarian
+naif (substring di setiap deskripsi) atas data yang sama.
+Sebagian deskripsi diberi nomor referensi unik (--unique-ratio), meniru mutasi bank, agar
+tabel teks dan kosakata tidak hanya berisi puluhan deskripsi.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import search
+from benchmarks import synthetic
+from benchmarks.bench_parser import percentile
+
+MERCHANTS = ["indomaret", "alfamart", "tokopedia", "shopee", "gopay", "ovo", "dana", "bca", "mandiri"]
+
+QUERIES = [
+    ("Satu kata", "kopi", {}),
+    ("Awalan", "mak", {}),
+    ("Salah ketik", "blanja", {}),
+    ("Dua kata", "tiket kereta", {}),
+    ("Kata + filter", "ojol", {'date_from': "2025-01-01", 'date_to': "2025-12-31", 'amount_min': 20000.0}),
+    ("Kategori + tipe", "bayar", {'category': "Tagihan", 'type': "Pengeluaran"}),
+    ("Merchant (unik)", "tokopedia", {}),
+    ("Tanpa hasil", "zzzz", {}),
+]
+
+
+def generate_rows(rows, unique_ratio, seed=7):
+    """Transaksi sintetis dengan ID, sebanyak rows (tahun ditambah sampai cukup)."""
+    rng = random.Random(seed)
+    transactions_per_month = synthetic.DEFAULT_TRANSACTIONS_PER_MONTH * 10
+    years = rows // (transactions_per_month * 12) + 1
+    result = []
+    for number, row in enumerate(synthetic.generate_household(transactions_per_month=transactions_per_month,
+                                                              years=years, seed=seed)):
+        if len(result) >= rows:
+            break
+        if rng.random() < unique_ratio:
+            row['description'] = f"{row['description']} {rng.choice(MERCHANTS)} ref {rng.randrange(10 ** 8)}"
+        row['id'] = f"{number:012x}"
+        result.append(row)
+    return result
+
+
+def timed_ms(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def naive_search(rows, query, limit=50):
+    words = search.words(query)
+    matches = [row for row in rows if all(word in row['description'].lower() for word in words)]
+    matches.sort(key=lambda row: (row['date'], row['id']), reverse=True)
+    return matches[:limit]
+
+
+def run(rows=1_000_000, unique_ratio=0.2, repeat=20, page_size=50):
+    data = generate_rows(rows, unique_ratio)
+    index = search.SearchIndex()
+    start = time.perf_counter()
+    index.apply(added=data)
+    build_s = time.perf_counter() - start
+
+    results = []
+    for label, query, filters in QUERIES:
+        start = time.perf_counter()
+        first, total = index.search(query, filters, None, page_size)
+        first_ms = (time.perf_counter() - start) * 1000
+        timings = timed_ms(lambda: index.search(query, filters, None, page_size), repeat)
+        after = (first[-1]['date'], first[-1]['id']) if first else None
+        next_timings = timed_ms(lambda: index.search(query, filters, after, page_size), repeat)
+        results.append({'label': label, 'query': query, 'total': total, 'first_ms': first_ms,
+                        'ms': timings, 'next_ms': next_timings})
+
+    naive_ms = timed_ms(lambda: naive_search(data, "kopi", page_size), 3)
+
+    # Penulisan inkremental: tambah satu, lalu ubah satu (tanggal lamanya diketahui)
+    extra = [dict(data[0], id=f"extra{i}", description="kopi tambahan") for i in range(repeat)]
+    add_ms = [timed_ms(lambda row=row: index.apply(added=[row]), 1)[0] for row in extra]
+    update_ms = [timed_ms(lambda row=row: index.apply(added=[dict(row, description="teh tambahan")],
+                                                     removed=[row['id']], removed_dates={row['id']: row['date']}), 1)[0]
+                 for row in extra]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index.path = os.path.join(workdir, "search.idx")
+        start = time.perf_counter()
+        index.save()
+        save_s = time.perf_counter() - start
+        file_mb = os.path.getsize(index.path) / 1e6
+        start = time.perf_counter()
+        loaded = search.SearchIndex(index.path)
+        load_s = time.perf_counter() - start
+        loaded_matches = loaded.search("kopi", None, None, page_size)[1] == index.search("kopi", None, None, page_size)[1]
+
+    return {
+        'rows': len(data),
+        'texts': len(index.texts),
+        'terms': len(index.vocabulary),
+        'build_s': build_s,
+        'queries': results,
+        'naive_ms': naive_ms,
+        'add_ms': add_ms,
+        'update_ms': update_ms,
+        'save_s': save_s,
+        'load_s': load_s,
+        'file_mb': file_mb,
+        'loaded_matches': loaded_matches,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--unique-ratio", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    result = run(rows=args.rows, unique_ratio=args.unique_ratio, repeat=args.repeat)
+    print(f"{result['rows']:,} transaksi | {result['texts']:,} teks unik | {result['terms']:,} term | "
+          f"dibangun dalam {result['build_s']:.1f} s")
+    for row in result['queries']:
+        print(f"{row['label']:<16} {row['query']!r:<15}: {row['total']:>9,} hasil | "
+              f"median {statistics.median(row['ms']):6.1f} ms | p99 {percentile(row['ms'], 99):6.1f} ms | "
+              f"halaman berikutnya {statistics.median(row['next_ms']):6.1f} ms | pertama {row['first_ms']:7.1f} ms")
+    print(f"Pembanding naif (substring per baris, 'kopi'): median {statistics.median(result['naive_ms']):.0f} ms")
+    print(f"Penulisan inkremental: tambah {statistics.median(result['add_ms']):.2f} ms | "
+          f"ubah {statistics.median(result['update_ms']):.2f} ms (median)")
+    print(f"File indeks: {result['file_mb']:.1f} MB | simpan {result['save_s']:.2f} s | muat {result['load_s']:.2f} s | "
+          f"hasil sama setelah dimuat: {result['loaded_matches']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark waktu startup: waktu import per modul dan waktu render pertama tiap halaman.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 5 --json startup.json
+
+Setiap pengukuran dijalankan di proses Python baru (cold start), dengan backend SQLite
+sementara, jadi tidak butuh jaringan. Pakai --max-import-ms untuk gagal (exit code 1)
+jika import modul aplikasi melebihi batas.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modul aplikasi (yang harus tetap ringan) dan library berat sebagai pembanding
+APP_MODULES = ["database", "storage", "ai_helper", "ai_resilience", "local_parser", "bank_import", "metrics", "export"]
+LIBRARY_MODULES = ["streamlit", "pandas", "plotly.express", "google.generativeai", "firebase_admin.firestore"]
+
+PAGES = [
+    "app.py",
+    "pages/1_input_transaksi.py",
+    "pages/2_manajemen_anggaran.py",
+    "pages/3_riwayat_transaksi.py",
+    "pages/4_import_mutasi.py",
+]
+
+IMPORT_SNIPPET = """
+import time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+RENDER_SNIPPET = """
+import time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({page!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit("Exception: " + at.exception[0].message)
+print(elapsed)
+"""
+
+
+def _run_snippet(code, env):
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _median_ms(code, env, repeat):
+    return statistics.median(_run_snippet(code, env) for _ in range(repeat)) * 1000
+
+
+def run(repeat=3):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = dict(os.environ)
+        env.update({
+            "EFTARI_STORAGE_BACKEND": "sqlite",
+            "EFTARI_SQLITE_PATH": os.path.join(tmp_dir, "startup.db"),
+            "EFTARI_AI_CACHE_PATH": os.path.join(tmp_dir, "ai_cache.db"),
+        })
+        imports = {
+            module: _median_ms(IMPORT_SNIPPET.format(module=module), env, repeat)
+            for module in APP_MODULES + LIBRARY_MODULES
+        }
+        renders = {
+            page: _median_ms(RENDER_SNIPPET.format(page=os.path.join(REPO_ROOT, page)), env, repeat)
+            for page in PAGES
+        }
+    return {'import_ms': imports, 'first_render_ms': renders}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu startup e-Ftari.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    parser.add_argument("--max-import-ms", type=float,
+                        help="Gagal jika import salah satu modul aplikasi melebihi batas ini")
+    args = parser.parse_args(argv)
+
+    result = run(repeat=args.repeat)
+
+    print("Waktu import (median, proses baru):")
+    for module, ms in result['import_ms'].items():
+        label = "aplikasi" if module in APP_MODULES else "library"
+        print(f"  {module:<28} {ms:9.1f} ms  ({label})")
+    print("Waktu render pertama (termasuk import):")
+    for page, ms in result['first_render_ms'].items():
+        print(f"  {page:<28} {ms:9.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.max_import_ms is not None:
+        slow = [module for module in APP_MODULES if result['import_ms'][module] > args.max_import_ms]
+        if slow:
+            print(f"GAGAL: import melebihi {args.max_import_ms:.0f} ms: {', '.join(slow)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,119 @@
+"""
+Benchmark antrean tulis lokal: latensi simpan langsung ke backend lambat vs. lewat antrean,
+lalu sinkronisasi setelah backend sempat tidak bisa dihubungi.
+
+    python -m benchmarks.bench_write_queue
+    python -m benchmarks.bench_write_queue --saves 200 --latency-ms 80
+
+Backend jarak jauh ditiru dengan SQLite lokal yang diberi jeda per panggilan (seperti round-trip
+Firestore) dan bisa dibuat "offline".
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import storage
+from benchmarks.bench_parser import percentile
+from storage.sqlite_backend import SQLiteBackend
+from storage.write_queue import QueuedBackend
+
+WRITE_METHODS = ('add_transaction', 'add_transactions', 'save_transactions',
+                 'update_transaction', 'delete_transaction', 'delete_transactions')
+
+
+class SlowBackend(SQLiteBackend):
+    """SQLite dengan jeda per penulisan; offline=True membuat setiap penulisan gagal."""
+
+    def __init__(self, path, latency):
+        super().__init__(path=path)
+        self.latency = latency
+        self.offline = False
+        self.calls = 0
+
+
+def _slow(method_name):
+    def method(self, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.offline:
+            raise ConnectionError("backend tidak bisa dihubungi")
+        return getattr(SQLiteBackend, method_name)(self, *args, **kwargs)
+    return method
+
+
+for _method_name in WRITE_METHODS:
+    setattr(SlowBackend, _method_name, _slow(_method_name))
+
+
+def run(saves=200, latency_ms=80):
+    workdir = tempfile.mkdtemp(prefix="eftari-bench-")
+    import database as db
+
+    user_id = storage.DEFAULT_USER_ID
+    latency = latency_ms / 1000
+
+    def save_all(label):
+        timings = []
+        for i in range(saves):
+            start = time.perf_counter()
+            db.save_transactions(user_id, [{
+                'key': f"{label}-{i}", 'date': f"2026-{i % 12 + 1:02d}-15", 'description': f"{label} {i}",
+                'amount': 1000 + i, 'type': 'Pengeluaran', 'category': 'Makanan',
+            }])
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    # 1. Langsung ke backend lambat
+    direct = SlowBackend(os.path.join(workdir, "direct.db"), latency)
+    db.set_backend(direct)
+    direct_ms = save_all("langsung")
+
+    # 2. Lewat antrean, backend sedang offline: simpan tetap secepat disk lokal
+    remote = SlowBackend(os.path.join(workdir, "remote.db"), latency)
+    remote.offline = True
+    queued = QueuedBackend(remote, path=os.path.join(workdir, "queue.db"), start_worker=False)
+    db.set_backend(queued)
+    queued_ms = save_all("antre")
+    visible = len(db.get_all_transactions(user_id))
+
+    # 3. Backend kembali online: antrean dikirim dalam batch
+    remote.offline = False
+    remote.calls = 0
+    start = time.perf_counter()
+    applied = queued.drain()
+    drain_seconds = time.perf_counter() - start
+
+    return {
+        'saves': saves,
+        'direct_ms': direct_ms,
+        'queued_ms': queued_ms,
+        'visible_before_sync': visible,
+        'applied': applied,
+        'drain_calls': remote.calls,
+        'drain_seconds': drain_seconds,
+        'remote_rows': len(remote.get_all_transactions(user_id)),
+        'drift': storage.rebuild_rollups(remote, user_id, dry_run=True),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    args = parser.parse_args(argv)
+
+    result = run(saves=args.saves, latency_ms=args.latency_ms)
+    for label, key in (("Langsung", 'direct_ms'), ("Lewat antrean", 'queued_ms')):
+        timings = result[key]
+        print(f"{label:<14}: median {statistics.median(timings):7.2f} ms | p99 {percentile(timings, 99):7.2f} ms")
+    print(f"Terlihat sebelum sinkron : {result['visible_before_sync']} / {result['saves']} transaksi")
+    print(f"Sinkronisasi             : {result['applied']} entri, {result['drain_calls']} panggilan backend, "
+          f"{result['drain_seconds']:.2f} s")
+    print(f"Tersimpan di backend     : {result['remote_rows']} transaksi, drift rollup: {len(result['drift'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+"""
+Suite benchmark yang bisa diulang: satu rumah tangga sintetis (benchmarks/synthetic.py) dimuat ke
+SQLite sementara, lalu jalur kode asli diukur. Hasil disimpan sebagai baseline JSON; mode
+pembanding gagal (exit code 1) jika ada kasus yang melambat melebihi ambang. Sepenuhnya offline
+(SQLite lokal, model AI tiruan, cache AI di memori).
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json --threshold 0.25
+    python -m benchmarks.suite --quick --cases dashboard_cold ai_parse
+
+Baseline bergantung pada mesin: buat di mesin yang sama dengan tempat pembandingan dijalankan.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import statistics
+import tempfile
+import time
+
+import storage
+from benchmarks import synthetic
+from benchmarks.bench_parser import SAMPLE_INPUTS, percentile
+from benchmarks.bench_startup import REPO_ROOT
+
+BASELINE_FORMAT = 1
+DEFAULT_REPEAT = 15
+RENDER_REPEAT = 5 # Render halaman lewat AppTest jauh lebih lambat; diulang lebih sedikit
+DEFAULT_THRESHOLD = 0.25 # Regresi = median lebih lambat 25% dari baseline
+MIN_REGRESSION_MS = 0.05 # Selisih di bawah ini dianggap derau, berapa pun persentasenya
+
+DEFAULT_PROFILE = {
+    'transactions_per_month': synthetic.DEFAULT_TRANSACTIONS_PER_MONTH,
+    'years': synthetic.DEFAULT_YEARS,
+    'end_month': synthetic.DEFAULT_END_MONTH,
+    'category_skew': synthetic.DEFAULT_CATEGORY_SKEW,
+    'seed': 42,
+}
+QUICK_PROFILE = dict(DEFAULT_PROFILE, transactions_per_month=40, years=1)
+
+BUDGET_CATEGORIES = [category for category, _, _ in synthetic.EXPENSE_CATEGORIES]
+HISTORY_PAGE_PATH = os.path.join(REPO_ROOT, "pages", "3_riwayat_transaksi.py")
+DASHBOARD_PAGE_PATH = os.path.join(REPO_ROOT, "app.py")
+BATCH_LINE = re.compile(r'^\s+(\d+)\. "', re.MULTILINE)
+
+
+def stub_responder(prompt):
+    """Model tiruan: array JSON untuk prompt batch (satu item per baris bernomor), objek untuk satu input."""
+    numbers = BATCH_LINE.findall(prompt)
+    item = {'type': 'Pengeluaran', 'amount': 10000, 'description': 'stub', 'category': 'Makanan'}
+    if numbers:
+        return [dict(item, index=int(number)) for number in numbers]
+    return item
+
+
+def build_cases(db, user_id, month):
+    """List kasus: dict {'name', 'run', 'prepare' (dipanggil sebelum setiap ulangan, tidak diukur), 'repeat'}."""
+    import ai_helper
+    import dashboard
+    import history_table
+
+    def reset_reads():
+        # Kasus "cold": semua cache baca, view realtime, indeks tren, model proyeksi, dan figure dibuang
+        db.cache.clear()
+        db.reset_live_views()
+        db.reset_trend_index()
+        db.reset_forecasts()
+        dashboard._expense_pie_figure.cache_clear()
+
+    def reset_parse_cache():
+        ai_helper.set_parse_cache(ai_helper.ParseCache(':memory:'))
+
+    def dashboard_computation():
+        # Sama dengan app.py tanpa Streamlit: ringkasan, status anggaran, pie chart
+        summary = dashboard.summary_from_month_summary(db.get_month_summary(user_id, month))
+        budgets_data = db.get_budgets_for_month(user_id, month)
+        dashboard.budget_status_frame(summary, budgets_data)
+        if summary['expense_by_category']:
+            dashboard.expense_pie_figure(summary)
+
+    def history_page():
+        page = db.get_transactions_page(user_id, {}, page_size=1000)
+        history_table.build_history_frame(page['transactions'])
+
+    def render(path, session_state=None):
+        from streamlit.testing.v1 import AppTest
+
+        def run():
+            app = AppTest.from_file(path, default_timeout=120)
+            for key, value in (session_state or {}).items():
+                app.session_state[key] = value
+            app.run()
+            if app.exception:
+                raise RuntimeError(f"{os.path.basename(path)}: {app.exception[0].message}")
+        return run
+
+    def ai_parse():
+        for text in SAMPLE_INPUTS:
+            ai_helper.parse_transaction(text, BUDGET_CATEGORIES, synthetic.INCOME_CATEGORIES)
+
+    def ai_parse_model():
+        categories = BUDGET_CATEGORIES + synthetic.INCOME_CATEGORIES
+        for text in SAMPLE_INPUTS:
+            ai_helper.parse_transaction_with_ai(text, categories)
+
+    def ai_parse_batch():
+        ai_helper.parse_transactions_batch(SAMPLE_INPUTS, BUDGET_CATEGORIES, synthetic.INCOME_CATEGORIES)
+
+    return [
+        {'name': 'month_transactions_cold', 'prepare': reset_reads,
+         'run': lambda: db.get_transactions_for_month(user_id, month)},
+        {'name': 'month_transactions_warm', 'run': lambda: db.get_transactions_for_month(user_id, month)},
+        {'name': 'all_transactions_cold', 'prepare': reset_reads, 'run': lambda: db.get_all_transactions(user_id)},
+        {'name': 'dashboard_cold', 'prepare': reset_reads, 'run': dashboard_computation},
+        {'name': 'dashboard_warm', 'run': dashboard_computation},
+        {'name': 'trends_cold', 'prepare': reset_reads, 'run': lambda: db.get_monthly_trends(user_id, month)},
+        {'name': 'forecast_cold', 'prepare': reset_reads,
+         'run': lambda: db.get_budget_forecast(user_id, month, _month_date(month))},
+        {'name': 'forecast_warm', 'run': lambda: db.get_budget_forecast(user_id, month, _month_date(month))},
+        {'name': 'history_page_cold', 'prepare': reset_reads, 'run': history_page},
+        {'name': 'ai_parse', 'prepare': reset_parse_cache, 'run': ai_parse},
+        {'name': 'ai_parse_model', 'prepare': reset_parse_cache, 'run': ai_parse_model},
+        {'name': 'ai_parse_batch', 'prepare': reset_parse_cache, 'run': ai_parse_batch},
+        {'name': 'dashboard_render', 'prepare': reset_reads, 'repeat': RENDER_REPEAT,
+         'run': render(DASHBOARD_PAGE_PATH, {'month_selector': _month_date(month)})},
+        {'name': 'history_render', 'prepare': reset_reads, 'repeat': RENDER_REPEAT,
+         'run': render(HISTORY_PAGE_PATH)},
+    ]
+
+
+def _month_date(month):
+    import datetime
+
+    return datetime.date(int(month[:4]), int(month[5:7]), 15)
+
+
+def time_case(case, repeat):
+    """
+    Menjalankan satu kasus (1x pemanasan, lalu `repeat` kali). Seperti timeit, garbage collector
+    dijalankan sebelum dan dimatikan selama setiap pengukuran. Mengembalikan statistik dalam ms.
+    """
+    repeat = min(repeat, case.get('repeat', repeat))
+    prepare = case.get('prepare')
+    timings = []
+    for index in range(repeat + 1):
+        if prepare is not None:
+            prepare()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            case['run']()
+            elapsed = (time.perf_counter() - start) * 1000
+        finally:
+            gc.enable()
+        if index:
+            timings.append(elapsed)
+    return {
+        'median_ms': statistics.median(timings),
+        'p95_ms': percentile(timings, 95),
+        'min_ms': min(timings),
+        'repeat': repeat,
+    }
+
+
+def run(profile=DEFAULT_PROFILE, repeat=DEFAULT_REPEAT, case_names=None, progress=None):
+    """Memuat rumah tangga sintetis lalu mengukur kasus-kasus. Mengembalikan dict siap disimpan sebagai JSON."""
+    workdir = tempfile.mkdtemp(prefix="eftari-suite-")
+    # Semua yang mungkin membuka koneksi diarahkan ke lokal sebelum modul aplikasi diimpor
+    os.environ['EFTARI_STORAGE_BACKEND'] = 'sqlite'
+    os.environ['EFTARI_SQLITE_PATH'] = os.path.join(workdir, "suite.db")
+    os.environ['EFTARI_WRITE_QUEUE'] = 'off'
+
+    import ai_helper
+    import database as db
+    from storage.sqlite_backend import SQLiteBackend
+
+    db.set_backend(SQLiteBackend(os.path.join(workdir, "suite.db")))
+    db.ANALYTICS_DIR = os.path.join(workdir, "analytics")
+    ai_helper.set_model(ai_helper.LocalStubModel(stub_responder))
+    ai_helper.set_parse_cache(ai_helper.ParseCache(':memory:'))
+
+    user_id = storage.DEFAULT_USER_ID
+    start = time.perf_counter()
+    rows = synthetic.load_household(db, user_id, **profile)
+    load_seconds = time.perf_counter() - start
+
+    month = profile['end_month']
+    results = {}
+    for case in build_cases(db, user_id, month):
+        if case_names and case['name'] not in case_names:
+            continue
+        results[case['name']] = time_case(case, repeat)
+        if progress:
+            progress(case['name'], results[case['name']])
+
+    return {
+        'format': BASELINE_FORMAT,
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'machine': platform.machine()},
+        'profile': dict(profile),
+        'rows': rows,
+        'load_seconds': load_seconds,
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Membandingkan median per kasus. Mengembalikan list dict {'name', 'baseline_ms', 'current_ms',
+    'change', 'status'} dengan status 'regresi', 'lebih cepat', 'stabil', atau 'baru'.
+    Regresi hanya jika median DAN waktu tercepat sama-sama melambat melebihi ambang: lonjakan
+    sesaat di mesin (yang menggeser median) tidak menggagalkan pembandingan.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append({'name': name, 'baseline_ms': None, 'current_ms': result['median_ms'],
+                         'change': None, 'status': 'baru'})
+            continue
+        base_ms, current_ms = base['median_ms'], result['median_ms']
+        change = (current_ms - base_ms) / base_ms if base_ms else 0.0
+        min_change = (result['min_ms'] - base['min_ms']) / base['min_ms'] if base['min_ms'] else 0.0
+        if change > threshold and min_change > threshold and current_ms - base_ms > MIN_REGRESSION_MS:
+            status = 'regresi'
+        elif change < -threshold and base_ms - current_ms > MIN_REGRESSION_MS:
+            status = 'lebih cepat'
+        else:
+            status = 'stabil'
+        rows.append({'name': name, 'baseline_ms': base_ms, 'current_ms': current_ms,
+                     'change': change, 'status': status})
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument("--compare", help="Bandingkan dengan baseline JSON; exit code 1 jika ada regresi")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Batas regresi relatif terhadap median baseline (0.25 = 25%%)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--cases", nargs="+", help="Hanya jalankan kasus ini")
+    parser.add_argument("--quick", action="store_true", help="Profil kecil (1 tahun, 40 transaksi/bulan)")
+    parser.add_argument("--transactions-per-month", type=int)
+    parser.add_argument("--years", type=int)
+    parser.add_argument("--category-skew", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    baseline = None
+    profile = dict(QUICK_PROFILE if args.quick else DEFAULT_PROFILE)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        # Tanpa argumen profil, pakai profil baseline agar datanya sama persis
+        profile = dict(baseline['profile'])
+    for key in ('transactions_per_month', 'years', 'category_skew', 'seed'):
+        if getattr(args, key) is not None:
+            profile[key] = getattr(args, key)
+
+    def report(name, result):
+        print(f"  {name:<26} median {result['median_ms']:10.3f} ms | p95 {result['p95_ms']:10.3f} ms "
+              f"({result['repeat']}x)")
+
+    print(f"Profil: {profile}")
+    result = run(profile=profile, repeat=args.repeat, case_names=args.cases, progress=report)
+    print(f"{result['rows']:,} transaksi dimuat dalam {result['load_seconds']:.1f} s")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as result_file:
+            json.dump(result, result_file, indent=2)
+        print(f"Baseline disimpan ke {args.save}")
+
+    if baseline is None:
+        return 0
+    if baseline['profile'] != result['profile']:
+        print(f"PERINGATAN: profil berbeda dari baseline {baseline['profile']}")
+    if baseline.get('environment') != result['environment']:
+        print(f"PERINGATAN: lingkungan berbeda dari baseline {baseline.get('environment')}")
+
+    rows = compare(baseline, result, args.threshold)
+    print(f"\nDibanding {args.compare} (ambang {args.threshold:.0%}):")
+    for row in rows:
+        if row['baseline_ms'] is None:
+            print(f"  {row['name']:<26} {'-':>10}    -> {row['current_ms']:10.3f} ms  baru")
+            continue
+        print(f"  {row['name']:<26} {row['baseline_ms']:10.3f} -> {row['current_ms']:10.3f} ms "
+              f"{row['change']:+7.1%}  {row['status']}")
+    regressions = [row['name'] for row in rows if row['status'] == 'regresi']
+    if regressions:
+        print(f"GAGAL: {len(regressions)} kasus melambat lebih dari {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("OK: tidak ada regresi.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+"""
+Generator data rumah tangga sintetis untuk benchmark (deterministik per seed).
+
+Satu rumah tangga: gaji bulanan (plus bonus sesekali), lalu sejumlah pengeluaran per bulan yang
+tersebar ke kategori dengan kemiringan Zipf (kategori pertama paling sering, seperti makanan),
+jumlah log-normal di sekitar nilai khas tiap kategori, dan deskripsi dari kosakata per kategori.
+
+    from benchmarks import synthetic
+    synthetic.load_household(db, user_id, transactions_per_month=120, years=3)
+"""
+import math
+import random
+
+# Kategori pengeluaran, dari yang paling sering: (nama, jumlah khas dalam Rp, contoh deskripsi)
+EXPENSE_CATEGORIES = [
+    ("Makanan", 35_000, ["makan siang warteg", "kopi susu", "nasi padang", "sarapan bubur", "mie ayam",
+                         "belanja sayur", "martabak", "bakso", "gorengan", "makan malam"]),
+    ("Transportasi", 25_000, ["ojol ke kantor", "grab pulang", "bensin motor", "parkir", "tol",
+                              "tiket krl", "tiket kereta", "taksi bandara"]),
+    ("Belanja", 150_000, ["belanja bulanan", "sabun dan sampo", "baju kerja", "sepatu", "alat dapur",
+                          "belanja online"]),
+    ("Tagihan", 350_000, ["bayar listrik", "air pdam", "internet rumah", "pulsa", "kuota internet",
+                          "iuran bpjs"]),
+    ("Hiburan", 80_000, ["nonton bioskop", "langganan netflix", "spotify", "karaoke", "buku novel"]),
+    ("Kesehatan", 120_000, ["obat flu", "vitamin", "periksa dokter", "apotek", "cek gigi"]),
+    ("Lain-Lain (Pengeluaran)", 100_000, ["sumbangan masjid", "kado ulang tahun", "transfer ke adik",
+                                          "servis laptop", "potong rambut"]),
+]
+INCOME_CATEGORIES = ["Gaji", "Bonus", "Investasi", "Lain-Lain (Pemasukan)"]
+
+DEFAULT_TRANSACTIONS_PER_MONTH = 120
+DEFAULT_YEARS = 3
+DEFAULT_END_MONTH = "2026-06"
+DEFAULT_CATEGORY_SKEW = 1.1 # Eksponen Zipf: 0 = merata, makin besar makin timpang
+DEFAULT_SALARY = 8_000_000
+LOAD_CHUNK = 20000
+
+
+def months_back(end_month, count):
+    """List 'YYYY-MM' sebanyak count yang berakhir di end_month, terlama dulu."""
+    year, month = int(end_month[:4]), int(end_month[5:7])
+    months = []
+    for _ in range(count):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months[::-1]
+
+
+def category_weights(skew, count=len(EXPENSE_CATEGORIES)):
+    """Bobot Zipf 1/k^skew untuk kategori ke-1..count."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+def generate_household(transactions_per_month=DEFAULT_TRANSACTIONS_PER_MONTH, years=DEFAULT_YEARS,
+                       end_month=DEFAULT_END_MONTH, category_skew=DEFAULT_CATEGORY_SKEW,
+                       salary=DEFAULT_SALARY, seed=42):
+    """Generator dict transaksi ('date', 'description', 'amount', 'type', 'category'), urut per bulan."""
+    rng = random.Random(seed)
+    weights = category_weights(category_skew)
+    for year_month in months_back(end_month, years * 12):
+        yield {'date': f"{year_month}-25", 'description': "gaji bulanan", 'amount': float(salary),
+               'type': 'Pemasukan', 'category': 'Gaji'}
+        if year_month.endswith("-12") or rng.random() < 0.05:
+            yield {'date': f"{year_month}-20", 'description': "bonus", 'amount': float(salary // 2),
+                   'type': 'Pemasukan', 'category': 'Bonus'}
+        # Jumlah pengeluaran per bulan sedikit bervariasi (+/- 20%)
+        count = max(0, round(transactions_per_month * rng.uniform(0.8, 1.2)))
+        for category_index in rng.choices(range(len(EXPENSE_CATEGORIES)), weights=weights, k=count):
+            category, typical_amount, descriptions = EXPENSE_CATEGORIES[category_index]
+            # Log-normal: kebanyakan dekat nilai khas, sesekali jauh lebih besar; dibulatkan ke Rp 500
+            amount = typical_amount * math.exp(rng.gauss(0, 0.6))
+            yield {
+                'date': f"{year_month}-{rng.randint(1, 28):02d}",
+                'description': rng.choice(descriptions),
+                'amount': float(max(500, round(amount / 500) * 500)),
+                'type': 'Pengeluaran',
+                'category': category,
+            }
+
+
+def household_budgets(transactions_per_month=DEFAULT_TRANSACTIONS_PER_MONTH, category_skew=DEFAULT_CATEGORY_SKEW):
+    """Anggaran bulanan per kategori: {kategori: jumlah}, sekitar pengeluaran khasnya (dibulatkan Rp 10.000)."""
+    weights = category_weights(category_skew)
+    return {
+        category: round(transactions_per_month * weight / sum(weights) * typical_amount, -4) or 10_000
+        for (category, typical_amount, _), weight in zip(EXPENSE_CATEGORIES, weights)
+    }
+
+
+def load_household(db, user_id, budget_month=None, **profile):
+    """
+    Mengisi database (modul database) dengan satu rumah tangga sintetis, beserta anggaran
+    bulanan per kategori (household_budgets). Argumen profile diteruskan ke
+    generate_household. Mengembalikan jumlah transaksi.
+    """
+    first_month = months_back(profile.get('end_month', DEFAULT_END_MONTH),
+                              profile.get('years', DEFAULT_YEARS) * 12)[0]
+    budgets = household_budgets(profile.get('transactions_per_month', DEFAULT_TRANSACTIONS_PER_MONTH),
+                                profile.get('category_skew', DEFAULT_CATEGORY_SKEW))
+    for category, amount in budgets.items():
+        db.add_budget(user_id, category, amount, effective_month=budget_month or first_month)
+
+    total, chunk = 0, []
+    for transaction in generate_household(**profile):
+        chunk.append(transaction)
+        if len(chunk) >= LOAD_CHUNK:
+            total += len(db.add_transactions(user_id, chunk))
+            chunk = []
+    if chunk:
+        total += len(db.add_transactions(user_id, chunk))
+    return total
@@ -0,0 +1,59 @@
+"""
+Riwayat anggaran per bulan berlaku.
+
+Setiap kategori punya daftar versi yang terurut menurut bulan berlaku ('YYYY-MM').
+Anggaran untuk suatu bulan adalah versi terakhir yang berlaku pada atau sebelum bulan itu,
+dicari dengan bisect (bukan memindai semua versi).
+"""
+from bisect import bisect_right
+
+from storage import BUDGET_BASE_MONTH
+
+
+class BudgetHistory:
+    """Indeks versi anggaran satu pengguna, dibangun sekali dari backend.get_budget_versions()."""
+
+    def __init__(self, versions):
+        self.months = {}  # kategori -> list bulan berlaku (terurut)
+        self.amounts = {} # kategori -> list jumlah (None = anggaran dihentikan)
+        for version in sorted(versions, key=lambda v: (v['category'], v['effective_month'])):
+            category = version['category']
+            months = self.months.setdefault(category, [])
+            amounts = self.amounts.setdefault(category, [])
+            if months and months[-1] == version['effective_month']:
+                amounts[-1] = version['amount']
+            else:
+                months.append(version['effective_month'])
+                amounts.append(version['amount'])
+
+    def amount_for(self, category, year_month):
+        """Anggaran kategori yang berlaku di year_month, atau None jika tidak ada."""
+        months = self.months.get(category)
+        if not months:
+            return None
+        position = bisect_right(months, year_month) - 1
+        if position < 0:
+            return None
+        return self.amounts[category][position]
+
+    def budgets_for_month(self, year_month):
+        """List dict {'category', 'amount'} yang berlaku di year_month, urut jumlah terbesar."""
+        budgets = []
+        for category in self.months:
+            amount = self.amount_for(category, year_month)
+            if amount is not None:
+                budgets.append({'category': category, 'amount': amount})
+        budgets.sort(key=lambda budget: (-budget['amount'], budget['category']))
+        return budgets
+
+    def versions(self, category):
+        """Riwayat versi satu kategori: list dict {'effective_month', 'amount'} (terlama dulu)."""
+        return [
+            {'effective_month': month, 'amount': amount}
+            for month, amount in zip(self.months.get(category, []), self.amounts.get(category, []))
+        ]
+
+    @staticmethod
+    def describe_month(effective_month):
+        """Label bulan berlaku untuk tampilan ('sejak awal' untuk anggaran lama)."""
+        return "sejak awal" if effective_month == BUDGET_BASE_MONTH else effective_month
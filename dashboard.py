@@ -0,0 +1,141 @@
+"""
+Perhitungan dasbor sebagai fungsi murni (tanpa Streamlit), dipakai oleh app.py.
+
+- summarize_transactions: satu kali groupby(['type', 'category']) atas DataFrame transaksi.
+- budget_status_frame: anggaran vs. aktual secara vektor (clip, bukan apply per baris).
+- over_budget_report: logika yang sama untuk semua bulan sekaligus (anggaran yang berlaku per bulan).
+- expense_pie_figure: figure Plotly di-memoize berdasarkan hash isi ringkasan.
+"""
+import functools
+import hashlib
+import json
+
+# pandas dan plotly diimpor di dalam fungsi agar impor modul ini tetap ringan
+
+BUDGET_STATUS_COLUMNS = ['category', 'budget', 'actual_spending', 'percent_spent', 'progress', 'over_budget']
+
+
+def make_summary(income, expense, expense_by_category):
+    """
+    Ringkasan dasbor yang ringkas: dict {'income', 'expense', 'expense_by_category', 'hash'}.
+    expense_by_category diurutkan dari yang terbesar; 'hash' mewakili isi ringkasan.
+    """
+    items = sorted(
+        ((str(category), float(total)) for category, total in expense_by_category.items()
+         if abs(total) > 0.005),
+        key=lambda item: (-item[1], item[0])
+    )
+    summary = {
+        'income': float(income),
+        'expense': float(expense),
+        'expense_by_category': dict(items),
+    }
+    summary['hash'] = summary_hash(summary)
+    return summary
+
+
+def summary_hash(summary):
+    """Hash isi ringkasan (pemasukan, pengeluaran, total per kategori)."""
+    payload = json.dumps(
+        [round(summary['income'], 2), round(summary['expense'], 2),
+         sorted((category, round(total, 2)) for category, total in summary['expense_by_category'].items())],
+        ensure_ascii=False
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def summary_from_month_summary(month_summary):
+    """Ringkasan dasbor dari hasil database.get_month_summary (sudah teragregasi di backend)."""
+    return make_summary(
+        month_summary['income'], month_summary['expense'], month_summary['expense_by_category']
+    )
+
+
+def summarize_transactions(df_transactions):
+    """
+    Ringkasan dasbor dari DataFrame transaksi mentah (kolom 'type', 'category', 'amount').
+    Semua total dihitung dalam satu kali groupby(['type', 'category']).
+    """
+    if df_transactions.empty:
+        return make_summary(0.0, 0.0, {})
+
+    totals = df_transactions.groupby(['type', 'category'], observed=True, sort=False)['amount'].sum()
+    by_type = totals.groupby(level='type', observed=True).sum()
+
+    expense_by_category = {}
+    if 'Pengeluaran' in by_type.index:
+        expense_by_category = totals.xs('Pengeluaran', level='type').to_dict()
+
+    return make_summary(
+        by_type.get('Pemasukan', 0.0), by_type.get('Pengeluaran', 0.0), expense_by_category
+    )
+
+
+def budget_status_frame(summary, budgets_data):
+    """
+    Tabel status anggaran vs. aktual, satu baris per kategori anggaran.
+    progress = persentase terpakai dibatasi 0-100; over_budget = kelebihan (0 jika masih di bawah).
+    """
+    import pandas as pd
+
+    if not budgets_data:
+        return pd.DataFrame(columns=BUDGET_STATUS_COLUMNS)
+
+    df_status = pd.DataFrame.from_records(budgets_data, columns=['category', 'amount'])
+    df_status = df_status.rename(columns={'amount': 'budget'})
+    df_status['actual_spending'] = df_status['category'].map(summary['expense_by_category'])
+    return _add_budget_status(df_status)[BUDGET_STATUS_COLUMNS]
+
+
+def _add_budget_status(df_status):
+    """Menambahkan percent_spent, progress, dan over_budget dari kolom budget dan actual_spending."""
+    import pandas as pd
+
+    df_status['budget'] = pd.to_numeric(df_status['budget'], errors='coerce').fillna(0.0).astype('float64')
+    df_status['actual_spending'] = df_status['actual_spending'].fillna(0.0).astype('float64')
+
+    # Anggaran 0 dianggap tidak terbatas persentasenya (hindari pembagian nol)
+    budget = df_status['budget'].where(df_status['budget'] > 0)
+    df_status['percent_spent'] = (df_status['actual_spending'] / budget * 100).fillna(0.0)
+    df_status['progress'] = df_status['percent_spent'].clip(lower=0, upper=100)
+    df_status['over_budget'] = (df_status['actual_spending'] - df_status['budget']).clip(lower=0)
+    return df_status
+
+
+def over_budget_report(rollups, budget_history):
+    """
+    Semua (bulan, kategori) yang pengeluarannya melebihi anggaran yang berlaku di bulan itu.
+    rollups: dict {'YYYY-MM': rollup} (storage/rollups.py); budget_history: budgets.BudgetHistory.
+    Mengembalikan DataFrame berkolom 'year_month' + BUDGET_STATUS_COLUMNS, bulan terbaru dulu.
+    """
+    import pandas as pd
+
+    records = [
+        (year_month, category, budget_history.amount_for(category, year_month), total)
+        for year_month, rollup in rollups.items()
+        for category, total in rollup['expense_by_category'].items()
+    ]
+    df_report = pd.DataFrame.from_records(
+        records, columns=['year_month', 'category', 'budget', 'actual_spending']
+    )
+    # Kategori tanpa anggaran di bulan itu tidak bisa overbudget
+    df_report = _add_budget_status(df_report[df_report['budget'].notna()].copy())
+    df_report = df_report[df_report['over_budget'] > 0.005]
+    return df_report.sort_values(['year_month', 'over_budget'], ascending=[False, False]) \
+                    .reset_index(drop=True)[['year_month'] + BUDGET_STATUS_COLUMNS]
+
+
+def expense_pie_figure(summary):
+    """Pie chart pengeluaran per kategori. Figure yang sama dipakai ulang selama isi ringkasan sama."""
+    return _expense_pie_figure(summary['hash'], tuple(summary['expense_by_category'].items()))
+
+
+@functools.lru_cache(maxsize=64)
+def _expense_pie_figure(content_hash, items):
+    import plotly.express as px  # Library untuk grafik interaktif
+
+    return px.pie(
+        values=[total for _, total in items],
+        names=[category for category, _ in items],
+        title='Proporsi Pengeluaran per Kategori'
+    )
@@ -1,149 +1,903 @@
-import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
 import datetime
 import calendar
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
 
-# --- Inisialisasi Firebase ---
+import analytics
+import budgets
+import dashboard
+import forecast
+import metrics
+import search
+import storage
+import trends
+from live_views import LiveViewManager
 
-# Path ke file service account lokal Anda (yang ada di folder .streamlit)
-LOCAL_SERVICE_ACCOUNT_PATH = ".streamlit/eftari-app-firebase.json" 
-# (Sesuaikan nama file ini jika Anda menamainya berbeda)
+# --- Inisialisasi Backend Penyimpanan ---
+# Backend (Firestore atau SQLite lokal) dipilih lewat konfigurasi, lihat storage/__init__.py.
+# Semua fungsi di bawah memakai antarmuka yang sama, jadi halaman tidak perlu tahu backend mana yang aktif.
+# Koneksi dibuat saat pertama kali dipakai (bukan saat modul diimpor), lalu dipakai ulang per proses.
+# Data dipisah per pengguna: setiap fungsi data menerima user_id sebagai argumen pertama
+# (di halaman Streamlit, ambil dari user_session.current_user_id()).
 
-def init_firestore():
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """Mengembalikan backend aktif; dibuat sekali saat pertama kali dibutuhkan."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _attach_backend(storage.with_write_queue(storage.get_backend_from_config()))
+    return _backend
+
+def _attach_backend(backend):
+    # Setiap panggilan backend diukur latensi dan jumlah dokumennya (lihat metrics.py)
+    backend = metrics.instrument_backend(backend)
+    # Backend berantrean memberi tahu saat penulisan tersinkron ke backend jarak jauh
+    add_listener = getattr(backend, 'add_listener', None)
+    if add_listener is not None:
+        add_listener(_on_queued_writes_applied)
+    return backend
+
+def _on_queued_writes_applied(user_id, months, reconcile=False):
     """
-    Menginisialisasi koneksi ke Firebase Firestore.
-    Cek koneksi yang ada dulu. Jika tidak ada, buat koneksi baru.
-    Coba pakai kredensial lokal dulu, jika gagal, pakai st.secrets (untuk deploy).
+    Penulisan dari antrean sudah diterapkan di backend jarak jauh: cache bulan itu (months None =
+    semua bulan pengguna) dibuang dan indeks tren dibangun ulang dari rollup (data lama transaksi
+    kini pasti diketahui). reconcile=True: hasilnya berbeda dengan yang sudah diterapkan lokal saat
+    menulis, jadi view realtime dan indeks pencarian bulan itu juga dibaca ulang dari backend.
+    """
+    if months is None:
+        _invalidate_user_transactions(user_id)
+    else:
+        _invalidate_transaction(user_id, *months)
+    reset_trend_index(user_id)
+    reset_forecasts(user_id)
+    if reconcile:
+        _discard_live_views(user_id, months)
+        _invalidate_search_index(user_id, months)
+
+def flush_pending_writes(timeout=30.0):
     """
-    if not firebase_admin._apps:
+    Menunggu antrean tulis lokal tersinkron (jika ada). Dipanggil skrip CLI sebelum selesai,
+    karena thread sinkronisasi ikut berhenti saat proses berakhir. Mengembalikan True jika kosong.
+    """
+    flush = getattr(get_backend(), 'flush', None)
+    return flush(timeout) if flush is not None else True
+
+def get_sync_status(user_id):
+    """Status antrean tulis pengguna {'pending', 'failed', 'last_error'}, atau None tanpa antrean."""
+    sync_status = getattr(get_backend(), 'sync_status', None)
+    return sync_status(user_id) if sync_status is not None else None
+
+def retry_failed_writes(user_id):
+    """Mengantrekan ulang penulisan yang gagal disinkronkan (setelah penyebabnya diperbaiki). Mengembalikan jumlahnya."""
+    retry = getattr(get_backend(), 'retry_failed_writes', None)
+    return retry(user_id) if retry is not None else 0
+
+def discard_failed_writes(user_id):
+    """Membuang penulisan yang gagal disinkronkan; perubahannya hilang dari tampilan. Mengembalikan jumlahnya."""
+    discard = getattr(get_backend(), 'discard_failed_writes', None)
+    return discard(user_id) if discard is not None else 0
+
+# --- Cache Baca ---
+# Setiap rerun Streamlit memanggil fungsi baca berkali-kali. Hasilnya disimpan di cache bersama
+# (per proses) dengan TTL, dan setiap penulisan membuang entri yang terdampak saja.
+# TTL hanya berlaku untuk perubahan dari luar proses ini; penulisan sendiri langsung terlihat.
+CACHE_TTL_SECONDS = float(storage.read_config("cache_ttl", "EFTARI_CACHE_TTL", 60))
+CACHE_MAX_ROWS = int(storage.read_config("cache_max_rows", "EFTARI_CACHE_MAX_ROWS", 50000))
+
+cache = storage.QueryCache(ttl=CACHE_TTL_SECONDS, max_rows=CACHE_MAX_ROWS)
+if metrics.METRICS_ENABLED:
+    cache.observer = metrics.record_cache_lookup
+
+# Semua kunci cache diawali user_id: data dan invalidasi tiap pengguna terpisah.
+
+def _budget_history_key(user_id):
+    return (user_id, 'budgets', 'history')
+
+def _over_budget_report_key(user_id):
+    return (user_id, 'reports', 'over_budget')
+
+def _transactions_all_key(user_id):
+    return (user_id, 'transactions', 'all')
+
+def _month_key(user_id, year_month):
+    return (user_id, 'transactions', 'month', year_month)
+
+def _summary_key(user_id, year_month):
+    return (user_id, 'transactions', 'summary', year_month)
+
+def _page_key(user_id, filters, cursor, page_size):
+    return (user_id, 'transactions', 'page', tuple(sorted(filters.items())), cursor, page_size)
+
+def _invalidate_budgets(user_id):
+    cache.invalidate(_budget_history_key(user_id))
+    cache.invalidate(_over_budget_report_key(user_id))
+    # Daftar kategori dipakai sebagai petunjuk agregasi, jadi ringkasan juga dibuang
+    cache.invalidate_where(lambda key, rows: key[:3] == (user_id, 'transactions', 'summary'))
+
+def _invalidate_transaction(user_id, *dates):
+    """
+    Membuang cache pengguna yang terdampak oleh perubahan satu transaksi:
+    daftar semua transaksi, serta daftar dan ringkasan bulan dari setiap tanggal yang diberikan
+    (tanggal lama dan baru saat transaksi di-update).
+    """
+    cache.invalidate(_transactions_all_key(user_id))
+    cache.invalidate(_over_budget_report_key(user_id))
+    # Halaman riwayat bisa bergeser karena satu transaksi, jadi semua halaman pengguna ini dibuang
+    cache.invalidate_where(lambda key, rows: key[:3] == (user_id, 'transactions', 'page'))
+    for date in dates:
+        year_month = str(date)[:7]
+        cache.invalidate(_month_key(user_id, year_month))
+        cache.invalidate(_summary_key(user_id, year_month))
+    _mark_analytics_dirty(user_id, [str(date)[:7] for date in dates])
+
+def _invalidate_user_transactions(user_id):
+    """Seperti _invalidate_transaction, untuk perubahan yang bulannya tidak diketahui: semua bulan pengguna."""
+    cache.invalidate(_over_budget_report_key(user_id))
+    cache.invalidate_where(lambda key, rows: key[:2] == (user_id, 'transactions'))
+    _mark_analytics_dirty(user_id, [_ALL_MONTHS])
+
+def set_backend(new_backend):
+    """
+    Mengganti backend yang aktif (misal ke SQLite untuk pengujian/benchmark offline).
+    Cache ikut dikosongkan. Mengembalikan backend sebelumnya.
+    """
+    global _backend
+    with _backend_lock:
+        old_backend = _backend
+        _backend = _attach_backend(new_backend)
+    cache.clear()
+    reset_trend_index()
+    reset_analytics_snapshots()
+    reset_live_views()
+    reset_search_indexes()
+    reset_forecasts()
+    return old_backend
+
+# --- Indeks Tren Bulanan ---
+# Satu indeks per pengguna, dibangun sekali dari semua rollup bulanannya (satu kali baca), lalu
+# diperbarui langsung oleh setiap penulisan transaksi dari proses ini. Seperti cache, dibangun
+# ulang setelah TTL agar perubahan dari luar proses (misal rebuild_rollups.py) ikut terlihat.
+# Jumlah indeks dibatasi; pengguna yang paling lama tidak dipakai dibuang dulu (LRU).
+TREND_INDEX_MAX_USERS = 256
+
+_trend_indexes = OrderedDict() # user_id -> (built_at, trends.MonthlySeries)
+_trend_generation = 0 # Naik setiap kali ada penulisan transaksi
+_trend_index_lock = threading.Lock()
+
+def get_trend_index(user_id):
+    """Mengembalikan indeks deret waktu bulanan (trends.MonthlySeries) milik pengguna."""
+    global _trend_generation
+    with _trend_index_lock:
+        entry = _trend_indexes.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] <= CACHE_TTL_SECONDS:
+            _trend_indexes.move_to_end(user_id)
+            return entry[1]
+        generation = _trend_generation
+
+    # Dibangun di luar lock agar pengguna lain tidak ikut menunggu pembacaan rollup ini
+    index = trends.MonthlySeries.from_rollups(get_backend().get_all_rollups(user_id))
+    with _trend_index_lock:
+        # Sama seperti QueryCache: jika ada penulisan selama membaca, hasilnya tidak disimpan
+        if generation == _trend_generation:
+            _trend_indexes[user_id] = (time.monotonic(), index)
+            while len(_trend_indexes) > TREND_INDEX_MAX_USERS:
+                _trend_indexes.popitem(last=False)
+    return index
+
+def reset_trend_index(user_id=None):
+    """Membuang indeks tren satu pengguna (atau semua); dibangun ulang saat berikutnya dibutuhkan."""
+    with _trend_index_lock:
+        if user_id is None:
+            _trend_indexes.clear()
+        else:
+            _trend_indexes.pop(user_id, None)
+
+def _update_trend_index(user_id, changes):
+    """Menerapkan perubahan [(data transaksi, +1/-1), ...] ke indeks tren pengguna jika sudah dibangun."""
+    global _trend_generation
+    with _trend_index_lock:
+        _trend_generation += 1
+        entry = _trend_indexes.get(user_id)
+        if entry is None:
+            return
+        for data, sign in changes:
+            entry[1].apply(data, sign)
+
+
+# --- Snapshot Analitik ---
+# Salinan transaksi per bulan dalam file Parquet lokal, dikueri dengan DuckDB (lihat analytics.py).
+# Disinkronkan saat dibaca: segera setelah ada penulisan dari proses ini (bulan yang terdampak
+# ditandai kotor), atau jika sinkronisasi terakhir lebih lama dari TTL cache.
+ANALYTICS_DIR = storage.read_config("analytics_dir", "EFTARI_ANALYTICS_DIR", "analytics")
+ANALYTICS_MAX_USERS = 64
+
+_analytics_snapshots = OrderedDict() # user_id -> analytics.AnalyticsSnapshot
+_analytics_dirty = {} # user_id -> set bulan 'YYYY-MM' yang berubah sejak sinkronisasi terakhir
+_ALL_MONTHS = '*' # Penanda di _analytics_dirty: semua bulan dibaca ulang
+_analytics_lock = threading.Lock()
+
+def _analytics_directory(user_id):
+    # user_id bisa berupa email; nama direktori memakai hash agar aman untuk sistem file
+    return os.path.join(ANALYTICS_DIR, hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:16])
+
+def get_analytics_snapshot(user_id):
+    """Snapshot analitik pengguna (analytics.AnalyticsSnapshot), disinkronkan dulu jika perlu."""
+    with _analytics_lock:
+        snapshot = _analytics_snapshots.get(user_id)
+        if snapshot is None:
+            snapshot = analytics.AnalyticsSnapshot(_analytics_directory(user_id))
+            _analytics_snapshots[user_id] = snapshot
+            while len(_analytics_snapshots) > ANALYTICS_MAX_USERS:
+                _analytics_snapshots.popitem(last=False)[1].close()
+        _analytics_snapshots.move_to_end(user_id)
+        dirty = _analytics_dirty.pop(user_id, None)
+        if dirty is not None and _ALL_MONTHS in dirty:
+            dirty = (dirty - {_ALL_MONTHS}) | set(snapshot.months)
+
+    synced_at = snapshot.synced_at
+    if dirty is not None or synced_at is None or time.time() - synced_at > CACHE_TTL_SECONDS:
+        # Disinkronkan di luar lock global: hanya pengguna ini yang menunggu
         try:
-            # 1. Coba koneksi lokal (untuk laptop Anda)
-            cred = credentials.Certificate(LOCAL_SERVICE_ACCOUNT_PATH)
-        except Exception as e:
-            # 2. Jika gagal (di server Streamlit), pakai secrets
-            print(f"Koneksi lokal gagal: {e}. Mencoba st.secrets...")
-            # Ambil dari st.secrets (formatnya sudah kita siapkan)
-            cred_dict = st.secrets["firebase_credentials"]["key"]
-            cred = credentials.Certificate(cred_dict)
-            
-        firebase_admin.initialize_app(cred)
-        print("Firebase App terinisialisasi.")
-    
-    return firestore.client()
-
-# Panggil fungsi inisialisasi dan simpan koneksi DB
-db = init_firestore()
+            snapshot.sync(get_backend(), user_id, dirty or ())
+        except Exception:
+            if dirty:
+                _mark_analytics_dirty(user_id, dirty)
+            raise
+    return snapshot
+
+def reset_analytics_snapshots():
+    """Menutup semua snapshot yang terbuka (file Parquet di disk tetap ada)."""
+    with _analytics_lock:
+        for snapshot in _analytics_snapshots.values():
+            snapshot.close()
+        _analytics_snapshots.clear()
+        _analytics_dirty.clear()
+
+def _mark_analytics_dirty(user_id, months):
+    with _analytics_lock:
+        _analytics_dirty.setdefault(user_id, set()).update(months)
+
+
+# --- View Realtime ---
+# Untuk backend yang mendukung aliran perubahan (on_snapshot Firestore; SQLite di dalam proses),
+# ringkasan dan transaksi bulanan dibaca dari view di memori (lihat live_views.py). Satu langganan
+# per (pengguna, bulan) untuk seluruh proses, dipakai bersama semua sesi; perubahan dari proses
+# lain langsung masuk tanpa menunggu TTL cache. Penulisan dari proses ini juga diterapkan langsung
+# ke view; dengan antrean tulis lokal, data awal view ikut berisi penulisan yang masih antre.
+LIVE_VIEWS_ENABLED = storage.read_config("live_views", "EFTARI_LIVE_VIEWS", "on") != "off"
+
+_live_views = None # live_views.LiveViewManager untuk backend aktif
+_live_views_lock = threading.Lock()
+
+def get_live_views():
+    """Pengelola view realtime, atau None jika dimatikan atau backend tidak mendukung perubahan realtime."""
+    global _live_views
+    if not LIVE_VIEWS_ENABLED:
+        return None
+    if _live_views is None:
+        backend = get_backend()
+        if not getattr(backend, 'supports_watch', False):
+            return None
+        with _live_views_lock:
+            if _live_views is None:
+                _live_views = LiveViewManager(backend, month_date_range)
+    return _live_views
+
+def reset_live_views():
+    """Berhenti berlangganan semua view (dipanggil saat backend diganti)."""
+    global _live_views
+    with _live_views_lock:
+        manager, _live_views = _live_views, None
+    if manager is not None:
+        manager.close()
+
+def _live_view(user_id, year_month, subscribe=True):
+    """View bulan itu yang siap dibaca, atau None (pembacaan lalu memakai cache + backend)."""
+    manager = get_live_views()
+    if manager is None:
+        return None
+    if not subscribe:
+        view = manager.peek(user_id, year_month)
+        return view if view is not None and view.ready.is_set() else None
+    try:
+        return manager.get(user_id, year_month)
+    except Exception as e:
+        print(f"Error berlangganan perubahan {year_month}: {e}")
+        return None
+
+def get_live_version(user_id, year_month):
+    """Versi view realtime bulan itu (naik setiap ada perubahan), atau None jika tidak ada view."""
+    view = _live_view(user_id, year_month, subscribe=False)
+    return view.version if view is not None else None
+
+def _discard_live_views(user_id, months=None):
+    # View dibaca ulang dari backend saat berikutnya dibutuhkan
+    manager = _live_views
+    if manager is not None:
+        manager.discard(user_id, months)
+
+def _apply_live(user_id, changes):
+    # changes: list (jenis, transaksi dengan 'id'), lihat live_views.MonthView.apply
+    manager = _live_views
+    if manager is not None:
+        manager.apply_local(user_id, changes)
+
+
+# --- Indeks Pencarian ---
+# Pencarian teks di riwayat memakai indeks terbalik per pengguna di memori (lihat search.py),
+# disimpan ke file di SEARCH_DIR agar setelah restart tidak perlu membaca ulang semua transaksi.
+# Disinkronkan per bulan (hash rollup) jika sinkronisasi terakhir lebih lama dari TTL cache;
+# penulisan dari proses ini diterapkan langsung ke indeks yang sudah dimuat.
+SEARCH_DIR = storage.read_config("search_dir", "EFTARI_SEARCH_DIR", "search_index")
+SEARCH_INDEX_MAX_USERS = 16
+
+_search_indexes = OrderedDict() # user_id -> search.SearchIndex
+_search_lock = threading.Lock()
+
+def _search_index_path(user_id):
+    # Sama seperti snapshot analitik: nama file memakai hash user_id
+    return os.path.join(SEARCH_DIR, hashlib.sha1(user_id.encode('utf-8')).hexdigest()[:16] + ".idx")
+
+def get_search_index(user_id):
+    """Indeks pencarian pengguna (search.SearchIndex), dimuat dari file dan disinkronkan dulu jika perlu."""
+    with _search_lock:
+        index = _search_indexes.get(user_id)
+        if index is not None:
+            _search_indexes.move_to_end(user_id)
+    if index is None:
+        # File indeks dimuat di luar lock global: pengguna lain tidak ikut menunggu
+        loaded = search.SearchIndex(_search_index_path(user_id))
+        with _search_lock:
+            index = _search_indexes.setdefault(user_id, loaded)
+            while len(_search_indexes) > SEARCH_INDEX_MAX_USERS:
+                _search_indexes.popitem(last=False)
+
+    synced_at = index.synced_at
+    if synced_at is None or time.time() - synced_at > CACHE_TTL_SECONDS:
+        index.sync(get_backend(), user_id)
+    return index
+
+def rebuild_search_index(user_id):
+    """Membangun ulang indeks pencarian pengguna dari semua transaksinya. Mengembalikan jumlah transaksi terindeks."""
+    index = get_search_index(user_id)
+    index.clear()
+    index.sync(get_backend(), user_id)
+    return len(index)
+
+def reset_search_indexes():
+    """Melepas semua indeks pencarian dari memori (file di disk tetap ada)."""
+    with _search_lock:
+        _search_indexes.clear()
+
+def _invalidate_search_index(user_id, months=None):
+    # Bulan-bulan itu dibaca ulang dari backend pada pencarian berikutnya
+    with _search_lock:
+        index = _search_indexes.get(user_id)
+    if index is not None:
+        index.invalidate(months)
+
+def _update_search_index(user_id, added=(), removed=()):
+    # added: transaksi (dengan 'id') baru/versi barunya; removed: transaksi lama (dengan 'id' dan 'date')
+    with _search_lock:
+        index = _search_indexes.get(user_id)
+    if index is not None:
+        index.apply(added=added, removed=[data['id'] for data in removed],
+                    removed_dates={data['id']: data['date'] for data in removed if data.get('date')})
+
+
+# --- Proyeksi Anggaran ---
+# Satu model proyeksi per (pengguna, bulan), lihat forecast.py: statistik harian riwayat dari
+# snapshot analitik (disimpan, lihat _forecast_history) plus pengeluaran harian bulan itu. Penulisan dari proses ini diterapkan
+# langsung ke model bulan itu; penulisan ke bulan-bulan riwayatnya membuang model. Dibangun ulang
+# setelah TTL cache, atau saat versi view realtime bulan itu berubah (penulisan dari proses lain).
+FORECAST_MAX_MODELS = 256
+FORECAST_HISTORY_NAME = "forecast_history.json" # Di direktori snapshot analitik pengguna
+FORECAST_HISTORY_MONTHS_KEPT = 12
+
+_forecasts = OrderedDict() # (user_id, 'YYYY-MM') -> (built_at, versi view realtime, forecast.MonthForecast)
+_forecast_generation = 0 # Naik setiap kali ada penulisan transaksi
+_forecast_lock = threading.Lock()
+
+def get_month_forecast(user_id, year_month):
+    """Model proyeksi bulan itu (forecast.MonthForecast), dibangun sekali lalu diperbarui per transaksi."""
+    key = (user_id, year_month)
+    live_version = get_live_version(user_id, year_month)
+    with _forecast_lock:
+        entry = _forecasts.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= CACHE_TTL_SECONDS and entry[1] == live_version:
+            _forecasts.move_to_end(key)
+            return entry[2]
+        generation = _forecast_generation
+
+    model = forecast.MonthForecast.from_transactions(
+        year_month, get_transactions_for_month(user_id, year_month),
+        history_state=_forecast_history(user_id, year_month)
+    )
+    with _forecast_lock:
+        # Sama seperti indeks tren: jika ada penulisan selama membangun, model tidak disimpan
+        if generation == _forecast_generation:
+            _forecasts[key] = (time.monotonic(), live_version, model)
+            while len(_forecasts) > FORECAST_MAX_MODELS:
+                _forecasts.popitem(last=False)
+    return model
+
+def _forecast_history(user_id, year_month):
+    """
+    Statistik riwayat model proyeksi bulan itu (MonthForecast.history_state). Disimpan di direktori
+    snapshot analitik bersama watermark bulan-bulan riwayatnya (dari rollup), jadi snapshot
+    (DuckDB + pyarrow) hanya dibuka saat riwayat berubah, bukan setiap kali dasbor dibangun.
+    """
+    history_from = trends.month_offset(year_month, -forecast.HISTORY_MONTHS)
+    history_end = trends.month_offset(year_month, -1)
+    watermark = {
+        month: analytics.month_signature(rollup)
+        for month, rollup in get_backend().get_all_rollups(user_id).items()
+        if history_from <= month <= history_end
+    }
+    path = os.path.join(_analytics_directory(user_id), FORECAST_HISTORY_NAME)
+    try:
+        with open(path, encoding='utf-8') as history_file:
+            stored = json.load(history_file)
+    except (OSError, ValueError):
+        stored = {}
+    entry = stored.get(year_month)
+    if entry is not None and entry['watermark'] == watermark:
+        return entry['history']
+
+    # Riwayat dimulai dari bulan pertama yang punya data (pengguna baru tidak dianggap belanja nol)
+    snapshot = get_analytics_snapshot(user_id)
+    history_months = [month for month in snapshot.months if history_from <= month <= history_end]
+    history_daily, history_start = None, None
+    if history_months:
+        history_start = history_months[0]
+        history_daily = snapshot.daily_category_spend(
+            month_date_range(history_start)[0], month_date_range(history_end)[1]
+        )
+    history = forecast.MonthForecast(year_month, history_daily, history_start).history_state()
+
+    stored[year_month] = {'watermark': watermark, 'history': history}
+    for month in sorted(stored)[:-FORECAST_HISTORY_MONTHS_KEPT]:
+        del stored[month]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp" # Nama unik: proses lain bisa menulis bersamaan
+    with open(temp_path, 'w', encoding='utf-8') as history_file:
+        json.dump(stored, history_file, ensure_ascii=False)
+    os.replace(temp_path, path)
+    return history
+
+def reset_forecasts(user_id=None):
+    """Membuang model proyeksi satu pengguna (atau semua); dibangun ulang saat berikutnya dibutuhkan."""
+    with _forecast_lock:
+        for key in list(_forecasts):
+            if user_id is None or key[0] == user_id:
+                del _forecasts[key]
+
+def _update_forecasts(user_id, changes):
+    """Menerapkan perubahan [(data transaksi, +1/-1), ...] ke model proyeksi pengguna yang sudah dibangun."""
+    global _forecast_generation
+    months = {str(data['date'])[:7] for data, _ in changes}
+    updated = []
+    with _forecast_lock:
+        _forecast_generation += 1
+        for key in [key for key in _forecasts if key[0] == user_id]:
+            built_at, live_version, model = _forecasts[key]
+            if months & model.history_months():
+                del _forecasts[key]
+                continue
+            if key[1] in months:
+                for data, sign in changes:
+                    model.apply(data, sign)
+                updated.append(key)
+    # Perubahan ini juga menaikkan versi view realtime bulan itu; versi baru dicatat agar model
+    # yang baru diperbarui tidak dianggap usang dan dibangun ulang
+    for key in updated:
+        view = _live_view(user_id, key[1], subscribe=False)
+        with _forecast_lock:
+            entry = _forecasts.get(key)
+            if entry is not None:
+                _forecasts[key] = (entry[0], view.version if view is not None else None, entry[2])
 
 
 # --- Fungsi untuk Anggaran (Budgets) ---
-# Di Firestore, kita akan gunakan Kategori sebagai ID Dokumen agar unik
+# Anggaran berversi per bulan berlaku (lihat budgets.py): mengubah anggaran bulan ini
+# tidak mengubah anggaran bulan-bulan sebelumnya.
 
-def add_budget(category, amount):
-    """Menambah atau memperbarui anggaran (case-insensitive)."""
+def current_month():
+    """Bulan berjalan, 'YYYY-MM'."""
+    return datetime.date.today().strftime('%Y-%m')
+
+def add_budget(user_id, category, amount, effective_month=None):
+    """Menambah atau memperbarui anggaran (case-insensitive), berlaku sejak effective_month (default bulan ini)."""
     category = category.strip().title()
-    doc_ref = db.collection('budgets').document(category) # ID Dokumen = Nama Kategori
-    doc_ref.set({'amount': amount}) # .set() akan create atau update
-
-def get_all_budgets():
-    """Mengambil semua data anggaran."""
-    budgets_ref = db.collection('budgets').order_by('amount', direction='DESCENDING').stream()
-    budgets = []
-    for doc in budgets_ref:
-        data = doc.to_dict()
-        budgets.append({
-            'category': doc.id, # Ambil ID dokumen sebagai kategori
-            'amount': data['amount']
-        })
-    return budgets
-
-def get_budget_categories():
-    """Hanya mengambil nama-nama kategori anggaran (untuk dropdown)."""
-    budgets_ref = db.collection('budgets').stream()
-    # Ambil ID dokumen (yang merupakan nama kategori)
-    categories = [doc.id for doc in budgets_ref]
-    categories.sort()
-    return categories
-
-def delete_budget_by_category(category):
-    """Menghapus kategori anggaran berdasarkan namanya (ID Dokumen)."""
+    get_backend().set_budget_version(user_id, category, effective_month or current_month(), float(amount))
+    _invalidate_budgets(user_id)
+
+def delete_budget_by_category(user_id, category, effective_month=None):
+    """
+    Menghentikan anggaran kategori sejak effective_month (default bulan ini).
+    Anggaran bulan-bulan sebelumnya tetap tercatat.
+    """
     category = category.strip().title()
-    db.collection('budgets').document(category).delete()
+    get_backend().set_budget_version(user_id, category, effective_month or current_month(), None)
+    _invalidate_budgets(user_id)
+
+def get_budget_history(user_id):
+    """Riwayat semua versi anggaran pengguna (budgets.BudgetHistory), dibaca sekali lalu di-cache."""
+    return cache.get_or_load(
+        _budget_history_key(user_id),
+        lambda: [budgets.BudgetHistory(get_backend().get_budget_versions(user_id))]
+    )[0]
+
+def get_budgets_for_month(user_id, year_month):
+    """Anggaran yang berlaku di bulan 'YYYY-MM': list dict {'category', 'amount'} urut jumlah terbesar."""
+    return get_budget_history(user_id).budgets_for_month(year_month)
+
+def get_all_budgets(user_id):
+    """Mengambil semua anggaran yang berlaku bulan ini."""
+    return get_budgets_for_month(user_id, current_month())
+
+def get_budget_categories(user_id):
+    """Hanya mengambil nama-nama kategori anggaran yang berlaku bulan ini (untuk dropdown)."""
+    return sorted(budget['category'] for budget in get_all_budgets(user_id))
+
+def get_over_budget_report(user_id):
+    """
+    Semua kejadian overbudget di seluruh bulan: list dict {'year_month', 'category', 'budget',
+    'actual_spending', 'percent_spent', 'progress', 'over_budget'}, bulan terbaru dulu.
+    Dihitung dari rollup bulanan + riwayat anggaran, lalu disimpan di cache sampai ada penulisan.
+    """
+    def load():
+        rollups = get_backend().get_all_rollups(user_id)
+        report = dashboard.over_budget_report(rollups, get_budget_history(user_id))
+        return report.to_dict('records')
+
+    return cache.get_or_load(_over_budget_report_key(user_id), load)
 
 
 # --- Fungsi untuk Transaksi (Transactions) ---
 
-def add_transaction(date, description, amount, type, category):
-    """Menambah satu transaksi baru (case-insensitive)."""
-    category = category.strip().title()
-    type = type.strip().title()
-    
-    # Buat dictionary data
-    data = {
+def normalize_transaction(date, description, amount, type, category):
+    """Normalisasi data transaksi (case-insensitive) sebelum disimpan."""
+    return {
         'date': str(date), # Pastikan formatnya string YYYY-MM-DD
         'description': description,
         'amount': float(amount), # Pastikan formatnya angka
-        'type': type,
-        'category': category
+        'type': type.strip().title(),
+        'category': category.strip().title()
     }
-    # .add() akan membuat dokumen baru dengan ID unik otomatis
-    db.collection('transactions').add(data)
 
-def update_transaction(trx_id, date, description, amount, type, category):
+def add_transaction(user_id, date, description, amount, type, category):
+    """Menambah satu transaksi baru (case-insensitive). Mengembalikan ID transaksi."""
+    data = normalize_transaction(date, description, amount, type, category)
+    trx_id = get_backend().add_transaction(user_id, data)
+    _invalidate_transaction(user_id, data['date'])
+    _update_trend_index(user_id, [(data, 1)])
+    _apply_live(user_id, [('added', dict(data, id=trx_id))])
+    _update_forecasts(user_id, [(data, 1)])
+    _update_search_index(user_id, added=[dict(data, id=trx_id)])
+    return trx_id
+
+def add_transactions(user_id, transactions):
+    """
+    Menambah banyak transaksi sekaligus dalam penulisan berkelompok (batch).
+    transactions: list dict dengan kunci 'date', 'description', 'amount', 'type', 'category'.
+    Mengembalikan list ID transaksi baru.
+    """
+    data_list = [
+        normalize_transaction(trx['date'], trx['description'], trx['amount'], trx['type'], trx['category'])
+        for trx in transactions
+    ]
+    if not data_list:
+        return []
+    trx_ids = get_backend().add_transactions(user_id, data_list)
+    _invalidate_transaction(user_id, *{data['date'][:7] for data in data_list})
+    _update_trend_index(user_id, [(data, 1) for data in data_list])
+    _apply_live(user_id, [('added', dict(data, id=trx_id)) for trx_id, data in zip(trx_ids, data_list)])
+    _update_forecasts(user_id, [(data, 1) for data in data_list])
+    _update_search_index(user_id, added=[dict(data, id=trx_id) for trx_id, data in zip(trx_ids, data_list)])
+    return trx_ids
+
+# --- Penulisan Idempoten ---
+# Setiap transaksi membawa kunci idempoten buatan klien (dibuat saat form/konfirmasi disiapkan,
+# bukan saat disimpan). Kunci itu menjadi ID transaksi, jadi menyimpan ulang kunci yang sama
+# (klik ganda, rerun, retry setelah error jaringan) tidak membuat transaksi ganda.
+SAVE_CREATED = 'created' # Baru tersimpan
+SAVE_DUPLICATE = 'duplicate' # Kunci sudah pernah tersimpan, tidak ditulis ulang
+SAVE_INVALID = 'invalid' # Data/kunci tidak valid, tidak dikirim ke backend
+SAVE_PENDING = 'pending' # Tersimpan di antrean lokal; baru/duplikat baru dipastikan saat tersinkron ke backend
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+
+def new_idempotency_key():
+    """Kunci idempoten baru untuk satu transaksi."""
+    return uuid.uuid4().hex
+
+def save_transactions(user_id, transactions):
+    """
+    Menyimpan banyak transaksi secara idempoten dalam satu batch/transaksi backend
+    (rollup ikut ditulis di commit yang sama).
+    transactions: list dict dengan kunci 'key' (kunci idempoten), 'date', 'description',
+    'amount', 'type', 'category'.
+    Mengembalikan list dict {'key', 'id', 'status', 'error'} sesuai urutan input; status salah
+    satu dari SAVE_CREATED, SAVE_DUPLICATE, SAVE_INVALID, SAVE_PENDING.
+    """
+    results, items, seen = [], [], set()
+    for trx in transactions:
+        key = trx.get('key')
+        result = {'key': key, 'id': None, 'status': SAVE_INVALID, 'error': None}
+        results.append(result)
+        if not isinstance(key, str) or not key or '/' in key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            result['error'] = "Kunci idempoten tidak valid."
+            continue
+        try:
+            data = normalize_transaction(trx['date'], trx['description'], trx['amount'], trx['type'], trx['category'])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            result['error'] = f"Data transaksi tidak valid: {e}"
+            continue
+        result['id'], result['status'] = key, None
+        if key in seen:
+            # Kunci yang sama dua kali dalam satu panggilan: hanya yang pertama ditulis
+            result['status'] = SAVE_DUPLICATE
+            continue
+        seen.add(key)
+        items.append((key, data))
+
+    backend = get_backend()
+    # Backend berantrean membedakan kunci yang pasti baru dari yang belum bisa diperiksa
+    save_checked = getattr(backend, 'save_transactions_checked', None)
+    if not items:
+        created, pending = set(), set()
+    elif save_checked is not None:
+        created, pending = save_checked(user_id, items)
+    else:
+        created, pending = backend.save_transactions(user_id, items), set()
+    for result in results:
+        if result['status'] is None:
+            result['status'] = (SAVE_CREATED if result['id'] in created else
+                                SAVE_PENDING if result['id'] in pending else SAVE_DUPLICATE)
+    # Yang pending ikut diterapkan lokal; jika ternyata duplikat, diselaraskan saat tersinkron
+    created_data = [dict(data, id=key) for key, data in items if key in created or key in pending]
+
+    if created_data:
+        _invalidate_transaction(user_id, *{data['date'][:7] for data in created_data})
+        _update_trend_index(user_id, [(data, 1) for data in created_data])
+        _apply_live(user_id, [('added', data) for data in created_data])
+        _update_forecasts(user_id, [(data, 1) for data in created_data])
+        _update_search_index(user_id, added=created_data)
+    return results
+
+def update_transaction(user_id, trx_id, date, description, amount, type, category):
     """Memperbarui transaksi yang ada berdasarkan ID-nya."""
-    category = category.strip().title()
-    type = type.strip().title()
-    
-    doc_ref = db.collection('transactions').document(trx_id)
-    doc_ref.update({
-        'date': str(date),
-        'description': description,
-        'amount': float(amount),
-        'type': type,
-        'category': category
-    })
+    data = normalize_transaction(date, description, amount, type, category)
+    # Backend mengembalikan data lama, jadi bulan lama dan baru sama-sama dibuang dari cache
+    old_data = get_backend().update_transaction(user_id, trx_id, data)
+    if old_data is not None:
+        _invalidate_transaction(user_id, old_data['date'], data['date'])
+        _update_trend_index(user_id, [(old_data, -1), (data, 1)])
+        _apply_live(user_id, [('modified', dict(data, id=trx_id))])
+        _update_forecasts(user_id, [(old_data, -1), (data, 1)])
+        _update_search_index(user_id, added=[dict(data, id=trx_id)], removed=[dict(old_data, id=trx_id)])
 
-def delete_transaction_by_id(transaction_id):
+def delete_transaction_by_id(user_id, transaction_id):
     """Menghapus satu transaksi berdasarkan ID-nya."""
-    db.collection('transactions').document(transaction_id).delete()
+    old_data = get_backend().delete_transaction(user_id, transaction_id)
+    if old_data is not None:
+        _invalidate_transaction(user_id, old_data['date'])
+        _update_trend_index(user_id, [(old_data, -1)])
+        _apply_live(user_id, [('removed', dict(old_data, id=transaction_id))])
+        _update_forecasts(user_id, [(old_data, -1)])
+        _update_search_index(user_id, removed=[dict(old_data, id=transaction_id)])
 
-def get_all_transactions():
+def delete_transactions(user_id, transaction_ids):
+    """Menghapus banyak transaksi sekaligus dalam satu penulisan berkelompok. Mengembalikan jumlah yang terhapus."""
+    transaction_ids = list(transaction_ids)
+    old_data_list = get_backend().delete_transactions(user_id, transaction_ids)
+    if old_data_list:
+        _invalidate_transaction(user_id, *{data['date'][:7] for data in old_data_list})
+        _update_trend_index(user_id, [(data, -1) for data in old_data_list])
+        _apply_live(user_id, [('removed', data) for data in old_data_list if 'id' in data])
+        _update_forecasts(user_id, [(data, -1) for data in old_data_list])
+        # ID diambil dari input: data lama tanpa 'id' tetap terhapus dari indeks (tanpa petunjuk tanggal)
+        old_dates = {data['id']: data['date'] for data in old_data_list if 'id' in data}
+        _update_search_index(user_id, removed=[{'id': trx_id, 'date': old_dates.get(trx_id)}
+                                               for trx_id in transaction_ids])
+    return len(old_data_list)
+
+def get_all_transactions(user_id):
     """Mengambil SEMUA transaksi (termasuk ID) untuk tab riwayat."""
-    trx_ref = db.collection('transactions').order_by('date', direction='DESCENDING').stream()
-    transactions = []
-    for doc in trx_ref:
-        data = doc.to_dict()
-        data['id'] = doc.id # Tambahkan ID Dokumen ke dictionary
-        transactions.append(data)
-    return transactions
+    return cache.get_or_load(_transactions_all_key(user_id), lambda: get_backend().get_all_transactions(user_id))
+
+TRANSACTION_FILTER_KEYS = ('date_from', 'date_to', 'type', 'category', 'amount_min', 'amount_max')
+SEARCH_QUERY_KEY = 'query' # Kata kunci pencarian teks di dict filter riwayat (lihat search.py)
+DEFAULT_PAGE_SIZE = 50
 
-def get_transactions_for_month(year_month):
+def _normalize_filters(filters):
+    """Membersihkan filter riwayat: buang yang kosong, samakan format dengan data tersimpan."""
+    normalized = {}
+    for key in TRANSACTION_FILTER_KEYS:
+        value = (filters or {}).get(key)
+        if value is None or value == "":
+            continue
+        if key in ('date_from', 'date_to'):
+            value = str(value)
+        elif key in ('type', 'category'):
+            value = value.strip().title()
+        else:
+            value = float(value)
+        normalized[key] = value
+    return normalized
+
+def _encode_cursor(trx):
+    return f"{trx['date']}|{trx['id']}"
+
+def _decode_cursor(cursor):
+    date, trx_id = cursor.split('|', 1)
+    return date, trx_id
+
+def get_transactions_page(user_id, filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Mengambil satu halaman transaksi (urut tanggal terbaru) dengan filter di sisi backend.
+    filters: dict opsional dengan kunci 'date_from', 'date_to', 'type', 'category',
+             'amount_min', 'amount_max', dan 'query' (pencarian teks, lewat search_transactions).
+    cursor: string dari 'next_cursor' halaman sebelumnya, atau None untuk halaman pertama.
+    Mengembalikan dict {'transactions': [...], 'next_cursor': str atau None}.
+    """
+    query = str((filters or {}).get(SEARCH_QUERY_KEY) or '').strip()
+    if query:
+        return search_transactions(user_id, query, filters, cursor, page_size)
+    filters = _normalize_filters(filters)
+    after = _decode_cursor(cursor) if cursor else None
+
+    def load():
+        # Ambil 1 item ekstra untuk mengetahui apakah masih ada halaman berikutnya
+        return get_backend().get_transactions_page(user_id, filters, after, page_size + 1)
+
+    rows = cache.get_or_load(_page_key(user_id, filters, cursor, page_size), load)
+    transactions = rows[:page_size]
+    next_cursor = _encode_cursor(transactions[-1]) if len(rows) > page_size else None
+    return {'transactions': transactions, 'next_cursor': next_cursor}
+
+def search_transactions(user_id, query, filters=None, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Pencarian teks (deskripsi dan kategori; awalan dan toleran salah ketik) digabung dengan filter
+    riwayat, dari indeks pencarian pengguna. Urutan dan cursor sama dengan get_transactions_page.
+    Mengembalikan dict {'transactions': [...], 'next_cursor': str atau None, 'total': jumlah hasil}.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    rows, total = get_search_index(user_id).search(query, _normalize_filters(filters), after, page_size + 1)
+    transactions = rows[:page_size]
+    next_cursor = _encode_cursor(transactions[-1]) if len(rows) > page_size else None
+    return {'transactions': transactions, 'next_cursor': next_cursor, 'total': total}
+
+EXPORT_CHUNK_SIZE = 5000
+
+def iter_transaction_chunks(user_id, filters=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Generator list transaksi (urut tanggal terbaru) per chunk, memakai keyset pagination backend.
+    Untuk ekspor/pemrosesan massal: tidak lewat cache dan tidak pernah memuat seluruh data
+    sekaligus, jadi memori sebanding dengan chunk_size, bukan jumlah transaksi.
+    Jika filters berisi 'query', chunk diambil dari indeks pencarian.
+    """
+    query = str((filters or {}).get(SEARCH_QUERY_KEY) or '').strip()
+    filters = _normalize_filters(filters)
+    after = None
+    while True:
+        if query:
+            chunk = get_search_index(user_id).search(query, filters, after, chunk_size)[0]
+        else:
+            chunk = get_backend().get_transactions_page(user_id, filters, after, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+        if len(chunk) < chunk_size:
+            return
+        after = (chunk[-1]['date'], chunk[-1]['id'])
+
+def month_date_range(year_month):
+    """
+    Mengubah 'YYYY-MM' menjadi tuple (tanggal awal, tanggal akhir) dalam format 'YYYY-MM-DD'.
+    Melempar ValueError jika formatnya salah.
+    """
+    year, month = map(int, year_month.split('-'))
+    # Cari hari terakhir di bulan itu
+    last_day = calendar.monthrange(year, month)[1]
+    start_date = f"{year:04d}-{month:02d}-01"
+    end_date = f"{year:04d}-{month:02d}-{last_day:02d}" # :02d untuk format '01', '09'
+    return start_date, end_date
+
+def get_transactions_for_month(user_id, year_month):
     """
     Mengambil semua transaksi untuk bulan tertentu.
     Format year_month adalah 'YYYY-MM'.
     """
-    # Ubah 'YYYY-MM' menjadi tanggal awal dan akhir
     try:
-        year, month = map(int, year_month.split('-'))
-        # Cari hari terakhir di bulan itu
-        last_day = calendar.monthrange(year, month)[1]
-        
-        start_date = f"{year_month}-01"
-        end_date = f"{year_month}-{last_day:02d}" # :02d untuk format '01', '09'
-        
+        start_date, end_date = month_date_range(year_month)
     except Exception as e:
         print(f"Error parsing tanggal: {e}")
         return []
 
-    # Buat kueri rentang tanggal
-    trx_ref = db.collection('transactions') \
-                .where('date', '>=', start_date) \
-                .where('date', '<=', end_date) \
-                .stream()
-                
-    transactions = []
-    for doc in trx_ref:
-        data = doc.to_dict()
-        data['id'] = doc.id
-        transactions.append(data)
-    return transactions
+    # View realtime hanya dipakai jika sudah ada (dibuka dasbor); pembacaan massal seperti
+    # impor mutasi tidak membuka langganan baru untuk setiap bulan
+    view = _live_view(user_id, start_date[:7], subscribe=False)
+    if view is not None:
+        return view.transactions()
+    return cache.get_or_load(
+        _month_key(user_id, start_date[:7]),
+        lambda: get_backend().get_transactions_between(user_id, start_date, end_date)
+    )
+
+def get_month_summary(user_id, year_month):
+    """
+    Ringkasan satu bulan: dict {'income', 'expense', 'expense_by_category': {kategori: total}}.
+    Dibaca dari rollup bulanan (satu dokumen) yang dijaga setiap penulisan transaksi.
+    Jika rollup bulan itu belum ada (data lama sebelum rollup), dihitung dengan agregasi di backend.
+    Jalankan `python rebuild_rollups.py` sekali untuk membangun rollup dari data lama.
+    """
+    try:
+        start_date, end_date = month_date_range(year_month)
+    except Exception as e:
+        print(f"Error parsing tanggal: {e}")
+        return storage.empty_rollup()
+
+    def load():
+        rollup = get_backend().get_month_rollup(user_id, start_date[:7])
+        if rollup is not None:
+            return [rollup]
+        # Petunjuk kategori untuk backend tanpa GROUP BY (Firestore)
+        categories = get_budget_categories(user_id)
+        if "Lain-Lain (Pengeluaran)" not in categories:
+            categories.append("Lain-Lain (Pengeluaran)")
+        return [get_backend().get_summary_between(user_id, start_date, end_date, categories)]
+
+    # View realtime (jika backend mendukung) selalu mutakhir; tanpa view, lewat cache + rollup
+    view = _live_view(user_id, start_date[:7])
+    if view is not None:
+        summary = view.summary()
+    else:
+        summary = cache.get_or_load(_summary_key(user_id, start_date[:7]), load)[0]
+    summary['expense_by_category'] = {
+        category: total for category, total in summary['expense_by_category'].items()
+        if abs(total) > 0.005 # Kategori yang totalnya kembali nol setelah dihapus/dipindah
+    }
+    return summary
+
+def get_monthly_trends(user_id, end_month, months=trends.DEFAULT_TREND_MONTHS):
+    """
+    Tren `months` bulan yang berakhir di end_month ('YYYY-MM'), dari indeks deret waktu
+    (bukan satu query per bulan). Mengembalikan (df_totals, df_categories), lihat trends.py.
+    """
+    months = max(1, min(int(months), trends.MAX_TREND_MONTHS))
+    return get_trend_index(user_id).to_frames(end_month, months)
+
+def get_budget_forecast(user_id, year_month, as_of=None, confidence=forecast.DEFAULT_CONFIDENCE):
+    """
+    Proyeksi akhir bulan per kategori beranggaran pada tanggal as_of (default hari ini): proyeksi
+    dengan interval keyakinan, peluang overbudget, dan tanggal anggaran habis (lihat forecast.py).
+    Mengembalikan (DataFrame berkolom forecast.FORECAST_COLUMNS, jumlah hari yang sudah lewat).
+    """
+    as_of_day = forecast.day_of_month(year_month, as_of or datetime.date.today())
+    budgets_data = get_budgets_for_month(user_id, year_month)
+    df_forecast = get_month_forecast(user_id, year_month).project(budgets_data, as_of_day, confidence)
+    return df_forecast[df_forecast['budget'].notna()].reset_index(drop=True), as_of_day
+
+# --- Instrumentasi ---
+# Semua fungsi publik di atas diukur (latensi, dokumen, cache, lihat metrics.py), kecuali helper
+# tanpa I/O yang dipanggil di dalam fungsi lain. Fungsi diganti langsung di globals() agar
+# panggilan antarfungsi di modul ini juga terukur.
+UNINSTRUMENTED = ('get_backend', 'get_live_views', 'current_month', 'normalize_transaction',
+                  'new_idempotency_key', 'month_date_range')
+
+metrics.instrument_module(globals(), [
+    name for name, value in list(globals().items())
+    if inspect.isfunction(value) and value.__module__ == __name__
+    and not name.startswith('_') and name not in UNINSTRUMENTED
+])
@@ -0,0 +1,124 @@
+"""
+Ekspor transaksi ke Parquet atau CSV secara streaming.
+
+Transaksi dibaca per chunk dari database (keyset pagination), setiap chunk diubah menjadi
+Arrow record batch lalu langsung ditulis ke file. Memori puncak sebanding dengan ukuran
+chunk, bukan jumlah transaksi.
+
+Pemakaian dari terminal:
+    python export.py transaksi.parquet
+    python export.py transaksi.csv --user budi@contoh.id --date-from 2026-01-01
+"""
+import argparse
+import functools
+import sys
+
+import database as db
+import storage
+
+EXPORT_FORMATS = ('parquet', 'csv')
+PARQUET_COMPRESSION = 'zstd'
+
+MIME_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'csv': 'text/csv',
+}
+
+
+# pyarrow diimpor di dalam fungsi agar halaman riwayat (yang mengimpor modul ini) tetap ringan;
+# biayanya hanya dibayar saat benar-benar mengekspor.
+
+@functools.lru_cache(maxsize=None)
+def export_schema():
+    """Skema Arrow file ekspor (juga dipakai snapshot analitik)."""
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.string()),
+        ('date', pa.date32()),
+        ('description', pa.string()),
+        ('amount', pa.float64()),
+        ('type', pa.string()),
+        ('category', pa.string()),
+    ])
+
+
+def chunk_to_batch(chunk):
+    """Satu chunk (list dict transaksi) -> pyarrow.RecordBatch sesuai export_schema()."""
+    import pyarrow as pa
+
+    schema = export_schema()
+    arrays = []
+    for field in schema:
+        values = [trx.get(field.name) for trx in chunk]
+        if field.name == 'date':
+            # Tanggal tersimpan sebagai string 'YYYY-MM-DD'; di-parse oleh Arrow (tanpa loop Python)
+            arrays.append(pa.array(values, type=pa.string()).cast(pa.date32()))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(user_id, filters=None, chunk_size=db.EXPORT_CHUNK_SIZE):
+    """Generator record batch Arrow dari transaksi pengguna (satu batch per chunk database)."""
+    for chunk in db.iter_transaction_chunks(user_id, filters, chunk_size):
+        yield chunk_to_batch(chunk)
+
+
+def export_transactions(user_id, sink, file_format='parquet', filters=None,
+                        chunk_size=db.EXPORT_CHUNK_SIZE, progress_callback=None):
+    """
+    Menulis transaksi pengguna ke sink (path atau file biner) dalam format 'parquet' atau 'csv'.
+    progress_callback(jumlah_baris): dipanggil setelah setiap batch ditulis.
+    Mengembalikan jumlah baris yang diekspor.
+    """
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: '{file_format}'")
+
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, export_schema(), compression=PARQUET_COMPRESSION)
+    else:
+        import pyarrow.csv as pa_csv
+        writer = pa_csv.CSVWriter(sink, export_schema())
+
+    rows = 0
+    try:
+        for batch in iter_record_batches(user_id, filters, chunk_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+            if progress_callback:
+                progress_callback(rows)
+    finally:
+        # Ditutup juga saat kosong/gagal, agar file tetap valid (header/footer tertulis)
+        writer.close()
+    return rows
+
+
+def detect_format(filename):
+    return 'csv' if filename.lower().endswith('.csv') else 'parquet'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ekspor transaksi e-Ftari ke Parquet atau CSV.")
+    parser.add_argument("path", help="File tujuan (.parquet atau .csv)")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, help="Paksa format file (default: dari ekstensi)")
+    parser.add_argument("--user", default=storage.DEFAULT_USER_ID, help="user_id pemilik transaksi")
+    parser.add_argument("--chunk-size", type=int, default=db.EXPORT_CHUNK_SIZE)
+    for key in db.TRANSACTION_FILTER_KEYS:
+        parser.add_argument(f"--{key.replace('_', '-')}", dest=key, help=f"Filter {key}")
+    args = parser.parse_args(argv)
+
+    def report(rows):
+        print(f"\rDiekspor: {rows:,} transaksi", end='', file=sys.stderr)
+
+    filters = {key: getattr(args, key) for key in db.TRANSACTION_FILTER_KEYS}
+    rows = export_transactions(args.user, args.path, args.format or detect_format(args.path),
+                               filters=filters, chunk_size=args.chunk_size, progress_callback=report)
+    report(rows)
+    print(file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,265 @@
+"""
+Proyeksi pengeluaran akhir bulan dan laju pemakaian anggaran per kategori.
+
+Dasar proyeksi adalah pengeluaran harian setiap kategori:
+- riwayat (HISTORY_MONTHS bulan sebelum bulan target, dari snapshot analitik) memberi rata-rata
+  dan varians pengeluaran harian per kategori;
+- bulan berjalan disimpan sebagai array harian per kategori, dibangun sekali lalu diperbarui
+  per transaksi (apply), seperti indeks tren di trends.py.
+
+Semua kategori diproyeksikan sekaligus sebagai matriks (kategori x hari) dengan NumPy:
+- laju harian  = campuran laju bulan ini dan rata-rata riwayat; bobot bulan ini d / (d + PRIOR_DAYS)
+                 (awal bulan masih mengikuti riwayat, makin akhir makin mengikuti bulan berjalan)
+- proyeksi     = terpakai sampai hari ini + maks(laju x sisa hari, transaksi terjadwal sisa bulan)
+- varians      = sisa hari x varians harian + sisa hari^2 x varians laju (ketidakpastian rata-rata)
+- interval     = proyeksi +/- z x simpangan baku, z dari tingkat keyakinan; batas bawah = terpakai
+- peluang lewat = 1 - Phi((anggaran - proyeksi) / simpangan baku)
+- tanggal habis: hari saat kumulatif melewati anggaran (jika sudah), atau perkiraan t saat
+  laju*t = sisa anggaran; tercepat/terlambat dari laju*t +/- z*sigma*sqrt(t) = sisa anggaran.
+"""
+import calendar
+import datetime
+import threading
+from array import array
+
+# numpy, pandas, dan statistics diimpor di dalam fungsi agar impor modul ini tetap ringan
+
+HISTORY_MONTHS = 6
+PRIOR_DAYS = 7 # Bobot riwayat setara sekian hari data bulan berjalan
+DEFAULT_CONFIDENCE = 0.9
+EXPENSE_TYPE = 'Pengeluaran'
+DAY_EPSILON = 1e-9 # Toleransi pembulatan nomor hari (tanggal habis)
+
+STATUS_NO_BUDGET = "Tanpa anggaran"
+STATUS_OVER = "Sudah lewat"
+STATUS_PROJECTED_OVER = "Diproyeksikan lewat"
+STATUS_AT_RISK = "Waspada"
+STATUS_SAFE = "Aman"
+
+FORECAST_COLUMNS = [
+    'category', 'budget', 'spent', 'daily_rate', 'projected', 'projected_low', 'projected_high',
+    'projected_overrun', 'overrun_probability', 'runout_date', 'runout_earliest', 'runout_latest', 'status',
+]
+
+
+def days_in_month(year_month):
+    return calendar.monthrange(int(year_month[:4]), int(year_month[5:7]))[1]
+
+
+def day_of_month(year_month, as_of):
+    """
+    Jumlah hari bulan itu yang sudah lewat pada tanggal as_of (datetime.date): 0 untuk bulan
+    yang belum mulai, jumlah hari sebulan untuk bulan yang sudah selesai.
+    """
+    current = as_of.strftime('%Y-%m')
+    if current < year_month:
+        return 0
+    if current > year_month:
+        return days_in_month(year_month)
+    return as_of.day
+
+
+def _normal_cdf(x):
+    """Phi(x) secara vektor (pendekatan Abramowitz-Stegun 7.1.26 untuk erf, galat < 1.5e-7)."""
+    import numpy as np
+
+    z = np.abs(x) / np.sqrt(2.0)
+    t = 1.0 / (1.0 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1.0 - poly * np.exp(-z * z)
+    return 0.5 * (1.0 + np.sign(x) * erf)
+
+
+class MonthForecast:
+    """
+    Model proyeksi satu pengguna untuk satu bulan: statistik harian riwayat per kategori
+    (tetap) dan array pengeluaran harian bulan itu per kategori (diperbarui per transaksi).
+    """
+
+    def __init__(self, year_month, history_daily=None, history_start=None, history_state=None):
+        """
+        history_daily: DataFrame berkolom 'date', 'category', 'total' (pengeluaran per hari per
+        kategori, hari tanpa pengeluaran boleh tidak ada) untuk rentang history_start ('YYYY-MM',
+        bulan pertama riwayat) sampai akhir bulan sebelum year_month.
+        history_state: statistik riwayat yang sudah dihitung (lihat history_state()), pengganti history_daily.
+        """
+        self.lock = threading.RLock()
+        self.year_month = year_month
+        self.days = days_in_month(year_month)
+        self.first_day = datetime.date(int(year_month[:4]), int(year_month[5:7]), 1)
+        self.daily = {} # kategori -> array('d') sepanjang self.days
+        self.history_start = history_start
+        self.history_days = 0
+        self.history = {} # kategori -> (rata-rata harian, varians harian)
+        if history_daily is not None and history_start is not None and len(history_daily):
+            start = datetime.date(int(history_start[:4]), int(history_start[5:7]), 1)
+            self.history_days = (self.first_day - start).days
+            self._set_history(history_daily)
+        elif history_state is not None:
+            self.history_start = history_state['start']
+            self.history_days = history_state['days']
+            self.history = {category: tuple(stats) for category, stats in history_state['stats'].items()}
+
+    @classmethod
+    def from_transactions(cls, year_month, transactions, history_daily=None, history_start=None,
+                          history_state=None):
+        model = cls(year_month, history_daily, history_start, history_state)
+        for data in transactions:
+            model.apply(data)
+        return model
+
+    def _set_history(self, history_daily):
+        # Rata-rata dan varians per hari kalender (hari tanpa pengeluaran dihitung nol): cukup
+        # jumlah dan jumlah kuadrat total harian per kategori, satu groupby untuk semua kategori
+        frame = history_daily.assign(square=history_daily['total'] ** 2)
+        sums = frame.groupby('category', sort=False)[['total', 'square']].sum()
+        days = self.history_days
+        mean = sums['total'] / days
+        variance = (sums['square'] - days * mean ** 2) / max(days - 1, 1)
+        self.history = {
+            category: (float(mean[category]), max(float(variance[category]), 0.0)) for category in sums.index
+        }
+
+    def history_state(self):
+        """Statistik riwayat yang bisa disimpan sebagai JSON dan dipakai ulang (argumen history_state)."""
+        return {'start': self.history_start, 'days': self.history_days,
+                'stats': {category: list(stats) for category, stats in self.history.items()}}
+
+    def history_months(self):
+        """Bulan-bulan 'YYYY-MM' yang dipakai sebagai riwayat (penulisan ke bulan itu membuat model usang)."""
+        if not self.history_days:
+            return set()
+        months, day = set(), self.first_day - datetime.timedelta(days=1)
+        while day.strftime('%Y-%m') >= self.history_start:
+            months.add(day.strftime('%Y-%m'))
+            day = day.replace(day=1) - datetime.timedelta(days=1)
+        return months
+
+    def apply(self, data, sign=1):
+        """Menerapkan satu transaksi (sign=1 tambah, sign=-1 keluarkan); selain pengeluaran bulan ini diabaikan."""
+        date = str(data['date'])
+        if data.get('type') != EXPENSE_TYPE or date[:7] != self.year_month:
+            return
+        with self.lock:
+            column = self.daily.get(data['category'])
+            if column is None:
+                column = self.daily[data['category']] = array('d', bytes(8 * self.days))
+            column[min(int(date[8:10]), self.days) - 1] += sign * float(data['amount'])
+
+    def project(self, budgets=(), as_of_day=None, confidence=DEFAULT_CONFIDENCE):
+        """
+        Proyeksi semua kategori (yang punya pengeluaran, riwayat, atau anggaran) pada hari ke-as_of_day
+        (default: akhir bulan). budgets: list dict {'category', 'amount'}.
+        Mengembalikan DataFrame berkolom FORECAST_COLUMNS, kategori beranggaran dulu (peluang lewat terbesar).
+        """
+        from statistics import NormalDist
+
+        import numpy as np
+        import pandas as pd
+
+        budget_by_category = {budget['category']: float(budget['amount']) for budget in budgets}
+        with self.lock:
+            categories = sorted(set(self.daily) | set(self.history) | set(budget_by_category))
+            daily = np.zeros((len(categories), self.days))
+            for row, category in enumerate(categories):
+                if category in self.daily:
+                    daily[row] = np.frombuffer(self.daily[category], dtype=np.float64)
+        if not categories:
+            return pd.DataFrame(columns=FORECAST_COLUMNS)
+
+        elapsed = self.days if as_of_day is None else min(max(int(as_of_day), 0), self.days)
+        remaining = self.days - elapsed
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        stats = np.array([self.history.get(category, (0.0, 0.0)) for category in categories]).reshape(-1, 2)
+        history_mean, history_variance = stats[:, 0], stats[:, 1]
+        budget = np.array([budget_by_category.get(category, np.nan) for category in categories])
+
+        # Terpakai dan laju hanya dari hari yang sudah lewat; transaksi bertanggal setelah hari ini
+        # (sudah dijadwalkan) menjadi batas bawah sisa bulan, bukan tambahan di atas laju
+        to_date = daily[:, :elapsed]
+        spent = to_date.sum(axis=1)
+        scheduled = daily[:, elapsed:].sum(axis=1)
+        current_rate = to_date.sum(axis=1) / elapsed if elapsed else np.zeros(len(categories))
+        current_variance = to_date.var(axis=1, ddof=1) if elapsed > 1 else np.zeros(len(categories))
+
+        if self.history_days:
+            weight = elapsed / (elapsed + PRIOR_DAYS)
+            rate = weight * current_rate + (1 - weight) * history_mean
+            variance = np.where(history_variance > 0, history_variance, current_variance)
+        else:
+            rate, variance = current_rate, current_variance
+        rate = np.maximum(rate, 0.0)
+        observations = max(self.history_days + elapsed, 1)
+        std = np.sqrt(remaining * variance + remaining ** 2 * variance / observations)
+
+        projected = spent + np.maximum(rate * remaining, scheduled)
+        low = np.maximum(projected - z * std, spent)
+        high = projected + z * std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            probability = np.where(std > 0, 1.0 - _normal_cdf((budget - projected) / std),
+                                   (projected > budget + 0.005).astype(float))
+        probability = np.where(np.isnan(budget), np.nan, probability)
+
+        # Tanggal habis: hari pertama kumulatif (sampai hari ini) melewati anggaran, atau perkiraan ke depan
+        cumulative = np.cumsum(to_date, axis=1) if elapsed else np.zeros((len(categories), 1))
+        crossed = cumulative > budget[:, None] + 0.005
+        already = crossed.any(axis=1)
+        crossed_day = np.where(already, crossed.argmax(axis=1) + 1, np.nan)
+        left = budget - spent
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sigma = np.sqrt(variance)
+            root = np.sqrt(z * z * variance + 4 * rate * left)
+            # Toleransi sebelum ceil: hasil tepat bulat (misal 20.000000000000004) tidak bergeser sehari
+            central = elapsed + np.ceil(left / rate - DAY_EPSILON)
+            earliest = elapsed + np.ceil(((root - z * sigma) / (2 * rate)) ** 2 - DAY_EPSILON)
+            latest = elapsed + np.ceil(((root + z * sigma) / (2 * rate)) ** 2 - DAY_EPSILON)
+        ahead = ~already & (left > 0) & (rate > 0)
+        runout = [np.where(already, crossed_day, np.where(ahead, days, np.nan)) for days in (central, earliest, latest)]
+        runout = [np.where(days <= self.days, days, np.nan) for days in runout] # Tidak habis bulan ini: kosong
+
+        status = np.select(
+            [np.isnan(budget), spent > budget + 0.005, projected > budget + 0.005, high > budget + 0.005],
+            [STATUS_NO_BUDGET, STATUS_OVER, STATUS_PROJECTED_OVER, STATUS_AT_RISK],
+            STATUS_SAFE,
+        )
+        df_forecast = pd.DataFrame({
+            'category': categories,
+            'budget': budget,
+            'spent': spent,
+            'daily_rate': rate,
+            'projected': projected,
+            'projected_low': low,
+            'projected_high': high,
+            'projected_overrun': np.clip(projected - budget, 0, None),
+            'overrun_probability': probability,
+            'runout_date': self._dates(runout[0]),
+            'runout_earliest': self._dates(runout[1]),
+            'runout_latest': self._dates(runout[2]),
+            'status': status,
+        })
+        df_forecast['_has_budget'] = df_forecast['budget'].notna()
+        df_forecast = df_forecast.sort_values(['_has_budget', 'overrun_probability', 'projected'],
+                                              ascending=[False, False, False], na_position='last')
+        return df_forecast[FORECAST_COLUMNS].reset_index(drop=True)
+
+    def _dates(self, days):
+        """Nomor hari (1..days, NaN = tidak ada) -> datetime64 (NaT = tidak ada)."""
+        import numpy as np
+
+        start = np.datetime64(self.first_day, 'D')
+        offsets = np.nan_to_num(days, nan=1).astype('int64') - 1
+        return np.where(np.isnan(days), np.datetime64('NaT', 'D'), start + offsets)
+
+
+def describe_projected_overruns(df_forecast):
+    """Kalimat peringatan untuk kategori berstatus STATUS_PROJECTED_OVER, atau None jika tidak ada."""
+    import pandas as pd
+
+    rows = df_forecast[df_forecast['status'] == STATUS_PROJECTED_OVER]
+    if rows.empty:
+        return None
+    items = []
+    for row in rows.itertuples():
+        runout = "" if pd.isna(row.runout_date) else f"habis sekitar {row.runout_date:%d %b}, "
+        items.append(f"{row.category} ({runout}peluang {row.overrun_probability:.0%})")
+    return f"{len(items)} kategori diproyeksikan melewati anggaran bulan ini: " + ", ".join(items)
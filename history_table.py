@@ -0,0 +1,43 @@
+"""
+Penyusunan tabel riwayat transaksi (satu DataFrame, tipe kolom diatur sekali di pandas).
+Dipisah dari halaman agar bisa dipakai ulang dan di-benchmark tanpa Streamlit.
+"""
+import pandas as pd
+
+HISTORY_COLUMNS = ['date', 'category', 'type', 'amount', 'description']
+
+
+def build_history_frame(transactions):
+    """
+    Mengubah list dict transaksi menjadi DataFrame bertipe (index = ID transaksi).
+    date -> datetime64, amount -> float64, type/category -> category (hemat memori).
+    """
+    if not transactions:
+        frame = pd.DataFrame(columns=HISTORY_COLUMNS, index=pd.Index([], name='id'))
+    else:
+        frame = pd.DataFrame.from_records(transactions, index='id', columns=['id'] + HISTORY_COLUMNS)
+    return frame.astype({
+        'date': 'datetime64[ns]',
+        'amount': 'float64',
+        'type': 'category',
+        'category': 'category',
+        'description': 'string',
+    })
+
+
+def selected_ids(frame, selected_rows):
+    """ID transaksi dari posisi baris yang dipilih di st.dataframe."""
+    return [frame.index[position] for position in selected_rows if position < len(frame)]
+
+
+def row_to_transaction(frame, trx_id):
+    """Satu baris DataFrame kembali ke format dict transaksi (untuk mode edit)."""
+    row = frame.loc[trx_id]
+    return {
+        'id': trx_id,
+        'date': row['date'].date().isoformat(),
+        'category': str(row['category']),
+        'type': str(row['type']),
+        'amount': float(row['amount']),
+        'description': str(row['description']) if pd.notna(row['description']) else '',
+    }
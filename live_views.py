@@ -0,0 +1,169 @@
+"""
+Tampilan bulanan yang diperbarui secara realtime dari aliran perubahan backend.
+
+Satu langganan per (pengguna, bulan) untuk seluruh proses (semua sesi Streamlit memakai view
+yang sama). Backend mengirim semua transaksi bulan itu sekali, lalu hanya perubahannya
+('added', 'modified', 'removed'); view menyimpan transaksi per ID dan ringkasannya
+(format rollup, lihat storage/rollups.py) diperbarui per perubahan, bukan dihitung ulang.
+
+Karena disimpan per ID, perubahan yang sama boleh datang dua kali (dari penulisan proses ini
+dan dari backend) tanpa terhitung ganda.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from storage.rollups import apply_to_rollup, empty_rollup, rollup_month
+
+LIVE_VIEW_MAX = 128
+LIVE_VIEW_IDLE_SECONDS = 600 # View yang tidak dibaca selama ini berhenti berlangganan
+READY_TIMEOUT_SECONDS = 10 # Menunggu data awal; lewat dari ini pembacaan memakai kueri biasa
+LIVE_VIEW_RETRY_SECONDS = 60 # View yang data awalnya tidak kunjung tiba berlangganan ulang setelah ini
+
+
+class MonthView:
+    """Transaksi dan ringkasan satu bulan milik satu pengguna, diperbarui dari perubahan."""
+
+    def __init__(self, user_id, year_month):
+        self.user_id = user_id
+        self.year_month = year_month
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.rows = {}
+        self.rollup = empty_rollup()
+        self.version = 0 # Naik setiap ada perubahan; halaman membandingkannya untuk tahu kapan rerun
+        self.last_access = time.monotonic()
+        self.subscribed_at = time.monotonic()
+        self.timed_out = False # Pernah ditunggu sampai READY_TIMEOUT_SECONDS; pembacaan berikutnya tidak menunggu lagi
+        self.unsubscribe = None
+
+    def apply(self, changes):
+        """Menerapkan list (jenis, transaksi); transaksi di luar bulan ini dikeluarkan dari view."""
+        with self.lock:
+            changed = False
+            for kind, row in changes:
+                old_row = self.rows.pop(row['id'], None)
+                if old_row is not None:
+                    apply_to_rollup(self.rollup, old_row, -1)
+                    changed = True
+                if kind != 'removed' and rollup_month(row) == self.year_month:
+                    self.rows[row['id']] = row
+                    apply_to_rollup(self.rollup, row, 1)
+                    changed = True
+            if changed:
+                self.version += 1
+
+    def receive(self, changes):
+        """Callback langganan backend: perubahan pertama berisi data awal, sesudahnya view siap dibaca."""
+        self.apply(changes)
+        self.ready.set()
+
+    def summary(self):
+        """Salinan ringkasan bulan ini {'income', 'expense', 'expense_by_category'}."""
+        with self.lock:
+            return dict(self.rollup, expense_by_category=dict(self.rollup['expense_by_category']))
+
+    def transactions(self):
+        with self.lock:
+            return list(self.rows.values())
+
+
+class LiveViewManager:
+    """Daftar view bulanan yang sedang berlangganan ke satu backend (maksimal LIVE_VIEW_MAX, LRU)."""
+
+    def __init__(self, backend, month_range):
+        self.backend = backend
+        self.month_range = month_range # 'YYYY-MM' -> (tanggal awal, tanggal akhir)
+        self.views = OrderedDict() # (user_id, 'YYYY-MM') -> MonthView
+        self.lock = threading.Lock()
+
+    def get(self, user_id, year_month):
+        """
+        View bulan itu (berlangganan saat pertama kali dibaca), atau None jika data awal belum tiba.
+        Data awal ditunggu paling lama READY_TIMEOUT_SECONDS, sekali saja: jika tidak tiba (misal
+        offline), pembacaan berikutnya langsung memakai kueri biasa sambil tetap berlangganan, dan
+        setelah LIVE_VIEW_RETRY_SECONDS langganannya dibuat ulang.
+        """
+        key = (user_id, year_month)
+        now = time.monotonic()
+        with self.lock:
+            view = self.views.get(key)
+            expired, timed_out = [], False
+            if (view is not None and view.timed_out and not view.ready.is_set()
+                    and now - view.subscribed_at > LIVE_VIEW_RETRY_SECONDS):
+                expired.append(self.views.pop(key))
+                view, timed_out = None, True
+            subscribe = view is None
+            if subscribe:
+                view = MonthView(user_id, year_month)
+                view.timed_out = timed_out
+                self.views[key] = view
+            self.views.move_to_end(key)
+            view.last_access = now
+            expired += self._evict()
+
+        for old_view in expired:
+            self._unsubscribe(old_view)
+        if subscribe:
+            # Berlangganan di luar lock: backend bisa langsung mengirim data awal dari thread ini
+            start_date, end_date = self.month_range(year_month)
+            try:
+                view.unsubscribe = self.backend.watch_transactions_between(user_id, start_date, end_date, view.receive)
+            except Exception:
+                with self.lock:
+                    self.views.pop(key, None)
+                raise
+        if view.ready.is_set():
+            return view
+        if view.timed_out:
+            return None
+        if view.ready.wait(READY_TIMEOUT_SECONDS):
+            return view
+        view.timed_out = True
+        return None
+
+    def peek(self, user_id, year_month):
+        """View yang sudah ada (tanpa berlangganan baru), atau None."""
+        with self.lock:
+            return self.views.get((user_id, year_month))
+
+    def apply_local(self, user_id, changes):
+        """Menerapkan penulisan dari proses ini ke semua view pengguna, tanpa menunggu backend."""
+        with self.lock:
+            views = [view for (view_user, _), view in self.views.items() if view_user == user_id]
+        for view in views:
+            view.apply(changes)
+
+    def discard(self, user_id, months=None):
+        """Berhenti berlangganan view pengguna (bulan-bulan itu, atau semua); dibuat ulang saat dibaca lagi."""
+        with self.lock:
+            keys = [key for key in self.views if key[0] == user_id and (months is None or key[1] in months)]
+            views = [self.views.pop(key) for key in keys]
+        for view in views:
+            self._unsubscribe(view)
+
+    def close(self):
+        with self.lock:
+            views, self.views = list(self.views.values()), OrderedDict()
+        for view in views:
+            self._unsubscribe(view)
+
+    def _evict(self):
+        # Dipanggil dengan self.lock dipegang
+        now = time.monotonic()
+        expired = [key for key, view in self.views.items() if now - view.last_access > LIVE_VIEW_IDLE_SECONDS]
+        remaining = len(self.views) - len(expired)
+        for key in self.views: # Terlama dulu (LRU)
+            if remaining <= LIVE_VIEW_MAX:
+                break
+            if key not in expired:
+                expired.append(key)
+                remaining -= 1
+        return [self.views.pop(key) for key in expired]
+
+    def _unsubscribe(self, view):
+        if view.unsubscribe is not None:
+            try:
+                view.unsubscribe()
+            except Exception as e:
+                print(f"Gagal berhenti berlangganan {view.year_month}: {e}")
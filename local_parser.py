@@ -0,0 +1,225 @@
+"""
+Parser transaksi lokal berbasis aturan (tanpa AI).
+
+Dipakai sebelum memanggil Gemini: input pendek yang polanya umum
+("makan siang di warteg 25rb", "gaji 5 juta") langsung diproses di sini.
+Hanya input dengan confidence rendah yang diteruskan ke model.
+"""
+import difflib
+import re
+
+# Confidence minimal agar hasil lokal dipakai tanpa AI
+CONFIDENCE_THRESHOLD = 0.75
+
+DEFAULT_EXPENSE_CATEGORY = "Lain-Lain (Pengeluaran)"
+DEFAULT_INCOME_CATEGORY = "Lain-Lain (Pemasukan)"
+
+# Satuan nominal dalam bahasa Indonesia
+AMOUNT_MULTIPLIERS = {
+    'rb': 1_000, 'ribu': 1_000, 'k': 1_000, 'rebu': 1_000,
+    'jt': 1_000_000, 'juta': 1_000_000,
+    'miliar': 1_000_000_000, 'milyar': 1_000_000_000,
+}
+
+AMOUNT_PATTERN = re.compile(
+    r'(?P<rp>rp\.?\s*)?'                                  # 'Rp', 'Rp.' opsional
+    r'(?P<number>\d+(?:[.,]\d+)*)'                        # angka: 25, 25.000, 1.5, 1,5, 25.000,00
+    r'\s*(?P<unit>rb|ribu|rebu|k|jt|juta|miliar|milyar)?'  # satuan opsional
+    r'(?![a-z])',
+    re.IGNORECASE,
+)
+# Tanpa satuan: ribuan dipisah '.' dengan desimal ',' opsional (25.000 / 25.000,00),
+# ribuan dipisah ',' dengan desimal '.' opsional (25,000.00), atau angka dengan desimal saja (25,5)
+GROUPED_DOT_PATTERN = re.compile(r'\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?')
+GROUPED_COMMA_PATTERN = re.compile(r'\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?')
+DECIMAL_PATTERN = re.compile(r'\d+[.,]\d{1,2}')
+
+MAX_AMOUNT = 100_000_000_000 # Di atas ini nominal dianggap salah baca (misal '1.000.000 juta')
+MIN_PLAUSIBLE_AMOUNT = 100 # Di bawah ini kemungkinan bukan rupiah ('kopi 20', '2 porsi')
+# Confidence nominal (digabung dengan confidence tipe dan kategori, lihat parse_transaction_locally)
+AMOUNT_CONFIDENCE_MARKED = 1.0 # Ada satuan atau 'Rp'
+AMOUNT_CONFIDENCE_GROUPED = 0.8 # Tanpa satuan/'Rp', tapi ditulis dengan pemisah ribuan ('25.000')
+AMOUNT_CONFIDENCE_BARE = 0.6 # Angka polos tanpa penanda apa pun
+AMOUNT_CONFIDENCE_SMALL = 0.2
+AMOUNT_CONFIDENCE_COMPETING = 0.5 # Lebih dari satu angka yang sama-sama mungkin nominal
+
+INCOME_KEYWORDS = (
+    'gaji', 'gajian', 'bonus', 'thr', 'dapat', 'dapet', 'terima', 'diterima', 'masuk',
+    'transferan', 'dikirim', 'dividen', 'bunga', 'komisi', 'honor', 'fee', 'untung',
+    'penjualan', 'jual', 'refund', 'cashback', 'hadiah',
+)
+EXPENSE_KEYWORDS = (
+    'beli', 'bayar', 'makan', 'minum', 'jajan', 'ongkos', 'ojol', 'gojek', 'grab', 'parkir',
+    'bensin', 'isi', 'pulsa', 'kuota', 'listrik', 'air', 'sewa', 'kos', 'cicilan', 'tagihan',
+    'belanja', 'kopi', 'nonton', 'langganan', 'servis', 'tiket', 'obat', 'donasi', 'sedekah',
+)
+
+# Kata kunci -> kata yang kemungkinan muncul di nama kategori pengguna
+CATEGORY_KEYWORDS = {
+    'makan': ('makan', 'makanan', 'kuliner'), 'minum': ('makan', 'makanan', 'minuman'),
+    'kopi': ('makan', 'makanan', 'minuman', 'kopi'), 'warteg': ('makan', 'makanan'),
+    'sarapan': ('makan', 'makanan'), 'jajan': ('jajan', 'makan', 'makanan'),
+    'ojol': ('transport', 'transportasi'), 'gojek': ('transport', 'transportasi'),
+    'grab': ('transport', 'transportasi'), 'bensin': ('transport', 'transportasi', 'bensin'),
+    'parkir': ('transport', 'transportasi'), 'ongkos': ('transport', 'transportasi'),
+    'tol': ('transport', 'transportasi'), 'kereta': ('transport', 'transportasi'),
+    'pulsa': ('pulsa', 'komunikasi', 'internet', 'tagihan'), 'kuota': ('pulsa', 'internet', 'komunikasi'),
+    'listrik': ('listrik', 'tagihan', 'utilitas'), 'air': ('tagihan', 'utilitas'),
+    'sewa': ('sewa', 'kos', 'rumah', 'tempat tinggal'), 'kos': ('kos', 'sewa', 'rumah'),
+    'belanja': ('belanja', 'kebutuhan'), 'nonton': ('hiburan',), 'langganan': ('hiburan', 'langganan'),
+    'obat': ('kesehatan',), 'dokter': ('kesehatan',), 'donasi': ('sedekah', 'donasi', 'amal'),
+    'sedekah': ('sedekah', 'donasi', 'amal'),
+    'gaji': ('gaji',), 'gajian': ('gaji',), 'bonus': ('bonus',), 'thr': ('bonus',),
+    'dividen': ('investasi',), 'saham': ('investasi',), 'reksadana': ('investasi',),
+}
+
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+
+def _parse_number(number, unit):
+    """Nilai rupiah dari angka + satuan, atau None jika bentuknya tidak masuk akal."""
+    if unit:
+        separators = number.count('.') + number.count(',')
+        if separators > 1:
+            return None # Satuan setelah angka berpemisah ribuan: '1.000.000 juta'
+        # Dengan satuan, satu '.'/',' adalah desimal: '1.5 juta', '2,5jt'
+        value = float(number.replace(',', '.')) * AMOUNT_MULTIPLIERS[unit]
+    elif number.isdigit():
+        value = float(number)
+    elif GROUPED_DOT_PATTERN.fullmatch(number):
+        value = float(number.replace('.', '').replace(',', '.'))
+    elif GROUPED_COMMA_PATTERN.fullmatch(number):
+        value = float(number.replace(',', ''))
+    elif DECIMAL_PATTERN.fullmatch(number):
+        value = float(number.replace(',', '.'))
+    else:
+        return None
+    return value if value <= MAX_AMOUNT else None
+
+
+def _find_amount(text):
+    """
+    Mengembalikan (nominal, span teksnya, confidence nominal) atau (None, None, 0.0).
+    Confidence turun jika nominal tanpa satuan/'Rp', terlalu kecil, atau bersaing dengan angka lain.
+    """
+    candidates = []
+    for match in AMOUNT_PATTERN.finditer(text):
+        unit = (match.group('unit') or '').lower()
+        value = _parse_number(match.group('number'), unit)
+        if value is None:
+            continue
+        if unit or match.group('rp'):
+            confidence = AMOUNT_CONFIDENCE_MARKED
+        elif not match.group('number').isdigit():
+            confidence = AMOUNT_CONFIDENCE_GROUPED
+        else:
+            confidence = AMOUNT_CONFIDENCE_BARE
+        candidates.append((value, match.span(), confidence))
+    if not candidates:
+        return None, None, 0.0
+
+    # Nominal terbesar hampir selalu jumlah transaksinya (bukan '2 porsi')
+    value, span, confidence = max(candidates, key=lambda candidate: candidate[0])
+    if value < MIN_PLAUSIBLE_AMOUNT:
+        confidence = min(confidence, AMOUNT_CONFIDENCE_SMALL)
+    # Angka lain yang juga tampak seperti nominal (bertanda atau cukup besar) membuat hasilnya ragu
+    competing = [candidate for candidate in candidates if candidate[1] != span
+                 and (candidate[2] > AMOUNT_CONFIDENCE_BARE or candidate[0] >= MIN_PLAUSIBLE_AMOUNT)]
+    if competing:
+        confidence = min(confidence, AMOUNT_CONFIDENCE_COMPETING)
+    return int(round(value)), span, confidence
+
+
+def parse_amount_expression(text):
+    """
+    Mencari nominal dalam teks bahasa Indonesia dan mengembalikannya sebagai integer.
+    Contoh: '25rb' -> 25000, '1.5 juta' -> 1500000, 'Rp 25.000' -> 25000, '20k' -> 20000.
+    Mengembalikan None jika tidak ada nominal.
+    """
+    return _find_amount(text)[0]
+
+
+def _words(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def detect_type(words):
+    """Mengembalikan (tipe, confidence) berdasarkan kata kunci pemasukan/pengeluaran."""
+    income_hits = sum(1 for word in words if word in INCOME_KEYWORDS)
+    expense_hits = sum(1 for word in words if word in EXPENSE_KEYWORDS)
+    if income_hits and not expense_hits:
+        return 'Pemasukan', 1.0
+    if expense_hits and not income_hits:
+        return 'Pengeluaran', 1.0
+    if income_hits and expense_hits:
+        return ('Pemasukan', 0.5) if income_hits > expense_hits else ('Pengeluaran', 0.5)
+    # Tidak ada petunjuk: mayoritas input adalah pengeluaran
+    return 'Pengeluaran', 0.6
+
+
+def match_category(words, categories):
+    """
+    Memilih kategori dari daftar berdasarkan kata kunci, lalu fuzzy match.
+    Mengembalikan (kategori, confidence), atau (None, 0.0) jika tidak ada yang cocok.
+    """
+    lowered = {category: category.lower() for category in categories}
+
+    # 1. Nama kategori disebut langsung di teks
+    for category, name in lowered.items():
+        if any(word in _words(name) for word in words if len(word) > 3):
+            return category, 1.0
+
+    # 2. Kata kunci yang dipetakan ke kata di nama kategori
+    for word in words:
+        for hint in CATEGORY_KEYWORDS.get(word, ()):
+            for category, name in lowered.items():
+                if hint in name:
+                    return category, 0.9
+
+    # 3. Fuzzy match (salah ketik, bentuk kata berbeda)
+    best_category, best_ratio = None, 0.0
+    for word in words:
+        if len(word) < 4:
+            continue
+        for category, name in lowered.items():
+            for category_word in _words(name):
+                ratio = difflib.SequenceMatcher(None, word, category_word).ratio()
+                if ratio > best_ratio:
+                    best_category, best_ratio = category, ratio
+    if best_ratio >= 0.8:
+        return best_category, best_ratio * 0.9
+    return None, 0.0
+
+
+def parse_transaction_locally(user_input, expense_categories, income_categories):
+    """
+    Mem-parsing input tanpa AI.
+    Mengembalikan (hasil, confidence); confidence adalah yang terendah dari tipe, kategori, dan
+    nominal (lihat _find_amount), jadi nominal yang meragukan tetap diteruskan ke AI.
+    Hasil berformat sama dengan parse_transaction_with_ai ({'type', 'amount', 'description', 'category'})
+    atau None jika nominal tidak ditemukan.
+    """
+    amount, amount_span, amount_confidence = _find_amount(user_input)
+    if not amount:
+        return None, 0.0
+
+    words = _words(user_input)
+    trx_type, type_confidence = detect_type(words)
+
+    categories = income_categories if trx_type == 'Pemasukan' else expense_categories
+    category, category_confidence = match_category(words, categories)
+    if category is None:
+        category = DEFAULT_INCOME_CATEGORY if trx_type == 'Pemasukan' else DEFAULT_EXPENSE_CATEGORY
+        category_confidence = 0.3
+
+    # Deskripsi: teks asli tanpa nominalnya
+    description = user_input[:amount_span[0]] + ' ' + user_input[amount_span[1]:]
+    description = " ".join(description.split()) or user_input.strip()
+
+    result = {
+        'type': trx_type,
+        'amount': amount,
+        'description': description,
+        'category': category,
+    }
+    return result, min(type_confidence, category_confidence, amount_confidence)
@@ -0,0 +1,501 @@
+"""
+Instrumentasi performa: latensi per fungsi, dokumen dibaca/ditulis backend, cache hit/miss,
+dan token AI; per panggilan dan per render halaman.
+
+- Fungsi database.py dan parsing AI dibungkus dengan instrument_module() (latensi + hitungan).
+- Backend dibungkus InstrumentedBackend: setiap panggilan mencatat jumlah dokumen.
+- Hitungan dicatat ke panggilan yang sedang berjalan (contextvars) lalu dijumlahkan ke
+  pemanggilnya, sampai ke render halaman (begin_page/end_page di setiap halaman).
+- Ekspor: prometheus_text() (format teks Prometheus; juga lewat HTTP jika EFTARI_METRICS_PORT
+  diisi, hanya di 127.0.0.1 kecuali EFTARI_METRICS_HOST diisi) dan log terstruktur JSON per
+  baris jika EFTARI_METRICS_LOG diisi.
+
+Matikan seluruhnya dengan EFTARI_METRICS=off: fungsi dan backend tidak dibungkus sama sekali.
+"""
+import bisect
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.environ.get("EFTARI_METRICS", "on") != "off"
+METRICS_LOG_PATH = os.environ.get("EFTARI_METRICS_LOG", "") # Kosong = tanpa log terstruktur
+METRICS_PORT = int(os.environ.get("EFTARI_METRICS_PORT", 0)) # 0 = tanpa endpoint HTTP
+# Endpoint tanpa autentikasi: bawaan hanya lokal, isi "0.0.0.0" jika Prometheus di mesin lain
+METRICS_HOST = os.environ.get("EFTARI_METRICS_HOST", "127.0.0.1")
+
+# Batas atas bucket histogram latensi (detik): bucket default klien Prometheus, ditambah bucket
+# sub-milidetik untuk pembacaan dari cache/view
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Jumlah dokumen per panggilan backend: baca dihitung dari hasilnya, tulis dari argumennya
+# (jumlah transaksi/anggaran yang diminta ditulis; dokumen rollup tidak ikut dihitung).
+BACKEND_READS = {
+    'list_users': len,
+    'get_budget_versions': len,
+    'get_all_transactions': len,
+    'get_transactions_by_ids': len,
+    'get_transactions_between': len,
+    'get_transactions_page': len,
+    'get_all_rollups': len,
+    'get_month_rollup': lambda result: int(result is not None),
+    'get_summary_between': lambda result: 1, # Satu kueri agregasi
+}
+BACKEND_WRITES = {
+    'set_budget_version': lambda args, result: 1,
+    'add_transaction': lambda args, result: 1,
+    'add_transactions': lambda args, result: len(args[1]),
+    'save_transactions': lambda args, result: len(args[1]),
+    'update_transaction': lambda args, result: int(result is not None),
+    'delete_transaction': lambda args, result: int(result is not None),
+    'delete_transactions': lambda args, result: len(result),
+    'replace_rollups': lambda args, result: len(args[1]),
+}
+
+STAT_FIELDS = ('documents_read', 'documents_written', 'cache_hits', 'cache_misses',
+               'ai_prompt_tokens', 'ai_output_tokens')
+
+
+class CallStats:
+    """Hitungan satu panggilan (atau satu render halaman), termasuk semua panggilan di dalamnya."""
+
+    __slots__ = STAT_FIELDS + ('parent',)
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        for field in STAT_FIELDS:
+            setattr(self, field, 0)
+
+    def add(self, other):
+        for field in STAT_FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in STAT_FIELDS}
+
+
+class PageStats(CallStats):
+    """Hitungan satu render halaman; call_seconds = total durasi panggilan terukur tingkat atas."""
+
+    __slots__ = ('call_seconds',)
+
+    def __init__(self):
+        super().__init__()
+        self.call_seconds = 0.0
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1) # Bucket terakhir: +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Perkiraan kuantil (batas atas bucket), atau None jika kosong."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+
+# --- Registri (satu per proses, dipakai bersama semua sesi) ---
+
+# nama metrik -> (tipe, keterangan, nama label)
+METRIC_HELP = {
+    'eftari_call_duration_seconds': ('histogram', "Latensi fungsi database/AI", 'function'),
+    'eftari_call_errors_total': ('counter', "Panggilan fungsi yang melempar exception", 'function'),
+    'eftari_backend_duration_seconds': ('histogram', "Latensi panggilan backend penyimpanan", 'method'),
+    'eftari_backend_documents_read_total': ('counter', "Dokumen dibaca dari backend", 'method'),
+    'eftari_backend_documents_written_total': ('counter', "Dokumen ditulis ke backend", 'method'),
+    'eftari_cache_lookups_total': ('counter', "Pencarian cache baca", 'result'),
+    'eftari_ai_tokens_total': ('counter', "Token model AI", 'kind'),
+    'eftari_page_render_seconds': ('histogram', "Durasi render halaman", 'page'),
+    'eftari_page_documents_read_total': ('counter', "Dokumen dibaca per halaman", 'page'),
+    'eftari_page_documents_written_total': ('counter', "Dokumen ditulis per halaman", 'page'),
+    'eftari_page_cache_hits_total': ('counter', "Cache hit per halaman", 'page'),
+    'eftari_page_cache_misses_total': ('counter', "Cache miss per halaman", 'page'),
+    'eftari_page_ai_tokens_total': ('counter', "Token AI per halaman", 'page'),
+    'eftari_page_call_seconds_total': ('counter', "Waktu render di dalam fungsi database/AI", 'page'),
+}
+
+_lock = threading.Lock()
+_histograms = {} # (nama metrik, nilai label) -> Histogram
+_counters = {} # (nama metrik, nilai label) -> angka
+_current = contextvars.ContextVar('eftari_metrics_call', default=None)
+_logger = None
+
+
+def observe(metric, label, seconds):
+    with _lock:
+        histogram = _histograms.get((metric, label))
+        if histogram is None:
+            histogram = _histograms[(metric, label)] = Histogram()
+        histogram.observe(seconds)
+
+
+def increment(metric, label, amount=1):
+    if amount:
+        with _lock:
+            _counters[(metric, label)] = _counters.get((metric, label), 0) + amount
+
+
+def _count(field, amount):
+    # Ke panggilan yang sedang berjalan; dijumlahkan ke pemanggil saat panggilan itu selesai
+    stats = _current.get()
+    if stats is not None:
+        setattr(stats, field, getattr(stats, field) + amount)
+
+
+def reset():
+    """Mengosongkan semua metrik (misal untuk benchmark)."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """Salinan semua metrik: {'histograms': {(metrik, label): Histogram}, 'counters': {...}}."""
+    with _lock:
+        histograms = {}
+        for key, histogram in _histograms.items():
+            copy = histograms[key] = Histogram()
+            copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+        return {'histograms': histograms, 'counters': dict(_counters)}
+
+
+# --- Pencatatan ---
+
+def record_cache_lookup(hit):
+    """Observer QueryCache: dipanggil sekali per get_or_load."""
+    increment('eftari_cache_lookups_total', 'hit' if hit else 'miss')
+    _count('cache_hits' if hit else 'cache_misses', 1)
+
+
+def record_ai_usage(usage):
+    """Mencatat usage_metadata respons Gemini (prompt_token_count, candidates_token_count)."""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+    increment('eftari_ai_tokens_total', 'prompt', prompt_tokens)
+    increment('eftari_ai_tokens_total', 'output', output_tokens)
+    _count('ai_prompt_tokens', prompt_tokens)
+    _count('ai_output_tokens', output_tokens)
+
+
+def _log(event, **fields):
+    global _logger
+    if not METRICS_LOG_PATH:
+        return
+    if _logger is None:
+        with _lock:
+            if _logger is None:
+                logger = logging.getLogger("eftari.metrics")
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                logger.addHandler(logging.FileHandler(METRICS_LOG_PATH, encoding='utf-8'))
+                _logger = logger
+    _logger.info(json.dumps(dict(event=event, ts=round(time.time(), 3), **fields), ensure_ascii=False))
+
+
+def timed(name, function):
+    """Membungkus function: latensi, error, dan hitungan dokumen/cache/token per panggilan."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        parent = _current.get()
+        stats = CallStats(parent)
+        token = _current.set(stats)
+        error = None
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            _current.reset(token)
+            observe('eftari_call_duration_seconds', name, seconds)
+            if error is not None:
+                increment('eftari_call_errors_total', name)
+            nested = parent is not None and not isinstance(parent, PageStats)
+            if parent is not None:
+                parent.add(stats)
+                if not nested:
+                    parent.call_seconds += seconds
+            if METRICS_LOG_PATH:
+                _log('call', function=name, seconds=round(seconds, 6), nested=nested,
+                     error=type(error).__name__ if error is not None else None, **stats.as_dict())
+    wrapper.__wrapped_by_metrics__ = True
+    return wrapper
+
+
+def instrument_module(namespace, names):
+    """
+    Mengganti fungsi-fungsi `names` di namespace modul (globals()) dengan versi terukur, sehingga
+    panggilan antarfungsi di modul itu juga terukur. Generator dan fungsi yang sudah dibungkus dilewati.
+    Tidak melakukan apa-apa jika metrik dimatikan.
+    """
+    if not METRICS_ENABLED:
+        return
+    module = namespace.get('__name__', '')
+    for name in names:
+        function = namespace[name]
+        if getattr(function, '__wrapped_by_metrics__', False) or inspect.isgeneratorfunction(function):
+            continue
+        namespace[name] = timed(f"{module}.{name}", function)
+    start_http_server()
+
+
+# --- Ringkasan untuk Halaman Performa ---
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def function_rows(data):
+    """Satu baris per fungsi terukur: jumlah panggilan, error, rata-rata dan p50/p95 (ms)."""
+    rows = []
+    for (metric, name), histogram in data['histograms'].items():
+        if metric != 'eftari_call_duration_seconds':
+            continue
+        rows.append({
+            'function': name,
+            'calls': histogram.count,
+            'errors': data['counters'].get(('eftari_call_errors_total', name), 0),
+            'avg_ms': _ms(histogram.sum / histogram.count),
+            'p50_ms': _ms(histogram.quantile(0.5)),
+            'p95_ms': _ms(histogram.quantile(0.95)),
+            'total_ms': _ms(histogram.sum),
+        })
+    return sorted(rows, key=lambda row: -row['total_ms'])
+
+
+def backend_rows(data):
+    """Satu baris per metode backend: panggilan, latensi, dokumen dibaca/ditulis."""
+    rows = []
+    for (metric, method), histogram in data['histograms'].items():
+        if metric != 'eftari_backend_duration_seconds':
+            continue
+        rows.append({
+            'method': method,
+            'calls': histogram.count,
+            'avg_ms': _ms(histogram.sum / histogram.count),
+            'p95_ms': _ms(histogram.quantile(0.95)),
+            'documents_read': data['counters'].get(('eftari_backend_documents_read_total', method), 0),
+            'documents_written': data['counters'].get(('eftari_backend_documents_written_total', method), 0),
+        })
+    return sorted(rows, key=lambda row: -row['calls'])
+
+
+def page_rows(data):
+    """
+    Satu baris per halaman, rata-rata per render: durasi total, waktu di fungsi database/AI,
+    sisanya (pandas, widget Streamlit), dokumen dibaca, cache hit, dan token AI.
+    """
+    counters, rows = data['counters'], []
+    for (metric, page), histogram in data['histograms'].items():
+        if metric != 'eftari_page_render_seconds':
+            continue
+        renders = histogram.count
+        call_seconds = counters.get(('eftari_page_call_seconds_total', page), 0)
+        hits = counters.get(('eftari_page_cache_hits_total', page), 0)
+        misses = counters.get(('eftari_page_cache_misses_total', page), 0)
+        rows.append({
+            'page': page,
+            'renders': renders,
+            'avg_ms': _ms(histogram.sum / renders),
+            'p95_ms': _ms(histogram.quantile(0.95)),
+            'calls_ms': _ms(call_seconds / renders),
+            'other_ms': _ms((histogram.sum - call_seconds) / renders),
+            'documents_read': counters.get(('eftari_page_documents_read_total', page), 0) / renders,
+            'cache_hit_rate': hits / (hits + misses) if hits + misses else None,
+            'ai_tokens': counters.get(('eftari_page_ai_tokens_total', page), 0) / renders,
+        })
+    return sorted(rows, key=lambda row: row['page'])
+
+
+# --- Render Halaman ---
+
+_page = contextvars.ContextVar('eftari_metrics_page', default=None) # (nama halaman, mulai, PageStats)
+
+
+def begin_page(name):
+    """Dipanggil di awal skrip halaman: semua panggilan sesudahnya dihitung ke render ini."""
+    if not METRICS_ENABLED:
+        return
+    stats = PageStats()
+    _page.set((name, time.perf_counter(), stats))
+    _current.set(stats)
+
+
+def end_page():
+    """Dipanggil di akhir skrip halaman. Render yang berhenti lebih awal (st.stop/st.rerun) tidak dicatat."""
+    render = _page.get()
+    if render is None:
+        return
+    name, start, stats = render
+    _page.set(None)
+    _current.set(None)
+    seconds = time.perf_counter() - start
+    observe('eftari_page_render_seconds', name, seconds)
+    increment('eftari_page_documents_read_total', name, stats.documents_read)
+    increment('eftari_page_documents_written_total', name, stats.documents_written)
+    increment('eftari_page_cache_hits_total', name, stats.cache_hits)
+    increment('eftari_page_cache_misses_total', name, stats.cache_misses)
+    increment('eftari_page_ai_tokens_total', name, stats.ai_prompt_tokens + stats.ai_output_tokens)
+    increment('eftari_page_call_seconds_total', name, stats.call_seconds)
+    _log('page', page=name, seconds=round(seconds, 6), call_seconds=round(stats.call_seconds, 6),
+         **stats.as_dict())
+
+
+# --- Backend Terukur ---
+
+class InstrumentedBackend:
+    """
+    Pembungkus backend penyimpanan: setiap metode StorageBackend diukur latensi dan jumlah
+    dokumennya. Atribut lain (add_listener, flush, supports_watch, ...) diteruskan apa adanya.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def _measured(method_name):
+    count_reads = BACKEND_READS.get(method_name)
+    count_writes = BACKEND_WRITES.get(method_name)
+
+    def method(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = getattr(self.backend, method_name)(*args, **kwargs)
+        observe('eftari_backend_duration_seconds', method_name, time.perf_counter() - start)
+        if count_reads is not None and result is not None:
+            documents = count_reads(result)
+            increment('eftari_backend_documents_read_total', method_name, documents)
+            _count('documents_read', documents)
+        if count_writes is not None:
+            documents = count_writes(args, result)
+            increment('eftari_backend_documents_written_total', method_name, documents)
+            _count('documents_written', documents)
+        return result
+    method.__name__ = method_name
+    return method
+
+
+for _method_name in (*BACKEND_READS, *BACKEND_WRITES):
+    setattr(InstrumentedBackend, _method_name, _measured(_method_name))
+
+
+def _watch_transactions_between(self, user_id, start_date, end_date, callback):
+    # Setiap dokumen di snapshot awal dan di setiap perubahan terhitung sebagai dokumen dibaca.
+    # Hanya snapshot awal yang dihitung ke panggilan yang berlangganan; perubahan sesudahnya
+    # datang dari thread listener (atau dari penulisan pengguna lain) dan hanya masuk total proses.
+    initial = [True]
+
+    def counted(changes):
+        increment('eftari_backend_documents_read_total', 'watch_transactions_between', len(changes))
+        if initial[0]:
+            initial[0] = False
+            _count('documents_read', len(changes))
+        callback(changes)
+
+    start = time.perf_counter()
+    unsubscribe = self.backend.watch_transactions_between(user_id, start_date, end_date, counted)
+    observe('eftari_backend_duration_seconds', 'watch_transactions_between', time.perf_counter() - start)
+    return unsubscribe
+
+
+InstrumentedBackend.watch_transactions_between = _watch_transactions_between
+
+
+def instrument_backend(backend):
+    """Backend terukur (atau backend itu sendiri jika metrik mati / sudah terbungkus)."""
+    if not METRICS_ENABLED or isinstance(backend, InstrumentedBackend):
+        return backend
+    return InstrumentedBackend(backend)
+
+
+# --- Ekspor ---
+
+def _label(metric, value):
+    escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return f'{METRIC_HELP[metric][2]}="{escaped}"'
+
+
+def prometheus_text():
+    """Semua metrik dalam format teks Prometheus (exposition format 0.0.4)."""
+    data = snapshot()
+    lines = []
+    for metric, (kind, help_text, _) in METRIC_HELP.items():
+        if kind == 'histogram':
+            series = sorted((label, h) for (name, label), h in data['histograms'].items() if name == metric)
+        else:
+            series = sorted((label, v) for (name, label), v in data['counters'].items() if name == metric)
+        if not series:
+            continue
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for label, value in series:
+            label_text = _label(metric, label)
+            if kind == 'counter':
+                lines.append(f"{metric}{{{label_text}}} {value:g}")
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), value.counts):
+                cumulative += count
+                le = "+Inf" if bound == float('inf') else f"{bound:g}"
+                lines.append(f'{metric}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{label_text}}} {value.sum:.6f}")
+            lines.append(f"{metric}_count{{{label_text}}} {value.count}")
+    return "\n".join(lines) + "\n"
+
+
+_http_server = None
+
+
+def start_http_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Endpoint /metrics untuk di-scrape Prometheus (sekali per proses; port 0 = tidak dijalankan)."""
+    global _http_server
+    if not port or _http_server is not None:
+        return
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = prometheus_text().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        if _http_server is not None:
+            return
+        try:
+            _http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        except OSError as e:
+            print(f"Endpoint metrik tidak bisa dibuka di {host}:{port}: {e}")
+            return
+    threading.Thread(target=_http_server.serve_forever, name="eftari-metrics", daemon=True).start()
@@ -0,0 +1,33 @@
+"""
+Memindahkan data lama (sebelum ada pemisahan per pengguna) ke satu pengguna.
+
+    python migrate_to_users.py                       # ke pengguna bawaan ('default')
+    python migrate_to_users.py --user budi@contoh.id
+
+Firestore: koleksi root budgets/transactions/monthly_rollups disalin ke users/{user}/...
+(koleksi lama tidak dihapus). SQLite tidak perlu skrip ini: database lama otomatis
+dimigrasi ke pengguna bawaan saat pertama kali dibuka.
+"""
+import argparse
+
+import storage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pindahkan data lama ke data per pengguna.")
+    parser.add_argument("--user", default=storage.DEFAULT_USER_ID, help="user_id pemilik data lama")
+    args = parser.parse_args(argv)
+
+    backend = storage.get_backend_from_config()
+    if not hasattr(backend, "migrate_legacy_collections"):
+        print(f"Backend '{backend.name}' tidak perlu migrasi manual.")
+        return 0
+
+    copied = backend.migrate_legacy_collections(args.user)
+    for collection, count in copied.items():
+        print(f"{collection}: {count:,} dokumen disalin ke users/{args.user}/{collection}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,33 @@
 import streamlit as st
+import metrics
 import database as db
+import user_session
 import datetime
 import ai_helper
 import json
 
 st.set_page_config(page_title="Input Transaksi", page_icon="💸")
+metrics.begin_page("Input Transaksi")
 st.title("💸 Input Transaksi")
 
+user_id = user_session.current_user_id()
+
+# --- Status Sinkronisasi (jika penulisan lewat antrean lokal) ---
+sync_status = db.get_sync_status(user_id)
+if sync_status and sync_status['failed']:
+    st.warning(f"{sync_status['failed']} penulisan gagal disinkronkan: {sync_status['last_error']}")
+    retry_col, discard_col = st.columns(2)
+    if retry_col.button("🔁 Coba Lagi", key="retry_failed_writes"):
+        db.retry_failed_writes(user_id)
+        st.rerun()
+    if discard_col.button("🗑️ Buang Penulisan Gagal", key="discard_failed_writes"):
+        db.discard_failed_writes(user_id)
+        st.rerun()
+elif sync_status and sync_status['pending']:
+    st.caption(f"⏳ {sync_status['pending']} penulisan menunggu sinkronisasi ke server.")
+
 # --- Persiapan Kategori ---
-budget_categories = db.get_budget_categories()
+budget_categories = db.get_budget_categories(user_id)
 income_categories = ["Gaji", "Bonus", "Investasi", "Lain-Lain (Pemasukan)"]
 
 if "Lain-Lain (Pengeluaran)" not in budget_categories:
@@ -26,32 +45,65 @@ st.subheader("Input Cepat (AI)")
 ai_disabled = is_edit_mode
 
 with st.form("ai_form"):
-    user_input = st.text_area("Apa yang baru?", "Contoh: makan siang di warteg 25rb", disabled=ai_disabled)
+    user_input = st.text_area(
+        "Apa yang baru?", "Contoh: makan siang di warteg 25rb", disabled=ai_disabled,
+        help="Tulis satu transaksi per baris untuk mencatat banyak transaksi sekaligus."
+    )
     submit_ai = st.form_submit_button("Catat dengan AI ⚡", disabled=ai_disabled)
 
 # Inisialisasi state jika belum ada
 if 'ai_result' not in st.session_state:
     st.session_state.ai_result = None
+if 'ai_batch_result' not in st.session_state:
+    st.session_state.ai_batch_result = None
+# Kunci idempoten transaksi manual berikutnya; diganti hanya setelah berhasil tersimpan,
+# jadi submit ganda/rerun untuk transaksi yang sama tidak membuat data ganda
+if 'manual_trx_key' not in st.session_state:
+    st.session_state.manual_trx_key = db.new_idempotency_key()
+
+
+def report_save(results):
+    """
+    Menampilkan pesan error untuk item yang gagal; mengembalikan (jumlah baru, jumlah duplikat).
+    Item yang tersimpan di antrean lokal tapi belum bisa dipastikan baru (SAVE_PENDING) dihitung baru.
+    """
+    for result in results:
+        if result['status'] == db.SAVE_INVALID:
+            st.error(f"Gagal menyimpan: {result['error']}")
+    created = sum(result['status'] in (db.SAVE_CREATED, db.SAVE_PENDING) for result in results)
+    duplicates = sum(result['status'] == db.SAVE_DUPLICATE for result in results)
+    return created, duplicates
+
+input_lines = [line.strip() for line in user_input.splitlines() if line.strip()]
+
+if submit_ai and len(input_lines) > 1:
+    # --- Mode Banyak Baris: semua baris diproses dalam satu panggilan AI ---
+    st.session_state.ai_result = None
+    with st.spinner(f"AI sedang memproses {len(input_lines)} baris..."):
+        batch_items = ai_helper.parse_transactions_batch(input_lines, budget_categories, income_categories)
+    for item in batch_items:
+        for warning in item['warnings']:
+            st.warning(f"'{item['input']}': {warning}")
+    # Kunci idempoten dibuat sekarang (saat konfirmasi disiapkan), bukan saat tombol simpan diklik
+    st.session_state.ai_batch_result = [
+        dict(item, key=db.new_idempotency_key()) for item in batch_items if item['result']
+    ]
 
-if submit_ai and user_input:
+elif submit_ai and user_input:
+    st.session_state.ai_batch_result = None
     with st.spinner("AI sedang memproses..."):
-        all_categories = budget_categories + income_categories
-        ai_result = ai_helper.parse_transaction_with_ai(user_input, all_categories)
+        # Parser lokal dulu; AI hanya dipanggil untuk input yang tidak dikenali dengan yakin
+        ai_result, parse_source = ai_helper.parse_transaction(user_input, budget_categories, income_categories)
         
         if ai_result:
-            # NORMALISASI: Pastikan output AI juga konsisten
-            ai_result['category'] = ai_result['category'].strip().title()
-            ai_result['type'] = ai_result['type'].strip().title()
-            
-            # Validasi kategori AI
-            if ai_result['type'] == 'Pengeluaran' and ai_result['category'] not in budget_categories:
-                st.warning(f"AI memilih kategori '{ai_result['category']}' yang tidak ada di daftar anggaran Anda. Menggantinya ke 'Lain-Lain (Pengeluaran)'.")
-                ai_result['category'] = 'Lain-Lain (Pengeluaran)'
-            
-            elif ai_result['type'] == 'Pemasukan' and ai_result['category'] not in income_categories:
-                st.warning(f"AI memilih kategori '{ai_result['category']}' yang tidak ada di daftar pemasukan. Menggantinya ke 'Lain-Lain (Pemasukan)'.")
-                ai_result['category'] = 'Lain-Lain (Pemasukan)'
-                
+            # NORMALISASI + validasi kategori: Pastikan output AI juga konsisten
+            ai_result, warnings = ai_helper.validate_parsed_transaction(ai_result, budget_categories, income_categories)
+            for warning in warnings:
+                st.warning(warning)
+
+        if ai_result:
+            ai_result['source'] = parse_source
+            ai_result['key'] = db.new_idempotency_key()
             st.session_state.ai_result = ai_result
         else:
             st.error("AI tidak dapat memproses input Anda. Coba lagi.")
@@ -60,7 +112,8 @@ if submit_ai and user_input:
 # --- Bagian Konfirmasi AI ---
 if st.session_state.ai_result:
     res = st.session_state.ai_result
-    st.info(f"**Konfirmasi Data dari AI:**\n"
+    source_label = "Parser Lokal" if res.get('source') == 'lokal' else "AI"
+    st.info(f"**Konfirmasi Data dari {source_label}:**\n"
             f"- **Tipe:** {res['type']}\n"
             f"- **Jumlah:** Rp {res['amount']:,.0f}\n"
             f"- **Kategori:** {res['category']}\n"
@@ -70,16 +123,19 @@ if st.session_state.ai_result:
     with col1:
         if st.button("✅ Ya, Simpan", use_container_width=True, type="primary"):
             try:
-                db.add_transaction(
-                    date=str(datetime.date.today()),
-                    description=res['description'],
-                    amount=res['amount'],
-                    type=res['type'],
-                    category=res['category']
-                )
-                st.success("Transaksi berhasil disimpan oleh AI!")
-                st.session_state.ai_result = None
-                st.rerun()
+                created, duplicates = report_save(db.save_transactions(user_id, [{
+                    'key': res['key'],
+                    'date': str(datetime.date.today()),
+                    'description': res['description'],
+                    'amount': res['amount'],
+                    'type': res['type'],
+                    'category': res['category'],
+                }]))
+                if created or duplicates:
+                    # Duplikat = sudah tersimpan oleh klik sebelumnya
+                    st.success("Transaksi berhasil disimpan oleh AI!")
+                    st.session_state.ai_result = None
+                    st.rerun()
             except Exception as e:
                 st.error(f"Gagal menyimpan ke database: {e}")
                 
@@ -88,6 +144,54 @@ if st.session_state.ai_result:
             st.session_state.ai_result = None
             st.rerun()
 
+# --- Bagian Konfirmasi Banyak Baris ---
+if st.session_state.ai_batch_result:
+    batch_results = st.session_state.ai_batch_result
+    st.info(f"**Konfirmasi {len(batch_results)} Transaksi:**")
+    st.dataframe(
+        [
+            {
+                "Tipe": item['result']['type'],
+                "Jumlah (Rp)": item['result']['amount'],
+                "Kategori": item['result']['category'],
+                "Deskripsi": item['result']['description'],
+                "Sumber": "Lokal" if item['source'] == 'lokal' else "AI",
+            }
+            for item in batch_results
+        ],
+        use_container_width=True,
+        hide_index=True
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("✅ Simpan Semua", use_container_width=True, type="primary"):
+            try:
+                # Satu penulisan batch untuk semua transaksi; aman diulang karena setiap item berkunci
+                today = str(datetime.date.today())
+                created, duplicates = report_save(db.save_transactions(user_id, [
+                    {
+                        'key': item['key'],
+                        'date': today,
+                        'description': item['result']['description'],
+                        'amount': item['result']['amount'],
+                        'type': item['result']['type'],
+                        'category': item['result']['category'],
+                    }
+                    for item in batch_results
+                ]))
+                if created + duplicates == len(batch_results):
+                    st.success(f"{len(batch_results)} transaksi berhasil disimpan!")
+                    st.session_state.ai_batch_result = None
+                    st.rerun()
+            except Exception as e:
+                st.error(f"Gagal menyimpan ke database: {e}")
+
+    with col2:
+        if st.button("❌ Batal Semua", use_container_width=True):
+            st.session_state.ai_batch_result = None
+            st.rerun()
+
 st.markdown("---")
 
 # --- Form Input Manual (Sekarang dengan Mode Edit) ---
@@ -152,6 +256,7 @@ with st.form("manual_input_form", clear_on_submit=False):
             if is_edit_mode:
                 # Panggil fungsi UPDATE
                 db.update_transaction(
+                    user_id,
                     trx_id=trx_data['id'],
                     date=str(date),
                     description=description,
@@ -163,13 +268,28 @@ with st.form("manual_input_form", clear_on_submit=False):
                 del st.session_state.edit_trx
                 st.rerun()
             else:
-                # Panggil fungsi ADD (Tambah baru)
-                db.add_transaction(str(date), description, amount, type, category)
-                st.success(f"Transaksi '{type}' sebesar Rp {amount:,.0f} untuk '{category.title()}' berhasil disimpan!")
-                st.rerun()
+                # Tambah baru dengan kunci idempoten form ini
+                created, duplicates = report_save(db.save_transactions(user_id, [{
+                    'key': st.session_state.manual_trx_key,
+                    'date': str(date),
+                    'description': description,
+                    'amount': amount,
+                    'type': type,
+                    'category': category,
+                }]))
+                if created:
+                    st.success(f"Transaksi '{type}' sebesar Rp {amount:,.0f} untuk '{category.title()}' berhasil disimpan!")
+                elif duplicates:
+                    st.info("Transaksi ini sudah tersimpan sebelumnya.")
+                if created or duplicates:
+                    # Kunci baru untuk transaksi berikutnya
+                    st.session_state.manual_trx_key = db.new_idempotency_key()
+                    st.rerun()
                 
 # Tombol untuk batal edit
 if is_edit_mode:
     if st.button("Batal Edit"):
         del st.session_state.edit_trx
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+metrics.end_page()
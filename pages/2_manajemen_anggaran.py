@@ -1,10 +1,16 @@
 import streamlit as st
+import metrics
 import database as db
-import pandas as pd
+import datetime
+import user_session
+from budgets import BudgetHistory
 
 st.set_page_config(page_title="Manajemen Anggaran", page_icon="📊")
+metrics.begin_page("Manajemen Anggaran")
 st.title("📊 Manajemen Anggaran")
 
+user_id = user_session.current_user_id()
+
 # --- Inisialisasi Session State untuk Edit ---
 if 'edit_category' not in st.session_state:
     st.session_state.edit_category = None
@@ -13,6 +19,7 @@ if 'edit_amount' not in st.session_state:
 
 # --- Form untuk Menambah/Edit Anggaran ---
 st.subheader("Tambah atau Edit Anggaran Bulanan")
+st.caption("Perubahan anggaran berlaku mulai bulan yang dipilih; anggaran bulan-bulan sebelumnya tidak berubah.")
 
 # Jika kita dalam mode edit, isi form dengan data yang ada
 if st.session_state.edit_category:
@@ -38,6 +45,7 @@ with st.form("budget_form", clear_on_submit=False):
         step=50000.0,
         value=default_amount
     )
+    effective_date = st.date_input("Berlaku Mulai Bulan", datetime.date.today(), format="YYYY-MM-DD")
     
     submitted = st.form_submit_button(submit_label)
 
@@ -48,8 +56,11 @@ with st.form("budget_form", clear_on_submit=False):
         if not category_to_save or amount <= 0:
             st.error("Kategori dan Jumlah harus diisi dan lebih dari nol.")
         else:
-            db.add_budget(category_to_save, amount) # add_budget akan update jika kategori ada
-            st.success(f"Anggaran untuk '{category_to_save.title()}' disimpan/diperbarui ke Rp {amount:,.0f}")
+            effective_month = effective_date.strftime('%Y-%m')
+            # add_budget membuat versi baru (atau menimpa versi di bulan yang sama)
+            db.add_budget(user_id, category_to_save, amount, effective_month)
+            st.success(f"Anggaran untuk '{category_to_save.title()}' disimpan/diperbarui ke Rp {amount:,.0f} "
+                       f"mulai {effective_month}")
             
             # Keluar dari mode edit setelah update
             st.session_state.edit_category = None
@@ -65,9 +76,9 @@ if st.session_state.edit_category:
 
 # --- Menampilkan Anggaran Saat Ini (Dengan Tombol Edit & Hapus) ---
 st.markdown("---")
-st.subheader("Anggaran Anda Saat Ini")
+st.subheader(f"Anggaran Anda Saat Ini ({db.current_month()})")
 
-budgets_data = db.get_all_budgets()
+budgets_data = db.get_all_budgets(user_id)
 
 if not budgets_data:
     st.info("Anda belum menetapkan anggaran apapun.")
@@ -99,11 +110,62 @@ else:
             
             with b_col2:
                 # Tombol Hapus: Panggil fungsi delete
+                # Tombol Hapus: hentikan anggaran mulai bulan ini (riwayat bulan lalu tetap ada)
                 if st.button("🗑️", key=f"del_budget_{budget['category']}", type="primary"):
-                    db.delete_budget_by_category(budget['category'])
-                    st.toast(f"Anggaran '{budget['category']}' telah dihapus.")
+                    db.delete_budget_by_category(user_id, budget['category'])
+                    st.toast(f"Anggaran '{budget['category']}' dihentikan mulai {db.current_month()}.")
                     # Jika kita menghapus item yang sedang diedit, batalkan edit
                     if st.session_state.edit_category == budget['category']:
                         st.session_state.edit_category = None
                         st.session_state.edit_amount = 0.0
-                    st.rerun() # Refresh halaman
\ No newline at end of file
+                    st.rerun() # Refresh halaman
+# --- Riwayat Versi Anggaran ---
+st.markdown("---")
+st.subheader("Riwayat Anggaran")
+
+budget_history = db.get_budget_history(user_id)
+if not budget_history.months:
+    st.info("Belum ada riwayat anggaran.")
+else:
+    st.dataframe(
+        [
+            {
+                "Kategori": category,
+                "Berlaku Mulai": BudgetHistory.describe_month(version['effective_month']),
+                "Jumlah (Rp)": version['amount'],
+                "Status": "Aktif" if version['amount'] is not None else "Dihentikan",
+            }
+            for category in sorted(budget_history.months)
+            for version in budget_history.versions(category)
+        ],
+        hide_index=True,
+        use_container_width=True,
+        column_config={"Jumlah (Rp)": st.column_config.NumberColumn(format="localized")},
+    )
+
+# --- Laporan Overbudget Semua Bulan ---
+st.markdown("---")
+st.subheader("Laporan Overbudget")
+
+over_budget_rows = db.get_over_budget_report(user_id)
+if not over_budget_rows:
+    st.success("Belum pernah ada kategori yang melebihi anggaran. 🎉")
+else:
+    st.write(f"{len(over_budget_rows)} kali overbudget di "
+             f"{len({row['year_month'] for row in over_budget_rows})} bulan.")
+    st.dataframe(
+        over_budget_rows,
+        hide_index=True,
+        use_container_width=True,
+        column_order=["year_month", "category", "budget", "actual_spending", "percent_spent", "over_budget"],
+        column_config={
+            "year_month": st.column_config.TextColumn("Bulan"),
+            "category": st.column_config.TextColumn("Kategori"),
+            "budget": st.column_config.NumberColumn("Anggaran (Rp)", format="localized"),
+            "actual_spending": st.column_config.NumberColumn("Terpakai (Rp)", format="localized"),
+            "percent_spent": st.column_config.NumberColumn("Terpakai (%)", format="%.1f%%"),
+            "over_budget": st.column_config.NumberColumn("Overbudget (Rp)", format="localized"),
+        },
+    )
+
+metrics.end_page()
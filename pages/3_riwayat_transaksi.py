@@ -1,51 +1,156 @@
 import streamlit as st
+import metrics
 import database as db
-import pandas as pd
+import user_session
+import history_table
+import tempfile
+import export
 
 st.set_page_config(page_title="Riwayat Transaksi", page_icon="🧾")
+metrics.begin_page("Riwayat Transaksi")
 st.title("🧾 Riwayat Semua Transaksi Anda")
 
-# (Nanti kita akan tambahkan filter di sini)
+user_id = user_session.current_user_id()
+
+PAGE_SIZE_OPTIONS = [100, 1000, 10000, 50000]
+
+# --- Inisialisasi Session State untuk Paginasi ---
+# history_cursors adalah tumpukan cursor: elemen terakhir = cursor halaman yang sedang tampil
+if 'history_cursors' not in st.session_state:
+    st.session_state.history_cursors = [None]
+if 'history_page_size' not in st.session_state:
+    st.session_state.history_page_size = 1000
+if 'history_filters' not in st.session_state:
+    st.session_state.history_filters = {}
+
+# --- Pencarian & Filter (diterapkan di sisi database / indeks pencarian) ---
+with st.expander("Cari & Filter Transaksi", expanded=bool(st.session_state.history_filters.get(db.SEARCH_QUERY_KEY))):
+    with st.form("history_filter_form"):
+        query = st.text_input("Cari deskripsi atau kategori", placeholder="mis. kopi, ojol kantor, blnja")
+        f_col1, f_col2 = st.columns(2)
+        with f_col1:
+            date_from = st.date_input("Dari Tanggal", value=None)
+            trx_type = st.selectbox("Tipe", ["Semua", "Pengeluaran", "Pemasukan"])
+            amount_min = st.number_input("Jumlah Minimal (Rp)", min_value=0.0, step=1000.0, value=None)
+        with f_col2:
+            date_to = st.date_input("Sampai Tanggal", value=None)
+            category = st.text_input("Kategori")
+            amount_max = st.number_input("Jumlah Maksimal (Rp)", min_value=0.0, step=1000.0, value=None)
+        apply_filter = st.form_submit_button("Terapkan Filter")
+
+    if apply_filter:
+        st.session_state.history_filters = {
+            db.SEARCH_QUERY_KEY: query,
+            'date_from': date_from,
+            'date_to': date_to,
+            'type': None if trx_type == "Semua" else trx_type,
+            'category': category,
+            'amount_min': amount_min,
+            'amount_max': amount_max,
+        }
+        # Filter baru = mulai lagi dari halaman pertama
+        st.session_state.history_cursors = [None]
+
+    if st.button("🔄 Bangun Ulang Indeks Pencarian"):
+        with st.spinner("Mengindeks ulang semua transaksi..."):
+            indexed_count = db.rebuild_search_index(user_id)
+        st.toast(f"{indexed_count} transaksi terindeks.")
+
 st.subheader("Daftar Transaksi")
 
-# Ambil semua data transaksi
-all_transactions = db.get_all_transactions()
+# --- Ekspor (mengikuti filter aktif) ---
+with st.expander("Ekspor Transaksi"):
+    export_format = st.selectbox("Format", export.EXPORT_FORMATS, key="history_export_format")
+
+    def build_export_file():
+        # Dipanggil saat tombol diklik: transaksi ditulis per batch ke file sementara,
+        # tidak pernah dimuat sekaligus ke memori. buffering=0 -> io.FileIO (RawIOBase),
+        # tipe file yang diterima download_button
+        export_file = tempfile.TemporaryFile(buffering=0)
+        export.export_transactions(user_id, export_file, export_format, st.session_state.history_filters)
+        export_file.seek(0)
+        return export_file
 
-if not all_transactions:
-    st.info("Belum ada data transaksi yang tercatat.")
+    st.download_button(
+        "⬇️ Unduh Transaksi",
+        data=build_export_file,
+        file_name=f"transaksi.{export_format}",
+        mime=export.MIME_TYPES[export_format],
+        use_container_width=True,
+    )
+
+def reset_pagination():
+    st.session_state.history_cursors = [None]
+
+st.selectbox("Baris per halaman", PAGE_SIZE_OPTIONS, key="history_page_size", on_change=reset_pagination)
+
+# Ambil satu halaman transaksi saja
+page = db.get_transactions_page(
+    user_id,
+    st.session_state.history_filters,
+    cursor=st.session_state.history_cursors[-1],
+    page_size=st.session_state.history_page_size
+)
+page_transactions = page['transactions']
+page_number = len(st.session_state.history_cursors)
+if 'total' in page:
+    st.caption(f"{page['total']} transaksi cocok dengan pencarian.")
+
+if not page_transactions and page_number == 1:
+    if 'total' in page:
+        st.info("Tidak ada transaksi yang cocok dengan pencarian.")
+    else:
+        st.info("Belum ada data transaksi yang tercatat.")
 else:
-    # Buat header tabel manual
-    cols = st.columns([1, 2, 2, 2, 2, 2]) # Beri ruang lebih untuk 2 tombol
-    headers = ["Tanggal", "Kategori", "Tipe", "Jumlah (Rp)", "Deskripsi", "Aksi"]
-    for col, header in zip(cols, headers):
-        col.write(f"**{header}**")
-    
+    # Satu tabel untuk seluruh halaman (dirender virtual oleh st.dataframe),
+    # bukan widget per baris. Pilih baris untuk mengedit/menghapus.
+    df_history = history_table.build_history_frame(page_transactions)
+    event = st.dataframe(
+        df_history,
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="multi-row",
+        key=f"history_table_{page_number}",
+        column_config={
+            "date": st.column_config.DateColumn("Tanggal", format="YYYY-MM-DD"),
+            "category": st.column_config.TextColumn("Kategori"),
+            "type": st.column_config.TextColumn("Tipe"),
+            "amount": st.column_config.NumberColumn("Jumlah (Rp)", format="localized"),
+            "description": st.column_config.TextColumn("Deskripsi"),
+        },
+    )
+    selected = history_table.selected_ids(df_history, event.selection.rows)
+
+    # --- Bar Aksi untuk baris yang dipilih ---
+    a_col1, a_col2, a_col3 = st.columns([2, 1, 1])
+    a_col1.write(f"{len(selected)} transaksi dipilih")
+    with a_col2:
+        # Tombol Edit (hanya untuk satu transaksi)
+        if st.button("✏️ Edit", disabled=len(selected) != 1, use_container_width=True):
+            # Simpan seluruh data transaksi ke session state
+            st.session_state.edit_trx = history_table.row_to_transaction(df_history, selected[0])
+            # Pindah ke halaman input
+            st.switch_page("pages/1_input_transaksi.py")
+    with a_col3:
+        # Tombol Hapus: satu penulisan batch untuk semua baris terpilih
+        if st.button("🗑️ Hapus", disabled=not selected, type="primary", use_container_width=True):
+            deleted_count = db.delete_transactions(user_id, selected)
+            st.toast(f"{deleted_count} transaksi telah dihapus.")
+            st.rerun()
+
+    # --- Navigasi Halaman ---
     st.markdown("---")
+    nav_col1, nav_col2, nav_col3 = st.columns([1, 2, 1])
+    with nav_col1:
+        if st.button("⬅️ Sebelumnya", disabled=page_number == 1, use_container_width=True):
+            st.session_state.history_cursors.pop()
+            st.rerun()
+    with nav_col2:
+        st.write(f"Halaman {page_number}")
+    with nav_col3:
+        if st.button("Berikutnya ➡️", disabled=page['next_cursor'] is None, use_container_width=True):
+            st.session_state.history_cursors.append(page['next_cursor'])
+            st.rerun()
 
-    # Loop untuk setiap transaksi
-    for trx in all_transactions:
-        cols = st.columns([1, 2, 2, 2, 2, 2])
-        cols[0].write(trx['date'])
-        cols[1].write(trx['category'])
-        cols[2].write(trx['type'])
-        cols[3].write(f"Rp {trx['amount']:,.0f}")
-        cols[4].write(trx['description'])
-        
-        # Kolom ke-5 (indeks 5) untuk tombol Aksi
-        with cols[5]:
-            # Buat 2 kolom di dalam kolom Aksi
-            b_col1, b_col2 = st.columns(2)
-            with b_col1:
-                # Tombol Edit
-                if st.button("✏️", key=f"edit_trx_{trx['id']}"):
-                    # Simpan seluruh data transaksi ke session state
-                    st.session_state.edit_trx = dict(trx) 
-                    # Pindah ke halaman input
-                    st.switch_page("pages/1_Input_Transaksi.py")
-            
-            with b_col2:
-                # Tombol Hapus
-                if st.button("🗑️", key=f"del_trx_{trx['id']}", type="primary"):
-                    db.delete_transaction_by_id(trx['id'])
-                    st.toast(f"Transaksi (ID: {trx['id']}) telah dihapus.")
-                    st.rerun()
\ No newline at end of file
+metrics.end_page()
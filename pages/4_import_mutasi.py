@@ -0,0 +1,56 @@
+import streamlit as st
+import metrics
+import bank_import
+import user_session
+
+st.set_page_config(page_title="Impor Mutasi", page_icon="🏦")
+metrics.begin_page("Impor Mutasi")
+st.title("🏦 Impor Mutasi Rekening")
+
+user_id = user_session.current_user_id()
+
+st.write(
+    "Unggah file mutasi rekening (CSV atau OFX). Transaksi yang sudah tercatat "
+    "(tanggal, jumlah, dan deskripsi sama) akan dilewati otomatis."
+)
+st.caption(
+    "CSV minimal punya kolom Tanggal dan Jumlah (atau Debit/Kredit). "
+    "Kolom Deskripsi, Tipe, dan Kategori bersifat opsional."
+)
+
+uploaded_file = st.file_uploader("File Mutasi", type=["csv", "ofx", "qfx"])
+
+if uploaded_file is not None and st.button("Mulai Impor", type="primary"):
+    progress_bar = st.progress(0, text="Memulai impor...")
+    file_size = max(uploaded_file.size, 1)
+
+    def update_progress(stats):
+        # Perkiraan progres dari posisi baca file
+        position = min(uploaded_file.tell() / file_size, 1.0)
+        progress_bar.progress(
+            position,
+            text=f"Diimpor: {stats['imported']:,} | Duplikat dilewati: {stats['duplicates']:,}"
+        )
+
+    try:
+        stats = bank_import.import_statement(
+            user_id,
+            uploaded_file,
+            bank_import.detect_format(uploaded_file.name),
+            progress_callback=update_progress
+        )
+    except bank_import.StatementRowError as e:
+        progress_bar.empty()
+        st.error(f"File tidak bisa dibaca: {e}")
+    else:
+        progress_bar.progress(1.0, text="Selesai!")
+        st.success(
+            f"{stats['imported']:,} transaksi berhasil diimpor, "
+            f"{stats['duplicates']:,} duplikat dilewati."
+        )
+        if stats['errors']:
+            st.warning(f"{len(stats['errors']):,} baris gagal dibaca:")
+            for line_number, message in stats['errors'][:20]:
+                st.write(f"- Baris {line_number}: {message}")
+
+metrics.end_page()
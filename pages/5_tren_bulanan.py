@@ -0,0 +1,89 @@
+import streamlit as st
+import metrics
+import database as db
+import datetime
+import trends
+import user_session
+
+st.set_page_config(page_title="Tren Bulanan", page_icon="📈", layout="wide")
+metrics.begin_page("Tren Bulanan")
+st.title("📈 Tren Keuangan Bulanan")
+
+user_id = user_session.current_user_id()
+
+# --- Pilihan Rentang ---
+t_col1, t_col2 = st.columns(2)
+with t_col1:
+    end_date = st.date_input("Sampai Bulan", datetime.date.today(), format="YYYY-MM-DD")
+with t_col2:
+    months = st.slider("Jumlah Bulan", min_value=trends.DEFAULT_TREND_MONTHS,
+                       max_value=trends.MAX_TREND_MONTHS, value=trends.DEFAULT_TREND_MONTHS, step=6)
+
+# Seluruh rentang dibaca dari indeks deret waktu, bukan satu query per bulan
+df_totals, df_categories = db.get_monthly_trends(user_id, end_date.strftime('%Y-%m'), months)
+
+if not df_totals[['income', 'expense']].abs().to_numpy().any():
+    st.info("Belum ada data transaksi pada rentang bulan ini.")
+    st.stop()
+
+import plotly.express as px  # Library untuk grafik interaktif
+
+df_trend = trends.trend_analysis(df_totals)
+last_month = df_trend.iloc[-1]
+
+# --- 1. Ringkasan Bulan Terakhir vs. Bulan Sebelumnya ---
+col1, col2, col3 = st.columns(3)
+col1.metric("Pemasukan", f"Rp {last_month['income']:,.0f}",
+            delta=None if last_month.isna()['income_mom'] else f"{last_month['income_mom']:,.0f}")
+col2.metric("Pengeluaran", f"Rp {last_month['expense']:,.0f}",
+            delta=None if last_month.isna()['expense_mom'] else f"{last_month['expense_mom']:,.0f}",
+            delta_color="inverse")
+col3.metric("Netto", f"Rp {last_month['net']:,.0f}",
+            delta=None if last_month.isna()['net_mom'] else f"{last_month['net_mom']:,.0f}")
+
+st.markdown("---")
+
+# --- 2. Pemasukan, Pengeluaran, Netto per Bulan ---
+st.header("Pemasukan, Pengeluaran, dan Netto")
+fig_totals = px.line(
+    df_trend.reset_index(),
+    x='month',
+    y=['income', 'expense', 'net', 'expense_avg'],
+    markers=True,
+    labels={'month': 'Bulan', 'value': 'Jumlah (Rp)', 'variable': 'Seri'},
+)
+st.plotly_chart(fig_totals, use_container_width=True)
+st.caption(f"expense_avg = rata-rata pengeluaran {trends.ROLLING_WINDOW} bulan terakhir.")
+
+# --- 3. Pengeluaran per Kategori ---
+st.header("Pengeluaran per Kategori")
+if df_categories.empty:
+    st.info("Belum ada data pengeluaran pada rentang bulan ini.")
+else:
+    fig_categories = px.line(
+        df_categories.reset_index().melt(id_vars='month', var_name='category', value_name='amount'),
+        x='month',
+        y='amount',
+        color='category',
+        markers=True,
+        labels={'month': 'Bulan', 'amount': 'Jumlah (Rp)', 'category': 'Kategori'},
+    )
+    st.plotly_chart(fig_categories, use_container_width=True)
+
+# --- 4. Tabel Perubahan Bulanan ---
+st.header("Perubahan Bulan ke Bulan")
+st.dataframe(
+    df_trend[['income', 'expense', 'net', 'expense_mom', 'expense_mom_pct', 'expense_avg', 'net_avg']],
+    use_container_width=True,
+    column_config={
+        "income": st.column_config.NumberColumn("Pemasukan (Rp)", format="localized"),
+        "expense": st.column_config.NumberColumn("Pengeluaran (Rp)", format="localized"),
+        "net": st.column_config.NumberColumn("Netto (Rp)", format="localized"),
+        "expense_mom": st.column_config.NumberColumn("Δ Pengeluaran (Rp)", format="localized"),
+        "expense_mom_pct": st.column_config.NumberColumn("Δ Pengeluaran (%)", format="%.1f%%"),
+        "expense_avg": st.column_config.NumberColumn(f"Rata-rata Pengeluaran {trends.ROLLING_WINDOW} Bln", format="localized"),
+        "net_avg": st.column_config.NumberColumn(f"Rata-rata Netto {trends.ROLLING_WINDOW} Bln", format="localized"),
+    },
+)
+
+metrics.end_page()
@@ -0,0 +1,97 @@
+import streamlit as st
+import metrics
+import database as db
+import datetime
+import analytics
+import user_session
+
+st.set_page_config(page_title="Analitik", page_icon="🔎", layout="wide")
+metrics.begin_page("Analitik")
+st.title("🔎 Analitik Pengeluaran")
+
+user_id = user_session.current_user_id()
+
+# Semua kueri di halaman ini dijalankan atas snapshot lokal (Parquet + DuckDB), bukan backend utama
+snapshot = db.get_analytics_snapshot(user_id)
+
+if not snapshot.months:
+    st.info("Belum ada data transaksi untuk dianalisis.")
+    st.stop()
+
+synced_at = datetime.datetime.fromtimestamp(snapshot.synced_at)
+st.caption(
+    f"Snapshot analitik: {len(snapshot.months)} bulan ({snapshot.months[0]} s.d. {snapshot.months[-1]}), "
+    f"disinkronkan {synced_at:%Y-%m-%d %H:%M:%S}."
+)
+
+# --- Rentang Tanggal ---
+r_col1, r_col2 = st.columns(2)
+with r_col1:
+    date_from = st.date_input("Dari Tanggal", value=None, format="YYYY-MM-DD")
+with r_col2:
+    date_to = st.date_input("Sampai Tanggal", value=None, format="YYYY-MM-DD")
+
+import plotly.express as px  # Library untuk grafik interaktif
+
+# --- 1. Total per Kategori ---
+st.header("Total per Kategori")
+df_categories = snapshot.category_totals(date_from, date_to)
+st.dataframe(
+    df_categories,
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "type": st.column_config.TextColumn("Tipe"),
+        "category": st.column_config.TextColumn("Kategori"),
+        "total": st.column_config.NumberColumn("Total (Rp)", format="localized"),
+        "count": st.column_config.NumberColumn("Jumlah Transaksi"),
+    },
+)
+
+col1, col2 = st.columns(2)
+
+# --- 2. Pengeluaran per Hari ---
+with col1:
+    st.header("Pengeluaran per Hari")
+    df_weekday = snapshot.spend_by_weekday(date_from, date_to)
+    fig_weekday = px.bar(
+        df_weekday, x='weekday', y='total',
+        labels={'weekday': 'Hari', 'total': 'Total (Rp)'},
+        hover_data=['count', 'average'],
+    )
+    st.plotly_chart(fig_weekday, use_container_width=True)
+
+# --- 3. Deskripsi Teratas ---
+with col2:
+    st.header("Pengeluaran Terbesar per Deskripsi")
+    limit = st.number_input("Tampilkan", min_value=5, max_value=100,
+                            value=analytics.DEFAULT_TOP_DESCRIPTIONS, step=5)
+    st.dataframe(
+        snapshot.top_descriptions(limit, date_from, date_to),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "description": st.column_config.TextColumn("Deskripsi"),
+            "total": st.column_config.NumberColumn("Total (Rp)", format="localized"),
+            "count": st.column_config.NumberColumn("Jumlah Transaksi"),
+        },
+    )
+
+# --- 4. Persentil Jumlah Pengeluaran ---
+st.header("Sebaran Jumlah Pengeluaran")
+st.dataframe(
+    snapshot.amount_percentiles(date_from=date_from, date_to=date_to),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "category": st.column_config.TextColumn("Kategori"),
+        "count": st.column_config.NumberColumn("Jumlah Transaksi"),
+        **{
+            f"p{round(p * 100):g}": st.column_config.NumberColumn(f"P{round(p * 100):g} (Rp)", format="localized")
+            for p in analytics.DEFAULT_PERCENTILES
+        },
+    },
+)
+st.caption("P50 = median: setengah transaksi di kategori itu bernilai di bawah angka ini.")
+
+metrics.end_page()
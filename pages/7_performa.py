@@ -0,0 +1,99 @@
+import streamlit as st
+import metrics
+import user_session
+
+st.set_page_config(page_title="Performa", page_icon="⏱️", layout="wide")
+
+# Halaman pemantauan untuk admin: metrik mencakup semua pengguna proses ini dan bisa direset,
+# jadi hanya tampil untuk akun yang terdaftar di EFTARI_ADMIN_USERS (lihat user_session.is_admin)
+if not user_session.is_admin():
+    st.info("Halaman ini tidak tersedia.")
+    st.stop()
+
+st.title("⏱️ Performa")
+
+if not metrics.METRICS_ENABLED:
+    st.info("Instrumentasi dimatikan (EFTARI_METRICS=off).")
+    st.stop()
+
+data = metrics.snapshot()
+counters = data['counters']
+st.caption("Metrik seluruh proses (semua sesi) sejak server dijalankan atau sejak direset. "
+           "Persentil adalah batas atas bucket histogram.")
+
+hits = counters.get(('eftari_cache_lookups_total', 'hit'), 0)
+misses = counters.get(('eftari_cache_lookups_total', 'miss'), 0)
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Dokumen Dibaca", f"{sum(v for (m, _), v in counters.items() if m == 'eftari_backend_documents_read_total'):,.0f}")
+col2.metric("Dokumen Ditulis", f"{sum(v for (m, _), v in counters.items() if m == 'eftari_backend_documents_written_total'):,.0f}")
+col3.metric("Cache Hit", f"{hits / (hits + misses):.0%}" if hits + misses else "-")
+col4.metric("Token AI", f"{counters.get(('eftari_ai_tokens_total', 'prompt'), 0) + counters.get(('eftari_ai_tokens_total', 'output'), 0):,.0f}")
+
+# --- 1. Per Halaman ---
+st.header("Per Render Halaman")
+st.dataframe(
+    metrics.page_rows(data),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "page": st.column_config.TextColumn("Halaman"),
+        "renders": st.column_config.NumberColumn("Render"),
+        "avg_ms": st.column_config.NumberColumn("Rata-rata (ms)", format="%.1f"),
+        "p95_ms": st.column_config.NumberColumn("P95 (ms)", format="%.1f"),
+        "calls_ms": st.column_config.NumberColumn("Database/AI (ms)", format="%.1f"),
+        "other_ms": st.column_config.NumberColumn("Lainnya (ms)", format="%.1f"),
+        "documents_read": st.column_config.NumberColumn("Dokumen Dibaca", format="%.1f"),
+        "cache_hit_rate": st.column_config.NumberColumn("Cache Hit", format="percent"),
+        "ai_tokens": st.column_config.NumberColumn("Token AI", format="%.0f"),
+    },
+)
+st.caption("Lainnya = waktu render di luar fungsi database/AI (pandas, grafik, widget Streamlit).")
+
+# --- 2. Per Fungsi ---
+st.header("Per Fungsi")
+st.dataframe(
+    metrics.function_rows(data),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "function": st.column_config.TextColumn("Fungsi"),
+        "calls": st.column_config.NumberColumn("Panggilan"),
+        "errors": st.column_config.NumberColumn("Error"),
+        "avg_ms": st.column_config.NumberColumn("Rata-rata (ms)", format="%.3f"),
+        "p50_ms": st.column_config.NumberColumn("P50 (ms)", format="%.1f"),
+        "p95_ms": st.column_config.NumberColumn("P95 (ms)", format="%.1f"),
+        "total_ms": st.column_config.NumberColumn("Total (ms)", format="%.1f"),
+    },
+)
+
+# --- 3. Backend Penyimpanan ---
+st.header("Backend Penyimpanan")
+st.dataframe(
+    metrics.backend_rows(data),
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "method": st.column_config.TextColumn("Metode"),
+        "calls": st.column_config.NumberColumn("Panggilan"),
+        "avg_ms": st.column_config.NumberColumn("Rata-rata (ms)", format="%.3f"),
+        "p95_ms": st.column_config.NumberColumn("P95 (ms)", format="%.1f"),
+        "documents_read": st.column_config.NumberColumn("Dokumen Dibaca"),
+        "documents_written": st.column_config.NumberColumn("Dokumen Ditulis"),
+    },
+)
+
+# --- 4. Ekspor ---
+prometheus_text = metrics.prometheus_text()
+col1, col2 = st.columns(2)
+with col1:
+    st.download_button("Unduh (format Prometheus)", prometheus_text, file_name="eftari_metrics.txt",
+                       mime="text/plain", use_container_width=True)
+with col2:
+    # Reset menghapus metrik seluruh proses (semua sesi), jadi harus dikonfirmasi dulu
+    confirm_reset = st.checkbox("Saya yakin ingin mereset metrik seluruh proses", key="confirm_metrics_reset")
+    if st.button("Reset Metrik", use_container_width=True, disabled=not confirm_reset):
+        print(f"Metrik direset oleh {user_session.current_user_id()}")
+        metrics.reset()
+        st.rerun()
+with st.expander("Format Prometheus"):
+    st.code(prometheus_text, language="text")
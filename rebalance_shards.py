@@ -0,0 +1,62 @@
+"""
+Memindahkan data pengguna ke shard yang sesuai konfigurasi shard sekarang.
+
+    python rebalance_shards.py            # pindahkan data, lalu tulis peta shard baru
+    python rebalance_shards.py --dry-run  # hanya laporkan pengguna yang perlu dipindah (exit code 1 jika ada)
+
+Jalankan setelah mengubah EFTARI_STORAGE_SHARDS atau EFTARI_HOT_USERS (aplikasi menolak dibuka
+sampai peta shard cocok, lihat storage/sharding.py), dengan aplikasi dihentikan. File shard lama
+di luar jumlah shard sekarang dan file database tanpa shard ikut dikosongkan ke shard yang baru.
+Aman diulang jika terhenti di tengah.
+"""
+import argparse
+import os
+
+import storage
+from storage.sharding import parse_hot_users
+
+
+def retired_shards(path, shards):
+    """Backend untuk file database lama yang tidak lagi dipakai sebagai shard."""
+    from storage.sqlite_backend import SQLiteBackend
+
+    paths = [path] if os.path.exists(path) else []
+    index = shards
+    while os.path.exists(storage.shard_path(path, index)):
+        paths.append(storage.shard_path(path, index))
+        index += 1
+    return [SQLiteBackend(path=retired_path) for retired_path in paths]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pindahkan data pengguna ke shard yang sesuai konfigurasi.")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya laporkan, jangan pindahkan.")
+    args = parser.parse_args(argv)
+
+    from storage.sqlite_backend import DEFAULT_SQLITE_PATH
+    name = storage.read_config("backend", "EFTARI_STORAGE_BACKEND", storage.DEFAULT_BACKEND)
+    path = storage.read_config("sqlite_path", "EFTARI_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+    shards = int(storage.read_config("shards", "EFTARI_STORAGE_SHARDS", 1))
+    if name.strip().lower() != "sqlite" or shards <= 1 or path == ":memory:":
+        print("Backend yang dikonfigurasi tidak memakai shard; tidak ada yang perlu dipindah.")
+        return 0
+
+    hot_users = parse_hot_users(storage.read_config("hot_users", "EFTARI_HOT_USERS", ""))
+    backend = storage.create_backend("sqlite", path=path, shards=shards, hot_users=hot_users, check_layout=False)
+    retired = retired_shards(path, shards)
+
+    def progress(user_id, source, target, count):
+        print(f"[{user_id}] shard {source} -> {target}: {count:,} transaksi dipindah")
+
+    moved = backend.rebalance(dry_run=args.dry_run, retired=retired, progress=progress)
+    if args.dry_run:
+        for user_id, source, target in moved:
+            print(f"[{user_id}] perlu dipindah dari shard {source} ke {target}")
+        print(f"{len(moved)} pengguna perlu dipindah.")
+        return 1 if moved else 0
+    print(f"{len(moved)} pengguna dipindah. Peta shard ditulis ke {backend.layout_path}.")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
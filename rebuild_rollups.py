@@ -0,0 +1,40 @@
+"""
+Menghitung ulang rollup bulanan dari transaksi mentah dan melaporkan drift.
+
+    python rebuild_rollups.py            # hitung ulang dan simpan
+    python rebuild_rollups.py --dry-run  # hanya laporkan drift (exit code 1 jika ada)
+    python rebuild_rollups.py --user budi@contoh.id   # hanya satu pengguna
+
+Backend mengikuti konfigurasi yang sama dengan aplikasi (EFTARI_STORAGE_BACKEND, dll).
+"""
+import argparse
+
+import storage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hitung ulang rollup bulanan dari transaksi mentah.")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya laporkan drift, jangan simpan.")
+    parser.add_argument("--user", action="append", help="user_id yang diproses (default: semua pengguna).")
+    args = parser.parse_args(argv)
+
+    backend = storage.get_backend_from_config()
+    found_drift = False
+    for user_id in args.user or backend.list_users():
+        drift = storage.rebuild_rollups(backend, user_id, dry_run=args.dry_run)
+        found_drift = found_drift or bool(drift)
+
+        if not drift:
+            print(f"[{user_id}] Tidak ada drift. Rollup sudah sesuai dengan transaksi.")
+        else:
+            print(f"[{user_id}] Ditemukan {len(drift)} drift:")
+            for item in drift:
+                print(f"  {item['year_month']} {item['field']}: "
+                      f"tersimpan {item['actual']:,.2f}, seharusnya {item['expected']:,.2f}")
+        if not args.dry_run:
+            print(f"[{user_id}] Rollup telah dihitung ulang dan disimpan.")
+    return 1 if found_drift and args.dry_run else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
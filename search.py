@@ -0,0 +1,586 @@
+"""
+Indeks pencarian teks transaksi (deskripsi dan kategori) untuk halaman riwayat.
+
+Indeks terbalik dua tingkat. Deskripsi transaksi sangat berulang ("kopi susu", "ojol ke kantor"),
+jadi setiap pasangan unik (deskripsi, kategori) disimpan sekali sebagai "teks" bernomor, dan
+token -> array nomor teks. Setiap transaksi hanya menyimpan nomor teksnya plus kolom tanggal,
+jumlah, dan tipe dalam array ringkas. Kueri: token dicocokkan ke nomor teks (himpunan kecil),
+lalu satu kali gather vektor (numpy) atas semua transaksi, digabung dengan filter tanggal/jumlah.
+
+Pencocokan untuk teks bahasa Indonesia:
+- Dinormalisasi: huruf kecil, aksen dibuang, dipecah per huruf/angka ("jajan-jajan" -> jajan).
+- Singkatan umum ikut diindeks sebagai kata lengkapnya ("tf" -> transfer, "yg" -> yang).
+- Partikel/kata ganti akhiran (-nya, -lah, -kah, -pun, -ku, -mu) dibuang sebagai term tambahan:
+  "belanjanya" cocok dengan "belanja".
+- Setiap token kueri dicocokkan sebagai awalan ("mak" -> makan, makanan).
+- Token tanpa kecocokan awalan dikoreksi dengan jarak edit (maks. 1 salah ketik, 2 untuk kata
+  panjang) lewat peta penghapusan huruf (satu huruf, dua untuk kata panjang), lalu diperluas
+  sebagai awalan ("mkaan" -> makan*).
+Semua token kueri harus cocok (AND).
+
+Sinkronisasi per bulan seperti snapshot analitik (analytics.py): watermark setiap bulan adalah
+hash dan revisi rollup-nya (analytics.month_signature; revisi naik pada setiap perubahan baris,
+termasuk yang hanya mengubah deskripsi), hanya bulan yang berubah yang dibaca ulang. Penulisan dari proses ini diterapkan
+langsung (apply). Indeks disimpan ke satu file terkompresi (zlib); term tidak ikut disimpan
+karena dibangun ulang dari tabel teks saat dimuat. Penulisan yang diterapkan sejak file terakhir
+disimpan dicatat ke jurnal di sebelahnya (satu baris JSON per apply) dan diputar ulang saat
+dimuat, jadi tidak hilang walau indeks dimuat ulang sebelum sinkronisasi berikutnya.
+"""
+import bisect
+import calendar
+import functools
+import json
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from array import array
+
+from analytics import month_signature
+
+# numpy diimpor di dalam fungsi agar impor modul ini tetap ringan
+
+FILE_MAGIC = b"EFTARI-SEARCH-1\n"
+FUZZY_MIN_LENGTH = 4 # Token lebih pendek dari ini tidak dikoreksi (terlalu banyak kemiripan)
+FUZZY_TWO_TYPOS_LENGTH = 8 # Mulai panjang ini boleh 2 salah ketik
+MIN_STEM_LENGTH = 4
+PARTICLE_SUFFIXES = ('nya', 'lah', 'kah', 'pun', 'ku', 'mu')
+SYNC_READ_ATTEMPTS = 3
+# Pemadatan: slot mati (dihapus/di-update) dibuang jika jumlahnya lewat batas ini dan > 25% slot
+COMPACT_MIN_DEAD = 4096
+JOURNAL_SUFFIX = ".journal"
+JOURNAL_MAX_BYTES = 4 * 1024 * 1024 # Jurnal lebih besar dari ini digabung ke file indeks (save)
+
+ABBREVIATIONS = {
+    'yg': 'yang', 'dgn': 'dengan', 'utk': 'untuk', 'dr': 'dari', 'tf': 'transfer', 'trf': 'transfer',
+    'byr': 'bayar', 'bln': 'bulan', 'blnj': 'belanja', 'mkn': 'makan', 'mnm': 'minum',
+    'tgl': 'tanggal', 'sdh': 'sudah', 'blm': 'belum', 'krn': 'karena', 'bpk': 'bapak',
+}
+
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def normalize_text(text):
+    """Huruf kecil tanpa aksen ("Kafé" -> "kafe")."""
+    text = str(text or '')
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def words(text):
+    """Kata-kata (huruf/angka) dari teks yang sudah dinormalisasi."""
+    return WORD_PATTERN.findall(normalize_text(text))
+
+
+def strip_particle(word):
+    """Kata tanpa partikel/kata ganti akhiran ("belanjanya" -> "belanja"), atau kata itu sendiri."""
+    if word.endswith(PARTICLE_SUFFIXES):
+        for suffix in PARTICLE_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+                return word[:-len(suffix)]
+    return word
+
+
+@functools.lru_cache(maxsize=65536)
+def word_terms(word):
+    """Term untuk satu kata: kata itu, bentuk lengkap singkatannya, dan bentuk dasarnya."""
+    expanded = ABBREVIATIONS.get(word, word)
+    return tuple({word, expanded, strip_particle(word), strip_particle(expanded)})
+
+
+def text_terms(*texts):
+    """Himpunan term yang diindeks untuk teks-teks ini."""
+    terms = set()
+    for text in texts:
+        for word in words(text):
+            terms.update(word_terms(word))
+    return terms
+
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _delete_keys(word, depth):
+    """Kata itu plus semua bentuknya setelah dihapus hingga depth huruf."""
+    keys, frontier = {word}, {word}
+    for _ in range(depth):
+        frontier = {key for variant in frontier for key in _deletes(variant)}
+        keys |= frontier
+    return keys
+
+
+def edit_distance(a, b, limit):
+    """Jarak Damerau-Levenshtein (transposisi berdampingan dihitung 1); limit + 1 jika melebihi limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def allowed_typos(token):
+    if len(token) >= FUZZY_TWO_TYPOS_LENGTH:
+        return 2
+    return 1 if len(token) >= FUZZY_MIN_LENGTH else 0
+
+
+def _date_number(date):
+    # 'YYYY-MM-DD' -> YYYYMMDD (bilangan bulat, urutannya sama dengan urutan string)
+    try:
+        return int(str(date)[:10].replace('-', ''))
+    except ValueError:
+        return 0
+
+
+def _date_text(number):
+    return f"{number // 10000:04d}-{number // 100 % 100:02d}-{number % 100:02d}"
+
+
+class _Table:
+    """Tabel string -> nomor (kategori, tipe), dipakai bersama banyak baris."""
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class SearchIndex:
+    """Indeks pencarian transaksi milik satu pengguna. Aman dipakai dari banyak thread."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock() # Satu sinkronisasi per indeks dalam satu waktu
+        self.generation = 0 # Naik setiap kali apply(), lihat sync()
+        self.months = {} # 'YYYY-MM' -> month_signature rollup saat bulan itu terakhir dibaca
+        self.synced_at = None
+        self._reset()
+        if path is not None:
+            self._load()
+
+    def _reset(self):
+        # Tabel teks: nomor -> (deskripsi, kategori), dan term -> array nomor teks
+        self.texts = []
+        self.text_codes = {}
+        self.text_categories = array('I')
+        self.postings = {}
+        self.vocabulary = [] # Term terurut, untuk pencarian awalan dengan bisect
+        self._new_terms = [] # Term baru yang belum masuk vocabulary (lihat _merge_vocabulary)
+        self._fuzzy_keys = None # Penghapusan huruf -> term, dibangun saat pertama dibutuhkan
+        self.categories = _Table()
+        self.types = _Table()
+        # Kolom per transaksi (slot); slot yang dihapus ditandai mati, id-nya jadi None
+        self.ids = []
+        self.codes = array('I')
+        self.dates = array('I')
+        self.amounts = array('d')
+        self.type_codes = array('B')
+        self.alive = bytearray()
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.ids) - self.dead
+
+    # --- Pembaruan ---
+
+    def _text_code(self, description, category):
+        key = (description, category)
+        code = self.text_codes.get(key)
+        if code is None:
+            code = self.text_codes[key] = len(self.texts)
+            self.texts.append(key)
+            self.text_categories.append(self.categories.code(category))
+            self._index_text(code, description, category)
+        return code
+
+    def _index_text(self, code, description, category):
+        for term in text_terms(description, category):
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array('I')
+                self._new_terms.append(term)
+            postings.append(code)
+
+    def _merge_vocabulary(self):
+        # Sekali per batch: sedikit term baru disisipkan, banyak term baru -> diurutkan ulang sekaligus
+        new_terms, self._new_terms = self._new_terms, []
+        if len(new_terms) > 64:
+            self.vocabulary = sorted(self.postings)
+        else:
+            for term in new_terms:
+                bisect.insort(self.vocabulary, term)
+        if self._fuzzy_keys is not None:
+            for term in new_terms:
+                self._add_fuzzy_keys(term)
+
+    def _add_fuzzy_keys(self, term):
+        if term.isdigit():
+            return # Angka (nominal, nomor referensi) tidak dikoreksi salah ketiknya
+        # Dua huruf salah/hilang pada kata panjang butuh dua penghapusan di kedua sisi
+        for key in _delete_keys(term, 2 if len(term) >= FUZZY_TWO_TYPOS_LENGTH else 1):
+            self._fuzzy_keys.setdefault(key, set()).add(term)
+
+    def _add_rows(self, rows):
+        for row in rows:
+            self.codes.append(self._text_code(str(row.get('description') or ''), str(row.get('category') or '')))
+            self.ids.append(row['id'])
+            self.dates.append(_date_number(row['date']))
+            self.amounts.append(float(row['amount']))
+            self.type_codes.append(self.types.code(str(row.get('type') or '')))
+            self.alive.append(1)
+        self._merge_vocabulary()
+
+    def _kill(self, slots):
+        for slot in slots:
+            if self.alive[slot]:
+                self.alive[slot] = 0
+                self.ids[slot] = None
+                self.dead += 1
+
+    def _find_slots(self, trx_ids, dates=None):
+        """Slot hidup untuk ID-ID ini; dates ({id: tanggal}) mempersempit pencarian ke tanggalnya."""
+        import numpy as np
+
+        wanted, slots = set(trx_ids), []
+        dates = dates or {}
+        by_date = {}
+        for trx_id in wanted:
+            by_date.setdefault(dates.get(trx_id), []).append(trx_id)
+        date_column = np.frombuffer(self.dates, dtype=np.uintc)
+        for date, ids in by_date.items():
+            if date is None:
+                candidates = range(len(self.ids))
+            else:
+                candidates = np.flatnonzero(date_column == _date_number(date)).tolist()
+            remaining = set(ids)
+            for slot in candidates:
+                if self.ids[slot] in remaining:
+                    slots.append(slot)
+                    remaining.discard(self.ids[slot])
+                    if not remaining:
+                        break
+        del date_column
+        return slots
+
+    def apply(self, added=(), removed=(), removed_dates=None):
+        """
+        Menerapkan penulisan: added = list transaksi (dengan 'id') yang baru/versi barunya,
+        removed = list ID yang dihapus atau diganti versinya. removed_dates opsional
+        {id: tanggal lama} agar slotnya ditemukan tanpa memindai semua ID.
+        """
+        with self.lock:
+            self.generation += 1
+            if removed and self.ids:
+                self._kill(self._find_slots(removed, removed_dates))
+            self._add_rows(added)
+            self._compact_if_needed()
+            if self.path is not None:
+                self._append_journal(added, removed, removed_dates)
+
+    def _append_journal(self, added, removed, removed_dates):
+        # Dipanggil dengan self.lock dipegang
+        entry = json.dumps({'added': list(added), 'removed': list(removed), 'removed_dates': removed_dates or {}},
+                           ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as journal:
+            journal.write(entry + "\n")
+            size = journal.tell()
+        if size > JOURNAL_MAX_BYTES:
+            self.save()
+
+    def _replay_journal(self):
+        try:
+            with open(self.path + JOURNAL_SUFFIX, encoding='utf-8') as journal:
+                lines = journal.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue # Baris terakhir yang terpotong saat proses berhenti
+            if entry['removed'] and self.ids:
+                self._kill(self._find_slots(entry['removed'], entry['removed_dates']))
+            # Baris yang ditambahkan dibuang dulu jika sudah ada: jurnal bisa lebih lama dari file indeks
+            added_dates = {row['id']: row['date'] for row in entry['added']}
+            if added_dates and self.ids:
+                self._kill(self._find_slots(added_dates, added_dates))
+            self._add_rows(entry['added'])
+
+    def _replace_month(self, year_month, rows):
+        import numpy as np
+
+        start, end = _date_number(f"{year_month}-01"), _date_number(f"{year_month}-31")
+        dates = np.frombuffer(self.dates, dtype=np.uintc)
+        alive = np.frombuffer(self.alive, dtype=np.uint8)
+        slots = np.flatnonzero(alive.astype(bool) & (dates >= start) & (dates <= end)).tolist()
+        del dates, alive
+        self._kill(slots)
+        self._add_rows(rows)
+
+    def _compact_if_needed(self):
+        if self.dead >= COMPACT_MIN_DEAD and self.dead * 4 > len(self.ids):
+            self._compact()
+
+    def _compact(self):
+        """Membuang slot mati dan teks yang tidak dipakai lagi (tanpa membaca backend)."""
+        rows = [self._row(slot) for slot in range(len(self.ids)) if self.alive[slot]]
+        self._reset()
+        self._add_rows(rows)
+
+    def _row(self, slot):
+        description, category = self.texts[self.codes[slot]]
+        return {
+            'id': self.ids[slot],
+            'date': _date_text(self.dates[slot]),
+            'description': description,
+            'amount': self.amounts[slot],
+            'type': self.types.values[self.type_codes[slot]],
+            'category': category,
+        }
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self._reset()
+            self.months = {}
+            self.synced_at = None
+
+    def invalidate(self, months=None):
+        """Bulan-bulan itu (atau semua) dibaca ulang dari backend pada sinkronisasi berikutnya."""
+        with self.lock:
+            for year_month in (self.months if months is None else months):
+                if year_month in self.months:
+                    self.months[year_month] = None
+            self.synced_at = None
+
+    # --- Sinkronisasi dan penyimpanan ---
+
+    def sync(self, backend, user_id):
+        """
+        Menyamakan indeks dengan backend: satu kali baca semua rollup, lalu hanya bulan yang
+        hash rollup-nya berubah yang transaksinya dibaca ulang. Indeks disimpan ke file jika
+        ada yang berubah. Mengembalikan list bulan yang diperbarui atau dihapus.
+        """
+        with self.sync_lock:
+            rollups = backend.get_all_rollups(user_id)
+            signatures = {year_month: month_signature(rollup) for year_month, rollup in rollups.items()}
+            changed = sorted(year_month for year_month, signature in signatures.items()
+                             if self.months.get(year_month) != signature)
+            removed = sorted(set(self.months) - set(signatures))
+            for year_month in changed:
+                for _ in range(SYNC_READ_ATTEMPTS):
+                    generation = self.generation
+                    last_day = calendar.monthrange(int(year_month[:4]), int(year_month[5:7]))[1]
+                    start_date, end_date = f"{year_month}-01", f"{year_month}-{last_day:02d}"
+                    rows = backend.get_transactions_between(user_id, start_date, end_date)
+                    with self.lock:
+                        # Ada penulisan lokal selama membaca: bulan ini dibaca ulang agar tidak tertimpa
+                        if generation != self.generation:
+                            continue
+                        self._replace_month(year_month, rows)
+                        self.months[year_month] = signatures[year_month]
+                        break
+                else:
+                    self.months[year_month] = None # Dicoba lagi pada sinkronisasi berikutnya
+            with self.lock:
+                for year_month in removed:
+                    self._replace_month(year_month, [])
+                    del self.months[year_month]
+                self._compact_if_needed()
+                self.synced_at = time.time()
+                if (changed or removed) and self.path is not None:
+                    self.save()
+            return changed + removed
+
+    def save(self):
+        """Menulis indeks (hanya slot hidup) ke self.path secara atomik."""
+        import numpy as np
+
+        with self.lock:
+            alive = np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            columns = [np.frombuffer(column, dtype=dtype)[alive].tobytes() for column, dtype in (
+                (self.codes, np.uintc), (self.dates, np.uintc), (self.amounts, np.float64), (self.type_codes, np.uint8))]
+            header = json.dumps({
+                'months': self.months,
+                'synced_at': self.synced_at,
+                'ids': [trx_id for trx_id in self.ids if trx_id is not None],
+                'texts': self.texts,
+                'categories': self.categories.values,
+                'types': self.types.values,
+            }, ensure_ascii=False).encode('utf-8')
+            payload = b''.join([struct.pack('<Q', len(header)), header, *columns])
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".tmp", 'wb') as index_file:
+                index_file.write(FILE_MAGIC + zlib.compress(payload, 1))
+            os.replace(self.path + ".tmp", self.path)
+            # Isi jurnal kini sudah ada di file indeks
+            if os.path.exists(self.path + JOURNAL_SUFFIX):
+                os.remove(self.path + JOURNAL_SUFFIX)
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as index_file:
+                content = index_file.read()
+            if not content.startswith(FILE_MAGIC):
+                return
+            payload = zlib.decompress(content[len(FILE_MAGIC):])
+            header_length = struct.unpack_from('<Q', payload)[0]
+            header = json.loads(payload[8:8 + header_length].decode('utf-8'))
+        except (OSError, ValueError, zlib.error, struct.error) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Indeks pencarian {self.path} tidak bisa dibaca, dibangun ulang: {e}")
+            return
+
+        count = len(header['ids'])
+        offset = 8 + header_length
+        columns = []
+        for typecode in ('I', 'I', 'd', 'B'):
+            column = array(typecode)
+            size = column.itemsize * count
+            column.frombytes(payload[offset:offset + size])
+            columns.append(column)
+            offset += size
+        self.categories = _Table(header['categories'])
+        self.types = _Table(header['types'])
+        for code, (description, category) in enumerate(header['texts']):
+            self.texts.append((description, category))
+            self.text_codes[(description, category)] = code
+            self.text_categories.append(self.categories.code(category))
+            self._index_text(code, description, category)
+        self._merge_vocabulary()
+        self.ids = header['ids']
+        self.codes, self.dates, self.amounts, self.type_codes = columns
+        self.alive = bytearray(b'\x01' * count)
+        self.months = header['months']
+        self.synced_at = header['synced_at']
+        self._replay_journal()
+        self._compact_if_needed()
+
+    # --- Kueri ---
+
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + '\uffff')
+        return self.vocabulary[start:end]
+
+    def _fuzzy_terms(self, token):
+        limit = allowed_typos(token)
+        if not limit:
+            return []
+        if self._fuzzy_keys is None:
+            self._fuzzy_keys = {}
+            for term in self.vocabulary:
+                self._add_fuzzy_keys(term)
+        candidates = set()
+        for key in _delete_keys(token, limit):
+            candidates |= self._fuzzy_keys.get(key, set())
+        return sorted(term for term in candidates if edit_distance(token, term, limit) <= limit)
+
+    def expand_token(self, word):
+        """Term di kosakata yang cocok dengan satu kata kueri (awalan, bentuk dasar, atau koreksi salah ketik)."""
+        variants = {word, ABBREVIATIONS.get(word, word)}
+        terms = set()
+        for variant in variants:
+            terms.update(self._prefix_terms(variant))
+            stem = strip_particle(variant)
+            if stem != variant and stem in self.postings:
+                terms.add(stem)
+        if not terms:
+            for variant in variants:
+                for corrected in self._fuzzy_terms(variant):
+                    terms.update(self._prefix_terms(corrected))
+        return terms
+
+    def search(self, query, filters=None, after=None, limit=50):
+        """
+        Transaksi yang cocok dengan query (semua kata harus cocok) dan filter riwayat
+        (date_from, date_to, type, category, amount_min, amount_max; sudah dinormalisasi),
+        urut tanggal terbaru lalu ID. after: (tanggal, id) item terakhir halaman sebelumnya.
+        Mengembalikan (list transaksi, jumlah seluruh hasil tanpa memperhitungkan after).
+        """
+        import numpy as np
+
+        filters = filters or {}
+        with self.lock:
+            if not len(self):
+                return [], 0
+            # 1. Tingkat teks: AND antar kata kueri atas himpunan nomor teks (kecil)
+            text_mask = np.ones(len(self.texts), dtype=bool)
+            for word in dict.fromkeys(words(query)):
+                matched = np.zeros(len(self.texts), dtype=bool)
+                for term in self.expand_token(word):
+                    matched[np.frombuffer(self.postings[term], dtype=np.uintc)] = True
+                text_mask &= matched
+            if filters.get('category') is not None:
+                category_code = self.categories.codes.get(filters['category'])
+                if category_code is None:
+                    return [], 0
+                text_mask &= np.frombuffer(self.text_categories, dtype=np.uintc) == category_code
+            if not text_mask.any():
+                return [], 0
+
+            # 2. Tingkat transaksi: satu gather nomor teks + filter kolom
+            dates = np.frombuffer(self.dates, dtype=np.uintc)
+            mask = text_mask[np.frombuffer(self.codes, dtype=np.uintc)]
+            mask &= np.frombuffer(self.alive, dtype=np.uint8).astype(bool)
+            if filters.get('date_from') is not None:
+                mask &= dates >= _date_number(filters['date_from'])
+            if filters.get('date_to') is not None:
+                mask &= dates <= _date_number(filters['date_to'])
+            if filters.get('type') is not None:
+                type_code = self.types.codes.get(filters['type'])
+                if type_code is None:
+                    return [], 0
+                mask &= np.frombuffer(self.type_codes, dtype=np.uint8) == type_code
+            amounts = np.frombuffer(self.amounts, dtype=np.float64)
+            if filters.get('amount_min') is not None:
+                mask &= amounts >= filters['amount_min']
+            if filters.get('amount_max') is not None:
+                mask &= amounts <= filters['amount_max']
+            total = int(np.count_nonzero(mask))
+
+            # 3. Keyset seperti backend: (tanggal, id) < after, lalu ambil limit teratas
+            if after is not None:
+                after_date, after_id = _date_number(after[0]), after[1]
+                ties = np.flatnonzero(mask & (dates == after_date)).tolist()
+                mask &= dates < after_date
+                ties = [slot for slot in ties if self.ids[slot] < after_id]
+            else:
+                ties = []
+            slots = np.flatnonzero(mask)
+            if len(slots) > limit:
+                # Hanya slot dengan tanggal >= tanggal ke-limit yang perlu diurutkan
+                slot_dates = dates[slots]
+                kth = np.partition(slot_dates, len(slots) - limit)[len(slots) - limit]
+                slots = slots[slot_dates >= kth]
+            slots = ties + slots.tolist()
+            del dates, amounts, mask
+            slots.sort(key=lambda slot: (self.dates[slot], self.ids[slot]), reverse=True)
+            return [self._row(slot) for slot in slots[:limit]], total
@@ -0,0 +1,119 @@
+"""
+Lapisan penyimpanan e-Ftari.
+
+Backend dipilih lewat konfigurasi:
+  - environment variable EFTARI_STORAGE_BACKEND ('firestore' atau 'sqlite'), atau
+  - st.secrets["storage"]["backend"].
+Default-nya 'firestore' (perilaku asli aplikasi).
+Untuk SQLite, lokasi file diatur lewat EFTARI_SQLITE_PATH / st.secrets["storage"]["sqlite_path"].
+
+Data dipisah per pengguna (lihat storage/base.py). SQLite bisa dibagi ke beberapa file shard
+lewat EFTARI_STORAGE_SHARDS (jumlah shard) dan EFTARI_HOT_USERS ('user:shard,...'),
+lihat storage/sharding.py. Mengubah keduanya mengharuskan `python rebalance_shards.py` sebelum
+aplikasi bisa dibuka lagi. Firestore tidak perlu shard: subkoleksi per pengguna sudah terpisah.
+
+Penulisan ke Firestore lewat antrean lokal (storage/write_queue.py) yang disinkronkan di latar;
+lokasi file antrean diatur lewat EFTARI_WRITE_QUEUE / st.secrets["storage"]["write_queue"]
+('off' untuk menulis langsung). Untuk SQLite lokal antrean tidak dipakai kecuali diatur.
+"""
+import os
+import sys
+
+from storage.base import StorageBackend, DEFAULT_USER_ID, BUDGET_BASE_MONTH
+from storage.cache import QueryCache
+from storage.rollups import empty_rollup, rebuild_rollups
+
+DEFAULT_BACKEND = "firestore"
+
+
+SECRETS_PATHS = (
+    os.path.join(".streamlit", "secrets.toml"),
+    os.path.join(os.path.expanduser("~"), ".streamlit", "secrets.toml"),
+)
+
+
+def _secrets_available():
+    # Streamlit hanya diimpor jika memang sudah dimuat atau ada file secrets,
+    # supaya skrip CLI/benchmark tidak menanggung waktu import Streamlit.
+    return "streamlit" in sys.modules or any(os.path.exists(path) for path in SECRETS_PATHS)
+
+
+def read_config(key, env_name, default):
+    """Baca konfigurasi dari environment dulu, lalu st.secrets, lalu default."""
+    value = os.environ.get(env_name)
+    if value:
+        return value
+    if not _secrets_available():
+        return default
+    try:
+        import streamlit as st
+        return st.secrets["storage"][key]
+    except Exception:
+        return default
+
+
+def shard_path(path, index):
+    """Lokasi file shard ke-index: 'eftari.db' -> 'eftari.shard0.db'."""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{index}{ext}"
+
+
+def shard_layout_path(path):
+    """Lokasi peta shard: 'eftari.db' -> 'eftari.shards.json'."""
+    return f"{os.path.splitext(path)[0]}.shards.json"
+
+
+def create_backend(name, **kwargs):
+    """Membuat instance backend berdasarkan namanya."""
+    name = name.strip().lower()
+    if name == "sqlite":
+        from storage.sqlite_backend import SQLiteBackend, DEFAULT_SQLITE_PATH
+        path = kwargs.pop("path", None) or read_config("sqlite_path", "EFTARI_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+        shards = int(kwargs.pop("shards", None) or read_config("shards", "EFTARI_STORAGE_SHARDS", 1))
+        if shards <= 1 or path == ":memory:":
+            return SQLiteBackend(path=path, **kwargs)
+        from storage.sharding import ShardedBackend, parse_hot_users
+        hot_users = kwargs.pop("hot_users", None)
+        if hot_users is None:
+            hot_users = parse_hot_users(read_config("hot_users", "EFTARI_HOT_USERS", ""))
+        check_layout = kwargs.pop("check_layout", True)
+        return ShardedBackend(
+            [SQLiteBackend(path=shard_path(path, index), **kwargs) for index in range(shards)],
+            hot_users=hot_users,
+            layout_path=shard_layout_path(path),
+            check_layout=check_layout,
+        )
+    if name == "firestore":
+        from storage.firestore_backend import FirestoreBackend
+        return FirestoreBackend(**kwargs)
+    raise ValueError(f"Backend penyimpanan tidak dikenal: '{name}'")
+
+
+def with_write_queue(backend):
+    """Membungkus backend dengan antrean tulis lokal jika dikonfigurasi (default: hanya Firestore)."""
+    from storage.write_queue import DEFAULT_WRITE_QUEUE_PATH, QueuedBackend
+    default = DEFAULT_WRITE_QUEUE_PATH if backend.name == "firestore" else "off"
+    path = read_config("write_queue", "EFTARI_WRITE_QUEUE", default)
+    if str(path).strip().lower() in ("off", "0", "false", "none"):
+        return backend
+    return QueuedBackend(backend, path=path)
+
+
+def get_backend_from_config():
+    """Membuat backend sesuai konfigurasi aplikasi."""
+    name = read_config("backend", "EFTARI_STORAGE_BACKEND", DEFAULT_BACKEND)
+    return create_backend(name)
+
+
+__all__ = [
+    "StorageBackend",
+    "DEFAULT_USER_ID",
+    "BUDGET_BASE_MONTH",
+    "QueryCache",
+    "read_config",
+    "empty_rollup",
+    "rebuild_rollups",
+    "create_backend",
+    "with_write_queue",
+    "get_backend_from_config",
+]
@@ -0,0 +1,134 @@
+# Pemilik data yang tersimpan sebelum ada pemisahan per pengguna,
+# sekaligus pengguna bawaan saat aplikasi berjalan tanpa login.
+DEFAULT_USER_ID = "default"
+
+# Bulan berlaku untuk anggaran lama (sebelum ada versi per bulan): berlaku untuk semua bulan
+BUDGET_BASE_MONTH = "0000-01"
+
+
+class StorageBackend:
+    """
+    Antarmuka penyimpanan yang dipakai oleh database.py.
+    Setiap backend (Firestore, SQLite, ...) wajib mengimplementasikan method di bawah.
+    Data yang diterima sudah dinormalisasi oleh database.py (kategori/tipe sudah .title()).
+
+    Semua data dipisah per pengguna: setiap method menerima user_id sebagai argumen pertama
+    dan hanya membaca/menulis data milik pengguna itu.
+    """
+
+    name = "base"
+
+    def list_users(self):
+        """Mengembalikan list user_id yang punya data tersimpan."""
+        raise NotImplementedError
+
+    # --- Anggaran (Budgets) ---
+    # Anggaran disimpan sebagai versi per bulan berlaku: satu versi berlaku sejak
+    # effective_month ('YYYY-MM') sampai ada versi yang lebih baru untuk kategori yang sama.
+    # amount None berarti anggaran kategori itu dihentikan sejak bulan tersebut.
+
+    def set_budget_version(self, user_id, category, effective_month, amount):
+        """Membuat atau menimpa versi anggaran (category, effective_month). amount None = dihentikan."""
+        raise NotImplementedError
+
+    def get_budget_versions(self, user_id):
+        """Mengembalikan semua versi anggaran: list dict {'category', 'effective_month', 'amount'}."""
+        raise NotImplementedError
+
+    # --- Transaksi (Transactions) ---
+    # Setiap penulisan transaksi WAJIB memperbarui rollup bulanan (lihat storage/rollups.py)
+    # di dalam batch/transaksi yang sama, termasuk bulan lama dan baru saat transaksi dipindah.
+
+    def add_transaction(self, user_id, data):
+        """Menyimpan transaksi baru dan mengembalikan ID-nya."""
+        raise NotImplementedError
+
+    def add_transactions(self, user_id, data_list):
+        """
+        Menyimpan banyak transaksi sekaligus (beserta rollup-nya) dengan penulisan berkelompok.
+        Mengembalikan list ID sesuai urutan data_list.
+        """
+        raise NotImplementedError
+
+    def save_transactions(self, user_id, items):
+        """
+        Penulisan idempoten: items adalah list (trx_id, data) dengan trx_id = kunci idempoten
+        buatan klien (dipakai sebagai ID dokumen/baris). ID yang sudah ada tidak ditimpa.
+        Semua item (beserta rollup-nya) ditulis dalam satu batch/transaksi.
+        Mengembalikan set ID yang benar-benar baru ditulis.
+        """
+        raise NotImplementedError
+
+    def update_transaction(self, user_id, trx_id, data):
+        """Memperbarui transaksi berdasarkan ID-nya. Mengembalikan data lama (atau None)."""
+        raise NotImplementedError
+
+    def delete_transaction(self, user_id, trx_id):
+        """Menghapus transaksi berdasarkan ID-nya. Mengembalikan data lama (atau None)."""
+        raise NotImplementedError
+
+    def delete_transactions(self, user_id, trx_ids):
+        """
+        Menghapus banyak transaksi sekaligus (beserta penyesuaian rollup) dengan penulisan berkelompok.
+        Mengembalikan list data lama dari transaksi yang benar-benar terhapus.
+        """
+        raise NotImplementedError
+
+    def get_all_transactions(self, user_id):
+        """Mengembalikan semua transaksi (dengan 'id') urut tanggal terbaru."""
+        raise NotImplementedError
+
+    def get_transactions_by_ids(self, user_id, trx_ids):
+        """Transaksi (dengan 'id') untuk ID-ID yang ada, dalam satu pembacaan berkelompok; ID yang tidak ada dilewati."""
+        raise NotImplementedError
+
+    def get_transactions_between(self, user_id, start_date, end_date):
+        """Mengembalikan transaksi dengan start_date <= date <= end_date (string 'YYYY-MM-DD')."""
+        raise NotImplementedError
+
+    def get_transactions_page(self, user_id, filters, after, page_size):
+        """
+        Satu halaman transaksi urut (date, id) menurun, memakai keyset/cursor pagination.
+        filters: dict dengan kunci opsional 'date_from', 'date_to', 'type', 'category',
+                 'amount_min', 'amount_max' (semuanya diterapkan di sisi backend).
+        after: tuple (date, id) dari item terakhir halaman sebelumnya, atau None untuk halaman pertama.
+        Mengembalikan maksimal page_size transaksi (dengan 'id').
+        """
+        raise NotImplementedError
+
+    def get_summary_between(self, user_id, start_date, end_date, categories=()):
+        """
+        Agregasi di sisi backend untuk rentang tanggal.
+        Mengembalikan dict {'income', 'expense', 'expense_by_category': {kategori: total}}.
+        'categories' adalah petunjuk kategori pengeluaran yang diketahui
+        (diperlukan backend tanpa GROUP BY, seperti Firestore).
+        """
+        raise NotImplementedError
+
+    # --- Perubahan Realtime (opsional) ---
+    # Hanya untuk backend dengan supports_watch = True (lihat live_views.py).
+
+    supports_watch = False
+
+    def watch_transactions_between(self, user_id, start_date, end_date, callback):
+        """
+        Berlangganan transaksi dengan start_date <= date <= end_date. callback(changes) dipanggil
+        sekali dengan semua transaksi yang ada, lalu setiap kali ada perubahan;
+        changes: list (jenis, transaksi dengan 'id'), jenis 'added', 'modified', atau 'removed'.
+        Mengembalikan fungsi tanpa argumen untuk berhenti berlangganan.
+        """
+        raise NotImplementedError
+
+    # --- Rollup Bulanan ---
+
+    def get_month_rollup(self, user_id, year_month):
+        """Rollup satu bulan (lihat storage/rollups.py), atau None jika belum ada."""
+        raise NotImplementedError
+
+    def get_all_rollups(self, user_id):
+        """Semua rollup yang tersimpan: dict {'YYYY-MM': rollup}."""
+        raise NotImplementedError
+
+    def replace_rollups(self, user_id, rollups):
+        """Menimpa seluruh rollup yang tersimpan dengan dict {'YYYY-MM': rollup}."""
+        raise NotImplementedError
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """
+    Cache baca sederhana untuk hasil kueri database (dipakai bersama oleh semua sesi Streamlit).
+
+    - Kunci berupa tuple kueri, misal ('transactions', 'month', '2024-05').
+    - Setiap entri punya TTL (detik) sebagai batas untuk perubahan dari proses lain.
+    - Total baris yang disimpan dibatasi max_rows; entri yang paling lama tidak dipakai dibuang dulu (LRU).
+    - Penulisan memanggil invalidate() untuk membuang entri yang terdampak saja.
+    """
+
+    def __init__(self, ttl=60.0, max_rows=50000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.clock = clock
+        self.lock = threading.RLock()
+        self.entries = OrderedDict() # key -> (expires_at, rows)
+        self.generation = 0 # Naik setiap kali ada invalidasi (penulisan)
+        self.total_rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.observer = None # observer(hit) per get_or_load, misal metrics.record_cache_lookup
+
+    def get_or_load(self, key, loader):
+        """
+        Kembalikan hasil dari cache jika masih berlaku, jika tidak panggil loader().
+        Hasil selalu berupa salinan agar pemanggil bebas mengubahnya.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                if self.observer is not None:
+                    self.observer(True)
+                return _copy_rows(entry[1])
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            if self.observer is not None:
+                self.observer(False)
+            generation = self.generation
+
+        rows = loader()
+
+        with self.lock:
+            # Jika ada penulisan selama loader() berjalan, hasilnya mungkin basi: jangan disimpan.
+            if self.generation == generation:
+                self._store(key, rows)
+        return _copy_rows(rows)
+
+    def invalidate(self, key):
+        """Membuang satu entri cache."""
+        with self.lock:
+            self.generation += 1
+            self._drop(key)
+
+    def invalidate_where(self, predicate):
+        """Membuang semua entri yang (key, rows)-nya memenuhi predicate."""
+        with self.lock:
+            for key, (_, rows) in list(self.entries.items()):
+                if predicate(key, rows):
+                    self.invalidate(key)
+
+    def clear(self):
+        """Mengosongkan seluruh cache."""
+        with self.lock:
+            for key in list(self.entries):
+                self.invalidate(key)
+
+    def stats(self):
+        """Ringkasan kondisi cache (untuk debug/monitoring)."""
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'rows': self.total_rows,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _store(self, key, rows):
+        size = len(rows)
+        if size > self.max_rows:
+            return # Terlalu besar untuk di-cache
+        self._drop(key)
+        self.entries[key] = (self.clock() + self.ttl, list(rows))
+        self.total_rows += size
+        while self.total_rows > self.max_rows:
+            oldest_key = next(iter(self.entries))
+            self._drop(oldest_key)
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_rows -= len(entry[1])
+
+
+def _copy_rows(rows):
+    return [dict(row) if isinstance(row, dict) else row for row in rows]
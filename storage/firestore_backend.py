@@ -0,0 +1,382 @@
+import streamlit as st
+import firebase_admin
+from firebase_admin import credentials, firestore
+from google.cloud.firestore_v1.aggregation import AggregationQuery
+from google.cloud.firestore_v1.base_query import FieldFilter
+
+from storage.base import StorageBackend, DEFAULT_USER_ID, BUDGET_BASE_MONTH
+from storage.rollups import rollup_increments, rollup_month
+
+# Batas jumlah operasi dalam satu batched write Firestore
+FIRESTORE_BATCH_LIMIT = 500
+
+# Path ke file service account lokal Anda (yang ada di folder .streamlit)
+LOCAL_SERVICE_ACCOUNT_PATH = ".streamlit/eftari-app-firebase.json" 
+# (Sesuaikan nama file ini jika Anda menamainya berbeda)
+
+
+def init_firestore():
+    """
+    Menginisialisasi koneksi ke Firebase Firestore.
+    Cek koneksi yang ada dulu. Jika tidak ada, buat koneksi baru.
+    Coba pakai kredensial lokal dulu, jika gagal, pakai st.secrets (untuk deploy).
+    """
+    if not firebase_admin._apps:
+        try:
+            # 1. Coba koneksi lokal (untuk laptop Anda)
+            cred = credentials.Certificate(LOCAL_SERVICE_ACCOUNT_PATH)
+        except Exception as e:
+            # 2. Jika gagal (di server Streamlit), pakai secrets
+            print(f"Koneksi lokal gagal: {e}. Mencoba st.secrets...")
+            # Ambil dari st.secrets (formatnya sudah kita siapkan)
+            cred_dict = st.secrets["firebase_credentials"]["key"]
+            cred = credentials.Certificate(cred_dict)
+            
+        firebase_admin.initialize_app(cred)
+        print("Firebase App terinisialisasi.")
+    
+    return firestore.client()
+
+
+# Kategori untuk sisa pengeluaran yang kategorinya tidak ada di daftar (misal anggaran yang sudah dihapus):
+# kategori pengeluaran bawaan aplikasi, jadi sisa itu digabung ke sana, bukan ke kategori baru
+UNLISTED_CATEGORY = "Lain-Lain (Pengeluaran)"
+
+
+# Koleksi lama di root database (sebelum data dipisah per pengguna)
+LEGACY_COLLECTIONS = ('budgets', 'transactions', 'monthly_rollups')
+
+
+class FirestoreBackend(StorageBackend):
+    """
+    Backend Firestore (perilaku asli aplikasi).
+    Data tiap pengguna disimpan di subkoleksi users/{user_id}/budget_versions, .../transactions,
+    dan .../monthly_rollups, jadi setiap kueri hanya memindai data satu pengguna.
+    """
+
+    name = "firestore"
+
+    def __init__(self, client=None):
+        self.db = client if client is not None else init_firestore()
+
+    def _collection(self, user_id, name):
+        return self.db.collection('users').document(user_id).collection(name)
+
+    def list_users(self):
+        # list_documents() ikut mengembalikan dokumen induk yang hanya berisi subkoleksi
+        return sorted(doc_ref.id for doc_ref in self.db.collection('users').list_documents())
+
+    def migrate_legacy_collections(self, user_id=DEFAULT_USER_ID):
+        """
+        Menyalin koleksi lama di root (budgets, transactions, monthly_rollups) ke
+        users/{user_id}/... dengan ID dokumen yang sama. Aman dijalankan ulang (ditimpa, bukan digandakan).
+        Koleksi lama tidak dihapus. Mengembalikan jumlah dokumen yang disalin per koleksi.
+        """
+        copied = {}
+        for name in LEGACY_COLLECTIONS:
+            target = self._collection(user_id, name)
+            batch, pending, copied[name] = self.db.batch(), 0, 0
+            for doc in self.db.collection(name).stream():
+                batch.set(target.document(doc.id), doc.to_dict())
+                pending += 1
+                copied[name] += 1
+                if pending == FIRESTORE_BATCH_LIMIT:
+                    batch.commit()
+                    batch, pending = self.db.batch(), 0
+            if pending:
+                batch.commit()
+        return copied
+
+    # --- Anggaran (Budgets) ---
+    # Satu dokumen per versi di users/{user_id}/budget_versions, ID = '{kategori}__{YYYY-MM}'.
+    # Dokumen lama di users/{user_id}/budgets (ID = kategori, satu jumlah) tetap dibaca
+    # sebagai versi yang berlaku sejak BUDGET_BASE_MONTH, jadi tidak perlu migrasi.
+
+    def set_budget_version(self, user_id, category, effective_month, amount):
+        doc_ref = self._collection(user_id, 'budget_versions').document(f"{category}__{effective_month}")
+        doc_ref.set({'category': category, 'effective_month': effective_month, 'amount': amount})
+
+    def get_budget_versions(self, user_id):
+        versions = [
+            {'category': doc.id, 'effective_month': BUDGET_BASE_MONTH, 'amount': doc.to_dict()['amount']}
+            for doc in self._collection(user_id, 'budgets').stream()
+        ]
+        versions += [doc.to_dict() for doc in self._collection(user_id, 'budget_versions').stream()]
+        return versions
+
+    # --- Transaksi (Transactions) ---
+
+    def add_transaction(self, user_id, data):
+        # .document() tanpa argumen membuat ID unik otomatis (seperti .add()).
+        # Transaksi dan rollup bulanannya ditulis dalam satu batch (atomik).
+        doc_ref = self._collection(user_id, 'transactions').document()
+        batch = self.db.batch()
+        batch.set(doc_ref, data)
+        self._write_rollup_changes(user_id, batch, [(data, 1)])
+        batch.commit()
+        return doc_ref.id
+
+    def add_transactions(self, user_id, data_list):
+        # Batched write berisi maksimal 500 operasi: transaksi + satu penulisan rollup per bulan
+        trx_ids = []
+        chunk, months = [], set()
+        for data in data_list:
+            new_months = months | {rollup_month(data)}
+            if chunk and len(chunk) + 1 + len(new_months) > FIRESTORE_BATCH_LIMIT:
+                trx_ids += self._commit_transaction_chunk(user_id, chunk)
+                chunk, new_months = [], {rollup_month(data)}
+            chunk.append(data)
+            months = new_months
+        if chunk:
+            trx_ids += self._commit_transaction_chunk(user_id, chunk)
+        return trx_ids
+
+    def _commit_transaction_chunk(self, user_id, chunk):
+        batch = self.db.batch()
+        trx_ids = []
+        for data in chunk:
+            doc_ref = self._collection(user_id, 'transactions').document()
+            batch.set(doc_ref, data)
+            trx_ids.append(doc_ref.id)
+        self._write_rollup_changes(user_id, batch, [(data, 1) for data in chunk])
+        batch.commit()
+        return trx_ids
+
+    def save_transactions(self, user_id, items):
+        # Kunci idempoten menjadi ID dokumen. Setiap chunk: satu transaksi Firestore yang membaca
+        # dokumen yang sudah ada, membuat yang belum ada, dan menambah rollup-nya (atomik,
+        # diulang otomatis oleh Firestore jika bentrok dengan penulisan lain).
+        items = list(items)
+        chunk_size = FIRESTORE_BATCH_LIMIT // 2
+        created = set()
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            doc_refs = {trx_id: self._collection(user_id, 'transactions').document(trx_id) for trx_id, _ in chunk}
+
+            @firestore.transactional
+            def save_chunk(transaction):
+                existing = {snapshot.id for snapshot in transaction.get_all(list(doc_refs.values()))
+                            if snapshot.exists}
+                new_items = [(trx_id, data) for trx_id, data in chunk if trx_id not in existing]
+                for trx_id, data in new_items:
+                    transaction.create(doc_refs[trx_id], data)
+                self._write_rollup_changes(user_id, transaction, [(data, 1) for _, data in new_items])
+                return {trx_id for trx_id, _ in new_items}
+
+            created |= save_chunk(self.db.transaction())
+        return created
+
+    def update_transaction(self, user_id, trx_id, data):
+        doc_ref = self._collection(user_id, 'transactions').document(trx_id)
+
+        @firestore.transactional
+        def update_in_transaction(transaction):
+            # Baca data lama di dalam transaksi agar bucket rollup lama bisa dikurangi
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            old_data = snapshot.to_dict()
+            transaction.update(doc_ref, data)
+            self._write_rollup_changes(user_id, transaction, [(old_data, -1), (data, 1)])
+            return old_data
+
+        return update_in_transaction(self.db.transaction())
+
+    def delete_transaction(self, user_id, trx_id):
+        doc_ref = self._collection(user_id, 'transactions').document(trx_id)
+
+        @firestore.transactional
+        def delete_in_transaction(transaction):
+            snapshot = doc_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+            old_data = snapshot.to_dict()
+            transaction.delete(doc_ref)
+            self._write_rollup_changes(user_id, transaction, [(old_data, -1)])
+            return old_data
+
+        return delete_in_transaction(self.db.transaction())
+
+    def delete_transactions(self, user_id, trx_ids):
+        # Setiap chunk: satu transaksi Firestore yang membaca data lama (untuk rollup),
+        # menghapus dokumennya, dan mengurangi rollup. Chunk dibuat cukup kecil agar
+        # jumlah penghapusan + penulisan rollup per bulan tetap di bawah 500 operasi.
+        trx_ids = list(trx_ids)
+        chunk_size = FIRESTORE_BATCH_LIMIT // 2
+        old_data_list = []
+        for start in range(0, len(trx_ids), chunk_size):
+            doc_refs = [self._collection(user_id, 'transactions').document(trx_id)
+                        for trx_id in trx_ids[start:start + chunk_size]]
+
+            @firestore.transactional
+            def delete_chunk(transaction):
+                deleted = []
+                for snapshot in transaction.get_all(doc_refs):
+                    if snapshot.exists:
+                        deleted.append(self._doc_to_dict(snapshot))
+                        transaction.delete(snapshot.reference)
+                self._write_rollup_changes(user_id, transaction, [(data, -1) for data in deleted])
+                return deleted
+
+            old_data_list += delete_chunk(self.db.transaction())
+        return old_data_list
+
+    def _write_rollup_changes(self, user_id, writer, changes):
+        """
+        Menambahkan penulisan rollup ke batch/transaksi 'writer'.
+        changes adalah list (data transaksi, +1/-1). Perubahan pada bulan yang sama
+        digabung menjadi satu penulisan per dokumen rollup, memakai Increment (tanpa perlu membaca).
+        """
+        totals = {} # year_month -> {'income': x, 'expense': y, 'categories': {kategori: z}, 'revision': n}
+        for data, sign in changes:
+            increments = rollup_increments(data, sign)
+            month = totals.setdefault(rollup_month(data),
+                                      {'income': 0.0, 'expense': 0.0, 'categories': {}, 'revision': 0})
+            month['revision'] += 1
+            if 'income' in increments:
+                month['income'] += increments['income']
+            if 'expense' in increments:
+                month['expense'] += increments['expense']
+                category = increments['category']
+                month['categories'][category] = month['categories'].get(category, 0.0) + increments['expense']
+
+        for year_month, month in totals.items():
+            # Revisi selalu dinaikkan, juga untuk perubahan yang tidak mengubah total (lihat storage/rollups.py)
+            payload = {'revision': firestore.Increment(month['revision'])}
+            if month['income']:
+                payload['income'] = firestore.Increment(month['income'])
+            if month['expense']:
+                payload['expense'] = firestore.Increment(month['expense'])
+            categories = {category: firestore.Increment(value)
+                          for category, value in month['categories'].items() if value}
+            if categories:
+                payload['expense_by_category'] = categories
+            rollup_ref = self._collection(user_id, 'monthly_rollups').document(year_month)
+            writer.set(rollup_ref, payload, merge=True)
+
+    def get_transactions_by_ids(self, user_id, trx_ids):
+        collection = self._collection(user_id, 'transactions')
+        trx_ids = list(trx_ids)
+        rows = []
+        for start in range(0, len(trx_ids), FIRESTORE_BATCH_LIMIT):
+            refs = [collection.document(trx_id) for trx_id in trx_ids[start:start + FIRESTORE_BATCH_LIMIT]]
+            rows += [self._doc_to_dict(doc) for doc in self.db.get_all(refs) if doc.exists]
+        return rows
+
+    def get_all_transactions(self, user_id):
+        trx_ref = self._collection(user_id, 'transactions').order_by('date', direction='DESCENDING').stream()
+        return [self._doc_to_dict(doc) for doc in trx_ref]
+
+    supports_watch = True
+
+    def watch_transactions_between(self, user_id, start_date, end_date, callback):
+        # Satu listener on_snapshot untuk kueri rentang tanggal; snapshot pertama berisi semua
+        # dokumen sebagai ADDED, sesudahnya hanya dokumen yang berubah
+        query = self._collection(user_id, 'transactions') \
+                    .where(filter=FieldFilter('date', '>=', start_date)) \
+                    .where(filter=FieldFilter('date', '<=', end_date))
+
+        def on_snapshot(snapshots, changes, read_time):
+            callback([(change.type.name.lower(), self._doc_to_dict(change.document)) for change in changes])
+
+        return query.on_snapshot(on_snapshot).unsubscribe
+
+    def get_transactions_between(self, user_id, start_date, end_date):
+        # Kueri rentang tanggal
+        trx_ref = self._collection(user_id, 'transactions') \
+                    .where('date', '>=', start_date) \
+                    .where('date', '<=', end_date) \
+                    .stream()
+        return [self._doc_to_dict(doc) for doc in trx_ref]
+
+    def get_transactions_page(self, user_id, filters, after, page_size):
+        # Semua filter diterapkan di server. Kombinasi filter membutuhkan composite index
+        # (Firestore akan menampilkan link untuk membuatnya saat kueri pertama kali dijalankan).
+        query = self._collection(user_id, 'transactions')
+        for key, field, op in (('type', 'type', '=='), ('category', 'category', '=='),
+                               ('date_from', 'date', '>='), ('date_to', 'date', '<='),
+                               ('amount_min', 'amount', '>='), ('amount_max', 'amount', '<=')):
+            if filters.get(key) is not None:
+                query = query.where(filter=FieldFilter(field, op, filters[key]))
+        query = query.order_by('date', direction='DESCENDING') \
+                     .order_by('__name__', direction='DESCENDING')
+        if after is not None:
+            # Cursor dari nilai (date, ID dokumen) item terakhir, tanpa perlu membaca dokumennya lagi
+            query = query.start_after({'date': after[0], '__name__': after[1]})
+        return [self._doc_to_dict(doc) for doc in query.limit(page_size).stream()]
+
+    def get_summary_between(self, user_id, start_date, end_date, categories=()):
+        # Firestore tidak punya GROUP BY, jadi kita pakai aggregation query (SUM di server)
+        # per tipe dan per kategori yang diketahui. Yang diunduh hanya angka, bukan dokumen.
+        base = self._collection(user_id, 'transactions') \
+                   .where(filter=FieldFilter('date', '>=', start_date)) \
+                   .where(filter=FieldFilter('date', '<=', end_date))
+
+        income = self._sum_amount(base.where(filter=FieldFilter('type', '==', 'Pemasukan')))
+        expense_query = base.where(filter=FieldFilter('type', '==', 'Pengeluaran'))
+        expense = self._sum_amount(expense_query)
+
+        expense_by_category = {}
+        if expense:
+            for category in categories:
+                total = self._sum_amount(expense_query.where(filter=FieldFilter('category', '==', category)))
+                if total:
+                    expense_by_category[category] = total
+            # Sisa pengeluaran yang kategorinya tidak ada di daftar
+            remainder = expense - sum(expense_by_category.values())
+            if remainder > 0.5:
+                expense_by_category[UNLISTED_CATEGORY] = expense_by_category.get(UNLISTED_CATEGORY, 0.0) + remainder
+
+        return {'income': income, 'expense': expense, 'expense_by_category': expense_by_category}
+
+    # --- Rollup Bulanan ---
+
+    def get_month_rollup(self, user_id, year_month):
+        snapshot = self._collection(user_id, 'monthly_rollups').document(year_month).get()
+        if not snapshot.exists:
+            return None
+        return self._to_rollup(snapshot.to_dict())
+
+    def get_all_rollups(self, user_id):
+        return {doc.id: self._to_rollup(doc.to_dict())
+                for doc in self._collection(user_id, 'monthly_rollups').stream()}
+
+    def replace_rollups(self, user_id, rollups):
+        collection = self._collection(user_id, 'monthly_rollups')
+        # Revisi tidak ditimpa tetapi dinaikkan satu: penggantian rollup juga sebuah perubahan
+        revisions = {doc.id: int(doc.to_dict().get('revision', 0)) for doc in collection.stream()}
+        writes = [(collection.document(year_month), dict(rollup, revision=revisions.get(year_month, 0) + 1))
+                  for year_month, rollup in rollups.items()]
+        writes += [(collection.document(year_month), None) for year_month in revisions if year_month not in rollups]
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = self.db.batch()
+            for doc_ref, rollup in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                if rollup is None:
+                    batch.delete(doc_ref)
+                else:
+                    batch.set(doc_ref, rollup)
+            batch.commit()
+
+    @staticmethod
+    def _to_rollup(data):
+        return {
+            'income': float(data.get('income', 0)),
+            'expense': float(data.get('expense', 0)),
+            'expense_by_category': {category: float(value)
+                                    for category, value in data.get('expense_by_category', {}).items()},
+            'revision': int(data.get('revision', 0)),
+        }
+
+    @staticmethod
+    def _sum_amount(query):
+        results = AggregationQuery(query).sum('amount', alias='total').get()
+        for result_group in results:
+            for result in result_group:
+                return float(result.value or 0)
+        return 0.0
+
+    @staticmethod
+    def _doc_to_dict(doc):
+        data = doc.to_dict()
+        data['id'] = doc.id # Tambahkan ID Dokumen ke dictionary
+        return data
@@ -0,0 +1,103 @@
+"""
+Rollup bulanan (koleksi/tabel 'monthly_rollups') yang dijaga setiap kali transaksi ditulis.
+
+Satu rollup per bulan 'YYYY-MM':
+    {'income': total pemasukan, 'expense': total pengeluaran,
+     'expense_by_category': {kategori: total pengeluaran},
+     'revision': jumlah penulisan transaksi di bulan itu}
+
+'revision' naik pada setiap penulisan yang menyentuh bulan itu, termasuk yang tidak mengubah
+total (ubah deskripsi, pindah tanggal di bulan yang sama). Salinan turunan (snapshot analitik,
+indeks pencarian) memakainya sebagai watermark bulan, lihat analytics.month_signature.
+
+Untuk menghitung ulang dari transaksi mentah dan melaporkan selisih, lihat rebuild_rollups.py.
+"""
+
+# Selisih di bawah ini dianggap pembulatan float, bukan drift
+DRIFT_TOLERANCE = 0.005
+
+
+def empty_rollup():
+    return {'income': 0.0, 'expense': 0.0, 'expense_by_category': {}, 'revision': 0}
+
+
+def rollup_month(data):
+    """Bulan ('YYYY-MM') tempat sebuah transaksi masuk."""
+    return str(data['date'])[:7]
+
+
+def rollup_increments(data, sign=1):
+    """
+    Perubahan yang diakibatkan satu transaksi terhadap rollup bulannya.
+    sign=1 untuk menambah transaksi, sign=-1 untuk mengeluarkannya.
+    Mengembalikan dict {'income': x} atau {'expense': x, 'category': nama}.
+    """
+    amount = float(data['amount']) * sign
+    if data['type'] == 'Pemasukan':
+        return {'income': amount}
+    if data['type'] == 'Pengeluaran':
+        return {'expense': amount, 'category': data['category']}
+    return {}
+
+
+def apply_to_rollup(rollup, data, sign=1):
+    """Menerapkan satu transaksi ke dict rollup (in-place). Menambah atau mengeluarkan sama-sama satu revisi."""
+    rollup['revision'] = rollup.get('revision', 0) + 1
+    increments = rollup_increments(data, sign)
+    if 'income' in increments:
+        rollup['income'] += increments['income']
+    if 'expense' in increments:
+        rollup['expense'] += increments['expense']
+        by_category = rollup['expense_by_category']
+        category = increments['category']
+        by_category[category] = by_category.get(category, 0.0) + increments['expense']
+    return rollup
+
+
+def compute_rollups(transactions):
+    """Menghitung semua rollup dari transaksi mentah (iterable of dict); 'revision' = jumlah transaksinya."""
+    rollups = {}
+    for data in transactions:
+        year_month = rollup_month(data)
+        if year_month not in rollups:
+            rollups[year_month] = empty_rollup()
+        apply_to_rollup(rollups[year_month], data)
+    return rollups
+
+
+def find_drift(expected, actual):
+    """
+    Membandingkan rollup hasil hitung ulang (expected) dengan yang tersimpan (actual).
+    Mengembalikan list dict {'year_month', 'field', 'expected', 'actual'}.
+    """
+    drift = []
+    for year_month in sorted(set(expected) | set(actual)):
+        exp = expected.get(year_month, empty_rollup())
+        act = actual.get(year_month, empty_rollup())
+        fields = [('income', exp['income'], act['income']),
+                  ('expense', exp['expense'], act['expense'])]
+        for category in sorted(set(exp['expense_by_category']) | set(act['expense_by_category'])):
+            fields.append((
+                f"expense_by_category.{category}",
+                exp['expense_by_category'].get(category, 0.0),
+                act['expense_by_category'].get(category, 0.0),
+            ))
+        for field, exp_value, act_value in fields:
+            if abs(exp_value - act_value) > DRIFT_TOLERANCE:
+                drift.append({'year_month': year_month, 'field': field,
+                              'expected': exp_value, 'actual': act_value})
+    return drift
+
+
+def rebuild_rollups(backend, user_id, dry_run=False):
+    """
+    Menghitung ulang rollup satu pengguna dari seluruh transaksinya, melaporkan drift,
+    lalu (kecuali dry_run) menimpa rollup yang tersimpan.
+    Sebaiknya dijalankan saat tidak ada penulisan lain yang berjalan.
+    """
+    expected = compute_rollups(backend.get_all_transactions(user_id))
+    actual = backend.get_all_rollups(user_id)
+    drift = find_drift(expected, actual)
+    if not dry_run:
+        backend.replace_rollups(user_id, expected)
+    return drift
@@ -0,0 +1,190 @@
+"""
+Pembagian data pengguna ke beberapa backend (shard).
+
+Setiap pengguna ditempatkan di satu shard lewat rendezvous hashing atas user_id: setiap shard
+diberi skor hash(user_id, shard) dan pengguna ikut shard dengan skor tertinggi. Menambah shard
+hanya memindahkan pengguna yang skornya tertinggi di shard baru (sekitar 1/N pengguna), bukan
+hampir semua pengguna seperti hash % jumlah shard. Pengguna "panas" (data/aktivitas besar)
+dipetakan ke shard tertentu lewat hot_users; pemetaan ini hanya memindahkan pengguna itu sendiri.
+
+Penempatan yang sedang berlaku disimpan di peta shard (file JSON, lihat write_layout). Saat
+dibuka, konfigurasi dibandingkan dengan peta itu; jika berbeda (jumlah shard atau hot_users
+berubah), backend menolak dibuka sampai data dipindahkan dengan `python rebalance_shards.py`,
+agar data pengguna tidak "hilang" karena dibaca dari shard yang salah.
+"""
+import functools
+import hashlib
+import json
+import os
+
+from storage.base import StorageBackend
+
+# Method backend yang diteruskan ke shard milik pengguna (argumen pertama = user_id)
+ROUTED_METHODS = (
+    'set_budget_version', 'get_budget_versions',
+    'add_transaction', 'add_transactions', 'save_transactions', 'update_transaction', 'delete_transaction',
+    'delete_transactions', 'get_all_transactions', 'get_transactions_by_ids', 'get_transactions_between',
+    'get_transactions_page', 'get_summary_between',
+    'get_month_rollup', 'get_all_rollups', 'replace_rollups', 'watch_transactions_between',
+)
+
+LAYOUT_VERSION = 1
+HASHING = "rendezvous-blake2b"
+MOVE_CHUNK_SIZE = 500 # Transaksi yang disalin per batch saat memindahkan pengguna
+
+
+class ShardLayoutError(RuntimeError):
+    """Konfigurasi shard tidak cocok dengan penempatan data yang tersimpan."""
+
+
+def parse_hot_users(value):
+    """'budi@contoh.id:2,ani@contoh.id:3' -> {'budi@contoh.id': 2, 'ani@contoh.id': 3}."""
+    hot_users = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        user_id, _, shard = item.strip().rpartition(":")
+        hot_users[user_id] = int(shard)
+    return hot_users
+
+
+@functools.lru_cache(maxsize=65536)
+def rendezvous_shard(user_id, shard_count):
+    """Shard dengan skor hash tertinggi untuk user_id (stabil antar proses, tidak bergantung PYTHONHASHSEED)."""
+    key = user_id.encode('utf-8')
+    return max(
+        range(shard_count),
+        key=lambda index: hashlib.blake2b(key, digest_size=8, salt=index.to_bytes(8, 'little')).digest(),
+    )
+
+
+def _routed(method_name):
+    def method(self, user_id, *args, **kwargs):
+        return getattr(self.shard_for(user_id), method_name)(user_id, *args, **kwargs)
+    method.__name__ = method_name
+    method.__doc__ = getattr(StorageBackend, method_name).__doc__
+    return method
+
+
+class ShardedBackend(StorageBackend):
+    """
+    Meneruskan setiap pemanggilan ke backend shard milik user_id.
+    layout_path: lokasi peta shard (None = tanpa peta). check_layout=False melewati pemeriksaan
+    peta saat dibuka (dipakai rebalance_shards.py).
+    """
+
+    name = "sharded"
+
+    def __init__(self, shards, hot_users=None, layout_path=None, check_layout=True):
+        if not shards:
+            raise ValueError("ShardedBackend membutuhkan minimal satu shard.")
+        self.shards = list(shards)
+        self.hot_users = dict(hot_users or {})
+        for user_id, index in self.hot_users.items():
+            if not 0 <= index < len(self.shards):
+                raise ValueError(f"Shard {index} untuk pengguna '{user_id}' tidak ada.")
+        self.supports_watch = all(shard.supports_watch for shard in self.shards)
+        self.layout_path = layout_path
+        if layout_path and check_layout:
+            self.check_layout()
+
+    def shard_index(self, user_id):
+        """Nomor shard untuk user_id."""
+        if user_id in self.hot_users:
+            return self.hot_users[user_id]
+        return rendezvous_shard(user_id, len(self.shards))
+
+    def shard_for(self, user_id):
+        return self.shards[self.shard_index(user_id)]
+
+    def list_users(self):
+        users = set()
+        for shard in self.shards:
+            users.update(shard.list_users())
+        return sorted(users)
+
+    # --- Peta shard ---
+
+    def layout(self):
+        """Penempatan yang berlaku untuk konfigurasi ini (disimpan di peta shard)."""
+        return {'version': LAYOUT_VERSION, 'hashing': HASHING, 'shards': len(self.shards),
+                'hot_users': dict(sorted(self.hot_users.items()))}
+
+    def read_layout(self):
+        """Peta shard tersimpan, atau None jika belum ada."""
+        if not self.layout_path or not os.path.exists(self.layout_path):
+            return None
+        with open(self.layout_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_layout(self):
+        # Ditulis ke file sementara lalu diganti, agar peta tidak pernah setengah tertulis
+        temp_path = f"{self.layout_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.layout(), f, indent=2)
+        os.replace(temp_path, self.layout_path)
+
+    def misplaced_users(self, retired=()):
+        """
+        list (user_id, shard asal, shard tujuan) untuk data yang tidak berada di shard seharusnya.
+        retired: shard lama di luar jumlah shard sekarang (nomornya melanjutkan self.shards); semua isinya dipindah.
+        """
+        misplaced = []
+        for index, shard in enumerate(self.shards + list(retired)):
+            for user_id in shard.list_users():
+                target = self.shard_index(user_id)
+                if target != index:
+                    misplaced.append((user_id, index, target))
+        return misplaced
+
+    def check_layout(self):
+        """
+        Menolak dibuka jika konfigurasi berbeda dengan peta shard tersimpan.
+        Tanpa peta (deployment baru atau versi lama), penempatan data diperiksa langsung:
+        jika semua pengguna sudah di shard seharusnya, peta ditulis; jika tidak, ditolak.
+        """
+        stored = self.read_layout()
+        if stored is None:
+            misplaced = self.misplaced_users()
+            if misplaced:
+                raise ShardLayoutError(
+                    f"{len(misplaced)} pengguna tersimpan di shard yang tidak sesuai konfigurasi sekarang. "
+                    "Jalankan `python rebalance_shards.py` untuk memindahkan datanya."
+                )
+            self.write_layout()
+        elif stored != self.layout():
+            raise ShardLayoutError(
+                f"Konfigurasi shard ({len(self.shards)} shard, hot_users {self.hot_users}) berbeda dengan peta "
+                f"shard tersimpan di {self.layout_path} ({stored.get('shards')} shard, hot_users "
+                f"{stored.get('hot_users')}). Jalankan `python rebalance_shards.py` untuk memindahkan data."
+            )
+
+    def rebalance(self, dry_run=False, retired=(), progress=None):
+        """
+        Memindahkan data setiap pengguna yang tidak berada di shard seharusnya, lalu menulis peta shard.
+        Aman diulang jika terhenti di tengah: transaksi disalin idempoten (ID tetap, lihat
+        save_transactions) sebelum data di shard asal dihapus dalam satu transaksi.
+        Mengembalikan list (user_id, shard asal, shard tujuan).
+        """
+        shards = self.shards + list(retired)
+        misplaced = self.misplaced_users(retired)
+        if dry_run:
+            return misplaced
+        for user_id, source_index, target_index in misplaced:
+            source, target = shards[source_index], shards[target_index]
+            for version in source.get_budget_versions(user_id):
+                target.set_budget_version(user_id, version['category'], version['effective_month'], version['amount'])
+            # Rollup tujuan ikut diperbarui oleh save_transactions, hanya untuk transaksi yang benar-benar baru
+            rows = source.get_all_transactions(user_id)
+            for start in range(0, len(rows), MOVE_CHUNK_SIZE):
+                target.save_transactions(user_id, [(row['id'], row) for row in rows[start:start + MOVE_CHUNK_SIZE]])
+            source.delete_user(user_id)
+            if progress:
+                progress(user_id, source_index, target_index, len(rows))
+        if self.layout_path:
+            self.write_layout()
+        return misplaced
+
+
+for _method_name in ROUTED_METHODS:
+    setattr(ShardedBackend, _method_name, _routed(_method_name))
@@ -0,0 +1,477 @@
+import os
+import sqlite3
+import threading
+import uuid
+
+from storage.base import StorageBackend, DEFAULT_USER_ID, BUDGET_BASE_MONTH
+from storage.rollups import rollup_increments, rollup_month, empty_rollup, compute_rollups
+
+# Lokasi default file database lokal
+DEFAULT_SQLITE_PATH = "eftari.db"
+
+SCHEMA = """
+-- Semua tabel diawali kolom user_id: data tiap pengguna terpisah dan setiap indeks
+-- diawali user_id, jadi kueri satu pengguna hanya menyentuh data pengguna itu.
+-- Versi anggaran per bulan berlaku; amount NULL = anggaran dihentikan sejak bulan itu
+CREATE TABLE IF NOT EXISTS budget_versions (
+    user_id         TEXT NOT NULL,
+    category        TEXT NOT NULL,
+    effective_month TEXT NOT NULL,      -- 'YYYY-MM'
+    amount          REAL,
+    PRIMARY KEY (user_id, category, effective_month)
+);
+
+-- ID transaksi unik per pengguna (kunci idempotensi dari klien), bukan global
+CREATE TABLE IF NOT EXISTS transactions (
+    id          TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    date        TEXT NOT NULL,          -- 'YYYY-MM-DD'
+    description TEXT NOT NULL DEFAULT '',
+    amount      REAL NOT NULL,
+    type        TEXT NOT NULL,
+    category    TEXT NOT NULL,
+    PRIMARY KEY (user_id, id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_date_id ON transactions (user_id, date, id); -- rentang tanggal + keyset pagination
+CREATE INDEX IF NOT EXISTS idx_transactions_user_type_category ON transactions (user_id, type, category, date);
+
+-- Rollup bulanan: satu baris per (pengguna, bulan, tipe, kategori). Pemasukan disimpan dengan kategori '',
+-- revisi bulan (lihat storage/rollups.py) sebagai baris bertipe 'Revisi' dengan kategori ''.
+CREATE TABLE IF NOT EXISTS monthly_rollups (
+    user_id    TEXT NOT NULL,
+    year_month TEXT NOT NULL,           -- 'YYYY-MM'
+    type       TEXT NOT NULL,
+    category   TEXT NOT NULL,
+    total      REAL NOT NULL,
+    PRIMARY KEY (user_id, year_month, type, category)
+);
+"""
+
+# Migrasi database lama (sebelum ada user_id): semua data lama menjadi milik DEFAULT_USER_ID.
+# Tabel lama -> (tabel baru, kolom yang disalin apa adanya, nilai kolom tambahan).
+# Anggaran lama menjadi versi yang berlaku untuk semua bulan (BUDGET_BASE_MONTH).
+LEGACY_TABLE_COPIES = {
+    'budgets': ('budget_versions', "category, amount", {'effective_month': BUDGET_BASE_MONTH}),
+    'transactions': ('transactions', "id, date, description, amount, type, category", {}),
+    'monthly_rollups': ('monthly_rollups', "year_month, type, category, total", {}),
+}
+
+def _row(trx_id, data):
+    return {
+        'id': trx_id, 'date': data['date'], 'description': data['description'],
+        'amount': data['amount'], 'type': data['type'], 'category': data['category'],
+    }
+
+
+def _sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+TRANSACTION_COLUMNS = ('id', 'date', 'description', 'amount', 'type', 'category')
+
+REVISION_TYPE = 'Revisi' # Baris monthly_rollups yang menyimpan revisi bulan
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Backend SQLite lokal (tanpa jaringan).
+    Cocok untuk pengembangan offline, benchmark, dan pengujian.
+    Satu koneksi dipakai bersama antar thread Streamlit, dijaga dengan lock.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH):
+        self.path = path
+        if path != ":memory:":
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+        self.lock = threading.RLock()
+        self.watchers = {} # user_id -> list (start_date, end_date, callback), lihat watch_transactions_between
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate_legacy_schema()
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+
+    def _migrate_legacy_schema(self):
+        """
+        Memindahkan database versi lama ke skema sekarang:
+        - tanpa kolom user_id: semua data menjadi milik DEFAULT_USER_ID;
+        - tabel budgets (satu jumlah per kategori): menjadi versi anggaran sejak BUDGET_BASE_MONTH;
+        - transactions dengan PRIMARY KEY (id) global: menjadi PRIMARY KEY (user_id, id).
+        """
+        existing = {row['name'] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        columns = {row['name']: row['pk'] for row in self.conn.execute("PRAGMA table_info(transactions)")}
+        if columns and 'user_id' not in columns:
+            # Data lama milik pengguna bawaan
+            copies = {table: LEGACY_TABLE_COPIES[table] for table in LEGACY_TABLE_COPIES if table in existing}
+            owner = {'user_id': DEFAULT_USER_ID}
+        else:
+            copies, owner = {}, {}
+            if 'budgets' in existing:
+                # Sudah per pengguna, tapi anggaran belum berversi
+                copies['budgets'] = ('budget_versions', "user_id, category, amount", {'effective_month': BUDGET_BASE_MONTH})
+            if columns and not columns['user_id']:
+                # Kunci ID transaksi masih global: kunci yang sama milik pengguna lain ikut tertolak
+                copies['transactions'] = ('transactions', "user_id, " + LEGACY_TABLE_COPIES['transactions'][1], {})
+        if not copies:
+            return
+
+        # Indeks ikut pindah ke tabel legacy_* saat di-rename; dihapus dulu agar SCHEMA membuatnya untuk tabel baru
+        indexes = [row['name'] for table in copies for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+        )]
+        # Satu skrip dalam satu transaksi: gagal di tengah = database lama tetap utuh
+        script = ["BEGIN;"]
+        script += [f"DROP INDEX {index};" for index in indexes]
+        script += [f"ALTER TABLE {table} RENAME TO legacy_{table};" for table in copies]
+        script.append(SCHEMA)
+        for table, (target, table_columns, extra) in copies.items():
+            extra = dict(owner, **extra)
+            extra_columns = "".join(f"{name}, " for name in extra)
+            extra_values = "".join(_sql_literal(value) + ", " for value in extra.values())
+            script.append(
+                f"INSERT INTO {target} ({extra_columns}{table_columns}) "
+                f"SELECT {extra_values}{table_columns} FROM legacy_{table};"
+            )
+            script.append(f"DROP TABLE legacy_{table};")
+        script.append("COMMIT;")
+        self.conn.executescript("\n".join(script))
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, params=()):
+        with self.lock, self.conn:
+            self.conn.execute(sql, params)
+
+    def list_users(self):
+        rows = self._query(
+            "SELECT user_id FROM transactions UNION SELECT user_id FROM budget_versions "
+            "UNION SELECT user_id FROM monthly_rollups"
+        )
+        return sorted(row['user_id'] for row in rows)
+
+    def delete_user(self, user_id):
+        """Menghapus semua data user_id dalam satu transaksi (dipakai saat memindahkan pengguna antar shard)."""
+        with self.lock, self.conn:
+            for table in ('transactions', 'budget_versions', 'monthly_rollups'):
+                self.conn.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+
+    # --- Anggaran (Budgets) ---
+
+    def set_budget_version(self, user_id, category, effective_month, amount):
+        self._write(
+            "INSERT INTO budget_versions (user_id, category, effective_month, amount) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(user_id, category, effective_month) DO UPDATE SET amount = excluded.amount",
+            (user_id, category, effective_month, amount),
+        )
+
+    def get_budget_versions(self, user_id):
+        rows = self._query(
+            "SELECT category, effective_month, amount FROM budget_versions WHERE user_id = ? "
+            "ORDER BY category, effective_month",
+            (user_id,),
+        )
+        return [dict(row) for row in rows]
+
+    # --- Transaksi (Transactions) ---
+
+    def add_transaction(self, user_id, data):
+        trx_id = uuid.uuid4().hex # Meniru ID unik otomatis Firestore
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO transactions (id, user_id, date, description, amount, type, category) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (trx_id, user_id, data['date'], data['description'], data['amount'], data['type'], data['category']),
+            )
+            self._bump_rollup(user_id, data, 1)
+        self._publish(user_id, [('added', None, _row(trx_id, data))])
+        return trx_id
+
+    def add_transactions(self, user_id, data_list):
+        trx_ids = [uuid.uuid4().hex for _ in data_list]
+        params = [
+            (trx_id, user_id, data['date'], data['description'], data['amount'], data['type'], data['category'])
+            for trx_id, data in zip(trx_ids, data_list)
+        ]
+        # Satu transaksi SQL: executemany untuk baris transaksi, lalu rollup yang sudah digabung per bulan
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO transactions (id, user_id, date, description, amount, type, category) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                params,
+            )
+            self._add_rollups(user_id, compute_rollups(data_list))
+        self._publish(user_id, [('added', None, _row(trx_id, data)) for trx_id, data in zip(trx_ids, data_list)])
+        return trx_ids
+
+    def save_transactions(self, user_id, items):
+        created, created_data = set(), []
+        # Satu transaksi SQL. INSERT ... DO NOTHING per baris: rowcount menunjukkan apakah
+        # baris benar-benar baru, tetap benar walau proses lain menulis kunci yang sama
+        with self.lock, self.conn:
+            for trx_id, data in items:
+                cursor = self.conn.execute(
+                    "INSERT INTO transactions (id, user_id, date, description, amount, type, category) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(user_id, id) DO NOTHING",
+                    (trx_id, user_id, data['date'], data['description'], data['amount'], data['type'],
+                     data['category']),
+                )
+                if cursor.rowcount == 1:
+                    created.add(trx_id)
+                    created_data.append(_row(trx_id, data))
+            self._add_rollups(user_id, compute_rollups(created_data))
+        self._publish(user_id, [('added', None, row) for row in created_data])
+        return created
+
+    def update_transaction(self, user_id, trx_id, data):
+        with self.lock, self.conn:
+            old_data = self._get_transaction(user_id, trx_id)
+            if old_data is None:
+                return None
+            self.conn.execute(
+                "UPDATE transactions SET date = ?, description = ?, amount = ?, type = ?, category = ? "
+                "WHERE id = ? AND user_id = ?",
+                (data['date'], data['description'], data['amount'], data['type'], data['category'],
+                 trx_id, user_id),
+            )
+            # Keluarkan dari bucket lama, masukkan ke bucket baru (bisa beda bulan/kategori)
+            self._bump_rollup(user_id, old_data, -1)
+            self._bump_rollup(user_id, data, 1)
+        self._publish(user_id, [('modified', old_data, _row(trx_id, data))])
+        return old_data
+
+    def delete_transaction(self, user_id, trx_id):
+        with self.lock, self.conn:
+            old_data = self._get_transaction(user_id, trx_id)
+            if old_data is None:
+                return None
+            self.conn.execute("DELETE FROM transactions WHERE id = ? AND user_id = ?", (trx_id, user_id))
+            self._bump_rollup(user_id, old_data, -1)
+        self._publish(user_id, [('removed', old_data, None)])
+        return old_data
+
+    def delete_transactions(self, user_id, trx_ids):
+        trx_ids = list(trx_ids)
+        old_data_list = []
+        with self.lock, self.conn:
+            # Dipecah per 500 ID agar tidak melebihi batas parameter SQLite
+            for start in range(0, len(trx_ids), 500):
+                chunk = trx_ids[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    "SELECT id, date, description, amount, type, category FROM transactions "
+                    f"WHERE user_id = ? AND id IN ({placeholders})",
+                    [user_id] + chunk,
+                ).fetchall()
+                self.conn.execute(
+                    f"DELETE FROM transactions WHERE user_id = ? AND id IN ({placeholders})", [user_id] + chunk
+                )
+                old_data_list += [dict(row) for row in rows]
+            # Rollup dikurangi sekaligus, digabung per bulan/kategori
+            negated = [dict(data, amount=-data['amount']) for data in old_data_list]
+            self._add_rollups(user_id, compute_rollups(negated))
+        self._publish(user_id, [('removed', data, None) for data in old_data_list])
+        return old_data_list
+
+    def _get_transaction(self, user_id, trx_id):
+        row = self.conn.execute(
+            "SELECT id, date, description, amount, type, category FROM transactions "
+            "WHERE id = ? AND user_id = ?",
+            (trx_id, user_id),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def _bump_rollup(self, user_id, data, sign):
+        # Dipanggil di dalam transaksi SQL yang sama dengan penulisan transaksinya
+        increments = rollup_increments(data, sign)
+        keys = [(REVISION_TYPE, '', 1)]
+        if 'income' in increments:
+            keys.append(('Pemasukan', '', increments['income']))
+        elif 'expense' in increments:
+            keys.append(('Pengeluaran', increments['category'], increments['expense']))
+        self.conn.executemany(
+            "INSERT INTO monthly_rollups (user_id, year_month, type, category, total) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id, year_month, type, category) DO UPDATE SET total = total + excluded.total",
+            [(user_id, rollup_month(data)) + key for key in keys],
+        )
+
+    # --- Perubahan Realtime ---
+    # Aliran perubahan di dalam proses (hanya penulisan lewat objek backend ini yang terlihat);
+    # meniru perilaku on_snapshot Firestore untuk view realtime dan pengujiannya.
+
+    supports_watch = True
+
+    def watch_transactions_between(self, user_id, start_date, end_date, callback):
+        watcher = (start_date, end_date, callback)
+        with self.lock:
+            # Data awal dikirim dan watcher didaftarkan di bawah lock yang sama dengan penulisan,
+            # jadi tidak ada perubahan yang terlewat atau terkirim dua kali
+            callback([('added', row) for row in self.get_transactions_between(user_id, start_date, end_date)])
+            self.watchers.setdefault(user_id, []).append(watcher)
+
+        def unsubscribe():
+            with self.lock:
+                watchers = self.watchers.get(user_id, [])
+                if watcher in watchers:
+                    watchers.remove(watcher)
+                if not watchers:
+                    self.watchers.pop(user_id, None)
+        return unsubscribe
+
+    def _publish(self, user_id, changes):
+        """changes: list (jenis, data lama, data baru). Dikirim ke watcher yang rentangnya cocok."""
+        with self.lock:
+            watchers = list(self.watchers.get(user_id, ()))
+        for start_date, end_date, callback in watchers:
+            def in_range(data):
+                return data is not None and start_date <= data['date'] <= end_date
+
+            matched = []
+            for kind, old_data, new_data in changes:
+                if in_range(new_data):
+                    matched.append((kind, new_data))
+                elif in_range(old_data):
+                    # Termasuk transaksi yang dipindah ke luar rentang: bagi watcher ini sama dengan dihapus
+                    matched.append(('removed', old_data))
+            if matched:
+                try:
+                    callback(matched)
+                except Exception as e:
+                    print(f"Watcher transaksi gagal: {e}")
+
+    def get_all_transactions(self, user_id):
+        rows = self._query(
+            "SELECT id, date, description, amount, type, category FROM transactions "
+            "WHERE user_id = ? ORDER BY date DESC",
+            (user_id,),
+        )
+        return [dict(row) for row in rows]
+
+    def get_transactions_by_ids(self, user_id, trx_ids):
+        trx_ids = list(trx_ids)
+        rows = []
+        for start in range(0, len(trx_ids), 500): # Batas parameter SQLite
+            chunk = trx_ids[start:start + 500]
+            rows += self._query(
+                "SELECT id, date, description, amount, type, category FROM transactions "
+                f"WHERE user_id = ? AND id IN ({', '.join('?' * len(chunk))})",
+                [user_id] + chunk,
+            )
+        return [dict(row) for row in rows]
+
+    def get_transactions_between(self, user_id, start_date, end_date):
+        rows = self._query(
+            "SELECT id, date, description, amount, type, category FROM transactions "
+            "WHERE user_id = ? AND date >= ? AND date <= ?",
+            (user_id, start_date, end_date),
+        )
+        return [dict(row) for row in rows]
+
+    def get_transactions_page(self, user_id, filters, after, page_size):
+        conditions = ["user_id = ?"]
+        params = [user_id]
+        for key, sql in (('date_from', "date >= ?"), ('date_to', "date <= ?"),
+                         ('type', "type = ?"), ('category', "category = ?"),
+                         ('amount_min', "amount >= ?"), ('amount_max', "amount <= ?")):
+            if filters.get(key) is not None:
+                conditions.append(sql)
+                params.append(filters[key])
+        if after is not None:
+            conditions.append("(date, id) < (?, ?)") # Keyset: lanjut setelah item terakhir
+            params.extend(after)
+        rows = self._query(
+            "SELECT id, date, description, amount, type, category FROM transactions "
+            f"WHERE {' AND '.join(conditions)} ORDER BY date DESC, id DESC LIMIT ?",
+            params + [page_size],
+        )
+        return [dict(row) for row in rows]
+
+    def get_summary_between(self, user_id, start_date, end_date, categories=()):
+        rows = self._query(
+            "SELECT type, category, SUM(amount) AS total FROM transactions "
+            "WHERE user_id = ? AND date >= ? AND date <= ? GROUP BY type, category",
+            (user_id, start_date, end_date),
+        )
+        summary = {'income': 0.0, 'expense': 0.0, 'expense_by_category': {}}
+        for row in rows:
+            if row['type'] == 'Pemasukan':
+                summary['income'] += row['total']
+            elif row['type'] == 'Pengeluaran':
+                summary['expense'] += row['total']
+                summary['expense_by_category'][row['category']] = row['total']
+        return summary
+
+    def _add_rollups(self, user_id, rollups):
+        # Menambahkan dict {'YYYY-MM': rollup} ke rollup yang tersimpan (bukan menimpa)
+        params = []
+        for year_month, rollup in rollups.items():
+            if rollup.get('revision'):
+                params.append((user_id, year_month, REVISION_TYPE, '', rollup['revision']))
+            if rollup['income']:
+                params.append((user_id, year_month, 'Pemasukan', '', rollup['income']))
+            for category, total in rollup['expense_by_category'].items():
+                params.append((user_id, year_month, 'Pengeluaran', category, total))
+        self.conn.executemany(
+            "INSERT INTO monthly_rollups (user_id, year_month, type, category, total) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id, year_month, type, category) DO UPDATE SET total = total + excluded.total",
+            params,
+        )
+
+    # --- Rollup Bulanan ---
+
+    def get_month_rollup(self, user_id, year_month):
+        rows = self._query(
+            "SELECT year_month, type, category, total FROM monthly_rollups "
+            "WHERE user_id = ? AND year_month = ?",
+            (user_id, year_month),
+        )
+        return self._rows_to_rollups(rows).get(year_month)
+
+    def get_all_rollups(self, user_id):
+        rows = self._query(
+            "SELECT year_month, type, category, total FROM monthly_rollups WHERE user_id = ?", (user_id,)
+        )
+        return self._rows_to_rollups(rows)
+
+    def replace_rollups(self, user_id, rollups):
+        params = []
+        for year_month, rollup in rollups.items():
+            params.append((user_id, year_month, 'Pemasukan', '', rollup['income']))
+            for category, total in rollup['expense_by_category'].items():
+                params.append((user_id, year_month, 'Pengeluaran', category, total))
+        with self.lock, self.conn:
+            # Revisi tidak ditimpa tetapi dinaikkan satu: penggantian rollup juga sebuah perubahan
+            self.conn.execute("DELETE FROM monthly_rollups WHERE user_id = ? AND type != ?", (user_id, REVISION_TYPE))
+            self.conn.executemany(
+                "INSERT INTO monthly_rollups (user_id, year_month, type, category, total) VALUES (?, ?, ?, ?, ?)",
+                params,
+            )
+            self.conn.executemany(
+                "INSERT INTO monthly_rollups (user_id, year_month, type, category, total) VALUES (?, ?, ?, ?, 1) "
+                "ON CONFLICT(user_id, year_month, type, category) DO UPDATE SET total = total + 1",
+                [(user_id, year_month, REVISION_TYPE, '') for year_month in rollups],
+            )
+
+    @staticmethod
+    def _rows_to_rollups(rows):
+        rollups = {}
+        for row in rows:
+            rollup = rollups.setdefault(row['year_month'], empty_rollup())
+            if row['type'] == 'Pemasukan':
+                rollup['income'] += row['total']
+            elif row['type'] == 'Pengeluaran':
+                rollup['expense'] += row['total']
+                rollup['expense_by_category'][row['category']] = row['total']
+            elif row['type'] == REVISION_TYPE:
+                rollup['revision'] = int(row['total'])
+        return rollups
@@ -0,0 +1,618 @@
+"""
+Antrean tulis lokal (write-ahead) di depan backend jarak jauh.
+
+Penulisan transaksi dicatat dulu ke file SQLite lokal lalu langsung kembali; thread latar
+menerapkannya ke backend jarak jauh (Firestore) secara berurutan, dalam batch, dan diulang
+dengan jeda yang makin panjang saat gagal (misal jaringan putus). Entri baru dihapus dari
+antrean setelah berhasil diterapkan, jadi tidak ada yang hilang walau proses berhenti.
+Error sementara (jaringan, timeout, server sibuk) diulang terus; hanya error yang tidak akan
+berhasil walau diulang (data tidak valid, izin ditolak, lihat permanent_errors) yang menandai
+entri gagal. Entri gagal tetap terlihat di pembacaan sampai pengguna mengulang atau membuangnya.
+
+Pengulangan aman karena setiap transaksi baru membawa ID buatan klien (kunci idempoten,
+lihat StorageBackend.save_transactions); update dan delete memang idempoten.
+
+Pembacaan transaksi dan rollup menggabungkan data backend dengan penulisan yang masih antre,
+jadi halaman langsung menampilkan perubahan walau belum tersinkron.
+Penulisan tidak pernah menunggu jaringan: data lama untuk update/delete diambil dari antrean atau
+dari baris yang pernah dibaca lewat backend ini, dan keberadaan kunci baru tidak diperiksa ke backend.
+Yang belum diketahui tetap diantrekan lalu dipastikan oleh thread latar saat diterapkan; jika
+hasilnya berbeda dengan yang sudah diterapkan lokal (misal kunci ternyata sudah ada, atau data lama
+tidak diketahui), listener diberi tahu untuk menyelaraskan ulang (reconcile) data turunannya.
+"""
+import functools
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from storage.base import StorageBackend
+from storage.rollups import apply_to_rollup, empty_rollup, rollup_month
+
+DEFAULT_WRITE_QUEUE_PATH = "eftari_queue.db"
+DRAIN_BATCH_SIZE = 500
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+IDLE_POLL_SECONDS = 5.0 # Memeriksa entri yang ditambahkan proses lain
+KNOWN_ROWS_MAX = 20000
+PAYLOAD_CACHE_MAX = 50000 # Payload antrean yang sudah di-parse (lihat WriteQueue.pending)
+OVERLAY_CACHE_MAX_USERS = 256
+TRANSACTION_FIELDS = ('date', 'description', 'amount', 'type', 'category')
+
+# Error yang tidak akan berhasil walau diulang; selain ini dianggap sementara dan diulang terus
+PERMANENT_ERROR_TYPES = (ValueError, TypeError, KeyError)
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_writes (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT, -- urutan penulisan (diterapkan FIFO)
+    user_id    TEXT NOT NULL,
+    op         TEXT NOT NULL,                     -- 'save', 'update', 'delete'
+    payload    TEXT NOT NULL,                     -- JSON
+    attempts   INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    failed     INTEGER NOT NULL DEFAULT 0,        -- 1 = error permanen, menunggu diulang/dibuang pengguna
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pending_writes_user ON pending_writes (user_id, failed, seq);
+"""
+
+# Method yang langsung diteruskan ke backend jarak jauh (tidak lewat antrean)
+PASSTHROUGH_METHODS = ('list_users', 'set_budget_version', 'get_budget_versions', 'replace_rollups')
+
+# Filter riwayat (lihat StorageBackend.get_transactions_page) untuk baris yang masih antre
+FILTER_CHECKS = {
+    'date_from': lambda row, value: row['date'] >= value,
+    'date_to': lambda row, value: row['date'] <= value,
+    'type': lambda row, value: row['type'] == value,
+    'category': lambda row, value: row['category'] == value,
+    'amount_min': lambda row, value: row['amount'] >= value,
+    'amount_max': lambda row, value: row['amount'] <= value,
+}
+
+
+def matches_filters(row, filters):
+    return all(FILTER_CHECKS[key](row, value) for key, value in filters.items() if value is not None)
+
+
+@functools.lru_cache(maxsize=None)
+def permanent_errors():
+    """Tuple jenis error permanen: PERMANENT_ERROR_TYPES plus error data/izin dari Google API (jika terpasang)."""
+    try:
+        # google-api-core hanya ada bersama Firestore; diimpor di dalam fungsi agar impor modul ini tetap ringan
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return PERMANENT_ERROR_TYPES
+    return PERMANENT_ERROR_TYPES + (google_exceptions.InvalidArgument, google_exceptions.PermissionDenied,
+                                    google_exceptions.FailedPrecondition)
+
+
+class WriteQueue:
+    """Penyimpanan antrean yang tahan restart (satu file SQLite, dipakai bersama antar thread)."""
+
+    def __init__(self, path=DEFAULT_WRITE_QUEUE_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._payloads = {} # seq -> payload yang sudah di-parse (dibaca berulang oleh overlay)
+        with self.lock:
+            if path != ":memory:":
+                self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=FULL") # Entri harus selamat walau listrik mati
+            self.conn.executescript(QUEUE_SCHEMA)
+            self.conn.commit()
+
+    def append(self, user_id, op, payload):
+        text = json.dumps(payload, ensure_ascii=False)
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO pending_writes (user_id, op, payload, created_at) VALUES (?, ?, ?, ?)",
+                (user_id, op, text, time.time()),
+            )
+            self._cache_payload(cursor.lastrowid, json.loads(text))
+        return cursor.lastrowid
+
+    def _cache_payload(self, seq, payload):
+        # Dipanggil dengan self.lock dipegang
+        if len(self._payloads) >= PAYLOAD_CACHE_MAX:
+            self._payloads.clear()
+        self._payloads[seq] = payload
+
+    def pending(self, user_id):
+        """
+        Entri milik pengguna yang belum diterapkan, termasuk yang gagal (tetap terlihat sampai diulang
+        atau dibuang): list (seq, op, payload) urut penulisan. Payload di-parse sekali per entri.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, op FROM pending_writes WHERE user_id = ? ORDER BY seq", (user_id,)
+            ).fetchall()
+            payloads = {row['seq']: self._payloads.get(row['seq']) for row in rows}
+            missing = [seq for seq, payload in payloads.items() if payload is None]
+            for start in range(0, len(missing), 500): # Batas parameter SQLite
+                chunk = missing[start:start + 500]
+                for row in self.conn.execute(
+                    f"SELECT seq, payload FROM pending_writes WHERE seq IN ({', '.join('?' * len(chunk))})", chunk
+                ):
+                    payloads[row['seq']] = json.loads(row['payload'])
+                    self._cache_payload(row['seq'], payloads[row['seq']])
+        return [(row['seq'], row['op'], payloads[row['seq']]) for row in rows]
+
+    def head(self, limit):
+        """Entri tertua (semua pengguna) yang belum diterapkan dan tidak ditandai gagal."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT seq, user_id, op, payload, attempts FROM pending_writes WHERE failed = 0 "
+                "ORDER BY seq LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row, payload=json.loads(row['payload'])) for row in rows]
+
+    def remove(self, seqs):
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM pending_writes WHERE seq = ?", [(seq,) for seq in seqs])
+            for seq in seqs:
+                self._payloads.pop(seq, None)
+
+    def record_failure(self, seqs, error, permanent=False):
+        """Mencatat percobaan yang gagal; permanent=True menandai entri gagal (tidak diulang otomatis)."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pending_writes SET attempts = attempts + 1, last_error = ?, failed = ? WHERE seq = ?",
+                [(error, int(permanent), seq) for seq in seqs],
+            )
+
+    def retry_failed(self, user_id):
+        """Entri gagal milik pengguna diantrekan ulang; mengembalikan jumlahnya."""
+        with self.lock, self.conn:
+            cursor = self.conn.execute(
+                "UPDATE pending_writes SET failed = 0, attempts = 0 WHERE user_id = ? AND failed = 1", (user_id,)
+            )
+        return cursor.rowcount
+
+    def discard_failed(self, user_id):
+        """Menghapus entri gagal milik pengguna; mengembalikan list (op, payload) yang dihapus."""
+        with self.lock, self.conn:
+            rows = self.conn.execute(
+                "SELECT seq, op, payload FROM pending_writes WHERE user_id = ? AND failed = 1 ORDER BY seq",
+                (user_id,),
+            ).fetchall()
+            self.conn.execute("DELETE FROM pending_writes WHERE user_id = ? AND failed = 1", (user_id,))
+            for row in rows:
+                self._payloads.pop(row['seq'], None)
+        return [(row['op'], json.loads(row['payload'])) for row in rows]
+
+    def status(self, user_id):
+        """{'pending': jumlah entri antre, 'failed': jumlah entri gagal, 'last_error': pesan terakhir}."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT SUM(failed = 0) AS pending, SUM(failed = 1) AS failed, "
+                "(SELECT last_error FROM pending_writes WHERE user_id = ? AND last_error IS NOT NULL "
+                " ORDER BY seq DESC LIMIT 1) AS last_error "
+                "FROM pending_writes WHERE user_id = ?",
+                (user_id, user_id),
+            ).fetchone()
+        return {'pending': row['pending'] or 0, 'failed': row['failed'] or 0, 'last_error': row['last_error']}
+
+
+def _passthrough(method_name):
+    def method(self, *args, **kwargs):
+        return getattr(self.remote, method_name)(*args, **kwargs)
+    method.__name__ = method_name
+    method.__doc__ = getattr(StorageBackend, method_name).__doc__
+    return method
+
+
+def _same_transaction(a, b):
+    """True jika dua data transaksi (atau dua None) sama isinya, tanpa membandingkan 'id'."""
+    if a is None or b is None:
+        return a is b
+    return all(a.get(field) == b.get(field) for field in TRANSACTION_FIELDS)
+
+
+def _group_entries(entries):
+    """
+    Entri 'save' berurutan milik pengguna yang sama digabung menjadi satu penulisan batch.
+    Entri yang pernah gagal diterapkan sendiri, agar satu item rusak tidak menggagalkan yang lain.
+    """
+    groups = []
+    for entry in entries:
+        previous = groups[-1][-1] if groups else None
+        if (previous is not None and entry['op'] == 'save' and previous['op'] == 'save'
+                and entry['user_id'] == previous['user_id']
+                and not entry['attempts'] and not previous['attempts']):
+            groups[-1].append(entry)
+        else:
+            groups.append([entry])
+    return groups
+
+
+class QueuedBackend(StorageBackend):
+    """Backend yang menulis lewat antrean lokal dan menyinkronkannya ke backend jarak jauh di latar."""
+
+    name = "queued"
+
+    def __init__(self, remote, path=DEFAULT_WRITE_QUEUE_PATH, start_worker=True):
+        self.remote = remote
+        self.supports_watch = remote.supports_watch
+        self.queue = WriteQueue(path)
+        self.listeners = []
+        self._known_rows = OrderedDict() # (user_id, id) -> baris yang pernah dibaca dari backend
+        self._known_lock = threading.Lock()
+        self._overlays = OrderedDict() # user_id -> (seq entri antrean, rows, changes), lihat _overlay
+        self._overlay_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = None
+        self.failures = 0 # Kegagalan berturut-turut (untuk jeda ulang)
+        if start_worker:
+            self.start()
+
+    def add_listener(self, listener):
+        """
+        listener(user_id, bulan, reconcile) dipanggil setelah entri antrean diterapkan di backend jarak jauh.
+        bulan: set 'YYYY-MM' yang terdampak, atau None jika tidak diketahui (semua bulan).
+        reconcile=True: hasil di backend berbeda dengan yang sudah diterapkan lokal saat menulis
+        (data turunan pengguna perlu dibangun ulang, bukan hanya cache-nya dibuang).
+        """
+        self.listeners.append(listener)
+
+    def sync_status(self, user_id):
+        return self.queue.status(user_id)
+
+    def retry_failed_writes(self, user_id):
+        """Mengantrekan ulang penulisan pengguna yang ditandai gagal; mengembalikan jumlahnya."""
+        count = self.queue.retry_failed(user_id)
+        if count:
+            self._wakeup.set()
+        return count
+
+    def discard_failed_writes(self, user_id):
+        """Membuang penulisan pengguna yang ditandai gagal (hilang juga dari pembacaan); mengembalikan jumlahnya."""
+        entries = self.queue.discard_failed(user_id)
+        if entries:
+            self._notify(user_id, None, reconcile=True)
+        return len(entries)
+
+    # --- Sinkronisasi ---
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="eftari-write-queue", daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _run(self):
+        delay = 0
+        while not self._stopped.is_set():
+            self._wakeup.wait(delay)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.drain()
+                self.failures = 0
+                delay = IDLE_POLL_SECONDS
+            except Exception as e:
+                self.failures += 1
+                delay = min(RETRY_BASE_SECONDS * 2 ** (self.failures - 1), RETRY_MAX_SECONDS)
+                print(f"Sinkronisasi antrean gagal (percobaan ulang dalam {delay:.0f} detik): {e}")
+
+    def drain(self):
+        """
+        Menerapkan antrean ke backend jarak jauh sampai habis; mengembalikan jumlah entri yang diterapkan.
+        Berhenti dan melempar ulang error sementara pada entri pertama yang gagal, jadi urutan tetap
+        terjaga. Entri dengan error permanen ditandai gagal lalu dilewati.
+        """
+        applied = 0
+        with self._drain_lock:
+            while True:
+                entries = self.queue.head(DRAIN_BATCH_SIZE)
+                if not entries:
+                    return applied
+                for group in _group_entries(entries):
+                    seqs = [entry['seq'] for entry in group]
+                    try:
+                        months, reconcile = self._apply(group)
+                    except Exception as e:
+                        permanent = isinstance(e, permanent_errors())
+                        # Grup batch tidak ditandai gagal: entrinya diulang satu per satu dulu (lihat _group_entries)
+                        self.queue.record_failure(seqs, f"{type(e).__name__}: {e}", permanent and len(group) == 1)
+                        if not permanent:
+                            raise
+                        break
+                    self.queue.remove(seqs)
+                    applied += len(group)
+                    self._notify(group[0]['user_id'], months, reconcile)
+
+    def flush(self, timeout=30.0):
+        """Menunggu antrean kosong (atau timeout). Untuk skrip CLI sebelum proses berakhir."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                self.drain()
+                return True
+            except Exception:
+                time.sleep(min(RETRY_BASE_SECONDS, max(0.0, deadline - time.monotonic())))
+        return False
+
+    def _apply(self, group):
+        """
+        Menerapkan satu grup entri; mengembalikan (set bulan yang terdampak, reconcile).
+        reconcile=True jika hasilnya berbeda dengan yang sudah diterapkan lokal saat menulis:
+        ada kunci yang ternyata sudah tersimpan, atau data lama update/delete di backend tidak sama
+        dengan yang dicatat di antrean (tidak diketahui, atau diubah dari tempat lain).
+        """
+        user_id, op = group[0]['user_id'], group[0]['op']
+        if op == 'save':
+            items = [(trx_id, data) for entry in group for trx_id, data in entry['payload']['items']]
+            created = self.remote.save_transactions(user_id, items)
+            return {rollup_month(data) for _, data in items}, len(created) < len(items)
+        payload = group[0]['payload']
+        if op == 'update':
+            old_data = self.remote.update_transaction(user_id, payload['id'], payload['data'])
+            if old_data is not None:
+                self._remember(user_id, [dict(payload['data'], id=payload['id'])])
+            changed = [payload['data']] + ([old_data] if old_data else [])
+            reconcile = not _same_transaction(payload['old'], old_data)
+        else:
+            changed = self.remote.delete_transactions(user_id, payload['ids'])
+            self._forget(user_id, payload['ids'])
+            deleted = {data['id']: data for data in changed if 'id' in data}
+            reconcile = any(not _same_transaction(payload['old'].get(trx_id), deleted.get(trx_id))
+                            for trx_id in payload['ids'])
+        return {rollup_month(data) for data in changed}, reconcile
+
+    def _notify(self, user_id, months, reconcile=False):
+        for listener in self.listeners:
+            try:
+                listener(user_id, months, reconcile)
+            except Exception as e:
+                print(f"Listener antrean gagal: {e}")
+
+    def _enqueue(self, user_id, op, payload):
+        self.queue.append(user_id, op, payload)
+        self._wakeup.set()
+
+    # --- Penulisan (lewat antrean) ---
+
+    def add_transaction(self, user_id, data):
+        return self.add_transactions(user_id, [data])[0]
+
+    def add_transactions(self, user_id, data_list):
+        items = [(uuid.uuid4().hex, data) for data in data_list]
+        if items:
+            self._enqueue(user_id, 'save', {'items': items})
+        return [trx_id for trx_id, _ in items]
+
+    def save_transactions(self, user_id, items):
+        created, pending = self.save_transactions_checked(user_id, items)
+        return created | pending
+
+    def save_transactions_checked(self, user_id, items):
+        """
+        Seperti save_transactions, tetapi mengembalikan (created, pending) tanpa membaca backend:
+        created = kunci yang pasti baru (dihapus lebih dulu di antrean), pending = kunci yang tidak
+        dikenal secara lokal. Keduanya diantrekan; kunci yang masih antre atau pernah dibaca dari
+        backend adalah duplikat. Jika kunci pending ternyata sudah ada, listener diberi tahu dengan
+        reconcile=True saat tersinkron (lihat _apply).
+        """
+        rows, _ = self._overlay(user_id)
+        with self._known_lock:
+            # Kunci yang masih antre atau sudah pernah dibaca = duplikat; yang dihapus di antrean boleh disimpan lagi
+            new_items = [(trx_id, data) for trx_id, data in items
+                         if rows.get(trx_id) is None and (trx_id in rows or (user_id, trx_id) not in self._known_rows)]
+        if new_items:
+            self._enqueue(user_id, 'save', {'items': new_items})
+        created = {trx_id for trx_id, _ in new_items if trx_id in rows}
+        return created, {trx_id for trx_id, _ in new_items} - created
+
+    def update_transaction(self, user_id, trx_id, data):
+        old, unknown = self._old_rows(user_id, [trx_id])
+        old_data = old[trx_id]
+        if old_data is None and not unknown:
+            return None # Sudah dihapus di antrean
+        self._enqueue(user_id, 'update', {'id': trx_id, 'data': data, 'old': old_data})
+        if unknown:
+            self._notify(user_id, None, reconcile=True)
+        return old_data
+
+    def delete_transaction(self, user_id, trx_id):
+        deleted = self.delete_transactions(user_id, [trx_id])
+        return deleted[0] if deleted else None
+
+    def delete_transactions(self, user_id, trx_ids):
+        old, unknown = self._old_rows(user_id, trx_ids)
+        targets = {trx_id: data for trx_id, data in old.items() if data is not None or trx_id in unknown}
+        if targets:
+            self._enqueue(user_id, 'delete', {'ids': list(targets), 'old': targets})
+        if unknown:
+            self._notify(user_id, None, reconcile=True)
+        return [data for data in targets.values() if data is not None]
+
+    # --- Penggabungan antrean dengan data backend ---
+
+    def _remember(self, user_id, rows):
+        with self._known_lock:
+            for row in rows:
+                self._known_rows[(user_id, row['id'])] = row
+                self._known_rows.move_to_end((user_id, row['id']))
+            while len(self._known_rows) > KNOWN_ROWS_MAX:
+                self._known_rows.popitem(last=False)
+        return rows
+
+    def _forget(self, user_id, trx_ids):
+        with self._known_lock:
+            for trx_id in trx_ids:
+                self._known_rows.pop((user_id, trx_id), None)
+
+    def _old_rows(self, user_id, trx_ids):
+        """
+        Data transaksi saat ini dari antrean atau dari baris yang pernah dibaca (tanpa membaca backend).
+        Mengembalikan ({id: data, atau None jika dihapus/tidak dikenal}, set ID yang tidak dikenal;
+        data lamanya dipastikan thread latar saat entri diterapkan, lihat _apply).
+        """
+        rows, _ = self._overlay(user_id)
+        old, unknown = {}, set()
+        with self._known_lock:
+            for trx_id in trx_ids:
+                if trx_id in rows:
+                    old[trx_id] = rows[trx_id]
+                elif (user_id, trx_id) in self._known_rows:
+                    old[trx_id] = self._known_rows[(user_id, trx_id)]
+                else:
+                    old[trx_id] = None
+                    unknown.add(trx_id)
+        return old, unknown
+
+    def _overlay(self, user_id):
+        """
+        Efek antrean pengguna: (rows, changes), disimpan per pengguna selama isi antreannya sama.
+        rows: {id: baris terbaru, atau None jika dihapus}; changes: [(data, +1/-1)] untuk rollup.
+        Keduanya dipakai bersama: jangan diubah oleh pemanggil.
+        """
+        entries = self.queue.pending(user_id)
+        seqs = tuple(seq for seq, _, _ in entries)
+        with self._overlay_lock:
+            cached = self._overlays.get(user_id)
+            if cached is not None and cached[0] == seqs:
+                self._overlays.move_to_end(user_id)
+                return cached[1], cached[2]
+
+        rows, changes = {}, []
+        for _, op, payload in entries:
+            if op == 'save':
+                for trx_id, data in payload['items']:
+                    if rows.get(trx_id) is None:
+                        rows[trx_id] = dict(data, id=trx_id)
+                        changes.append((data, 1))
+            elif op == 'update':
+                trx_id = payload['id']
+                if trx_id in rows and rows[trx_id] is None:
+                    continue # Sudah dihapus lebih dulu di antrean
+                old_data = rows[trx_id] if trx_id in rows else payload['old']
+                rows[trx_id] = dict(payload['data'], id=trx_id)
+                if old_data is not None:
+                    changes += [(old_data, -1), (payload['data'], 1)]
+            elif op == 'delete':
+                for trx_id in payload['ids']:
+                    old_data = rows[trx_id] if trx_id in rows else payload['old'].get(trx_id)
+                    rows[trx_id] = None
+                    if old_data is not None:
+                        changes.append((old_data, -1))
+        with self._overlay_lock:
+            self._overlays[user_id] = (seqs, rows, changes)
+            self._overlays.move_to_end(user_id)
+            while len(self._overlays) > OVERLAY_CACHE_MAX_USERS:
+                self._overlays.popitem(last=False)
+        return rows, changes
+
+    def _merge_rows(self, user_id, remote_rows, keep, rows=None):
+        """Baris backend yang tidak disentuh antrean + salinan baris antrean yang lolos keep(row)."""
+        if rows is None:
+            rows, _ = self._overlay(user_id)
+        self._remember(user_id, remote_rows)
+        merged = [row for row in remote_rows if row['id'] not in rows]
+        merged += [dict(row) for row in rows.values() if row is not None and keep(row)]
+        return merged
+
+    def _merge_rollup(self, rollup, changes):
+        if not changes:
+            return rollup
+        merged = empty_rollup() if rollup is None else dict(rollup, expense_by_category=dict(rollup['expense_by_category']))
+        for data, sign in changes:
+            apply_to_rollup(merged, data, sign)
+        return merged
+
+    # --- Pembacaan (backend + antrean) ---
+
+    def get_all_transactions(self, user_id):
+        merged = self._merge_rows(user_id, self.remote.get_all_transactions(user_id), lambda row: True)
+        merged.sort(key=lambda row: row['date'], reverse=True)
+        return merged
+
+    def get_transactions_by_ids(self, user_id, trx_ids):
+        rows, _ = self._overlay(user_id)
+        trx_ids = list(dict.fromkeys(trx_ids))
+        remote_ids = [trx_id for trx_id in trx_ids if trx_id not in rows]
+        found = self._remember(user_id, self.remote.get_transactions_by_ids(user_id, remote_ids)) if remote_ids else []
+        return found + [dict(rows[trx_id]) for trx_id in trx_ids if rows.get(trx_id) is not None]
+
+    def watch_transactions_between(self, user_id, start_date, end_date, callback):
+        """
+        Langganan ke backend jarak jauh, digabung dengan antrean: data awal ikut berisi penulisan yang
+        masih antre, dan perubahan dari backend untuk transaksi yang masih antre diganti versi antreannya.
+        """
+        initial = [True]
+
+        def merged(changes):
+            rows, _ = self._overlay(user_id)
+            result = []
+            for kind, row in changes:
+                if row['id'] not in rows:
+                    result.append((kind, row))
+                elif rows[row['id']] is None:
+                    result.append(('removed', row))
+                else:
+                    result.append(('modified', dict(rows[row['id']])))
+            if initial[0]:
+                initial[0] = False
+                seen = {row['id'] for _, row in changes}
+                result += [('added', dict(row)) for trx_id, row in rows.items()
+                           if row is not None and trx_id not in seen and start_date <= row['date'] <= end_date]
+            callback(result)
+
+        return self.remote.watch_transactions_between(user_id, start_date, end_date, merged)
+
+    def get_transactions_between(self, user_id, start_date, end_date):
+        return self._merge_rows(
+            user_id, self.remote.get_transactions_between(user_id, start_date, end_date),
+            lambda row: start_date <= row['date'] <= end_date
+        )
+
+    def get_transactions_page(self, user_id, filters, after, page_size):
+        rows, _ = self._overlay(user_id)
+        # Ambil lebih banyak sebanyak baris antrean: baris backend yang diubah/dihapus di antrean dibuang
+        remote_rows = self.remote.get_transactions_page(user_id, filters, after, page_size + len(rows))
+        merged = self._merge_rows(
+            user_id, remote_rows,
+            lambda row: matches_filters(row, filters) and (after is None or (row['date'], row['id']) < tuple(after)),
+            rows
+        )
+        merged.sort(key=lambda row: (row['date'], row['id']), reverse=True)
+        return merged[:page_size]
+
+    def get_summary_between(self, user_id, start_date, end_date, categories=()):
+        _, changes = self._overlay(user_id)
+        summary = self.remote.get_summary_between(user_id, start_date, end_date, categories)
+        return self._merge_rollup(
+            summary, [(data, sign) for data, sign in changes if start_date <= data['date'] <= end_date]
+        )
+
+    def get_month_rollup(self, user_id, year_month):
+        _, changes = self._overlay(user_id)
+        rollup = self.remote.get_month_rollup(user_id, year_month)
+        return self._merge_rollup(rollup, [(data, sign) for data, sign in changes if rollup_month(data) == year_month])
+
+    def get_all_rollups(self, user_id):
+        _, changes = self._overlay(user_id)
+        rollups = self.remote.get_all_rollups(user_id)
+        by_month = {}
+        for data, sign in changes:
+            by_month.setdefault(rollup_month(data), []).append((data, sign))
+        for year_month, month_changes in by_month.items():
+            rollups[year_month] = self._merge_rollup(rollups.get(year_month), month_changes)
+        return rollups
+
+
+for _method_name in PASSTHROUGH_METHODS:
+    setattr(QueuedBackend, _method_name, _passthrough(_method_name))
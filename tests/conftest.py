@@ -0,0 +1,36 @@
+"""
+Fixture bersama untuk pengujian. Modul aplikasi ada di akar repo (bukan paket), jadi akar repo
+ditambahkan ke sys.path. Semua pengujian memakai backend SQLite di direktori sementara.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage.sqlite_backend import SQLiteBackend  # noqa: E402
+
+
+def transaction(date='2026-10-05', description='kopi susu', amount=20000.0, type='Pengeluaran', category='Makanan'):
+    return {'date': date, 'description': description, 'amount': amount, 'type': type, 'category': category}
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return SQLiteBackend(path=str(tmp_path / "eftari.db"))
+
+
+@pytest.fixture
+def db(backend, tmp_path, monkeypatch):
+    """Modul database dengan backend SQLite sementara; snapshot analitik dan indeks pencarian di tmp_path."""
+    import database
+
+    monkeypatch.setattr(database, 'ANALYTICS_DIR', str(tmp_path / "analytics"))
+    monkeypatch.setattr(database, 'SEARCH_DIR', str(tmp_path / "search_index"))
+    monkeypatch.setattr(database, '_backend', database._backend) # Dikembalikan setelah pengujian
+    database.set_backend(backend)
+    yield database
+    database.reset_live_views()
+    database.reset_analytics_snapshots()
+    database.cache.clear()
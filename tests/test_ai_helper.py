@@ -0,0 +1,62 @@
+"""Model AI yang dipakai ulang dan cache hasil parsing (lihat ai_helper.py), dengan LocalStubModel."""
+import itertools
+
+import pytest
+
+import ai_helper
+import ai_resilience
+
+CATEGORIES = ['Makanan', 'Transportasi', 'Gaji']
+PARSED = {'description': 'kopi', 'amount': 20000, 'type': 'Pengeluaran', 'category': 'Makanan'}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """LocalStubModel sebagai model aktif, cache parsing di memori, dan caller tanpa jeda retry."""
+    model = ai_helper.LocalStubModel(lambda prompt: PARSED)
+    old_model = ai_helper.set_model(model)
+    monkeypatch.setattr(ai_helper, '_parse_cache', ai_helper.ParseCache(':memory:'))
+    monkeypatch.setattr(ai_resilience, '_caller',
+                        ai_resilience.ResilientCaller(timeout=2, sleep=lambda seconds: None))
+    yield model
+    ai_helper.set_model(old_model)
+
+
+def test_model_is_reused(stub):
+    assert ai_helper.get_model() is stub
+    assert ai_helper.get_model() is stub
+
+
+def test_parse_result_is_cached(stub):
+    assert ai_helper.parse_transaction_with_ai("Kopi  20rb", CATEGORIES) == PARSED
+    # Input yang hanya beda spasi/huruf besar memakai hasil cache, model tidak dipanggil lagi
+    assert ai_helper.parse_transaction_with_ai("kopi 20rb ", CATEGORIES) == PARSED
+    assert stub.calls == 1
+    assert ai_helper.get_parse_cache().stats() == {'entries': 1, 'hits': 1, 'misses': 1}
+
+
+def test_category_change_invalidates_cache(stub):
+    ai_helper.parse_transaction_with_ai("kopi 20rb", CATEGORIES)
+    ai_helper.parse_transaction_with_ai("kopi 20rb", CATEGORIES + ['Hiburan'])
+    assert stub.calls == 2
+
+
+def test_invalid_model_output_is_not_cached(stub):
+    stub.responder = lambda prompt: "bukan json"
+    assert ai_helper.parse_transaction_with_ai("kopi 20rb", CATEGORIES) is None
+    assert ai_helper.get_parse_cache().stats()['entries'] == 0
+
+
+def test_parse_cache_evicts_least_recently_used(monkeypatch):
+    # Waktu pemakaian dibuat selalu naik agar urutan LRU tidak bergantung resolusi jam
+    clock = itertools.count(1)
+    monkeypatch.setattr(ai_helper.time, 'time', lambda: float(next(clock)))
+    cache = ai_helper.ParseCache(':memory:', max_entries=2)
+    cache.put("a", CATEGORIES, {'n': 1})
+    cache.put("b", CATEGORIES, {'n': 2})
+    assert cache.get("a", CATEGORIES) == {'n': 1} # "a" jadi yang terbaru dipakai
+    cache.put("c", CATEGORIES, {'n': 3})
+    assert cache.get("b", CATEGORIES) is None
+    assert cache.get("a", CATEGORIES) == {'n': 1}
+    assert cache.get("c", CATEGORIES) == {'n': 3}
+    assert cache.stats()['entries'] == 2
@@ -0,0 +1,130 @@
+"""Timeout, retry, batas konkurensi, dan circuit breaker ResilientCaller (lihat ai_resilience.py)."""
+import threading
+
+import pytest
+
+import ai_helper
+import ai_resilience
+from ai_resilience import AIBusyError, CircuitBreaker, CircuitOpenError, ResilientCaller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def stub_model(errors=None, latency=0.0):
+    return ai_helper.LocalStubModel(lambda prompt: {'ok': True}, latency=latency, errors=errors)
+
+
+def caller(**kwargs):
+    kwargs.setdefault('timeout', 2)
+    kwargs.setdefault('sleep', lambda seconds: None)
+    return ResilientCaller(**kwargs)
+
+
+def test_transient_error_is_retried():
+    model = stub_model(errors=[ConnectionError("putus"), None])
+    response = caller(max_retries=2).call(model.generate_content, "prompt")
+    assert response.text == '{"ok": true}'
+    assert model.calls == 2
+
+
+def test_last_transient_error_keeps_its_type_and_message():
+    model = stub_model(errors=[ConnectionError("putus")] * 3)
+    with pytest.raises(ConnectionError, match="putus"):
+        caller(max_retries=2).call(model.generate_content, "prompt")
+    assert model.calls == 3
+
+
+def test_non_transient_error_is_not_retried():
+    model = stub_model(errors=[ValueError("API key salah")])
+    with pytest.raises(ValueError):
+        caller(max_retries=2).call(model.generate_content, "prompt")
+    assert model.calls == 1
+
+
+def test_slow_call_times_out():
+    model = stub_model(latency=0.5)
+    with pytest.raises(TimeoutError):
+        caller(timeout=0.05, max_retries=0).call(model.generate_content, "prompt")
+
+
+def test_breaker_opens_then_allows_one_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=clock)
+    ai_caller = caller(max_retries=0, breaker=breaker)
+    failing = stub_model(errors=[ConnectionError()] * 2)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            ai_caller.call(failing.generate_content, "prompt")
+    assert breaker.state == 'open'
+
+    healthy = stub_model()
+    with pytest.raises(CircuitOpenError):
+        ai_caller.call(healthy.generate_content, "prompt")
+    assert healthy.calls == 0 # Ditolak tanpa memanggil upstream
+
+    clock.now = 31
+    assert breaker.state == 'half-open'
+    ai_caller.call(healthy.generate_content, "prompt")
+    assert breaker.state == 'closed'
+
+
+def test_failed_trial_reopens_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 31
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call() # Hanya satu percobaan dalam satu waktu
+    breaker.record_failure()
+    assert breaker.state == 'open'
+
+
+def test_full_local_queue_is_not_an_upstream_failure():
+    breaker = CircuitBreaker(failure_threshold=1)
+    ai_caller = caller(max_concurrency=1, timeout=0.05, max_retries=0, breaker=breaker)
+    release = threading.Event()
+    ai_caller.submit(release.wait) # Memegang satu-satunya slot
+    try:
+        with pytest.raises(AIBusyError):
+            ai_caller.call(stub_model().generate_content, "prompt")
+        assert breaker.state == 'closed'
+        assert breaker.failures == 0
+    finally:
+        release.set()
+
+
+def test_concurrency_is_limited():
+    ai_caller = caller(max_concurrency=2, max_retries=0)
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.05)
+        with lock:
+            running[0] -= 1
+        return True
+
+    threads = [threading.Thread(target=ai_caller.call, args=(work,)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] <= 2
+
+
+def test_shared_caller_can_be_replaced(monkeypatch):
+    monkeypatch.setattr(ai_resilience, '_caller', None)
+    shared = ai_resilience.get_caller()
+    assert ai_resilience.get_caller() is shared
+    replacement = caller()
+    ai_resilience.set_caller(replacement)
+    assert ai_resilience.get_caller() is replacement
@@ -0,0 +1,87 @@
+"""Anggaran berversi per bulan berlaku (lihat budgets.py) dan migrasi tabel anggaran lama."""
+import sqlite3
+
+from budgets import BudgetHistory
+from storage import BUDGET_BASE_MONTH
+from storage.sqlite_backend import SQLiteBackend
+
+
+def version(category, effective_month, amount):
+    return {'category': category, 'effective_month': effective_month, 'amount': amount}
+
+
+def test_month_before_first_version_has_no_budget():
+    history = BudgetHistory([version('Makanan', '2026-03', 1_000_000)])
+    assert history.amount_for('Makanan', '2026-02') is None
+    assert history.amount_for('Makanan', '2026-03') == 1_000_000
+    assert history.amount_for('Makanan', '2027-01') == 1_000_000
+    assert history.amount_for('Transportasi', '2026-03') is None
+    assert history.budgets_for_month('2026-02') == []
+
+
+def test_null_amount_ends_budget():
+    history = BudgetHistory([
+        version('Hiburan', '2026-01', 300_000), version('Hiburan', '2026-05', None),
+        version('Hiburan', '2026-09', 200_000),
+    ])
+    assert history.amount_for('Hiburan', '2026-04') == 300_000
+    assert history.amount_for('Hiburan', '2026-05') is None
+    assert history.amount_for('Hiburan', '2026-08') is None
+    assert history.amount_for('Hiburan', '2026-09') == 200_000 # Dimulai lagi
+
+
+def test_later_version_overrides_earlier():
+    # Urutan masukan tidak menentukan; versi bulan yang sama ditimpa yang terakhir
+    history = BudgetHistory([
+        version('Makanan', '2026-06', 1_500_000), version('Makanan', BUDGET_BASE_MONTH, 1_000_000),
+        version('Transportasi', '2026-02', 400_000), version('Transportasi', '2026-02', 500_000),
+    ])
+    assert history.amount_for('Makanan', '2026-05') == 1_000_000
+    assert history.amount_for('Makanan', '2026-06') == 1_500_000
+    assert history.budgets_for_month('2026-06') == [
+        {'category': 'Makanan', 'amount': 1_500_000}, {'category': 'Transportasi', 'amount': 500_000},
+    ]
+    assert history.versions('Makanan') == [
+        {'effective_month': BUDGET_BASE_MONTH, 'amount': 1_000_000},
+        {'effective_month': '2026-06', 'amount': 1_500_000},
+    ]
+    assert BudgetHistory.describe_month(BUDGET_BASE_MONTH) == "sejak awal"
+
+
+def test_database_budgets_for_month(db):
+    db.add_budget('budi', 'makanan ', 1_000_000, effective_month='2026-01')
+    db.add_budget('budi', 'Makanan', 1_200_000, effective_month='2026-07')
+    db.add_budget('budi', 'Hiburan', 300_000, effective_month='2026-03')
+    db.delete_budget_by_category('budi', 'hiburan', effective_month='2026-06')
+
+    assert db.get_budgets_for_month('budi', '2025-12') == []
+    assert db.get_budgets_for_month('budi', '2026-03') == [
+        {'category': 'Makanan', 'amount': 1_000_000}, {'category': 'Hiburan', 'amount': 300_000},
+    ]
+    assert db.get_budgets_for_month('budi', '2026-06') == [{'category': 'Makanan', 'amount': 1_000_000}]
+    assert db.get_budgets_for_month('budi', '2026-07') == [{'category': 'Makanan', 'amount': 1_200_000}]
+    assert db.get_budgets_for_month('ani', '2026-07') == []
+
+
+def test_legacy_budgets_table_is_migrated(tmp_path):
+    path = str(tmp_path / "lama.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE transactions (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, date TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '', amount REAL NOT NULL, type TEXT NOT NULL, category TEXT NOT NULL);
+        CREATE TABLE budgets (user_id TEXT NOT NULL, category TEXT NOT NULL, amount REAL NOT NULL,
+            PRIMARY KEY (user_id, category));
+        INSERT INTO budgets VALUES ('budi', 'Makanan', 1000000), ('ani', 'Tagihan', 500000);
+    """)
+    conn.close()
+
+    backend = SQLiteBackend(path=path)
+    # Anggaran lama berlaku untuk semua bulan
+    history = BudgetHistory(backend.get_budget_versions('budi'))
+    assert history.versions('Makanan') == [{'effective_month': BUDGET_BASE_MONTH, 'amount': 1_000_000}]
+    assert history.amount_for('Makanan', '2019-01') == 1_000_000
+    assert BudgetHistory(backend.get_budget_versions('ani')).budgets_for_month('2026-10') == [
+        {'category': 'Tagihan', 'amount': 500_000},
+    ]
+    tables = {row['name'] for row in backend.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'budgets' not in tables and 'legacy_budgets' not in tables
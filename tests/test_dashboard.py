@@ -0,0 +1,68 @@
+"""Perhitungan dasbor (lihat dashboard.py): ringkasan dari transaksi mentah dan status anggaran."""
+import pandas as pd
+import pytest
+
+import dashboard
+from benchmarks.bench_dashboard import BUDGETS, legacy_dashboard, synthetic_transactions
+
+
+def frame(rows):
+    return pd.DataFrame.from_records(rows, columns=['type', 'category', 'amount'])
+
+
+def test_summary_totals_and_order():
+    summary = dashboard.summarize_transactions(frame([
+        ('Pemasukan', 'Gaji', 5_000_000), ('Pengeluaran', 'Makanan', 20_000),
+        ('Pengeluaran', 'Transportasi', 50_000), ('Pengeluaran', 'Makanan', 15_000),
+        ('Pemasukan', 'Bonus', 250_000),
+    ]))
+    assert summary['income'] == 5_250_000
+    assert summary['expense'] == 85_000
+    # Urut dari pengeluaran terbesar
+    assert list(summary['expense_by_category'].items()) == [('Transportasi', 50_000), ('Makanan', 35_000)]
+
+
+def test_summary_of_empty_and_income_only():
+    assert dashboard.summarize_transactions(frame([]))['expense_by_category'] == {}
+    summary = dashboard.summarize_transactions(frame([('Pemasukan', 'Gaji', 1000)]))
+    assert (summary['income'], summary['expense'], summary['expense_by_category']) == (1000, 0, {})
+
+
+def test_summary_hash_follows_content():
+    a = dashboard.make_summary(100, 50, {'Makanan': 30, 'Transportasi': 20})
+    b = dashboard.make_summary(100, 50, {'Transportasi': 20, 'Makanan': 30})
+    c = dashboard.make_summary(100, 50, {'Makanan': 31, 'Transportasi': 19})
+    assert a['hash'] == b['hash'] != c['hash']
+
+
+def test_summary_matches_legacy_computation():
+    df_transactions = synthetic_transactions(5000)
+    income, expense, chart, _ = legacy_dashboard(df_transactions, BUDGETS)
+    summary = dashboard.summarize_transactions(df_transactions)
+    assert summary['income'] == pytest.approx(income)
+    assert summary['expense'] == pytest.approx(expense)
+    assert summary['expense_by_category'] == pytest.approx(dict(zip(chart['category'], chart['amount'])))
+
+
+def test_budget_status_clips_progress_and_over_budget():
+    summary = dashboard.make_summary(0, 0, {'Makanan': 150_000, 'Transportasi': 50_000, 'Hiburan': -10_000})
+    budgets = [
+        {'category': 'Makanan', 'amount': 100_000},       # Lewat anggaran
+        {'category': 'Transportasi', 'amount': 200_000},  # Masih di bawah
+        {'category': 'Tagihan', 'amount': 300_000},       # Belum ada pengeluaran
+        {'category': 'Hiburan', 'amount': 50_000},        # Total negatif (refund)
+        {'category': 'Kesehatan', 'amount': 0},           # Anggaran 0: tanpa persentase
+    ]
+    status = dashboard.budget_status_frame(summary, budgets).set_index('category')
+    assert list(status.columns) == dashboard.BUDGET_STATUS_COLUMNS[1:]
+    assert status.loc['Makanan', ['percent_spent', 'progress', 'over_budget']].tolist() == [150, 100, 50_000]
+    assert status.loc['Transportasi', ['percent_spent', 'progress', 'over_budget']].tolist() == [25, 25, 0]
+    assert status.loc['Tagihan', ['actual_spending', 'progress', 'over_budget']].tolist() == [0, 0, 0]
+    assert status.loc['Hiburan', ['percent_spent', 'progress', 'over_budget']].tolist() == [-20, 0, 0]
+    assert status.loc['Kesehatan', ['percent_spent', 'progress', 'over_budget']].tolist() == [0, 0, 0]
+
+
+def test_budget_status_without_budgets():
+    status = dashboard.budget_status_frame(dashboard.make_summary(0, 0, {}), [])
+    assert status.empty
+    assert list(status.columns) == dashboard.BUDGET_STATUS_COLUMNS
@@ -0,0 +1,17 @@
+"""
+Benchmark perhitungan dasbor dengan plugin pytest-benchmark (dilewati jika plugin tidak terpasang).
+Versi CLI dengan pembanding cara lama: python -m benchmarks.bench_dashboard
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.bench_dashboard import BUDGETS, synthetic_transactions, vectorized_dashboard  # noqa: E402
+
+
+@pytest.mark.parametrize('rows', [10_000, 100_000, 1_000_000])
+def test_dashboard_benchmark(benchmark, rows):
+    df_transactions = synthetic_transactions(rows)
+    summary, status = benchmark(vectorized_dashboard, df_transactions, BUDGETS)
+    assert summary['expense'] + summary['income'] == pytest.approx(df_transactions['amount'].sum())
+    assert len(status) == len(BUDGETS)
@@ -0,0 +1,108 @@
+"""Proyeksi akhir bulan (lihat forecast.py) pada bulan sintetis kecil, dan pembaruan model di database."""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import forecast
+from conftest import transaction
+
+BUDGETS = [{'category': 'Makanan', 'amount': 300_000}, {'category': 'Hiburan', 'amount': 50_000},
+           {'category': 'Transportasi', 'amount': 100_000}]
+
+
+def october(*extra):
+    """Oktober 2026 (31 hari): makan 10rb/hari tanggal 1-10 dan satu makan terjadwal tanggal 20."""
+    rows = [transaction(date=f'2026-10-{day:02d}', amount=10_000) for day in range(1, 11)]
+    rows.append(transaction(date='2026-10-20', amount=50_000))
+    rows.append(transaction(date='2026-10-03', amount=9_000_000, type='Pemasukan', category='Gaji')) # Diabaikan
+    return rows + list(extra)
+
+
+def project(rows, as_of_day=10, **kwargs):
+    model = forecast.MonthForecast.from_transactions('2026-10', rows, **kwargs)
+    return model.project(BUDGETS, as_of_day=as_of_day).set_index('category')
+
+
+def test_steady_spending_projection():
+    row = project(october()).loc['Makanan']
+    assert row['spent'] == 100_000 # Hanya hari yang sudah lewat
+    assert row['daily_rate'] == 10_000
+    # Laju x 21 sisa hari lebih besar dari transaksi terjadwal, jadi yang terjadwal tidak ditambahkan lagi
+    assert row['projected'] == 310_000
+    assert row['projected_low'] == row['projected_high'] == 310_000 # Tanpa varians
+    assert row['projected_overrun'] == 10_000
+    assert row['overrun_probability'] == 1.0
+    assert row['status'] == forecast.STATUS_PROJECTED_OVER
+    # Sisa anggaran 200rb / 10rb per hari = 20 hari setelah tanggal 10
+    assert row['runout_date'] == row['runout_earliest'] == row['runout_latest'] == pd.Timestamp('2026-10-30')
+
+
+def test_interval_from_daily_variance():
+    rows = [transaction(date=f'2026-10-{day:02d}', amount=5_000 if day % 2 else 15_000) for day in range(1, 11)]
+    row = project(rows).loc['Makanan']
+    variance = np.var([5_000, 15_000] * 5, ddof=1)
+    std = math.sqrt(21 * variance + 21 ** 2 * variance / 10)
+    z = 1.6448536269514722 # Keyakinan 90%
+    assert row['projected'] == 310_000
+    assert row['projected_low'] == pytest.approx(310_000 - z * std)
+    assert row['projected_high'] == pytest.approx(310_000 + z * std)
+    assert 0.5 < row['overrun_probability'] < 1.0
+    assert row['runout_earliest'] < row['runout_date'] == pd.Timestamp('2026-10-30')
+    assert pd.isna(row['runout_latest']) # Paling lambat baru habis setelah bulan ini
+
+
+def test_scheduled_transactions_are_a_floor():
+    row = project(october(transaction(date='2026-10-25', amount=150_000, category='Transportasi'))).loc['Transportasi']
+    assert (row['spent'], row['daily_rate'], row['projected']) == (0, 0, 150_000)
+    assert row['status'] == forecast.STATUS_PROJECTED_OVER
+    assert pd.isna(row['runout_date']) # Tanpa laju harian, tanggal habis tidak diperkirakan
+
+
+def test_run_out_date_when_already_over_budget():
+    rows = october(transaction(date='2026-10-02', amount=30_000, category='Hiburan'),
+                   transaction(date='2026-10-05', amount=30_000, category='Hiburan'))
+    row = project(rows).loc['Hiburan']
+    assert row['status'] == forecast.STATUS_OVER
+    assert row['runout_date'] == row['runout_earliest'] == pd.Timestamp('2026-10-05')
+
+
+def test_unbudgeted_category_and_month_end():
+    df_forecast = project(october(transaction(date='2026-10-04', amount=20_000, category='Kesehatan')), as_of_day=None)
+    row = df_forecast.loc['Kesehatan']
+    assert row['status'] == forecast.STATUS_NO_BUDGET
+    assert pd.isna(row['overrun_probability'])
+    # Akhir bulan: proyeksi = yang sudah terpakai
+    assert df_forecast.loc['Makanan', 'projected'] == df_forecast.loc['Makanan', 'spent'] == 150_000
+    assert list(df_forecast.index[:3]) == ['Makanan', 'Hiburan', 'Transportasi'] # Beranggaran dulu
+
+
+def test_history_is_blended_with_current_month():
+    history = {'start': '2026-04', 'days': 183, 'stats': {'Makanan': [17_000, 0.0]}}
+    row = project(october(), history_state=history).loc['Makanan']
+    rate = 10 / 17 * 10_000 + 7 / 17 * 17_000 # Bobot bulan ini d / (d + PRIOR_DAYS)
+    assert row['daily_rate'] == pytest.approx(rate)
+    assert row['projected'] == pytest.approx(100_000 + 21 * rate)
+
+
+def test_model_is_updated_in_place(db):
+    db.save_transactions('budi', [dict(transaction(date='2026-09-10', amount=40_000), key='lalu')])
+    db.save_transactions('budi', [dict(transaction(date='2026-10-01', amount=10_000), key='a')])
+    model = db.get_month_forecast('budi', '2026-10')
+    assert model.history_months() == {'2026-09'}
+
+    db.save_transactions('budi', [dict(transaction(date='2026-10-02', amount=5_000), key='b')])
+    db.update_transaction('budi', 'a', '2026-10-01', 'kopi susu', 12_000, 'Pengeluaran', 'Makanan')
+    assert db.get_month_forecast('budi', '2026-10') is model # Diperbarui, tidak dibangun ulang
+    assert sum(model.daily['Makanan']) == 17_000
+
+    db.delete_transaction_by_id('budi', 'b')
+    assert db.get_month_forecast('budi', '2026-10') is model
+    assert sum(model.daily['Makanan']) == 12_000
+
+    # Penulisan ke bulan riwayat membuat model usang
+    db.save_transactions('budi', [dict(transaction(date='2026-09-11', amount=1_000), key='c')])
+    rebuilt = db.get_month_forecast('budi', '2026-10')
+    assert rebuilt is not model
+    assert sum(rebuilt.daily['Makanan']) == 12_000
@@ -0,0 +1,131 @@
+"""View bulanan realtime (lihat live_views.py) di atas backend SQLite, termasuk lewat antrean tulis."""
+import time
+
+import pytest
+
+import live_views
+from conftest import transaction
+from live_views import LiveViewManager, MonthView
+from storage.write_queue import QueuedBackend
+
+
+def month_range(year_month):
+    return f"{year_month}-01", f"{year_month}-31"
+
+
+class SilentBackend:
+    """Backend yang tidak pernah mengirim data awal (misal offline)."""
+
+    def __init__(self):
+        self.subscriptions = 0
+
+    def watch_transactions_between(self, user_id, start_date, end_date, callback):
+        self.subscriptions += 1
+        return lambda: None
+
+
+def test_month_view_applies_deltas():
+    view = MonthView('budi', '2026-10')
+    row = dict(transaction(amount=20000), id='a')
+    view.apply([('added', row)])
+    view.apply([('added', row)]) # Perubahan yang sama dua kali tidak terhitung ganda
+    assert view.summary()['expense'] == 20000
+
+    view.apply([('modified', dict(row, amount=5000))])
+    assert view.summary()['expense_by_category'] == {'Makanan': 5000}
+    view.apply([('modified', dict(row, date='2026-11-01'))]) # Pindah bulan = keluar dari view
+    assert view.transactions() == []
+    assert view.summary()['expense'] == 0
+
+
+def test_view_follows_backend_writes(backend):
+    backend.add_transaction('budi', transaction(amount=20000))
+    manager = LiveViewManager(backend, month_range)
+    view = manager.get('budi', '2026-10')
+    assert view.summary()['expense'] == 20000
+
+    trx_id = backend.add_transaction('budi', transaction(amount=5000))
+    backend.add_transaction('budi', transaction(date='2026-11-02', amount=7000)) # Bulan lain
+    assert view.summary()['expense'] == 25000
+    backend.delete_transaction('budi', trx_id)
+    assert view.summary()['expense'] == 20000
+    assert manager.get('budi', '2026-10') is view
+    manager.close()
+
+
+def test_least_recently_used_views_are_unsubscribed(backend, monkeypatch):
+    monkeypatch.setattr(live_views, 'LIVE_VIEW_MAX', 2)
+    manager = LiveViewManager(backend, month_range)
+    for year_month in ('2026-08', '2026-09', '2026-10'):
+        manager.get('budi', year_month)
+    assert manager.peek('budi', '2026-08') is None
+    assert manager.peek('budi', '2026-10') is not None
+    assert len(backend.watchers['budi']) == 2
+    manager.close()
+    assert 'budi' not in backend.watchers
+
+
+def test_discard_drops_only_that_users_views(backend):
+    manager = LiveViewManager(backend, month_range)
+    manager.get('budi', '2026-10')
+    manager.get('ani', '2026-10')
+    manager.discard('budi')
+    assert manager.peek('budi', '2026-10') is None
+    assert manager.peek('ani', '2026-10') is not None
+    manager.close()
+
+
+def test_missing_initial_snapshot_is_waited_for_once(monkeypatch):
+    monkeypatch.setattr(live_views, 'READY_TIMEOUT_SECONDS', 0.2)
+    monkeypatch.setattr(live_views, 'LIVE_VIEW_RETRY_SECONDS', 0.3)
+    backend = SilentBackend()
+    manager = LiveViewManager(backend, month_range)
+    assert manager.get('budi', '2026-10') is None
+
+    start = time.monotonic()
+    assert manager.get('budi', '2026-10') is None
+    assert time.monotonic() - start < 0.1 # Tidak menunggu lagi
+
+    time.sleep(0.35)
+    start = time.monotonic()
+    assert manager.get('budi', '2026-10') is None
+    assert time.monotonic() - start < 0.1
+    assert backend.subscriptions == 2 # Langganan dibuat ulang, tanpa menunggu
+
+
+@pytest.fixture
+def queued(backend, tmp_path):
+    queued = QueuedBackend(backend, path=str(tmp_path / "queue.db"), start_worker=False)
+    yield queued
+    queued.stop()
+
+
+def test_initial_snapshot_includes_queued_writes(backend, queued):
+    backend.save_transactions('budi', [('a', transaction(amount=20000)), ('b', transaction(amount=1000))])
+    queued.save_transactions('budi', [('c', transaction(amount=5000))])
+    queued.update_transaction('budi', 'a', transaction(amount=30000))
+    queued.delete_transaction('budi', 'b')
+
+    manager = LiveViewManager(queued, month_range)
+    view = manager.get('budi', '2026-10')
+    assert sorted((row['id'], row['amount']) for row in view.transactions()) == [('a', 30000), ('c', 5000)]
+    assert view.summary()['expense'] == 35000
+
+    # Setelah tersinkron, perubahan dari backend tidak mengubah hasil
+    queued.drain()
+    assert view.summary()['expense'] == 35000
+    assert backend.get_month_rollup('budi', '2026-10')['expense'] == 35000
+    manager.close()
+
+
+def test_database_month_summary_includes_queued_writes(db, backend, queued):
+    db.set_backend(queued)
+    db.save_transactions('budi', [dict(transaction(amount=20000), key='a')])
+    assert db.get_month_summary('budi', '2026-10')['expense'] == 20000
+    assert db.get_live_version('budi', '2026-10') is not None # Dibaca dari view realtime
+
+    db.update_transaction('budi', 'a', '2026-10-05', 'warteg bahari', 25000, 'Pengeluaran', 'Makanan')
+    assert db.get_month_summary('budi', '2026-10')['expense'] == 25000
+    queued.drain()
+    assert db.get_month_summary('budi', '2026-10')['expense'] == 25000
+    assert db.search_transactions('budi', 'warteg')['transactions'][0]['id'] == 'a'
@@ -0,0 +1,102 @@
+"""Parser lokal berbasis aturan (lihat local_parser.py) dan jalur fallback ke AI di ai_helper.parse_transaction."""
+import pytest
+
+import ai_helper
+import ai_resilience
+import local_parser
+
+EXPENSE_CATEGORIES = ['Makanan', 'Transportasi', 'Tagihan']
+INCOME_CATEGORIES = ['Gaji', 'Bonus']
+AI_RESULT = {'description': 'dari model', 'amount': 20000, 'type': 'Pengeluaran', 'category': 'Makanan'}
+
+
+def parse(text):
+    return local_parser.parse_transaction_locally(text, EXPENSE_CATEGORIES, INCOME_CATEGORIES)
+
+
+@pytest.mark.parametrize('text, amount', [
+    ("25rb", 25000),
+    ("20k", 20000),
+    ("1.5 juta", 1500000),
+    ("2,5jt", 2500000),
+    ("Rp 25.000", 25000),
+    ("Rp 25.000,00", 25000),
+    ("makan Rp 25.000,00", 25000),
+    ("beli kopi Rp 18.500,00", 18500),
+    ("Rp25.000,50", 25000),
+    ("Rp. 1.250.000", 1250000),
+    ("25,000.00", 25000),
+    ("2 miliar", 2000000000),
+])
+def test_amount_formats(text, amount):
+    assert local_parser.parse_amount_expression(text) == amount
+
+
+@pytest.mark.parametrize('text', ["1.000.000 juta", "1.2.3", "tanpa angka"])
+def test_impossible_amount_is_rejected(text):
+    assert local_parser.parse_amount_expression(text) is None
+    assert parse(text) == (None, 0.0)
+
+
+@pytest.mark.parametrize('text, trx_type, category', [
+    ("makan siang 25rb", 'Pengeluaran', 'Makanan'),
+    ("kopi susu 20rb", 'Pengeluaran', 'Makanan'),
+    ("bensin 50rb", 'Pengeluaran', 'Transportasi'),
+    ("bayar listrik 300rb", 'Pengeluaran', 'Tagihan'),
+    ("gaji bulan ini 5jt", 'Pemasukan', 'Gaji'),
+    ("dapat bonus 1,5jt", 'Pemasukan', 'Bonus'),
+])
+def test_type_and_category_keywords(text, trx_type, category):
+    result, confidence = parse(text)
+    assert (result['type'], result['category']) == (trx_type, category)
+    assert confidence >= local_parser.CONFIDENCE_THRESHOLD
+
+
+def test_description_excludes_amount():
+    result, _ = parse("makan Rp 25.000,00 di warteg")
+    assert result['description'] == "makan di warteg"
+    assert result['amount'] == 25000
+
+
+@pytest.mark.parametrize('text', [
+    "kopi 20",                           # Terlalu kecil untuk rupiah
+    "bayar 25000",                       # Angka polos tanpa satuan/'Rp'
+    "beli 2 kopi 20rb dan roti 15rb",    # Dua nominal bersaing
+    "sesuatu 25rb",                      # Kategori tidak dikenali
+])
+def test_doubtful_input_has_low_confidence(text):
+    _, confidence = parse(text)
+    assert confidence < local_parser.CONFIDENCE_THRESHOLD
+
+
+def test_small_count_does_not_compete_with_amount():
+    result, confidence = parse("makan 2 porsi 50rb")
+    assert result['amount'] == 50000
+    assert confidence >= local_parser.CONFIDENCE_THRESHOLD
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """LocalStubModel sebagai model aktif, cache parsing di memori, dan caller tanpa jeda retry."""
+    model = ai_helper.LocalStubModel(lambda prompt: AI_RESULT)
+    old_model = ai_helper.set_model(model)
+    monkeypatch.setattr(ai_helper, '_parse_cache', ai_helper.ParseCache(':memory:'))
+    monkeypatch.setattr(ai_resilience, '_caller',
+                        ai_resilience.ResilientCaller(timeout=2, sleep=lambda seconds: None))
+    yield model
+    ai_helper.set_model(old_model)
+
+
+def test_confident_input_stays_local(stub):
+    result, source = ai_helper.parse_transaction("makan siang 25rb", EXPENSE_CATEGORIES, INCOME_CATEGORIES)
+    assert source == 'lokal'
+    assert result['amount'] == 25000
+    assert stub.calls == 0
+
+
+@pytest.mark.parametrize('text', ["kopi 20", "bayar 25000", "beli 2 kopi 20rb dan roti 15rb", "1.000.000 juta"])
+def test_low_confidence_input_goes_to_model(stub, text):
+    result, source = ai_helper.parse_transaction(text, EXPENSE_CATEGORIES, INCOME_CATEGORIES)
+    assert source == 'ai'
+    assert result['description'] == 'dari model'
+    assert stub.calls == 1
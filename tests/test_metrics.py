@@ -0,0 +1,84 @@
+"""Metrik proses (lihat metrics.py): format teks Prometheus dan hitungan dokumen InstrumentedBackend."""
+import pytest
+
+import metrics
+from conftest import transaction
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def counter(metric, label):
+    return metrics.snapshot()['counters'].get((metric, label), 0)
+
+
+def test_prometheus_text_format():
+    metrics.observe('eftari_backend_duration_seconds', 'get_all_rollups', 0.003)
+    metrics.observe('eftari_backend_duration_seconds', 'get_all_rollups', 20.0)
+    metrics.increment('eftari_cache_lookups_total', 'hit', 3)
+    metrics.increment('eftari_call_errors_total', 'fungsi "aneh"\nbaris')
+    lines = metrics.prometheus_text().splitlines()
+
+    assert "# HELP eftari_backend_duration_seconds Latensi panggilan backend penyimpanan" in lines
+    assert "# TYPE eftari_backend_duration_seconds histogram" in lines
+    # Bucket kumulatif: 0.003 masuk le=0.005 dan seterusnya, 20 detik hanya di +Inf
+    assert 'eftari_backend_duration_seconds_bucket{method="get_all_rollups",le="0.0025"} 0' in lines
+    assert 'eftari_backend_duration_seconds_bucket{method="get_all_rollups",le="0.005"} 1' in lines
+    assert 'eftari_backend_duration_seconds_bucket{method="get_all_rollups",le="10"} 1' in lines
+    assert 'eftari_backend_duration_seconds_bucket{method="get_all_rollups",le="+Inf"} 2' in lines
+    assert 'eftari_backend_duration_seconds_sum{method="get_all_rollups"} 20.003000' in lines
+    assert 'eftari_backend_duration_seconds_count{method="get_all_rollups"} 2' in lines
+    assert "# TYPE eftari_cache_lookups_total counter" in lines
+    assert 'eftari_cache_lookups_total{result="hit"} 3' in lines
+    assert 'eftari_call_errors_total{function="fungsi \\"aneh\\"\\nbaris"} 1' in lines
+    # Metrik tanpa data tidak ditulis sama sekali
+    assert not any(line.startswith("# HELP eftari_ai_tokens_total") for line in lines)
+
+
+def test_empty_registry_is_valid_text():
+    assert metrics.prometheus_text() == "\n"
+
+
+def test_instrumented_backend_counts_documents(backend):
+    instrumented = metrics.InstrumentedBackend(backend)
+    assert metrics.instrument_backend(instrumented) is instrumented # Tidak dibungkus dua kali
+
+    ids = instrumented.add_transactions('budi', [transaction(), transaction(amount=1000), transaction(amount=500)])
+    instrumented.update_transaction('budi', ids[0], transaction(amount=25000))
+    instrumented.update_transaction('budi', 'tidak-ada', transaction()) # Tidak menulis apa pun
+    instrumented.delete_transactions('budi', ids[1:] + ['tidak-ada'])
+    assert counter('eftari_backend_documents_written_total', 'add_transactions') == 3
+    assert counter('eftari_backend_documents_written_total', 'update_transaction') == 1
+    assert counter('eftari_backend_documents_written_total', 'delete_transactions') == 2
+
+    assert len(instrumented.get_all_transactions('budi')) == 1
+    instrumented.get_month_rollup('budi', '2026-10')
+    instrumented.get_month_rollup('budi', '1999-01') # Tidak ada: nol dokumen
+    instrumented.get_transactions_by_ids('budi', ids)
+    assert counter('eftari_backend_documents_read_total', 'get_all_transactions') == 1
+    assert counter('eftari_backend_documents_read_total', 'get_month_rollup') == 1
+    assert counter('eftari_backend_documents_read_total', 'get_transactions_by_ids') == 1
+    assert metrics.snapshot()['histograms'][('eftari_backend_duration_seconds', 'get_month_rollup')].count == 2
+
+
+def test_metrics_endpoint(monkeypatch):
+    import socket
+    import urllib.request
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    monkeypatch.setattr(metrics, '_http_server', None)
+    metrics.start_http_server(port)
+    try:
+        assert metrics._http_server.server_address[0] == "127.0.0.1" # Default: hanya lokal
+        metrics.increment('eftari_cache_lookups_total', 'miss')
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith("text/plain; version=0.0.4")
+            assert 'eftari_cache_lookups_total{result="miss"} 1' in response.read().decode('utf-8')
+    finally:
+        metrics._http_server.shutdown()
+        metrics._http_server.server_close()
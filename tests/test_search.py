@@ -0,0 +1,130 @@
+"""Indeks pencarian teks transaksi (lihat search.py) dan pencarian lewat database.search_transactions."""
+import pytest
+
+from conftest import transaction
+from search import JOURNAL_SUFFIX, SearchIndex
+
+ROWS = [
+    dict(transaction(date='2026-10-01', description='kopi susu', amount=20000), id='t1'),
+    dict(transaction(date='2026-10-02', description='susu bayi', amount=90000, category='Belanja'), id='t2'),
+    dict(transaction(date='2026-10-03', description='kopi hitam', amount=15000), id='t3'),
+    dict(transaction(date='2026-10-04', description='belanja bulanan', amount=500000, category='Belanja'), id='t4'),
+    dict(transaction(date='2026-10-05', description='tf ke adik', amount=250000, category='Lain-Lain'), id='t5'),
+    dict(transaction(date='2026-10-06', description='ojol ke kantor', amount=25000, category='Transportasi'), id='t6'),
+    dict(transaction(date='2026-09-30', description='gaji september', amount=8000000, type='Pemasukan',
+                     category='Gaji'), id='t7'),
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.apply(added=ROWS)
+    return index
+
+
+def ids(index, query, **kwargs):
+    rows, _ = index.search(query, **kwargs)
+    return [row['id'] for row in rows]
+
+
+def test_all_query_words_must_match(index):
+    assert ids(index, "kopi") == ['t3', 't1']
+    assert ids(index, "kopi susu") == ['t1']
+    assert ids(index, "susu kopi") == ['t1']
+    assert ids(index, "kopi makanan") == ['t3', 't1'] # Kategori ikut diindeks
+    assert ids(index, "kopi bayi") == []
+
+
+def test_prefix_and_abbreviation(index):
+    assert ids(index, "bel") == ['t4', 't2'] # 'belanja' (deskripsi dan kategori)
+    assert ids(index, "transfer") == ['t5'] # 'tf' diindeks sebagai 'transfer'
+
+
+def test_one_typo_correction(index):
+    assert ids(index, "kpoi") == ['t3', 't1'] # Transposisi
+    assert ids(index, "kopu") == ['t3', 't1'] # Substitusi
+    assert ids(index, "kpi") == [] # Token pendek tidak dikoreksi
+
+
+def test_two_typo_correction_for_long_words(index):
+    assert ids(index, "trnsportsi") == ['t6'] # Dua huruf hilang
+    assert ids(index, "trabsportazi") == ['t6'] # Dua huruf salah
+    assert ids(index, "transportasiii") == ['t6'] # Dua huruf lebih
+    assert ids(index, "trnsprtsi") == [] # Tiga salah ketik
+    assert ids(index, "blanja") == ['t4', 't2']
+    assert ids(index, "blanjaa") == [] # Kata pendek: satu salah ketik saja
+
+
+def test_particle_suffix_is_stripped(index):
+    assert ids(index, "belanjanya") == ['t4', 't2']
+    assert ids(index, "kopinya") == ['t3', 't1']
+    assert ids(index, "susulah") == ['t2', 't1']
+    index.apply(added=[dict(transaction(date='2026-10-07', description='bukunya adik'), id='t8')])
+    assert ids(index, "buku") == ['t8']
+
+
+def test_filters_with_cursor(index):
+    filters = {'type': 'Pengeluaran', 'date_from': '2026-10-01', 'amount_min': 15000}
+    rows, total = index.search("k", filters=filters, limit=2)
+    assert total == 4 # kopi hitam, kopi susu, ke adik, ke kantor
+    assert [row['id'] for row in rows] == ['t6', 't5']
+    after = (rows[-1]['date'], rows[-1]['id'])
+    rows, total = index.search("k", filters=filters, after=after, limit=2)
+    assert [row['id'] for row in rows] == ['t3', 't1']
+    assert total == 4
+
+    assert ids(index, "kopi", filters={'category': 'Makanan', 'amount_max': 18000}) == ['t3']
+    assert ids(index, "gaji", filters={'type': 'Pengeluaran'}) == []
+    assert ids(index, "kopi", filters={'category': 'Tidak Ada'}) == []
+
+
+def test_update_and_delete_via_apply(index):
+    index.apply(added=[dict(ROWS[0], description='teh manis')], removed=['t1'], removed_dates={'t1': '2026-10-01'})
+    index.apply(removed=['t3'])
+    assert ids(index, "kopi") == []
+    assert ids(index, "teh") == ['t1']
+    assert len(index) == len(ROWS) - 1
+
+
+def test_journal_replay(tmp_path):
+    path = str(tmp_path / "budi.idx")
+    index = SearchIndex(path)
+    index.apply(added=ROWS)
+    index.save()
+    index.apply(added=[dict(ROWS[0], description='teh manis')], removed=['t1'], removed_dates={'t1': '2026-10-01'})
+    index.apply(added=[dict(transaction(description='roti bakar'), id='t9')])
+    # Proses berhenti saat menulis baris jurnal berikutnya
+    with open(path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as journal:
+        journal.write('{"added": [{"id": "t10", "descr')
+
+    reloaded = SearchIndex(path)
+    assert ids(reloaded, "teh") == ['t1']
+    assert ids(reloaded, "kopi") == ['t3']
+    assert ids(reloaded, "roti") == ['t9']
+    assert len(reloaded) == len(ROWS) + 1
+
+    reloaded.save() # Jurnal digabung ke file indeks
+    assert not (tmp_path / ("budi.idx" + JOURNAL_SUFFIX)).exists()
+    assert ids(SearchIndex(path), "teh") == ['t1']
+
+
+def test_edit_is_found_after_reset(db):
+    db.save_transactions('budi', [dict(transaction(description='kopi susu'), key='a')])
+    assert [row['id'] for row in db.search_transactions('budi', "kopi")['transactions']] == ['a']
+
+    db.update_transaction('budi', 'a', '2026-10-05', 'teh manis', 20000, 'Pengeluaran', 'Makanan')
+    db.reset_search_indexes() # Indeks dimuat ulang dari file sebelum TTL sinkronisasi habis
+    assert [row['id'] for row in db.search_transactions('budi', "teh")['transactions']] == ['a']
+    assert db.search_transactions('budi', "kopi")['transactions'] == []
+
+
+def test_database_search_cursor(db):
+    db.save_transactions('budi', [dict(transaction(date=f'2026-10-{day:02d}', description='kopi'), key=f'k{day}')
+                                  for day in range(1, 6)])
+    first = db.search_transactions('budi', "kopi", page_size=3)
+    assert [row['id'] for row in first['transactions']] == ['k5', 'k4', 'k3']
+    assert first['total'] == 5
+    second = db.search_transactions('budi', "kopi", cursor=first['next_cursor'], page_size=3)
+    assert [row['id'] for row in second['transactions']] == ['k2', 'k1']
+    assert second['next_cursor'] is None
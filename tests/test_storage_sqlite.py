@@ -0,0 +1,144 @@
+"""Backend SQLite dan API database.py di atasnya (lihat storage/sqlite_backend.py)."""
+from conftest import transaction
+
+
+def test_add_and_read_transactions(backend):
+    trx_id = backend.add_transaction('budi', transaction())
+    backend.add_transaction('budi', transaction(date='2026-09-30', description='gaji', amount=5e6,
+                                                type='Pemasukan', category='Gaji'))
+
+    rows = backend.get_all_transactions('budi')
+    assert [row['date'] for row in rows] == ['2026-10-05', '2026-09-30']
+    assert rows[0]['id'] == trx_id
+    assert [row['id'] for row in backend.get_transactions_between('budi', '2026-10-01', '2026-10-31')] == [trx_id]
+    assert backend.get_all_transactions('ani') == []
+
+
+def test_rollups_follow_writes(backend):
+    trx_id = backend.add_transaction('budi', transaction(amount=20000))
+    backend.add_transaction('budi', transaction(amount=5000, category='Transportasi'))
+    rollup = backend.get_month_rollup('budi', '2026-10')
+    assert rollup['expense'] == 25000
+    assert rollup['expense_by_category'] == {'Makanan': 20000, 'Transportasi': 5000}
+
+    old_data = backend.update_transaction('budi', trx_id, transaction(date='2026-11-01', amount=30000))
+    assert old_data['amount'] == 20000
+    assert backend.get_month_rollup('budi', '2026-10')['expense'] == 5000
+    assert backend.get_month_rollup('budi', '2026-11')['expense'] == 30000
+
+    backend.delete_transaction('budi', trx_id)
+    assert backend.get_month_rollup('budi', '2026-11')['expense'] == 0
+    assert backend.get_summary_between('budi', '2026-10-01', '2026-10-31')['expense'] == 5000
+
+
+def test_revision_changes_on_description_only_edit(backend):
+    trx_id = backend.add_transaction('budi', transaction())
+    before = backend.get_month_rollup('budi', '2026-10')
+    backend.update_transaction('budi', trx_id, transaction(description='warteg bahari'))
+    after = backend.get_month_rollup('budi', '2026-10')
+    assert after['expense'] == before['expense']
+    assert after['revision'] > before['revision']
+
+
+def test_save_transactions_is_idempotent(backend):
+    items = [('kunci-1', transaction()), ('kunci-2', transaction(amount=1000))]
+    assert backend.save_transactions('budi', items) == {'kunci-1', 'kunci-2'}
+    assert backend.save_transactions('budi', items) == set()
+    assert len(backend.get_all_transactions('budi')) == 2
+    assert backend.get_month_rollup('budi', '2026-10')['expense'] == 21000
+    assert {row['id'] for row in backend.get_transactions_by_ids('budi', ['kunci-2', 'tidak-ada'])} == {'kunci-2'}
+
+
+def test_same_key_for_different_users(backend):
+    # Kunci idempotensi unik per pengguna: kunci milik 'alice' tidak menolak simpanan 'bob'
+    assert backend.save_transactions('alice', [('key-1', transaction(amount=1000))]) == {'key-1'}
+    assert backend.save_transactions('bob', [('key-1', transaction(amount=2000))]) == {'key-1'}
+    assert [row['amount'] for row in backend.get_transactions_by_ids('alice', ['key-1'])] == [1000]
+    assert [row['amount'] for row in backend.get_transactions_by_ids('bob', ['key-1'])] == [2000]
+    backend.delete_transaction('alice', 'key-1')
+    assert backend.get_transactions_by_ids('alice', ['key-1']) == []
+    assert len(backend.get_transactions_by_ids('bob', ['key-1'])) == 1
+
+
+def test_global_transaction_key_is_migrated(tmp_path):
+    import sqlite3
+    from storage.sqlite_backend import SQLiteBackend
+    path = str(tmp_path / "lama.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE transactions (id TEXT PRIMARY KEY, user_id TEXT NOT NULL, date TEXT NOT NULL,
+            description TEXT NOT NULL DEFAULT '', amount REAL NOT NULL, type TEXT NOT NULL, category TEXT NOT NULL);
+        CREATE INDEX idx_transactions_user_date_id ON transactions (user_id, date, id);
+        INSERT INTO transactions VALUES ('key-1', 'alice', '2026-10-05', 'kopi', 1000, 'Pengeluaran', 'Makanan');
+    """)
+    conn.close()
+
+    backend = SQLiteBackend(path=path)
+    assert backend.save_transactions('bob', [('key-1', transaction())]) == {'key-1'}
+    assert [row['description'] for row in backend.get_transactions_by_ids('alice', ['key-1'])] == ['kopi']
+    indexes = {row['name'] for row in backend.conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'transactions'")}
+    assert 'idx_transactions_user_date_id' in indexes
+
+
+def test_page_filters_and_keyset_cursor(backend):
+    for day in range(1, 8):
+        backend.save_transactions('budi', [(f"t{day}", transaction(date=f"2026-10-0{day}", amount=day * 1000))])
+
+    first = backend.get_transactions_page('budi', {'amount_min': 2000}, None, 3)
+    assert [row['id'] for row in first] == ['t7', 't6', 't5']
+    after = (first[-1]['date'], first[-1]['id'])
+    second = backend.get_transactions_page('budi', {'amount_min': 2000}, after, 3)
+    assert [row['id'] for row in second] == ['t4', 't3', 't2']
+
+
+def test_users_are_isolated(backend):
+    backend.add_transaction('budi', transaction())
+    backend.set_budget_version('ani', 'Makanan', '2026-10', 100000)
+    assert backend.list_users() == ['ani', 'budi']
+    assert backend.get_all_rollups('ani') == {}
+    backend.delete_user('budi')
+    assert backend.get_all_transactions('budi') == []
+    assert backend.list_users() == ['ani']
+
+
+def test_database_api_on_sqlite(db):
+    db.add_budget('budi', 'Makanan', 50000, effective_month='2026-10')
+    db.add_transaction('budi', '2026-10-05', 'kopi susu', 20000, 'Pengeluaran', 'Makanan')
+    results = db.save_transactions('budi', [
+        dict(transaction(amount=40000), key='kunci-1'),
+        dict(transaction(amount=40000), key='kunci-1'),
+        dict(transaction(), key='a/b'),
+    ])
+    assert [result['status'] for result in results] == [db.SAVE_CREATED, db.SAVE_DUPLICATE, db.SAVE_INVALID]
+
+    summary = db.get_month_summary('budi', '2026-10')
+    assert summary['expense'] == 60000
+    assert [(row['category'], row['over_budget']) for row in db.get_over_budget_report('budi')] == [('Makanan', 10000.0)]
+
+    # Penulisan membuang cache yang terdampak: ringkasan langsung mengikuti
+    db.delete_transaction_by_id('budi', 'kunci-1')
+    assert db.get_month_summary('budi', '2026-10')['expense'] == 20000
+    assert db.get_over_budget_report('budi') == []
+
+
+def test_rebuild_rollups_reports_and_fixes_drift(backend, monkeypatch, capsys):
+    import rebuild_rollups
+    import storage
+    backend.add_transactions('budi', [transaction(amount=20000), transaction(amount=5000, category='Transportasi')])
+    backend.conn.execute(
+        "UPDATE monthly_rollups SET total = 99999 WHERE user_id = 'budi' AND category = 'Makanan'"
+    )
+    backend.conn.commit()
+    monkeypatch.setattr(storage, 'get_backend_from_config', lambda: backend)
+
+    assert rebuild_rollups.main(['--dry-run']) == 1
+    output = capsys.readouterr().out
+    assert "[budi] Ditemukan 2 drift" in output
+    assert "2026-10 expense: tersimpan 104,999.00, seharusnya 25,000.00" in output
+    assert backend.get_month_rollup('budi', '2026-10')['expense'] == 104999 # Dry run tidak menyimpan
+
+    assert rebuild_rollups.main([]) == 0
+    assert backend.get_month_rollup('budi', '2026-10')['expense_by_category'] == {'Makanan': 20000, 'Transportasi': 5000}
+    assert rebuild_rollups.main(['--dry-run', '--user', 'budi']) == 0
+    assert "[budi] Tidak ada drift" in capsys.readouterr().out
@@ -0,0 +1,37 @@
+"""Identitas sesi dan hak admin (lihat user_session.py), dengan st.user tiruan."""
+import types
+
+import pytest
+
+import user_session
+
+
+@pytest.fixture
+def login(monkeypatch):
+    """login(user) mengganti st.user sesi ini; None = tanpa login."""
+    monkeypatch.setenv("EFTARI_ADMIN_USERS", "admin@contoh.id, ops@contoh.id")
+
+    def login(user):
+        monkeypatch.setattr(user_session, 'st', types.SimpleNamespace(user=user or {'is_logged_in': False}))
+    return login
+
+
+def test_admin_requires_login(login, monkeypatch):
+    login(None)
+    # Tanpa login semua sesi memakai pengguna bawaan, walau pengguna itu tercantum sebagai admin
+    monkeypatch.setenv("EFTARI_DEFAULT_USER", "admin@contoh.id")
+    assert user_session.current_user_id() == "admin@contoh.id"
+    assert not user_session.is_admin()
+
+
+def test_admin_list(login):
+    login({'is_logged_in': True, 'email': 'ops@contoh.id'})
+    assert user_session.is_admin()
+    login({'is_logged_in': True, 'email': 'budi@contoh.id'})
+    assert not user_session.is_admin()
+
+
+def test_no_admins_configured(login, monkeypatch):
+    monkeypatch.delenv("EFTARI_ADMIN_USERS")
+    login({'is_logged_in': True, 'email': 'admin@contoh.id'})
+    assert not user_session.is_admin()
@@ -0,0 +1,187 @@
+"""Antrean tulis lokal di depan backend jarak jauh (lihat storage/write_queue.py), dengan SQLite sebagai backend."""
+from collections import Counter
+
+import pytest
+
+import storage
+from conftest import transaction
+from storage.sqlite_backend import SQLiteBackend
+from storage.write_queue import QueuedBackend
+
+
+class FlakyBackend(SQLiteBackend):
+    """SQLiteBackend yang mencatat panggilan dan bisa melempar error yang diantrekan per method."""
+
+    def __init__(self, path):
+        super().__init__(path=path)
+        self.calls = Counter()
+        self.errors = {} # nama method -> list error yang dilempar berurutan
+
+    def _call(self, name, *args):
+        self.calls[name] += 1
+        if self.errors.get(name):
+            raise self.errors[name].pop(0)
+        return getattr(super(), name)(*args)
+
+    def save_transactions(self, user_id, items):
+        return self._call('save_transactions', user_id, items)
+
+    def update_transaction(self, user_id, trx_id, data):
+        return self._call('update_transaction', user_id, trx_id, data)
+
+    def delete_transactions(self, user_id, trx_ids):
+        return self._call('delete_transactions', user_id, trx_ids)
+
+    def get_transactions_by_ids(self, user_id, trx_ids):
+        return self._call('get_transactions_by_ids', user_id, trx_ids)
+
+
+@pytest.fixture
+def remote(tmp_path):
+    return FlakyBackend(str(tmp_path / "remote.db"))
+
+
+@pytest.fixture
+def notifications():
+    return []
+
+
+@pytest.fixture
+def queued(remote, tmp_path, notifications):
+    queued = QueuedBackend(remote, path=str(tmp_path / "queue.db"), start_worker=False)
+    queued.add_listener(lambda user_id, months, reconcile: notifications.append((user_id, months, reconcile)))
+    yield queued
+    queued.stop()
+
+
+def amounts(backend, user_id='budi'):
+    return sorted((row['id'], row['amount']) for row in backend.get_all_transactions(user_id))
+
+
+def test_writes_do_not_read_remote(remote, queued):
+    remote.save_transactions('budi', [('lama', transaction())])
+    queued.save_transactions('budi', [('baru', transaction())])
+    queued.update_transaction('budi', 'lama', transaction(amount=5000))
+    queued.delete_transaction('budi', 'tidak-dikenal')
+    assert remote.calls['get_transactions_by_ids'] == 0
+    assert remote.calls['save_transactions'] == 1 # Hanya penyiapan data di atas
+
+
+def test_fifo_order_across_save_update_delete(remote, queued):
+    queued.save_transactions('budi', [('a', transaction(amount=1000)), ('b', transaction(amount=2000))])
+    queued.update_transaction('budi', 'a', transaction(amount=3000))
+    queued.delete_transaction('budi', 'b')
+    queued.save_transactions('budi', [('b', transaction(amount=4000))]) # Kunci yang dihapus di antrean boleh disimpan lagi
+    assert amounts(queued) == [('a', 3000), ('b', 4000)]
+    assert queued.get_month_rollup('budi', '2026-10')['expense'] == 7000
+
+    assert queued.drain() == 4
+    assert amounts(remote) == [('a', 3000), ('b', 4000)]
+    assert remote.get_month_rollup('budi', '2026-10')['expense'] == 7000
+    assert storage.rebuild_rollups(remote, 'budi', dry_run=True) == []
+
+
+def test_consecutive_saves_are_merged(remote, queued):
+    for index in range(3):
+        queued.save_transactions('budi', [(f'k{index}', transaction())])
+    queued.save_transactions('ani', [('k9', transaction())])
+    assert queued.drain() == 4
+    assert remote.calls['save_transactions'] == 2 # Tiga simpanan 'budi' jadi satu batch, 'ani' terpisah
+    assert len(remote.get_all_transactions('budi')) == 3
+
+
+def test_transient_error_is_retried_in_order(remote, queued):
+    queued.save_transactions('budi', [('a', transaction(amount=1000))])
+    queued.update_transaction('budi', 'a', transaction(amount=2000))
+    remote.errors['save_transactions'] = [ConnectionError("jaringan putus")]
+    with pytest.raises(ConnectionError):
+        queued.drain()
+    assert remote.calls['update_transaction'] == 0 # Update tidak mendahului save yang gagal
+    assert queued.sync_status('budi') == {'pending': 2, 'failed': 0, 'last_error': "ConnectionError: jaringan putus"}
+
+    assert queued.drain() == 2
+    assert amounts(remote) == [('a', 2000)]
+    assert queued.sync_status('budi')['pending'] == 0
+
+
+def test_permanent_error_marks_entry_failed(remote, queued):
+    queued.save_transactions('budi', [('a', transaction(amount=1000))])
+    queued.update_transaction('budi', 'a', transaction(amount=2000))
+    queued.save_transactions('budi', [('b', transaction(amount=500))])
+    remote.errors['update_transaction'] = [ValueError("data tidak valid")]
+    assert queued.drain() == 2 # Entri gagal dilewati, sisanya tetap diterapkan
+    assert amounts(remote) == [('a', 1000), ('b', 500)]
+    assert queued.sync_status('budi')['failed'] == 1
+    assert amounts(queued) == [('a', 2000), ('b', 500)] # Entri gagal tetap terlihat
+
+    assert queued.drain() == 0 # Tidak diulang otomatis
+    assert queued.retry_failed_writes('budi') == 1
+    assert queued.drain() == 1
+    assert amounts(remote) == [('a', 2000), ('b', 500)]
+    assert storage.rebuild_rollups(remote, 'budi', dry_run=True) == []
+
+
+def test_discard_failed_write(remote, queued, notifications):
+    queued.save_transactions('budi', [('a', transaction(amount=1000))])
+    remote.errors['save_transactions'] = [ValueError("data tidak valid")]
+    queued.drain()
+    assert queued.sync_status('budi')['failed'] == 1
+
+    assert queued.discard_failed_writes('budi') == 1
+    assert amounts(queued) == []
+    assert queued.get_month_rollup('budi', '2026-10') is None
+    assert notifications[-1] == ('budi', None, True)
+
+
+def test_duplicate_key_is_reconciled(remote, queued, notifications):
+    remote.save_transactions('budi', [('a', transaction(amount=1000))])
+    created, pending = queued.save_transactions_checked('budi', [('a', transaction(amount=9000))])
+    assert (created, pending) == (set(), {'a'}) # Belum dipastikan: backend tidak dibaca saat menulis
+
+    queued.drain()
+    assert notifications[-1] == ('budi', {'2026-10'}, True)
+    assert amounts(queued) == [('a', 1000)]
+    assert queued.get_month_rollup('budi', '2026-10')['expense'] == 1000
+
+    # Kunci yang sudah pernah dibaca langsung dikenali sebagai duplikat
+    assert queued.save_transactions_checked('budi', [('a', transaction())]) == (set(), set())
+
+
+def test_unknown_old_row_is_reconciled(remote, queued, notifications):
+    remote.save_transactions('budi', [('a', transaction(amount=1000))])
+    assert queued.update_transaction('budi', 'a', transaction(amount=2000)) is None # Data lama belum diketahui
+    queued.drain()
+    assert notifications[-1] == ('budi', {'2026-10'}, True)
+    assert amounts(remote) == [('a', 2000)]
+
+    # Setelah dibaca, data lamanya diketahui tanpa menunggu backend
+    assert queued.update_transaction('budi', 'a', transaction(amount=3000))['amount'] == 2000
+    queued.drain()
+    assert notifications[-1] == ('budi', {'2026-10'}, False)
+
+
+def test_replay_after_restart_has_no_rollup_drift(remote, tmp_path):
+    path = str(tmp_path / "queue.db")
+    remote.save_transactions('budi', [('lama', transaction(amount=700))])
+    first = QueuedBackend(remote, path=path, start_worker=False)
+    first.get_all_transactions('budi')
+    first.save_transactions('budi', [('a', transaction(amount=1000)), ('b', transaction(date='2026-11-02'))])
+    first.update_transaction('budi', 'lama', transaction(amount=800))
+    first.delete_transaction('budi', 'a')
+    first.stop() # Proses berhenti sebelum antrean tersinkron
+
+    second = QueuedBackend(remote, path=path, start_worker=False)
+    assert second.sync_status('budi')['pending'] == 3
+    assert amounts(second) == [('b', 20000), ('lama', 800)]
+    assert second.drain() == 3
+    assert amounts(remote) == [('b', 20000), ('lama', 800)]
+    assert storage.rebuild_rollups(remote, 'budi', dry_run=True) == []
+
+    # Memutar ulang entri yang sama (misal proses mati sebelum entri dihapus) tetap idempoten
+    for trx_id, data in [('a', transaction(amount=1000)), ('b', transaction(date='2026-11-02'))]:
+        second.queue.append('budi', 'save', {'items': [(trx_id, data)]})
+    second.queue.append('budi', 'delete', {'ids': ['a'], 'old': {'a': transaction(amount=1000)}})
+    second.drain()
+    assert amounts(remote) == [('b', 20000), ('lama', 800)]
+    assert storage.rebuild_rollups(remote, 'budi', dry_run=True) == []
+    second.stop()
@@ -0,0 +1,146 @@
+"""
+Indeks deret waktu bulanan untuk analisis tren multi-bulan.
+
+Satu array kolom per seri (pemasukan, pengeluaran, dan setiap kategori pengeluaran),
+diindeks per bulan 'YYYY-MM' tanpa celah. Dibangun sekali dari rollup bulanan
+(satu kali baca semua rollup), lalu diperbarui per transaksi saat ada penulisan baru.
+"""
+import threading
+from array import array
+
+from storage.rollups import rollup_increments, rollup_month
+
+DEFAULT_TREND_MONTHS = 12
+MAX_TREND_MONTHS = 36
+ROLLING_WINDOW = 3
+
+
+def month_offset(year_month, offset):
+    """'YYYY-MM' digeser sejumlah bulan (boleh negatif)."""
+    year, month = int(year_month[:4]), int(year_month[5:7])
+    index = year * 12 + (month - 1) + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def months_between(start_month, end_month):
+    """Jumlah bulan dari start_month ke end_month (end - start)."""
+    return ((int(end_month[:4]) - int(start_month[:4])) * 12
+            + int(end_month[5:7]) - int(start_month[5:7]))
+
+
+class MonthlySeries:
+    """
+    Indeks deret waktu: array float per seri, posisi i = bulan start_month + i.
+    Seri 'income' dan 'expense' selalu ada; kategori pengeluaran ada di self.categories.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.start_month = None
+        self.length = 0
+        self.income = array('d')
+        self.expense = array('d')
+        self.categories = {}
+
+    @classmethod
+    def from_rollups(cls, rollups):
+        """Membangun indeks dari dict {'YYYY-MM': rollup} (lihat storage/rollups.py)."""
+        series = cls()
+        for year_month in sorted(rollups):
+            rollup = rollups[year_month]
+            position = series._position(year_month)
+            series.income[position] += rollup['income']
+            series.expense[position] += rollup['expense']
+            for category, total in rollup['expense_by_category'].items():
+                series._category(category)[position] += total
+        return series
+
+    @property
+    def end_month(self):
+        if self.start_month is None:
+            return None
+        return month_offset(self.start_month, self.length - 1)
+
+    def _columns(self):
+        return [self.income, self.expense, *self.categories.values()]
+
+    def _position(self, year_month):
+        """Posisi bulan di array; rentang diperluas (diisi nol) jika bulan di luar rentang."""
+        if self.start_month is None:
+            self.start_month = year_month
+        offset = months_between(self.start_month, year_month)
+        if offset < 0:
+            # Bulan sebelum awal indeks: geser semua kolom ke kanan
+            for column in self._columns():
+                column[0:0] = array('d', bytes(8 * -offset))
+            self.start_month = year_month
+            self.length += -offset
+            offset = 0
+        elif offset >= self.length:
+            grow = offset - self.length + 1
+            for column in self._columns():
+                column.extend(array('d', bytes(8 * grow)))
+            self.length += grow
+        return offset
+
+    def _category(self, category):
+        if category not in self.categories:
+            self.categories[category] = array('d', bytes(8 * self.length))
+        return self.categories[category]
+
+    def apply(self, data, sign=1):
+        """Menerapkan satu transaksi (sign=1 tambah, sign=-1 keluarkan) ke indeks."""
+        increments = rollup_increments(data, sign)
+        if not increments:
+            return
+        with self.lock:
+            position = self._position(rollup_month(data))
+            if 'income' in increments:
+                self.income[position] += increments['income']
+            if 'expense' in increments:
+                self.expense[position] += increments['expense']
+                self._category(increments['category'])[position] += increments['expense']
+
+    def to_frames(self, end_month, months=DEFAULT_TREND_MONTHS):
+        """
+        Potongan indeks untuk `months` bulan yang berakhir di end_month.
+        Mengembalikan (df_totals, df_categories), keduanya ber-index bulan 'YYYY-MM':
+        df_totals berkolom income/expense/net; df_categories satu kolom per kategori.
+        """
+        import pandas as pd
+
+        month_labels = [month_offset(end_month, offset) for offset in range(-(months - 1), 1)]
+        with self.lock:
+            if self.start_month is None:
+                first = 0
+            else:
+                first = months_between(self.start_month, month_labels[0])
+
+            def window(column):
+                # Bulan di luar rentang indeks bernilai nol
+                return [column[i] if 0 <= i < self.length else 0.0 for i in range(first, first + months)]
+
+            index = pd.Index(month_labels, name='month')
+            df_totals = pd.DataFrame({'income': window(self.income), 'expense': window(self.expense)}, index=index)
+            df_categories = pd.DataFrame(
+                {category: window(column) for category, column in self.categories.items()}, index=index
+            )
+
+        df_totals['net'] = df_totals['income'] - df_totals['expense']
+        # Kategori tanpa pengeluaran di rentang ini tidak ditampilkan
+        df_categories = df_categories.loc[:, df_categories.abs().sum() > 0.005]
+        return df_totals, df_categories
+
+
+def trend_analysis(df_totals, window=ROLLING_WINDOW):
+    """
+    Menambahkan perubahan bulan-ke-bulan dan rata-rata bergulir ke tabel total bulanan.
+    Kolom baru: <seri>_mom (selisih), <seri>_mom_pct (persen), <seri>_avg (rata-rata `window` bulan).
+    """
+    df_trend = df_totals.copy()
+    for column in ('income', 'expense', 'net'):
+        previous = df_totals[column].shift(1)
+        df_trend[f'{column}_mom'] = df_totals[column] - previous
+        df_trend[f'{column}_mom_pct'] = (df_trend[f'{column}_mom'] / previous.abs().where(previous != 0)) * 100
+        df_trend[f'{column}_avg'] = df_totals[column].rolling(window, min_periods=1).mean()
+    return df_trend
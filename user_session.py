@@ -0,0 +1,35 @@
+"""
+Identitas pengguna untuk sesi Streamlit.
+
+Jika login Streamlit (st.login, bagian [auth] di secrets.toml) aktif, data dipisah per akun
+berdasarkan email (atau 'sub' dari penyedia OIDC). Tanpa login, semua sesi memakai satu
+pengguna bawaan (EFTARI_DEFAULT_USER / st.secrets["storage"]["default_user"]), yaitu
+perilaku lama aplikasi dengan satu set data bersama.
+"""
+import streamlit as st
+
+import storage
+
+
+def current_user_id():
+    """user_id untuk sesi yang sedang berjalan; dipakai sebagai argumen pertama fungsi database."""
+    if st.user.get("is_logged_in"):
+        user_id = st.user.get("email") or st.user.get("sub")
+        if user_id:
+            # '/' tidak boleh ada di ID dokumen Firestore
+            return str(user_id).replace("/", "_")
+    return storage.read_config("default_user", "EFTARI_DEFAULT_USER", storage.DEFAULT_USER_ID)
+
+
+def is_admin():
+    """
+    True jika sesi ini login (st.login) sebagai salah satu admin: EFTARI_ADMIN_USERS /
+    st.secrets["storage"]["admin_users"], daftar user_id dipisah koma. Tanpa login tidak ada admin,
+    karena semua sesi memakai pengguna bawaan yang sama.
+    """
+    if not st.user.get("is_logged_in"):
+        return False
+    admins = storage.read_config("admin_users", "EFTARI_ADMIN_USERS", "")
+    if isinstance(admins, str):
+        admins = admins.split(",")
+    return current_user_id() in {str(admin).strip() for admin in admins if str(admin).strip()}